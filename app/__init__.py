@@ -24,8 +24,86 @@ def create_app(config_name=None):
     # Sobreescribir con variables de entorno si existen
     if os.environ.get('SECRET_KEY'):
         app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY')
+    if os.environ.get('CACHE_DIR'):
+        app.config['CACHE_DIR'] = os.environ.get('CACHE_DIR')
     if os.environ.get('CACHE_TIMEOUT'):
         app.config['CACHE_TIMEOUT'] = int(os.environ.get('CACHE_TIMEOUT'))
+    if os.environ.get('CACHE_TTL_RECIENTE'):
+        app.config['CACHE_TTL_RECIENTE'] = int(os.environ.get('CACHE_TTL_RECIENTE'))
+    if os.environ.get('CACHE_TTL_NEGATIVO'):
+        app.config['CACHE_TTL_NEGATIVO'] = int(os.environ.get('CACHE_TTL_NEGATIVO'))
+    if os.environ.get('CACHE_MAX_STALENESS'):
+        app.config['CACHE_MAX_STALENESS'] = int(os.environ.get('CACHE_MAX_STALENESS'))
+    if os.environ.get('CACHE_MEMORY_MAX_ENTRIES'):
+        app.config['CACHE_MEMORY_MAX_ENTRIES'] = int(os.environ.get('CACHE_MEMORY_MAX_ENTRIES'))
+    if os.environ.get('CACHE_MEMORY_MAX_BYTES'):
+        app.config['CACHE_MEMORY_MAX_BYTES'] = int(os.environ.get('CACHE_MEMORY_MAX_BYTES'))
+    if os.environ.get('CACHE_BACKEND'):
+        app.config['CACHE_BACKEND'] = os.environ.get('CACHE_BACKEND')
+    if os.environ.get('CACHE_SQLITE_PATH'):
+        app.config['CACHE_SQLITE_PATH'] = os.environ.get('CACHE_SQLITE_PATH')
+    if os.environ.get('CACHE_REDIS_URL'):
+        app.config['CACHE_REDIS_URL'] = os.environ.get('CACHE_REDIS_URL')
+    if os.environ.get('CACHE_MAX_BYTES'):
+        app.config['CACHE_MAX_BYTES'] = int(os.environ.get('CACHE_MAX_BYTES'))
+    if os.environ.get('CACHE_MAX_ENTRADAS'):
+        app.config['CACHE_MAX_ENTRADAS'] = int(os.environ.get('CACHE_MAX_ENTRADAS'))
+    if os.environ.get('CACHE_POLITICA_DESALOJO'):
+        app.config['CACHE_POLITICA_DESALOJO'] = os.environ.get('CACHE_POLITICA_DESALOJO')
+    if os.environ.get('CACHE_ADMISION_PREFIJOS') is not None:
+        app.config['CACHE_ADMISION_PREFIJOS'] = [
+            prefijo for prefijo in os.environ.get('CACHE_ADMISION_PREFIJOS').split(',') if prefijo
+        ]
+    if os.environ.get('CACHE_ADMISION_MIN_PEDIDOS'):
+        app.config['CACHE_ADMISION_MIN_PEDIDOS'] = int(os.environ.get('CACHE_ADMISION_MIN_PEDIDOS'))
+    if os.environ.get('JSON_CODEC'):
+        app.config['JSON_CODEC'] = os.environ.get('JSON_CODEC')
+    if os.environ.get('COMPRESION_MIN_BYTES'):
+        app.config['COMPRESION_MIN_BYTES'] = int(os.environ.get('COMPRESION_MIN_BYTES'))
+    if os.environ.get('SCHEDULER_ENABLED'):
+        app.config['SCHEDULER_ENABLED'] = os.environ.get('SCHEDULER_ENABLED').lower() in ('1', 'true', 'yes')
+    if os.environ.get('SCHEDULER_HORA_PUBLICACION'):
+        app.config['SCHEDULER_HORA_PUBLICACION'] = os.environ.get('SCHEDULER_HORA_PUBLICACION')
+    if os.environ.get('SCHEDULER_BACKFILL_DIAS'):
+        app.config['SCHEDULER_BACKFILL_DIAS'] = int(os.environ.get('SCHEDULER_BACKFILL_DIAS'))
+    if os.environ.get('CALENDARIO_FERIADOS_EXTRA'):
+        app.config['CALENDARIO_FERIADOS_EXTRA'] = os.environ.get('CALENDARIO_FERIADOS_EXTRA').split(',')
+    if os.environ.get('UI_INTERPOLACION'):
+        app.config['UI_INTERPOLACION'] = os.environ.get('UI_INTERPOLACION').lower() in ('1', 'true', 'yes')
+    if os.environ.get('UI_DIA_ANCLA'):
+        app.config['UI_DIA_ANCLA'] = int(os.environ.get('UI_DIA_ANCLA'))
+    if os.environ.get('JOBS_DIR'):
+        app.config['JOBS_DIR'] = os.environ.get('JOBS_DIR')
+    if os.environ.get('JOBS_MAX_WORKERS'):
+        app.config['JOBS_MAX_WORKERS'] = int(os.environ.get('JOBS_MAX_WORKERS'))
+    if os.environ.get('OBSERVATION_DB'):
+        app.config['OBSERVATION_DB'] = os.environ.get('OBSERVATION_DB')
+    if os.environ.get('BCU_URL'):
+        app.config['BCU_URL'] = os.environ.get('BCU_URL')
+    if os.environ.get('SCRAPER_MAX_WORKERS'):
+        app.config['SCRAPER_MAX_WORKERS'] = int(os.environ.get('SCRAPER_MAX_WORKERS'))
+    if os.environ.get('SCRAPER_RATE_LIMIT'):
+        app.config['SCRAPER_RATE_LIMIT'] = float(os.environ.get('SCRAPER_RATE_LIMIT'))
+    if os.environ.get('SCRAPER_RATE_BURST'):
+        app.config['SCRAPER_RATE_BURST'] = int(os.environ.get('SCRAPER_RATE_BURST'))
+    if os.environ.get('SCRAPER_POOL_SIZE'):
+        app.config['SCRAPER_POOL_SIZE'] = int(os.environ.get('SCRAPER_POOL_SIZE'))
+    if os.environ.get('SCRAPER_PARSER'):
+        app.config['SCRAPER_PARSER'] = os.environ.get('SCRAPER_PARSER')
+    if os.environ.get('SCRAPER_TRANSPORTE_ASYNC'):
+        app.config['SCRAPER_TRANSPORTE_ASYNC'] = os.environ.get('SCRAPER_TRANSPORTE_ASYNC')
+    if os.environ.get('SCRAPER_REINTENTOS'):
+        app.config['SCRAPER_REINTENTOS'] = int(os.environ.get('SCRAPER_REINTENTOS'))
+    if os.environ.get('SCRAPER_CONNECT_TIMEOUT'):
+        app.config['SCRAPER_CONNECT_TIMEOUT'] = float(os.environ.get('SCRAPER_CONNECT_TIMEOUT'))
+    if os.environ.get('SCRAPER_READ_TIMEOUT'):
+        app.config['SCRAPER_READ_TIMEOUT'] = float(os.environ.get('SCRAPER_READ_TIMEOUT'))
+    if os.environ.get('SCRAPER_TIEMPO_MAX'):
+        app.config['SCRAPER_TIEMPO_MAX'] = float(os.environ.get('SCRAPER_TIEMPO_MAX'))
+    if os.environ.get('CIRCUITO_UMBRAL_FALLAS'):
+        app.config['CIRCUITO_UMBRAL_FALLAS'] = int(os.environ.get('CIRCUITO_UMBRAL_FALLAS'))
+    if os.environ.get('CIRCUITO_ESPERA'):
+        app.config['CIRCUITO_ESPERA'] = float(os.environ.get('CIRCUITO_ESPERA'))
     
     # Crear directorios necesarios si no existen
     os.makedirs(app.config['CACHE_DIR'], exist_ok=True)
@@ -35,6 +113,70 @@ def create_app(config_name=None):
     from app.utils.logger import setup_logger
     setup_logger(app.config['LOG_DIR'])
     
+    # Configurar el motor de descargas concurrentes y el límite de tasa hacia el BCU
+    from app.scrapers import fetch_engine
+    fetch_engine.configure(
+        max_workers=app.config['SCRAPER_MAX_WORKERS'],
+        rate=app.config['SCRAPER_RATE_LIMIT'],
+        burst=app.config['SCRAPER_RATE_BURST']
+    )
+    
+    # Circuito compartido ante caídas del BCU
+    from app.scrapers import resiliencia
+    resiliencia.configure(
+        umbral_fallas=app.config['CIRCUITO_UMBRAL_FALLAS'],
+        espera_apertura=app.config['CIRCUITO_ESPERA']
+    )
+    
+    # Codificador JSON compartido por jsonify y por la caché
+    from app.utils.json_codec import CodecJSONProvider, get_codec
+    app.extensions['json_codec'] = get_codec(app.config['JSON_CODEC'])
+    app.json = CodecJSONProvider(app, app.extensions['json_codec'])
+    
+    # Compresión de las respuestas grandes que no vienen ya comprimidas de la caché
+    from app.utils.compresion import crear_comprimir_respuesta
+    app.after_request(crear_comprimir_respuesta(app.config['COMPRESION_MIN_BYTES']))
+    
+    # Caché en memoria compartida por todas las peticiones del worker
+    from app.services.memory_cache import MemoryLRU
+    app.extensions['cache_memoria'] = MemoryLRU(
+        max_entries=app.config['CACHE_MEMORY_MAX_ENTRIES'],
+        max_bytes=app.config['CACHE_MEMORY_MAX_BYTES']
+    )
+    
+    # Controlador compartido por todas las peticiones del worker: una sola
+    # caché, un solo almacén y una sola sesión HTTP con conexiones persistentes
+    from app.api.controllers import CotizacionController
+    with app.app_context():
+        app.extensions['cotizacion_controller'] = CotizacionController()
+    
+    # Planificador de caché: se ejecuta dentro de la aplicación si está habilitado
+    # o desde la línea de comandos (python run.py scheduler)
+    from app.services.scheduler import CacheScheduler
+    scheduler = CacheScheduler(
+        app.extensions['cotizacion_controller'],
+        hora_publicacion=app.config['SCHEDULER_HORA_PUBLICACION'],
+        backfill_dias=app.config['SCHEDULER_BACKFILL_DIAS'],
+        backfill_rate=app.config['SCHEDULER_BACKFILL_RATE'],
+        intervalo_gc=app.config['SCHEDULER_GC_INTERVALO']
+    )
+    app.extensions['cache_scheduler'] = scheduler
+    if app.config['SCHEDULER_ENABLED']:
+        scheduler.start(lock_path=os.path.join(app.config['CACHE_DIR'], 'scheduler.lock'))
+    
+    # Trabajos históricos en segundo plano: los que quedaron sin terminar
+    # (por ejemplo, por un worker reiniciado) se retoman al iniciar
+    from app.services.historico_jobs import HistoricoJobService
+    jobs = HistoricoJobService(
+        app.extensions['cotizacion_controller'],
+        app.config['JOBS_DIR'] or os.path.join(app.config['CACHE_DIR'], 'jobs'),
+        max_workers=app.config['JOBS_MAX_WORKERS'],
+        max_pendientes=app.config['JOBS_MAX_PENDIENTES'],
+        retencion=app.config['JOBS_RETENCION']
+    )
+    app.extensions['historico_jobs'] = jobs
+    jobs.reanudar()
+    
     # Registrar blueprints (rutas de la API)
     from app.api.routes import api_bp
     app.register_blueprint(api_bp, url_prefix='/api')
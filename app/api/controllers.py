@@ -1,15 +1,114 @@
 import datetime
 import os
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from flask import current_app
-from app.services.cache_service import CacheService
-from app.scrapers.base_scraper import BaseScraper
+from app.services.cache_service import CacheService, TTL_INMUTABLE, TTL_RECIENTE, TTL_NEGATIVO
+from app.services.cache_backends import get_backend
+from app.services.observation_store import ObservationStore
+from app.services.single_flight import SingleFlight
+from app.services.ui_interpolacion import InterpoladorUI
+from app.scrapers.base_scraper import BaseScraper, UNIDADES
+from app.scrapers.resiliencia import RetryPolicy
+from app.utils.calendario import CalendarioBCU
+
+logger = logging.getLogger('app.controller')
+
+# Unidades admitidas por la conversión ('uyu' son pesos uruguayos) y
+# decimales con que se redondea el monto convertido a cada una
+UNIDADES_CONVERSION = ('ui', 'ur', 'uyu')
+DECIMALES_CONVERSION = {'ui': 4, 'ur': 4, 'uyu': 2}
+# Formas de la respuesta histórica: una cotización por día o arreglos paralelos
+FORMATOS_HISTORICO = ('filas', 'columnar')
 
 class CotizacionController:
-    def __init__(self):
+    def __init__(self, cache_service=None, store=None, scraper=None, single_flight=None, calendario=None,
+                 interpolador=None):
+        """
+        Inicializa el controlador
+        
+        Se crea una única instancia por worker en create_app y se comparte entre
+        peticiones e hilos: el controlador no guarda estado propio y sus
+        dependencias son seguras para uso concurrente. Las dependencias no
+        indicadas se construyen a partir de la configuración de la aplicación.
+        
+        Args:
+            cache_service (CacheService, optional): Servicio de caché
+            store (ObservationStore, optional): Almacén de cotizaciones diarias
+            scraper (BaseScraper, optional): Scraper del BCU
+            single_flight (SingleFlight, optional): Agrupador de descargas concurrentes
+            calendario (CalendarioBCU, optional): Días en que el BCU publica cotizaciones
+            interpolador (InterpoladorUI, optional): Derivación de la UI entre observaciones
+                (por defecto según UI_INTERPOLACION)
+        """
         # Get cache_dir from app config
         cache_dir = current_app.config['CACHE_DIR']
-        self.cache_service = CacheService(cache_dir)
-        self.scraper = BaseScraper()
+        self.cache_service = cache_service or CacheService(
+            cache_dir,
+            timeout=current_app.config['CACHE_TIMEOUT'],
+            ttl_reciente=current_app.config['CACHE_TTL_RECIENTE'],
+            ttl_negativo=current_app.config['CACHE_TTL_NEGATIVO'],
+            memory=current_app.extensions.get('cache_memoria'),
+            max_staleness=current_app.config['CACHE_MAX_STALENESS'],
+            codec=current_app.extensions.get('json_codec'),
+            compresion_min_bytes=current_app.config['COMPRESION_MIN_BYTES'],
+            backend=get_backend(
+                current_app.config['CACHE_BACKEND'],
+                cache_dir,
+                sqlite_path=current_app.config.get('CACHE_SQLITE_PATH'),
+                redis_url=current_app.config.get('CACHE_REDIS_URL')
+            ),
+            max_bytes=current_app.config['CACHE_MAX_BYTES'],
+            max_entradas=current_app.config['CACHE_MAX_ENTRADAS'],
+            politica=current_app.config['CACHE_POLITICA_DESALOJO'],
+            admision_prefijos=current_app.config['CACHE_ADMISION_PREFIJOS'],
+            admision_min_pedidos=current_app.config['CACHE_ADMISION_MIN_PEDIDOS'],
+            admision_ventana=current_app.config['CACHE_ADMISION_VENTANA']
+        )
+        self.store = store or ObservationStore(
+            current_app.config.get('OBSERVATION_DB') or os.path.join(cache_dir, 'observaciones.db')
+        )
+        self.calendario = calendario or CalendarioBCU(
+            feriados_fijos=current_app.config['CALENDARIO_FERIADOS_FIJOS'],
+            feriados_pascua=current_app.config['CALENDARIO_FERIADOS_PASCUA'],
+            feriados_extra=current_app.config['CALENDARIO_FERIADOS_EXTRA']
+        )
+        self.scraper = scraper or BaseScraper(
+            current_app.config.get('BCU_URL'),
+            pool_size=current_app.config.get('SCRAPER_POOL_SIZE'),
+            parser=current_app.config.get('SCRAPER_PARSER'),
+            calendario=self.calendario,
+            transporte_async=current_app.config.get('SCRAPER_TRANSPORTE_ASYNC'),
+            retry_policy=RetryPolicy(
+                intentos=current_app.config['SCRAPER_REINTENTOS'],
+                backoff_base=current_app.config['SCRAPER_BACKOFF_BASE'],
+                backoff_max=current_app.config['SCRAPER_BACKOFF_MAX'],
+                connect_timeout=current_app.config['SCRAPER_CONNECT_TIMEOUT'],
+                read_timeout=current_app.config['SCRAPER_READ_TIMEOUT'],
+                tiempo_max=current_app.config['SCRAPER_TIEMPO_MAX']
+            )
+        )
+        self.single_flight = single_flight or SingleFlight(
+            os.path.join(cache_dir, 'locks') if current_app.config['SINGLE_FLIGHT_FILE_LOCK'] else None
+        )
+        self.batch_max = current_app.config['BATCH_MAX_CONSULTAS']
+        self.interpolador = interpolador
+        if self.interpolador is None and current_app.config['UI_INTERPOLACION']:
+            self.interpolador = InterpoladorUI(
+                self.store,
+                dia_ancla=current_app.config['UI_DIA_ANCLA'],
+                tolerancia=current_app.config['UI_TOLERANCIA']
+            )
+        
+        # Refresco en segundo plano de las entradas servidas como obsoletas
+        self._refresh_executor = ThreadPoolExecutor(
+            max_workers=current_app.config['CACHE_REFRESH_WORKERS'],
+            thread_name_prefix='cache-refresh'
+        )
+        self._refrescos = set()
+        self._refrescos_lock = threading.Lock()
+
     def get_cotizacion(self, tipo_unidad, fecha=None):
         """
         Obtiene la cotización de una unidad para una fecha específica
@@ -21,88 +120,725 @@ class CotizacionController:
         Returns:
             dict: Diccionario con la cotización o mensaje de error
         """
+        fecha, error = self._validar_consulta(tipo_unidad, fecha)
+        if error:
+            return error
+        
+        # Intentar obtener datos de la cache
+        cache_key = f"{tipo_unidad}_{fecha}"
+        cached_data = self.cache_service.get(cache_key)
+        
+        if cached_data:
+            return cached_data
+        
+        # Si la fecha ya está en el almacén de observaciones, no hace falta consultar
+        # al BCU. Las unidades de valor mensual (UR) se responden con el valor del mes
+        observacion = self.store.get(tipo_unidad, fecha)
+        if not observacion and self.calendario.es_mensual(tipo_unidad):
+            observacion = self.store.get_mensual(tipo_unidad, fecha)
+        if observacion:
+            response = self._formatear_cotizacion(observacion, fecha)
+            self.cache_service.set(cache_key, response, self._ttl_clase(fecha))
+            return response
+        
+        # La UI se puede derivar de las observaciones validadas de su período
+        derivada = self._derivar_ui(tipo_unidad, [fecha]).get(fecha)
+        if derivada:
+            response = self._formatear_cotizacion(derivada, fecha)
+            # Sin clase inmutable: si luego se descarga el valor publicado, lo reemplaza
+            self.cache_service.set(cache_key, response)
+            return response
+        
+        # Días sin publicación (no hábiles o ya consultados sin datos): no consultar al BCU.
+        # Las unidades de valor mensual se obtienen de la página de otro día del mes
+        pagina = self._pagina_de_consulta(tipo_unidad, fecha)
+        if pagina is None:
+            return self._no_encontrada(tipo_unidad)
+        
+        # Si hay un valor expirado pero no demasiado viejo, servirlo de inmediato
+        # marcado como obsoleto y refrescarlo en segundo plano
+        obsoleto = self.cache_service.get_stale(cache_key)
+        if obsoleto is not None:
+            data, vencido = obsoleto
+            self._refrescar_en_segundo_plano(fecha, pagina)
+            return self._obsoleta(data, vencido)
+        
+        # Con el circuito abierto el BCU no se consulta: se responde de inmediato
+        # con el último valor conocido, sin importar su antigüedad
+        if self.scraper.circuit_breaker.abierto():
+            return self._respaldo(cache_key, {
+                'error': 'El servidor del BCU no está disponible, se reintentará en breve',
+                'codigo': 'BCU_UNAVAILABLE'
+            })
+            
+        # Si no está en cache, obtener datos del scraper. Las peticiones
+        # concurrentes para la misma fecha comparten una única descarga
+        try:
+            respuestas = self.single_flight.do(
+                f"bcu_{pagina}",
+                lambda: self._descargar_fecha(pagina),
+                recheck=lambda: self._respuestas_en_cache(pagina)
+            )
+            
+            if 'error' in respuestas:
+                return self._respaldo(cache_key, respuestas)
+            
+            if pagina == fecha:
+                return respuestas[tipo_unidad]
+            
+            # La página de otro día del mes dejó el valor mensual en el almacén
+            observacion = self.store.get_mensual(tipo_unidad, fecha)
+            if not observacion:
+                return self._no_encontrada(tipo_unidad)
+            response = self._formatear_cotizacion(observacion, fecha)
+            self.cache_service.set(cache_key, response, self._ttl_clase(fecha))
+            return response
+        except Exception as e:
+            return {
+                'error': f'Error al obtener datos: {str(e)}',
+                'codigo': 'SCRAPER_ERROR'
+            }
+
+    def _pagina_de_consulta(self, tipo_unidad, fecha):
+        """
+        Elige la página del BCU que responde una consulta puntual
+        
+        Para una unidad diaria es la página de la misma fecha. Para una de valor
+        mensual (UR) es la de la fecha si el BCU publica ese día, o si no la del
+        primer día del mes que publica, igual que en las consultas por lote.
+        
+        Returns:
+            str: Fecha de la página a descargar, o None si no hay ninguna
+        """
+        def publica(dia, sin_datos):
+            return self.calendario.publica(tipo_unidad, dia) and dia not in sin_datos
+        
+        if not self.calendario.es_mensual(tipo_unidad):
+            return fecha if publica(fecha, self.store.get_sin_datos(tipo_unidad, fecha, fecha)) else None
+        
+        mes = fecha[:7]
+        sin_datos = self.store.get_sin_datos(tipo_unidad, f"{mes}-01", f"{mes}-31")
+        if publica(fecha, sin_datos):
+            return fecha
+        return next((dia for dia in (f"{mes}-{d:02d}" for d in range(1, 29)) if publica(dia, sin_datos)), None)
+
+    def precalentar(self, fechas):
+        """
+        Deja en caché las cotizaciones almacenadas de las fechas que aún no lo están
+
+        No consulta al BCU: solo copia a la caché lo que ya está en el almacén de
+        observaciones. Las unidades diarias se guardan en los días en que el BCU
+        publica y las de valor mensual (UR) en todos los días del mes.
+
+        Args:
+            fechas (list): Fechas en formato YYYY-MM-DD
+
+        Returns:
+            int: Cantidad de entradas guardadas en caché
+        """
+        consultas = [
+            (clave, fecha) for fecha in fechas for clave in UNIDADES
+            if self.calendario.es_mensual(clave) or self.calendario.publica(clave, fecha)
+        ]
+        if not consultas:
+            return 0
+        en_cache = self.cache_service.get_many(f"{clave}_{fecha}" for clave, fecha in consultas)
+        faltantes = [(clave, fecha) for clave, fecha in consultas if f"{clave}_{fecha}" not in en_cache]
+
+        respuestas = {}
+        self._resolver_batch_almacen(faltantes, respuestas)
+        for (clave, fecha), respuesta in respuestas.items():
+            self.cache_service.set(f"{clave}_{fecha}", respuesta, self._ttl_clase(fecha))
+        return len(respuestas)
+
+    def _obsoleta(self, data, vencido):
+        """Marca una respuesta expirada de la caché como obsoleta"""
+        response = dict(data)
+        response['metadata'] = dict(data.get('metadata', {}), obsoleto=True, segundos_vencido=int(vencido))
+        return response
+
+    def _respaldo(self, cache_key, error):
+        """
+        Respuesta cuando no se pudo consultar al BCU: el último valor conocido en
+        caché marcado como obsoleto, sin límite de antigüedad, o el error
+        
+        Args:
+            cache_key (str): Clave de caché de la cotización
+            error (dict): Error a devolver si no hay un valor anterior
+            
+        Returns:
+            dict: Respuesta obsoleta o el error
+        """
+        obsoleto = self.cache_service.get_stale(cache_key, max_staleness=float('inf'))
+        if obsoleto is None:
+            return error
+        return self._obsoleta(*obsoleto)
+
+    def _validar_consulta(self, tipo_unidad, fecha):
+        """
+        Valida la unidad y la fecha de una consulta puntual
+        
+        Args:
+            tipo_unidad (str): 'ui' para Unidad Indexada, 'ur' para Unidad Reajustable
+            fecha (str, optional): Fecha en formato YYYY-MM-DD. Si es None, se usa la fecha actual.
+            
+        Returns:
+            tuple: (fecha, None) si la consulta es válida o (None, error)
+        """
         # Validar tipo de unidad
         if tipo_unidad not in ['ui', 'ur']:
-            return {
+            return None, {
                 'error': f'Tipo de unidad inválido: {tipo_unidad}. Use "ui" o "ur"',
                 'codigo': 'INVALID_UNIT_TYPE'
             }
         
+        return self._validar_fecha(fecha)
+
+    def _validar_fecha(self, fecha):
+        """
+        Valida la fecha de una consulta puntual
+        
+        Args:
+            fecha (str, optional): Fecha en formato YYYY-MM-DD. Si es None, se usa la fecha actual.
+            
+        Returns:
+            tuple: (fecha, None) si la fecha es válida o (None, error)
+        """
         # Si no se proporciona fecha, usar la actual
         if fecha is None:
-            fecha = datetime.datetime.now().strftime('%Y-%m-%d')
-        else:
-            # Validar formato de fecha
-            try:
-                datetime.datetime.strptime(fecha, '%Y-%m-%d')
-            except ValueError:
-                return {
-                    'error': 'Formato de fecha inválido. Use YYYY-MM-DD',
-                    'codigo': 'INVALID_DATE_FORMAT'
-                }
+            return datetime.datetime.now().strftime('%Y-%m-%d'), None
         
-        # Intentar obtener datos de la cache
-        cache_key = f"{tipo_unidad}_{fecha}"
-        cached_data = self.cache_service.get(cache_key)
+        # Validar formato de fecha
+        try:
+            datetime.datetime.strptime(fecha, '%Y-%m-%d')
+        except (TypeError, ValueError):
+            return None, {
+                'error': 'Formato de fecha inválido. Use YYYY-MM-DD',
+                'codigo': 'INVALID_DATE_FORMAT'
+            }
+        return fecha, None
+
+    def get_cotizaciones_batch(self, consultas):
+        """
+        Obtiene las cotizaciones de una lista de pares (unidad, fecha) en una sola llamada
         
-        if cached_data:
-            return cached_data
+        Las consultas se resuelven por etapas para todo el lote a la vez: caché,
+        almacén de observaciones (y valores mensuales de la UR), derivación de la
+        UI y calendario de publicación. Lo que falta se descarga una sola vez por
+        página del BCU: la página de una fecha trae todas las unidades y, para la
+        UR, una página por mes alcanza para todo el mes. Las descargas pasan por
+        el motor concurrente con el límite de tasa global.
+        
+        Args:
+            consultas (list): Pares (unidad, fecha) como listas [unidad, fecha]
+                o diccionarios {'unidad': ..., 'fecha': ...}
+        
+        Returns:
+            dict: Resultado de cada consulta, en el mismo orden, y metadatos del
+                lote, o mensaje de error si el lote no es válido
+        """
+        if not isinstance(consultas, list) or not consultas:
+            return {
+                'error': 'Debe indicar una lista de consultas (unidad, fecha)',
+                'codigo': 'INVALID_BATCH'
+            }
+        if len(consultas) > self.batch_max:
+            return {
+                'error': f'Se admiten hasta {self.batch_max} consultas por lote',
+                'codigo': 'BATCH_TOO_LARGE'
+            }
+        
+        # Consultas únicas (unidad, fecha) y posiciones del lote que responde cada una
+        resultados = [None] * len(consultas)
+        posiciones = {}
+        for i, consulta in enumerate(consultas):
+            if isinstance(consulta, dict):
+                tipo_unidad, fecha = consulta.get('unidad') or consulta.get('tipo'), consulta.get('fecha')
+            elif isinstance(consulta, (list, tuple)) and len(consulta) == 2:
+                tipo_unidad, fecha = consulta
+            else:
+                tipo_unidad, fecha = None, None
             
-        # Si no está en cache, obtener datos del scraper
-        try:
-            if tipo_unidad == 'ui':
-                data = self.scraper.get_ui_cotizacion(fecha)
-                moneda_nombre = "UNIDAD INDEXADA"
+            tipo_unidad = tipo_unidad.lower() if isinstance(tipo_unidad, str) else tipo_unidad
+            fecha, error = self._validar_consulta(tipo_unidad, fecha)
+            if error:
+                resultados[i] = error
             else:
-                data = self.scraper.get_ur_cotizacion(fecha)
-                moneda_nombre = "UNIDAD REAJUSTABLE"
-                
-            # Validar que se obtuvieron datos correctamente
-            if 'error' in data:
+                posiciones.setdefault((tipo_unidad, fecha), []).append(i)
+        
+        respuestas, descargas = self._resolver_batch(list(posiciones))
+        for clave_consulta, indices in posiciones.items():
+            respuesta = respuestas[clave_consulta]
+            for i in indices:
+                resultados[i] = respuesta
+        
+        errores = sum(1 for r in resultados if 'error' in r)
+        return {
+            'resultados': resultados,
+            'metadata': {
+                'total_consultas': len(consultas),
+                'consultas_unicas': len(posiciones),
+                'encontradas': len(resultados) - errores,
+                'errores': errores,
+                'descargas': descargas,
+                'fuente': 'Banco Central del Uruguay'
+            }
+        }
+
+    def convertir(self, de, a, monto, fecha=None):
+        """
+        Convierte un monto entre UI, UR y pesos uruguayos (UYU) con la cotización de una fecha
+        
+        Args:
+            de (str): Unidad del monto ('ui', 'ur' o 'uyu')
+            a (str): Unidad a la que se convierte ('ui', 'ur' o 'uyu')
+            monto (float | str): Monto a convertir
+            fecha (str, optional): Fecha en formato YYYY-MM-DD. Si es None, se usa la fecha actual.
+        
+        Returns:
+            dict: Monto convertido con las cotizaciones usadas, o mensaje de error
+        """
+        result = self.convertir_batch(de, a, [[monto, fecha]])
+        if 'error' in result:
+            return result
+        
+        conversion = result['resultados'][0]
+        if 'error' in conversion:
+            return conversion
+        
+        return {
+            'de': result['de'],
+            'a': result['a'],
+            **conversion,
+            'metadata': {
+                'fuente': 'Banco Central del Uruguay',
+                'fecha_consulta': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            }
+        }
+
+    def convertir_batch(self, de, a, conversiones):
+        """
+        Convierte una lista de montos, cada uno con su fecha, en una sola llamada
+        
+        Las cotizaciones de todas las fechas se resuelven juntas con el mismo
+        plan que las consultas por lote (caché, almacén y una descarga por página
+        del BCU), y luego se calcula un factor por fecha que se aplica a todos
+        los montos de esa fecha.
+        
+        Args:
+            de (str): Unidad de los montos ('ui', 'ur' o 'uyu')
+            a (str): Unidad a la que se convierte ('ui', 'ur' o 'uyu')
+            conversiones (list): Pares (monto, fecha) como listas [monto, fecha]
+                o diccionarios {'monto': ..., 'fecha': ...}
+        
+        Returns:
+            dict: Resultado de cada conversión, en el mismo orden, y metadatos,
+                o mensaje de error si la solicitud no es válida
+        """
+        de, a = (de or '').lower(), (a or '').lower()
+        for unidad in (de, a):
+            if unidad not in UNIDADES_CONVERSION:
                 return {
-                    'error': data['error'],
-                    'codigo': 'DATA_FETCH_ERROR'
+                    'error': f'Unidad inválida: {unidad}. Use "ui", "ur" o "uyu"',
+                    'codigo': 'INVALID_UNIT_TYPE'
                 }
+        
+        if not isinstance(conversiones, list) or not conversiones:
+            return {
+                'error': 'Debe indicar una lista de conversiones (monto, fecha)',
+                'codigo': 'INVALID_BATCH'
+            }
+        if len(conversiones) > self.batch_max:
+            return {
+                'error': f'Se admiten hasta {self.batch_max} conversiones por lote',
+                'codigo': 'BATCH_TOO_LARGE'
+            }
+        
+        # Validar montos y fechas
+        montos, fechas, resultados = [], [], [None] * len(conversiones)
+        for i, conversion in enumerate(conversiones):
+            if isinstance(conversion, dict):
+                monto, fecha = conversion.get('monto'), conversion.get('fecha')
+            elif isinstance(conversion, (list, tuple)) and len(conversion) == 2:
+                monto, fecha = conversion
+            else:
+                monto, fecha = None, None
             
-            # Formatear respuesta con metadatos
-            response = {
-                'tipo': data['tipo'],
-                'moneda': data['moneda'],
-                'fecha': fecha,
-                'valor': data['valor'],
-                'metadata': {
-                    'fuente': 'Banco Central del Uruguay',
-                    'fecha_consulta': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            fecha, error = self._validar_fecha(fecha)
+            try:
+                if isinstance(monto, bool):
+                    raise TypeError(monto)
+                monto = float(monto)
+            except (TypeError, ValueError):
+                error = error or {
+                    'error': f'Monto inválido: {monto}',
+                    'codigo': 'INVALID_AMOUNT'
                 }
+            resultados[i] = error
+            montos.append(monto)
+            fechas.append(fecha)
+        
+        # Un factor por fecha: valor de la unidad de origen sobre el de la de destino
+        unidades = [unidad for unidad in (de, a) if unidad != 'uyu' and de != a]
+        distintas = sorted({fecha for fecha, error in zip(fechas, resultados) if error is None})
+        cotizaciones, descargas = self._resolver_batch(
+            [(unidad, fecha) for fecha in distintas for unidad in unidades]
+        )
+        factores = {}
+        for fecha in distintas:
+            valores = {'uyu': 1.0}
+            for unidad in unidades:
+                cotizacion = cotizaciones[(unidad, fecha)]
+                if 'error' in cotizacion:
+                    factores[fecha] = cotizacion
+                    break
+                valores[unidad] = cotizacion['valor']
+            else:
+                factores[fecha] = valores.get(de, 1.0) / valores.get(a, 1.0)
+        
+        decimales = DECIMALES_CONVERSION[a]
+        for i, (monto, fecha) in enumerate(zip(montos, fechas)):
+            if resultados[i] is not None:
+                continue
+            factor = factores[fecha]
+            if isinstance(factor, dict):
+                resultados[i] = factor
+            else:
+                resultados[i] = {
+                    'fecha': fecha,
+                    'monto': monto,
+                    'resultado': round(monto * factor, decimales),
+                    'factor': factor
+                }
+        
+        errores = sum(1 for r in resultados if 'error' in r)
+        return {
+            'de': de,
+            'a': a,
+            'resultados': resultados,
+            'metadata': {
+                'total_conversiones': len(conversiones),
+                'fechas_distintas': len(distintas),
+                'convertidas': len(resultados) - errores,
+                'errores': errores,
+                'descargas': descargas,
+                'fuente': 'Banco Central del Uruguay'
             }
-            
-            # Añadir campos adicionales si existen en la respuesta del scraper
-            for campo in ['valor_compra', 'valor_venta', 'valor_arbitraje']:
-                if campo in data:
-                    response[campo.replace('valor_', '')] = data[campo]
-            
-            # Guardar en cache si se obtuvo correctamente
-            self.cache_service.set(cache_key, response)
-            
-            return response
+        }
+
+    def _resolver_batch(self, consultas):
+        """
+        Resuelve consultas únicas (unidad, fecha) ya validadas
+        
+        Returns:
+            tuple: (respuesta por consulta, cantidad de páginas descargadas)
+        """
+        respuestas = {}
+        
+        # 1. Caché, leída en una sola operación
+        en_cache = self.cache_service.get_many(f"{clave}_{fecha}" for clave, fecha in consultas)
+        faltantes = []
+        for clave, fecha in consultas:
+            cached_data = en_cache.get(f"{clave}_{fecha}")
+            if cached_data:
+                respuestas[(clave, fecha)] = cached_data
+            else:
+                faltantes.append((clave, fecha))
+        
+        # 2. Almacén de observaciones, agrupado por unidad
+        faltantes = self._resolver_batch_almacen(faltantes, respuestas)
+        
+        # 3. UI derivable de las observaciones de su período
+        derivadas = self._derivar_ui('ui', [fecha for clave, fecha in faltantes if clave == 'ui'])
+        for fecha, cotizacion in derivadas.items():
+            respuestas[('ui', fecha)] = self._formatear_cotizacion(cotizacion, fecha)
+        faltantes = [(clave, fecha) for clave, fecha in faltantes if (clave, fecha) not in respuestas]
+        
+        # 4. Días en que el BCU no publica o que ya se consultaron sin datos. Las
+        # unidades de valor mensual se resuelven por mes, sea cual sea el día
+        por_unidad = {}
+        for clave, fecha in faltantes:
+            por_unidad.setdefault(clave, []).append(fecha)
+        sin_datos = {
+            clave: self.store.get_sin_datos(clave, min(fechas)[:7] + '-01', max(fechas)[:7] + '-31')
+            for clave, fechas in por_unidad.items()
+        }
+        
+        def publica(clave, fecha):
+            return self.calendario.publica(clave, fecha) and fecha not in sin_datos[clave]
+        
+        paginas = set()
+        meses = {}
+        for clave, fecha in faltantes:
+            if self.calendario.es_mensual(clave):
+                meses.setdefault((clave, fecha[:7]), []).append(fecha)
+            elif publica(clave, fecha):
+                paginas.add(fecha)
+            else:
+                respuestas[(clave, fecha)] = self._no_encontrada(clave)
+        
+        # 5. Páginas a descargar: una por fecha para las unidades diarias y una
+        # por mes para las mensuales, reutilizando si se puede una fecha ya planificada
+        pagina_del_mes = {}
+        for (clave, mes), fechas in meses.items():
+            candidatas = [fecha for fecha in fechas if publica(clave, fecha)] or [
+                fecha for fecha in (f"{mes}-{dia:02d}" for dia in range(1, 29)) if publica(clave, fecha)
+            ]
+            planificadas = paginas.intersection(candidatas)
+            if planificadas or candidatas:
+                pagina_del_mes[(clave, mes)] = min(planificadas or candidatas)
+                paginas.add(pagina_del_mes[(clave, mes)])
+        
+        if not paginas:
+            for clave, fecha in faltantes:
+                respuestas.setdefault((clave, fecha), self._no_encontrada(clave))
+            return respuestas, 0
+        
+        paginas = sorted(paginas)
+        logger.info(f"Lote de {len(consultas)} consultas: {len(paginas)} páginas a descargar")
+        descargadas = dict(zip(paginas, self.scraper.engine.map(self._descargar_pagina_batch, paginas)))
+        
+        # 6. Respuestas de lo descargado; los días de un mes de valor mensual se
+        # responden con el valor que la página de ese mes dejó en el almacén
+        mensuales = []
+        for clave, fecha in faltantes:
+            if (clave, fecha) in respuestas:
+                continue
+            if (clave, fecha[:7]) in meses:
+                mensuales.append((clave, fecha))
+            else:
+                pagina = descargadas[fecha]
+                respuestas[(clave, fecha)] = pagina.get(clave) or pagina
+        for clave, fecha in self._resolver_batch_almacen(mensuales, respuestas):
+            pagina = descargadas.get(pagina_del_mes.get((clave, fecha[:7])), {})
+            respuestas[(clave, fecha)] = pagina if 'error' in pagina else self._no_encontrada(clave)
+        
+        return respuestas, len(paginas)
+
+    def _resolver_batch_almacen(self, consultas, respuestas):
+        """
+        Responde desde el almacén las consultas que tiene almacenadas
+        
+        Returns:
+            list: Consultas que siguen sin respuesta
+        """
+        por_unidad = {}
+        for clave, fecha in consultas:
+            por_unidad.setdefault(clave, []).append(fecha)
+        
+        for clave, fechas in por_unidad.items():
+            observaciones = self.store.get_fechas(clave, fechas)
+            if self.calendario.es_mensual(clave):
+                mensuales = self.store.get_mensuales(clave, min(fechas)[:7], max(fechas)[:7])
+                for fecha in fechas:
+                    if fecha not in observaciones and fecha[:7] in mensuales:
+                        observaciones[fecha] = dict(mensuales[fecha[:7]], fecha=fecha)
+            for fecha, observacion in observaciones.items():
+                respuestas[(clave, fecha)] = self._formatear_cotizacion(observacion, fecha)
+        
+        return [consulta for consulta in consultas if consulta not in respuestas]
+
+    def _descargar_pagina_batch(self, fecha):
+        """Descarga la página de una fecha compartiendo la descarga con las consultas puntuales"""
+        try:
+            return self.single_flight.do(
+                f"bcu_{fecha}",
+                lambda: self._descargar_fecha(fecha),
+                recheck=lambda: self._respuestas_en_cache(fecha)
+            )
         except Exception as e:
             return {
                 'error': f'Error al obtener datos: {str(e)}',
                 'codigo': 'SCRAPER_ERROR'
             }
+
+    def _no_encontrada(self, tipo_unidad):
+        """Respuesta de error para una unidad que el BCU no publicó en la fecha"""
+        return {
+            'error': f"No se pudo encontrar el valor de la {UNIDADES[tipo_unidad]['nombre']}",
+            'codigo': 'DATA_FETCH_ERROR'
+        }
+
+    def _refrescar_en_segundo_plano(self, fecha, pagina=None):
+        """
+        Programa la descarga de una página en segundo plano, una sola vez por página
+        
+        Args:
+            fecha (str): Fecha en formato YYYY-MM-DD cuya entrada se sirvió obsoleta
+            pagina (str, optional): Fecha de la página del BCU que la publica (ver
+                _pagina_de_consulta); por defecto la misma fecha
+        """
+        pagina = pagina or fecha
+        with self._refrescos_lock:
+            if pagina in self._refrescos:
+                return
+            self._refrescos.add(pagina)
+        
+        def refrescar():
+            try:
+                resultado = self.single_flight.do(
+                    f"bcu_{pagina}",
+                    lambda: self._descargar_fecha(pagina),
+                    recheck=lambda: self._respuestas_en_cache(pagina)
+                )
+                if 'error' in resultado:
+                    logger.warning(f"No se pudo refrescar {fecha}: {resultado['error']}")
+                elif pagina != fecha:
+                    # La página de otro día del mes dejó el valor mensual en el almacén
+                    self.precalentar([fecha])
+            except Exception as e:
+                logger.error(f"Error al refrescar {fecha}: {str(e)}")
+            finally:
+                with self._refrescos_lock:
+                    self._refrescos.discard(pagina)
+        
+        self._refresh_executor.submit(refrescar)
+
+    def _descargar_fecha(self, fecha):
+        """
+        Descarga la página del BCU de una fecha y guarda en cache todas sus unidades
+        
+        La página del BCU trae todas las unidades juntas, así que una sola
+        descarga completa la cache de todas ellas para esa fecha.
+        
+        Args:
+            fecha (str): Fecha en formato YYYY-MM-DD
+            
+        Returns:
+            dict: Respuesta de cada unidad ('ui', 'ur') o diccionario con 'error'
+        """
+        registro = self.scraper.get_cotizaciones_fecha(fecha)
+            
+        # Validar que se obtuvieron datos correctamente
+        if 'error' in registro:
+            return {
+                'error': registro['error'],
+                'codigo': registro.get('codigo', 'DATA_FETCH_ERROR')
+            }
+        
+        return self._guardar_registro(registro)
+
+    def _guardar_registro(self, registro):
+        """
+        Guarda en el almacén y en cache todas las unidades de un registro del scraper
+        
+        Args:
+            registro (dict): Registro devuelto por BaseScraper.get_cotizaciones_fecha
+            
+        Returns:
+            dict: Respuesta de cada unidad ('ui', 'ur')
+        """
+        fecha = registro['fecha']
+        self.store.guardar_registros([registro])
+        
+        respuestas = {}
+        for clave, unidad in UNIDADES.items():
+            if clave in registro['unidades']:
+                respuesta_unidad = self._formatear_cotizacion(registro['unidades'][clave], fecha)
+                ttl_clase = self._ttl_clase(fecha)
+            else:
+                # La página no publica la unidad para esa fecha (fin de semana,
+                # feriado o aún no publicada): se guarda el resultado negativo
+                respuesta_unidad = {
+                    'error': f"No se pudo encontrar el valor de la {unidad['nombre']}",
+                    'codigo': 'DATA_FETCH_ERROR'
+                }
+                ttl_clase = self._ttl_clase(fecha, encontrada=False)
+            
+            # Guardar en cache cada unidad de la página
+            self.cache_service.set(f"{clave}_{fecha}", respuesta_unidad, ttl_clase)
+            respuestas[clave] = respuesta_unidad
+        
+        return respuestas
+
+    def _respuestas_en_cache(self, fecha):
+        """Devuelve las respuestas en cache de todas las unidades de una fecha, o None si falta alguna"""
+        en_cache = self.cache_service.get_many(f"{clave}_{fecha}" for clave in UNIDADES)
+        respuestas = {clave: en_cache.get(f"{clave}_{fecha}") for clave in UNIDADES}
+        return respuestas if all(respuestas.values()) else None
+
+    def _ttl_clase(self, fecha, encontrada=True):
+        """
+        Determina la clase de expiración de caché para una fecha
+        
+        Los valores de fechas pasadas ya publicadas no cambian y nunca expiran.
+        La fecha actual y las futuras pueden publicarse o corregirse, por lo
+        que expiran pronto, igual que los resultados negativos de esas fechas.
+        
+        Args:
+            fecha (str): Fecha en formato YYYY-MM-DD
+            encontrada (bool): Si la cotización se encontró en la página del BCU
+            
+        Returns:
+            str: Clase de expiración para CacheService.set
+        """
+        if fecha >= datetime.date.today().strftime('%Y-%m-%d'):
+            return TTL_RECIENTE
+        return TTL_INMUTABLE if encontrada else TTL_NEGATIVO
+
+    def _formatear_cotizacion(self, data, fecha):
+        """
+        Da formato de respuesta a la cotización de una unidad obtenida del scraper
+        
+        Args:
+            data (dict): Cotización devuelta por el scraper
+            fecha (str): Fecha consultada en formato YYYY-MM-DD
+            
+        Returns:
+            dict: Respuesta con metadatos
+        """
+        response = {
+            'tipo': data['tipo'],
+            'moneda': data['moneda'],
+            'fecha': fecha,
+            'valor': data['valor'],
+            'metadata': {
+                'fuente': 'Banco Central del Uruguay',
+                'fecha_consulta': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            }
+        }
+        
+        # Añadir campos adicionales si existen en la respuesta del scraper
+        for campo in ['valor_compra', 'valor_venta', 'valor_arbitraje']:
+            if campo in data:
+                response[campo.replace('valor_', '')] = data[campo]
+        
+        if data.get('interpolado'):
+            response['metadata']['interpolado'] = True
+        
+        return response
+
+    def _derivar_ui(self, tipo_unidad, fechas):
+        """
+        Deriva la UI de las fechas pedidas con el interpolador, si está habilitado
+        
+        Returns:
+            dict: Cotizaciones derivadas por fecha, marcadas con 'interpolado'
+        """
+        if tipo_unidad != 'ui' or self.interpolador is None or not fechas:
+            return {}
+        
+        unidad = UNIDADES['ui']
+        return {
+            fecha: {'tipo': unidad['tipo'], 'moneda': unidad['moneda'], 'fecha': fecha,
+                    'valor': valor, 'interpolado': True}
+            for fecha, valor in self.interpolador.derivar(fechas).items()
+        }
     
 
-    def get_historico(self, tipo_unidad, fecha_inicio=None, fecha_fin=None):
+    def validar_rango(self, tipo_unidad, fecha_inicio=None, fecha_fin=None, con_fechas=True):
         """
-        Obtiene datos históricos de una unidad para un rango de fechas
+        Valida la unidad y el rango de fechas de una consulta histórica
         
         Args:
             tipo_unidad (str): 'ui' para Unidad Indexada, 'ur' para Unidad Reajustable
             fecha_inicio (str, optional): Fecha inicial en formato YYYY-MM-DD
             fecha_fin (str, optional): Fecha final en formato YYYY-MM-DD
+            con_fechas (bool): Incluir la lista de fechas del rango
             
         Returns:
-            dict: Diccionario con los datos históricos o mensaje de error
+            dict: fecha_inicio, fecha_fin y la lista de fechas del rango,
+                o mensaje de error
         """
         # Validar tipo de unidad
         if tipo_unidad not in ['ui', 'ur']:
@@ -157,53 +893,430 @@ class CotizacionController:
                     'codigo': 'DATE_RANGE_TOO_LARGE'
                 }
             
-            # Intentar obtener datos de la cache
-            cache_key = f"historico_{tipo_unidad}_{fecha_inicio}_{fecha_fin}"
-            cached_data = self.cache_service.get(cache_key)
-            
-            if cached_data:
-                return cached_data
+            inicio = fecha_inicio_obj.date()
+            fechas = [
+                (inicio + datetime.timedelta(days=i)).isoformat() for i in range(dias_diferencia + 1)
+            ] if con_fechas else None
+            return {
+                'fecha_inicio': fecha_inicio,
+                'fecha_fin': fecha_fin,
+                'fechas': fechas
+            }
+                
+        except Exception as e:
+            return {
+                'error': f'Error al procesar la solicitud: {str(e)}',
+                'codigo': 'GENERAL_ERROR'
+            }
+
+    def get_historico(self, tipo_unidad, fecha_inicio=None, fecha_fin=None, completar=False, formato='filas'):
+        """
+        Obtiene datos históricos de una unidad para un rango de fechas
+        
+        Args:
+            tipo_unidad (str): 'ui' para Unidad Indexada, 'ur' para Unidad Reajustable
+            fecha_inicio (str, optional): Fecha inicial en formato YYYY-MM-DD
+            fecha_fin (str, optional): Fecha final en formato YYYY-MM-DD
+            completar (bool): Completar los días sin publicación (fines de semana,
+                feriados) con el último valor conocido
+            formato (str): 'filas' (una cotización por día) o 'columnar' (arreglos
+                paralelos de fechas y valores, ver _columnar)
             
-            # Si no está en cache, obtener datos del scraper
+        Returns:
+            dict: Diccionario con los datos históricos o mensaje de error
+        """
+        error = self._validar_formato(formato)
+        if error:
+            return error
+        
+        rango = self.validar_rango(tipo_unidad, fecha_inicio, fecha_fin)
+        if 'error' in rango:
+            return rango
+        
+        cache_key = self._clave_historico(tipo_unidad, rango, completar, formato)
+        cached_data = self.cache_service.get(cache_key)
+        if cached_data:
+            return cached_data
+        
+        try:
             try:
-                if tipo_unidad == 'ui':
-                    data = self.scraper.get_ui_historico(fecha_inicio, fecha_fin)
-                else:
-                    data = self.scraper.get_ur_historico(fecha_inicio, fecha_fin)
-                
-                # Validar que se obtuvieron datos
-                if 'error' in data:
-                    return {
-                        'error': data['error'],
-                        'codigo': 'DATA_FETCH_ERROR'
-                    }
-                
-                # Formatear respuesta según documentación
-                response = {
-                    'tipo': data['tipo'],
-                    'moneda': data['moneda'],
-                    'fecha_inicio': fecha_inicio,
-                    'fecha_fin': fecha_fin,
-                    'cotizaciones': data['cotizaciones'],
-                    'metadata': {
-                        'total_registros': len(data['cotizaciones']),
-                        'dias_solicitados': dias_diferencia + 1,
-                        'fuente': 'Banco Central del Uruguay'
-                    }
-                }
-                
-                # Guardar en cache
-                self.cache_service.set(cache_key, response)
-                return response
-                
+                almacenadas = self.completar_rango(tipo_unidad, rango)
             except Exception as e:
                 return {
                     'error': f'Error al obtener datos históricos: {str(e)}',
                     'codigo': 'SCRAPER_ERROR'
                 }
+            
+            response = self.respuesta_historico(tipo_unidad, rango, almacenadas, completar)
+            if 'error' not in response:
+                if formato == 'columnar':
+                    response = self._columnar(response)
+                self.cache_service.set(cache_key, response, self._ttl_historico(tipo_unidad, rango, almacenadas))
+            return response
                 
         except Exception as e:
             return {
                 'error': f'Error al procesar la solicitud: {str(e)}',
                 'codigo': 'GENERAL_ERROR'
-            }
\ No newline at end of file
+            }
+
+    def _clave_historico(self, tipo_unidad, rango, completar=False, formato='filas'):
+        """Clave de caché de la respuesta histórica de un rango"""
+        sufijo = '_completar' if completar else ''
+        if formato != 'filas':
+            sufijo += f'_{formato}'
+        return f"historico_{tipo_unidad}_{rango['fecha_inicio']}_{rango['fecha_fin']}{sufijo}"
+
+    def _validar_formato(self, formato):
+        """Devuelve el error si el formato de la respuesta histórica no existe, o None"""
+        if formato in FORMATOS_HISTORICO:
+            return None
+        return {
+            'error': f'Formato inválido: {formato}. Use "filas" o "columnar"',
+            'codigo': 'INVALID_FORMAT'
+        }
+
+    def _columnar(self, response):
+        """
+        Convierte una respuesta histórica a la forma columnar
+        
+        En lugar de repetir tipo, moneda y fecha en cada cotización, las fechas y
+        los valores van en dos arreglos paralelos. Los campos opcionales de las
+        cotizaciones ('completado_desde', 'interpolado') se agregan como arreglos
+        del mismo largo solo si alguna cotización los tiene.
+        
+        Args:
+            response (dict): Respuesta histórica armada por respuesta_historico
+            
+        Returns:
+            dict: Respuesta columnar
+        """
+        cotizaciones = response['cotizaciones']
+        columnar = {
+            'tipo': response['tipo'],
+            'moneda': response['moneda'],
+            'fecha_inicio': response['fecha_inicio'],
+            'fecha_fin': response['fecha_fin'],
+            'fechas': [c['fecha'] for c in cotizaciones],
+            'valores': [c['valor'] for c in cotizaciones]
+        }
+        if any('completado_desde' in c for c in cotizaciones):
+            columnar['completado_desde'] = [c.get('completado_desde') for c in cotizaciones]
+        if any(c.get('interpolado') for c in cotizaciones):
+            columnar['interpolado'] = [bool(c.get('interpolado')) for c in cotizaciones]
+        columnar['metadata'] = dict(response['metadata'], formato='columnar')
+        return columnar
+
+    def _ttl_historico(self, tipo_unidad, rango, almacenadas):
+        """
+        Determina la clase de expiración de caché de una respuesta histórica
+        
+        Un rango totalmente pasado en el que cada día con publicación está
+        almacenado (o registrado sin datos) ya no puede cambiar. Si el rango
+        incluye el día actual o quedó algún día sin descargar, expira pronto
+        para que la próxima consulta lo complete.
+        
+        Returns:
+            str: Clase de expiración para CacheService.set
+        """
+        if rango['fecha_fin'] >= datetime.date.today().strftime('%Y-%m-%d'):
+            return TTL_RECIENTE
+        
+        sin_datos = self.store.get_sin_datos(tipo_unidad, rango['fecha_inicio'], rango['fecha_fin'])
+        completo = all(
+            fecha in almacenadas or fecha in sin_datos or not self.calendario.publica(tipo_unidad, fecha)
+            for fecha in rango['fechas']
+        )
+        return TTL_INMUTABLE if completo else TTL_RECIENTE
+
+    def cache_cotizacion(self, tipo_unidad, fecha=None):
+        """
+        Devuelve la entrada de caché de una cotización ya resuelta, sin armarla
+        
+        Sirve para responder peticiones condicionales (If-None-Match,
+        If-Modified-Since) sin consultar el almacén ni el BCU.
+        
+        Args:
+            tipo_unidad (str): 'ui' para Unidad Indexada, 'ur' para Unidad Reajustable
+            fecha (str, optional): Fecha en formato YYYY-MM-DD. Si es None, se usa la fecha actual.
+            
+        Returns:
+            EntradaCache: Entrada con los bytes de la respuesta y sus metadatos
+                ('etag', 'creado', 'expira', 'clase'), o None si la cotización no
+                está en caché o es un resultado negativo
+        """
+        fecha, error = self._validar_consulta(tipo_unidad, fecha)
+        if error:
+            return None
+        return self._entrada_valida(f"{tipo_unidad}_{fecha}")
+
+    def cache_historico(self, tipo_unidad, fecha_inicio=None, fecha_fin=None, completar=False, formato='filas'):
+        """
+        Igual que cache_cotizacion pero para la respuesta histórica de un rango
+        
+        Returns:
+            EntradaCache: Entrada de la respuesta o None si no está en caché
+        """
+        if self._validar_formato(formato):
+            return None
+        rango = self.validar_rango(tipo_unidad, fecha_inicio, fecha_fin, con_fechas=False)
+        if 'error' in rango:
+            return None
+        return self._entrada_valida(self._clave_historico(tipo_unidad, rango, completar, formato))
+
+    def _entrada_valida(self, cache_key):
+        entry = self.cache_service.get_entry(cache_key)
+        # Los resultados negativos en caché se responden como error, sin validadores
+        if entry is None or entry.meta.get('error'):
+            return None
+        return entry
+
+    def completar_rango(self, tipo_unidad, rango, progreso=None, lote=None):
+        """
+        Descarga los días del rango que aún no están en el almacén
+        
+        Solo se consultan los días en que el BCU publica la unidad según el
+        calendario y que no se hayan registrado antes como "sin datos". Cada lote
+        descargado se guarda antes de seguir con el siguiente, de modo que si el
+        proceso se interrumpe el trabajo hecho no se pierde y una nueva llamada
+        solo descarga lo que falta.
+        
+        Args:
+            tipo_unidad (str): 'ui' o 'ur'
+            rango (dict): Rango validado por validar_rango
+            progreso (callable, optional): Función llamada tras cada lote con
+                (días descargados, días a descargar en total). Con el interpolador,
+                el total se conoce recién después de descargar las muestras
+            lote (int, optional): Días descargados por lote (por defecto todos juntos)
+            
+        Returns:
+            dict: Cotizaciones almacenadas del rango, por fecha
+        """
+        almacenadas, _, faltantes = self._planificar_rango(tipo_unidad, rango)
+        
+        if faltantes and tipo_unidad == 'ui' and self.interpolador is not None:
+            # Descargar primero unos pocos días por período y derivar el resto;
+            # los períodos que no validan se descargan completos a continuación
+            muestras = self.interpolador.muestras(faltantes)
+            self._descargar_dias(tipo_unidad, muestras, almacenadas, progreso, lote)
+            almacenadas, _, faltantes = self._planificar_rango(tipo_unidad, rango)
+            descargados = len(muestras)
+        else:
+            descargados = 0
+        
+        self._descargar_dias(tipo_unidad, faltantes, almacenadas, progreso, lote, descargados)
+        
+        if faltantes and self.calendario.es_mensual(tipo_unidad):
+            # Derivar el resto de los días de los meses recién descargados
+            almacenadas = self._planificar_rango(tipo_unidad, rango)[0]
+        
+        return almacenadas
+
+    def _descargar_dias(self, tipo_unidad, fechas, almacenadas, progreso=None, lote=None, previos=0):
+        """
+        Descarga y guarda fechas por lotes, agregando a almacenadas las cotizaciones encontradas
+
+        El progreso se informa sumando los previos días ya descargados en una etapa anterior
+        """
+        lote = lote or max(len(fechas), 1)
+        for i in range(0, len(fechas), lote):
+            registros = self.scraper.get_cotizaciones_fechas(fechas[i:i + lote])
+            self.store.guardar_registros(registros)
+            for registro in registros:
+                if 'error' not in registro and tipo_unidad in registro['unidades']:
+                    almacenadas[registro['fecha']] = registro['unidades'][tipo_unidad]
+            if progreso:
+                progreso(previos + min(i + lote, len(fechas)), previos + len(fechas))
+
+    def _planificar_rango(self, tipo_unidad, rango):
+        """
+        Separa los días del rango entre los ya almacenados y los que hay que descargar
+        
+        Para las unidades de valor mensual (UR) alcanza con un día por mes: los
+        días de los meses ya almacenados se derivan del valor mensual y de cada
+        mes faltante se descarga solo el primer día con publicación del rango.
+        Con el interpolador habilitado, los días de la UI que se pueden derivar
+        tampoco se descargan.
+        
+        Returns:
+            tuple: (cotizaciones almacenadas por fecha, fechas registradas sin datos,
+                fechas a descargar en orden)
+        """
+        # Armar el rango a partir del almacén de observaciones diarias
+        almacenadas = self.store.get_rango(tipo_unidad, rango['fecha_inicio'], rango['fecha_fin'])
+        sin_datos = self.store.get_sin_datos(tipo_unidad, rango['fecha_inicio'], rango['fecha_fin'])
+        
+        # Obtener del scraper solo los días que pueden tener cotización y aún no están almacenados
+        faltantes = [
+            fecha for fecha in rango['fechas']
+            if fecha not in almacenadas and fecha not in sin_datos
+            and self.calendario.publica(tipo_unidad, fecha)
+        ]
+        
+        if self.calendario.es_mensual(tipo_unidad) and faltantes:
+            mensuales = self.store.get_mensuales(
+                tipo_unidad, rango['fecha_inicio'][:7], rango['fecha_fin'][:7]
+            )
+            por_descargar = []
+            for fecha in faltantes:
+                mes = fecha[:7]
+                if mes in mensuales:
+                    almacenadas[fecha] = dict(mensuales[mes], fecha=fecha)
+                elif not por_descargar or por_descargar[-1][:7] != mes:
+                    por_descargar.append(fecha)
+            faltantes = por_descargar
+        
+        # Los días de la UI derivables de observaciones validadas no se descargan
+        derivadas = self._derivar_ui(tipo_unidad, faltantes)
+        if derivadas:
+            almacenadas.update(derivadas)
+            faltantes = [fecha for fecha in faltantes if fecha not in derivadas]
+        
+        return almacenadas, sin_datos, faltantes
+
+    def _rellenar(self, tipo_unidad, rango, dias, sin_datos):
+        """
+        Completa los días sin publicación con el último valor conocido
+        
+        Args:
+            tipo_unidad (str): 'ui' o 'ur'
+            rango (dict): Rango validado por validar_rango
+            dias (iterable): Pares (fecha, cotización o None) en orden de fecha
+            sin_datos (set): Fechas consultadas en las que el BCU no publicó la unidad
+            
+        Yields:
+            dict: Cotizaciones del rango; las completadas llevan 'completado_desde'
+                con la fecha de la que se tomó el valor
+        """
+        ultima = self.store.get_anterior(tipo_unidad, rango['fecha_inicio'])
+        for fecha, cotizacion in dias:
+            if cotizacion is not None:
+                ultima = cotizacion
+                yield cotizacion
+            elif ultima is not None and (
+                    fecha in sin_datos or not self.calendario.publica(tipo_unidad, fecha)):
+                yield dict(ultima, fecha=fecha, completado_desde=ultima['fecha'])
+
+    def respuesta_historico(self, tipo_unidad, rango, almacenadas, completar=False):
+        """
+        Arma la respuesta histórica a partir de las cotizaciones almacenadas
+        
+        Args:
+            tipo_unidad (str): 'ui' o 'ur'
+            rango (dict): Rango validado por validar_rango
+            almacenadas (dict): Cotizaciones por fecha (ver completar_rango)
+            completar (bool): Completar los días sin publicación con el último valor conocido
+            
+        Returns:
+            dict: Respuesta histórica o mensaje de error si no hay datos
+        """
+        dias = ((fecha, almacenadas.get(fecha)) for fecha in rango['fechas'])
+        if completar:
+            sin_datos = self.store.get_sin_datos(tipo_unidad, rango['fecha_inicio'], rango['fecha_fin'])
+            cotizaciones = list(self._rellenar(tipo_unidad, rango, dias, sin_datos))
+        else:
+            cotizaciones = [cotizacion for _, cotizacion in dias if cotizacion is not None]
+        
+        # Validar que se obtuvieron datos
+        if not cotizaciones:
+            return {
+                'error': 'No se encontraron cotizaciones para el rango de fechas especificado',
+                'codigo': 'DATA_FETCH_ERROR'
+            }
+        
+        # Formatear respuesta según documentación
+        unidad = UNIDADES[tipo_unidad]
+        return {
+            'tipo': unidad['tipo'],
+            'moneda': unidad['moneda'],
+            'fecha_inicio': rango['fecha_inicio'],
+            'fecha_fin': rango['fecha_fin'],
+            'cotizaciones': cotizaciones,
+            'metadata': {
+                'total_registros': len(cotizaciones),
+                'dias_solicitados': len(rango['fechas']),
+                'fuente': 'Banco Central del Uruguay'
+            }
+        }
+
+    def stream_historico(self, tipo_unidad, fecha_inicio=None, fecha_fin=None, completar=False):
+        """
+        Prepara una consulta histórica que entrega las cotizaciones día por día
+        
+        Los días ya almacenados se entregan de inmediato y los faltantes a medida
+        que se descargan, en orden de fecha, sin armar la lista completa en memoria.
+        
+        Args:
+            tipo_unidad (str): 'ui' para Unidad Indexada, 'ur' para Unidad Reajustable
+            fecha_inicio (str, optional): Fecha inicial en formato YYYY-MM-DD
+            fecha_fin (str, optional): Fecha final en formato YYYY-MM-DD
+            completar (bool): Completar los días sin publicación con el último valor conocido
+            
+        Returns:
+            dict: Mensaje de error si la consulta es inválida, o los datos del rango con:
+                - cotizaciones: generador de las cotizaciones encontradas
+                - metadata: se completa con total_registros al agotar el generador
+        """
+        rango = self.validar_rango(tipo_unidad, fecha_inicio, fecha_fin)
+        if 'error' in rango:
+            return rango
+        
+        unidad = UNIDADES[tipo_unidad]
+        metadata = {
+            'total_registros': 0,
+            'dias_solicitados': len(rango['fechas']),
+            'fuente': 'Banco Central del Uruguay'
+        }
+        return {
+            'tipo': unidad['tipo'],
+            'moneda': unidad['moneda'],
+            'fecha_inicio': rango['fecha_inicio'],
+            'fecha_fin': rango['fecha_fin'],
+            'cotizaciones': self._iter_historico(tipo_unidad, rango, metadata, completar),
+            'metadata': metadata
+        }
+
+    def _iter_historico(self, tipo_unidad, rango, metadata, completar=False):
+        """Genera las cotizaciones del rango en orden, descargando solo los días faltantes"""
+        almacenadas, sin_datos, faltantes = self._planificar_rango(tipo_unidad, rango)
+        hoy = datetime.date.today().strftime('%Y-%m-%d')
+        pendientes = set(faltantes)
+        mensual = self.calendario.es_mensual(tipo_unidad)
+        descargados = {}  # Valores mensuales obtenidos durante la iteración
+        
+        def dias():
+            # Las descargas avanzan en paralelo y se consumen en el mismo orden que fechas
+            descargas = self.scraper.iter_cotizaciones_fechas(faltantes)
+            try:
+                for fecha in rango['fechas']:
+                    if fecha not in pendientes:
+                        cotizacion = almacenadas.pop(fecha, None)
+                        if (cotizacion is None and fecha[:7] in descargados
+                                and self.calendario.publica(tipo_unidad, fecha)):
+                            cotizacion = dict(descargados[fecha[:7]], fecha=fecha)
+                        yield fecha, cotizacion
+                        continue
+                    
+                    registro = next(descargas)
+                    self.store.guardar_registros([registro])
+                    if 'error' in registro:
+                        yield fecha, None
+                    elif tipo_unidad not in registro['unidades']:
+                        if fecha < hoy:
+                            sin_datos.add(fecha)
+                        yield fecha, None
+                    else:
+                        if mensual:
+                            descargados[fecha[:7]] = registro['unidades'][tipo_unidad]
+                        yield fecha, registro['unidades'][tipo_unidad]
+            finally:
+                descargas.close()
+        
+        if completar:
+            cotizaciones = self._rellenar(tipo_unidad, rango, dias(), sin_datos)
+        else:
+            cotizaciones = (cotizacion for _, cotizacion in dias() if cotizacion is not None)
+        
+        for cotizacion in cotizaciones:
+            metadata['total_registros'] += 1
+            yield cotizacion
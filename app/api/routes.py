@@ -1,13 +1,154 @@
-from flask import Blueprint, jsonify, request
-from app.api.controllers import CotizacionController
+import time
+import datetime
+from flask import Blueprint, Response, jsonify, request, current_app
+from app.utils.compresion import CODIFICACIONES, elegir_codificacion, etag_variante
 
 api_bp = Blueprint('api', __name__)
+
+# max-age de las respuestas que ya no cambian (fechas pasadas publicadas): un año
+MAX_AGE_INMUTABLE = 365 * 24 * 60 * 60
+
+def _get_controller():
+    """Devuelve el controlador compartido creado en create_app"""
+    return current_app.extensions['cotizacion_controller']
+
+def _es_verdadero(valor):
+    """Interpreta un parámetro de consulta booleano (1, true, si)"""
+    return (valor or '').lower() in ('1', 'true', 'si')
+
+def _quiere_stream():
+    """Indica si el cliente pidió la respuesta en NDJSON (?stream=1 o Accept: application/x-ndjson)"""
+    if _es_verdadero(request.args.get('stream')):
+        return True
+    mejor = request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson'])
+    return mejor == 'application/x-ndjson'
+
+def _ndjson_historico(result, codec):
+    """
+    Genera la respuesta histórica en NDJSON: una línea por cotización apenas
+    está disponible y una última línea con la metadata (o con el error si la
+    descarga falla a mitad del rango)
+    
+    Las líneas se serializan con el codificador JSON de la aplicación, el
+    mismo de las respuestas JSON y de la caché.
+    """
+    try:
+        for cotizacion in result['cotizaciones']:
+            yield codec.dumps(cotizacion) + b'\n'
+    except Exception as e:
+        yield codec.dumps({
+            'error': f'Error al obtener datos históricos: {str(e)}',
+            'codigo': 'SCRAPER_ERROR'
+        }) + b'\n'
+        return
+    
+    yield codec.dumps({
+        'tipo': result['tipo'],
+        'moneda': result['moneda'],
+        'fecha_inicio': result['fecha_inicio'],
+        'fecha_fin': result['fecha_fin'],
+        'metadata': result['metadata']
+    }) + b'\n'
+
+def _aplicar_validadores(response, meta, codificacion=None):
+    """
+    Agrega ETag, Last-Modified y Cache-Control a partir de los metadatos de la
+    entrada de caché que originó la respuesta (cada variante comprimida tiene su etag)
+    """
+    response.set_etag(etag_variante(meta['etag'], codificacion))
+    response.last_modified = datetime.datetime.fromtimestamp(meta['creado'], tz=datetime.timezone.utc)
+    response.cache_control.public = True
+    if meta.get('expira') is None:
+        response.cache_control.max_age = MAX_AGE_INMUTABLE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.max_age = max(0, int(meta['expira'] - time.time()))
+    return response
+
+def _no_modificado(entrada, codificacion=None):
+    """
+    Devuelve una respuesta 304 si la petición condicional coincide con la
+    entrada de caché (If-None-Match, o If-Modified-Since si no hay etag), o None
+    """
+    meta = entrada.meta
+    if request.if_none_match:
+        # Cualquier representación de la entrada sirve: sin comprimir o una variante
+        coincide = any(
+            request.if_none_match.contains_weak(etag_variante(meta['etag'], c))
+            for c in (None,) + CODIFICACIONES
+        )
+    else:
+        desde = request.if_modified_since
+        coincide = desde is not None and int(meta['creado']) <= desde.timestamp()
+    
+    if not coincide:
+        return None
+    return _variante(Response(status=304), entrada, codificacion)
+
+def _variante(response, entrada, codificacion):
+    """Marca la codificación de la variante enviada y agrega los validadores"""
+    if entrada.variantes:
+        response.vary.add('Accept-Encoding')
+    if codificacion:
+        response.headers['Content-Encoding'] = codificacion
+    return _aplicar_validadores(response, entrada.meta, codificacion)
+
+def _respuesta_cacheada(entrada):
+    """
+    Responde con una entrada de caché: 304 si el cliente ya tiene la versión
+    vigente o, si no, los bytes JSON guardados tal cual, sin volver a serializarlos
+    (o su variante precomprimida si el cliente acepta la codificación)
+    """
+    codificacion = elegir_codificacion(request, entrada.variantes)
+    no_modificado = _no_modificado(entrada, codificacion)
+    if no_modificado is not None:
+        return no_modificado
+    
+    cuerpo = entrada.variantes[codificacion] if codificacion else entrada.cuerpo
+    return _variante(current_app.response_class(cuerpo, mimetype='application/json'), entrada, codificacion)
+
+def _respuesta_json(result, entrada):
+    """Respuesta para un resultado recién armado: los bytes de la caché si es el que quedó guardado"""
+    if entrada is not None and entrada.data == result:
+        return _respuesta_cacheada(entrada)
+    return jsonify(result)
+
 @api_bp.route('/health', methods=['GET'])
 def health_check():
-    """Endpoint para verificar que la API está funcionando"""
+    """
+    Endpoint para verificar que la API está funcionando
+    
+    Incluye el estado del circuito hacia el BCU: con el circuito abierto la API
+    sigue respondiendo desde la caché y el estado pasa a "degradado".
+    """
+    circuito = _get_controller().scraper.circuit_breaker.stats()
     return jsonify({
-        'status': 'ok',
-        'version': '1.0.0'
+        'status': 'ok' if circuito['estado'] == 'cerrado' else 'degradado',
+        'version': '1.0.0',
+        'bcu': circuito
+    })
+
+def _codigo_http(result):
+    """Código HTTP para los errores de las consultas: 503 si el BCU no está disponible"""
+    return 503 if result.get('codigo') == 'BCU_UNAVAILABLE' else 400
+
+def _codigo_http_job(result):
+    """Código HTTP para los errores de los trabajos históricos"""
+    return {'JOB_NOT_FOUND': 404, 'TOO_MANY_JOBS': 429}.get(result.get('codigo'), 400)
+
+@api_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Endpoint con métricas internas del worker (caché, planificador y trabajos)"""
+    memoria = current_app.extensions.get('cache_memoria')
+    scheduler = current_app.extensions.get('cache_scheduler')
+    jobs = current_app.extensions.get('historico_jobs')
+    return jsonify({
+        'cache': {
+            'almacenamiento': _get_controller().cache_service.stats(),
+            'memoria': memoria.stats() if memoria else None
+        },
+        'scheduler': scheduler.estado if scheduler else None,
+        'jobs': jobs.stats() if jobs else None
     })
 
 @api_bp.route('/info', methods=['GET'])
@@ -43,16 +184,37 @@ def get_api_info():
                     'valor': 1532.33
                 }
             },
+            {
+                'ruta': '/api/cotizacion/batch',
+                'metodo': 'POST',
+                'descripcion': 'Obtiene en una sola llamada las cotizaciones de una lista de pares (unidad, fecha)',
+                'parametros': ['consultas (cuerpo JSON, lista de [unidad, fecha] o {"unidad", "fecha"})'],
+                'ejemplo': '{"consultas": [["ui", "2023-12-29"], ["ur", "2023-12-29"]]}'
+            },
+            {
+                'ruta': '/api/convertir',
+                'metodo': 'GET, POST',
+                'descripcion': 'Convierte montos entre UI, UR y pesos uruguayos (UYU) con la cotización de cada fecha',
+                'parametros': [
+                    'de, a (ui, ur o uyu)',
+                    'monto y fecha (GET) o conversiones (cuerpo JSON del POST, lista de [monto, fecha])'
+                ],
+                'ejemplo': '/api/convertir?de=ui&a=uyu&monto=1000&fecha=2023-12-29'
+            },
             {
                 'ruta': '/api/historico/ui',
                 'metodo': 'GET',
                 'descripcion': 'Obtiene datos históricos de la Unidad Indexada en un rango de fechas',
                 'parametros': [
                     'inicio (opcional, formato YYYY-MM-DD)',
-                    'fin (opcional, formato YYYY-MM-DD)'
+                    'fin (opcional, formato YYYY-MM-DD)',
+                    'formato (opcional, filas o columnar)',
+                    'stream (opcional, 1 para recibir NDJSON; también con Accept: application/x-ndjson)',
+                    'completar (opcional, 1 para completar los días sin publicación con el último valor)'
                 ],
                 'ejemplo': '/api/historico/ui?inicio=2023-01-01&fin=2023-01-31',
-                'nota': 'Este endpoint actualmente depende del método get_ui_historico que debe implementarse en el BaseScraper'
+                'nota': 'Solo se descargan del BCU los días que no están en el almacén; '
+                        'para rangos largos sin descargar conviene /api/historico/jobs'
             },
             {
                 'ruta': '/api/historico/ur',
@@ -60,15 +222,50 @@ def get_api_info():
                 'descripcion': 'Obtiene datos históricos de la Unidad Reajustable en un rango de fechas',
                 'parametros': [
                     'inicio (opcional, formato YYYY-MM-DD)',
-                    'fin (opcional, formato YYYY-MM-DD)'
+                    'fin (opcional, formato YYYY-MM-DD)',
+                    'formato (opcional, filas o columnar)',
+                    'stream (opcional, 1 para recibir NDJSON; también con Accept: application/x-ndjson)',
+                    'completar (opcional, 1 para completar los días sin publicación con el último valor)'
                 ],
                 'ejemplo': '/api/historico/ur?inicio=2023-01-01&fin=2023-01-31',
-                'nota': 'Este endpoint actualmente depende del método get_ur_historico que debe implementarse en el BaseScraper'
+                'nota': 'Solo se descargan del BCU los días que no están en el almacén; '
+                        'para rangos largos sin descargar conviene /api/historico/jobs'
+            },
+            {
+                'ruta': '/api/historico/jobs',
+                'metodo': 'POST',
+                'descripcion': 'Crea un trabajo que obtiene un rango histórico en segundo plano',
+                'parametros': ['tipo (ui o ur)', 'inicio (opcional, formato YYYY-MM-DD)',
+                               'fin (opcional, formato YYYY-MM-DD)'],
+                'ejemplo': '{"tipo": "ui", "inicio": "2023-01-01", "fin": "2023-12-31"}',
+                'nota': 'Responde 202 con el id del trabajo y su URL en la cabecera Location'
+            },
+            {
+                'ruta': '/api/historico/jobs/<id>',
+                'metodo': 'GET',
+                'descripcion': 'Consulta el estado y el progreso de un trabajo histórico'
+            },
+            {
+                'ruta': '/api/historico/jobs/<id>/resultado',
+                'metodo': 'GET',
+                'descripcion': 'Obtiene el resultado de un trabajo terminado (202 si todavía está en curso)'
+            },
+            {
+                'ruta': '/api/health',
+                'metodo': 'GET',
+                'descripcion': 'Estado del servicio y del circuito hacia el BCU'
+            },
+            {
+                'ruta': '/api/metrics',
+                'metodo': 'GET',
+                'descripcion': 'Métricas internas del worker: caché, planificador y trabajos'
             }
         ],
         'características': [
             'Datos obtenidos directamente desde el Banco Central del Uruguay',
             'Sistema de caché para evitar consultas repetidas y mejorar rendimiento',
+            'Almacén de cotizaciones: cada día se descarga del BCU una sola vez',
+            'Respuestas condicionales (ETag, Last-Modified) y comprimidas (gzip, y br si brotli está instalado)',
             'Logs detallados para seguimiento de operaciones y errores'
         ],
         'version': '1.0.0',
@@ -79,9 +276,130 @@ def get_api_info():
 def get_cotizacion(tipo_unidad):
     """Endpoint para obtener la cotización de una unidad"""
     fecha = request.args.get('fecha', None)
+    tipo_unidad = tipo_unidad.lower()
+    
+    controller = _get_controller()
+    
+    # Aciertos de caché: 304 o los bytes guardados, sin armar la cotización
+    entrada = controller.cache_cotizacion(tipo_unidad, fecha)
+    if entrada is not None:
+        return _respuesta_cacheada(entrada)
+    
+    result = controller.get_cotizacion(tipo_unidad, fecha)
+    
+    if 'error' in result:
+        return jsonify(result), _codigo_http(result)
+    
+    return _respuesta_json(result, controller.cache_cotizacion(tipo_unidad, fecha))
+
+@api_bp.route('/cotizacion/batch', methods=['POST'])
+def get_cotizaciones_batch():
+    """
+    Endpoint para obtener en una sola llamada las cotizaciones de muchos pares (unidad, fecha)
+    
+    Cuerpo JSON: una lista de consultas, sola o en la clave "consultas". Cada
+    consulta es [unidad, fecha] o {"unidad": "ui", "fecha": "YYYY-MM-DD"}:
+    {
+        "consultas": [["ui", "2023-01-05"], {"unidad": "ur", "fecha": "2023-01-05"}]
+    }
+    
+    Respuesta exitosa (un resultado por consulta, en el mismo orden; una
+    consulta que no se puede resolver tiene su propio "error" y "codigo"):
+    {
+        "resultados": [
+            {"tipo": "UI", "moneda": "UNIDAD INDEXADA", "fecha": "2023-01-05", "valor": 5.6, ...},
+            {"error": "...", "codigo": "DATA_FETCH_ERROR"}
+        ],
+        "metadata": {
+            "total_consultas": 2,
+            "consultas_unicas": 2,
+            "encontradas": 1,
+            "errores": 1,
+            "descargas": 1,
+            "fuente": "Banco Central del Uruguay"
+        }
+    }
     
-    controller = CotizacionController()
-    result = controller.get_cotizacion(tipo_unidad.lower(), fecha)
+    Códigos de error del lote:
+    - INVALID_BATCH: El cuerpo no es una lista de consultas
+    - BATCH_TOO_LARGE: Más consultas que BATCH_MAX_CONSULTAS
+    """
+    datos = request.get_json(silent=True)
+    consultas = datos.get('consultas') if isinstance(datos, dict) else datos
+    
+    controller = _get_controller()
+    result = controller.get_cotizaciones_batch(consultas)
+    
+    if 'error' in result:
+        return jsonify(result), 400
+    
+    return jsonify(result)
+
+@api_bp.route('/convertir', methods=['GET'])
+def convertir():
+    """
+    Endpoint para convertir un monto entre UI, UR y pesos uruguayos (UYU)
+    
+    Parámetros de consulta (Query Parameters):
+    - de: Unidad del monto ('ui', 'ur' o 'uyu')
+    - a: Unidad a la que se convierte ('ui', 'ur' o 'uyu')
+    - monto: Monto a convertir
+    - fecha: (opcional) Fecha de la cotización en formato YYYY-MM-DD, por defecto la actual
+    
+    Respuesta exitosa:
+    {
+        "de": "ui",
+        "a": "uyu",
+        "fecha": "YYYY-MM-DD",
+        "monto": 1000.0,
+        "resultado": 5864.2,
+        "factor": 5.8642,
+        "metadata": {...}
+    }
+    
+    Códigos de error:
+    - INVALID_UNIT_TYPE: Unidad inválida
+    - INVALID_AMOUNT: Monto inválido
+    - INVALID_DATE_FORMAT: Formato de fecha inválido
+    - DATA_FETCH_ERROR: No hay cotización para la fecha
+    """
+    controller = _get_controller()
+    result = controller.convertir(
+        request.args.get('de'), request.args.get('a'), request.args.get('monto'), request.args.get('fecha')
+    )
+    
+    if 'error' in result:
+        return jsonify(result), 400
+    
+    return jsonify(result)
+
+@api_bp.route('/convertir', methods=['POST'])
+def convertir_batch():
+    """
+    Endpoint para convertir una lista de montos, cada uno con su fecha, en una sola llamada
+    
+    Cuerpo JSON:
+    {
+        "de": "ui",
+        "a": "uyu",
+        "conversiones": [[1000, "2023-01-05"], {"monto": 250.5, "fecha": "2023-02-06"}]
+    }
+    
+    Respuesta exitosa (un resultado por conversión, en el mismo orden; una
+    conversión que no se puede calcular tiene su propio "error" y "codigo"):
+    {
+        "de": "ui",
+        "a": "uyu",
+        "resultados": [{"fecha": "2023-01-05", "monto": 1000.0, "resultado": 5583.2, "factor": 5.5832}, ...],
+        "metadata": {"total_conversiones": 2, "fechas_distintas": 2, "convertidas": 2, "errores": 0, ...}
+    }
+    """
+    datos = request.get_json(silent=True) or {}
+    if not isinstance(datos, dict):
+        datos = {}
+    
+    controller = _get_controller()
+    result = controller.convertir_batch(datos.get('de'), datos.get('a'), datos.get('conversiones'))
     
     if 'error' in result:
         return jsonify(result), 400
@@ -99,6 +417,13 @@ def get_historico(tipo_unidad):
     Parámetros de consulta (Query Parameters):
     - inicio: (opcional) Fecha inicial en formato YYYY-MM-DD
     - fin: (opcional) Fecha final en formato YYYY-MM-DD
+    - stream: (opcional) 1 para recibir la respuesta en NDJSON; equivale a
+      enviar la cabecera Accept: application/x-ndjson
+    - completar: (opcional) 1 para completar los días sin publicación (fines de
+      semana y feriados) con el último valor conocido; esas cotizaciones llevan
+      "completado_desde" con la fecha de la que se tomó el valor
+    - formato: (opcional) 'filas' (por defecto) o 'columnar' para recibir las
+      fechas y los valores en dos arreglos paralelos; no admite stream
     
     Si no se proporcionan fechas:
     - fecha_fin: se usa la fecha actual
@@ -125,6 +450,24 @@ def get_historico(tipo_unidad):
         }
     }
     
+    Respuesta columnar (?formato=columnar); si se pidió completar, incluye
+    además "completado_desde" con null en los días publicados:
+    {
+        "tipo": "UI",
+        "moneda": "UNIDAD INDEXADA",
+        "fecha_inicio": "YYYY-MM-DD",
+        "fecha_fin": "YYYY-MM-DD",
+        "fechas": ["YYYY-MM-DD", ...],
+        "valores": [123.45, ...],
+        "metadata": {..., "formato": "columnar"}
+    }
+    
+    Respuesta en modo stream (application/x-ndjson), una línea por cotización
+    a medida que se obtiene y al final una línea con el resumen:
+    {"tipo": "UI", "moneda": "UNIDAD INDEXADA", "fecha": "YYYY-MM-DD", "valor": 123.45}
+    ...
+    {"tipo": "UI", "moneda": "...", "fecha_inicio": "...", "fecha_fin": "...", "metadata": {...}}
+    
     Respuesta de error:
     {
         "error": "Descripción del error",
@@ -136,17 +479,103 @@ def get_historico(tipo_unidad):
     - INVALID_DATE_FORMAT: Formato de fecha inválido
     - INVALID_DATE_RANGE: Rango de fechas inválido
     - DATE_RANGE_TOO_LARGE: Rango mayor a 365 días
+    - INVALID_FORMAT: Formato de respuesta inválido
     - DATA_FETCH_ERROR: Error al obtener datos del BCU
     - SCRAPER_ERROR: Error en el proceso de extracción
     - GENERAL_ERROR: Error general del sistema
     """
     fecha_inicio = request.args.get('inicio', None)
     fecha_fin = request.args.get('fin', None)
+    completar = _es_verdadero(request.args.get('completar'))
+    formato = request.args.get('formato', 'filas').lower()
+    
+    controller = _get_controller()
+    
+    if formato == 'filas' and _quiere_stream():
+        result = controller.stream_historico(tipo_unidad.lower(), fecha_inicio, fecha_fin, completar)
+        if 'error' in result:
+            return jsonify(result), 400
+        return Response(
+            # El generador corre fuera del contexto de la aplicación: el codificador se pasa ya resuelto
+            _ndjson_historico(result, current_app.extensions['json_codec']),
+            mimetype='application/x-ndjson',
+            # Evitar que un proxy acumule la respuesta; la URL también responde en JSON
+            headers={'X-Accel-Buffering': 'no', 'Vary': 'Accept'}
+        )
+    
+    entrada = controller.cache_historico(tipo_unidad.lower(), fecha_inicio, fecha_fin, completar, formato)
+    if entrada is not None:
+        response = _respuesta_cacheada(entrada)
+    else:
+        result = controller.get_historico(tipo_unidad.lower(), fecha_inicio, fecha_fin, completar, formato)
+        
+        if 'error' in result:
+            return jsonify(result), 400
+        
+        response = _respuesta_json(
+            result, controller.cache_historico(tipo_unidad.lower(), fecha_inicio, fecha_fin, completar, formato)
+        )
+    # La misma URL puede responder en NDJSON según la cabecera Accept
+    response.vary.add('Accept')
+    return response
+
+@api_bp.route('/historico/jobs', methods=['POST'])
+def crear_historico_job():
+    """
+    Endpoint para crear un trabajo que obtiene un rango histórico en segundo plano
+    
+    Pensado para rangos largos que no están en caché y cuya descarga puede
+    superar el timeout de la petición. Los parámetros se reciben en el cuerpo
+    JSON o como parámetros de consulta:
+    - tipo: 'ui' o 'ur'
+    - inicio: (opcional) Fecha inicial en formato YYYY-MM-DD
+    - fin: (opcional) Fecha final en formato YYYY-MM-DD
+    
+    Respuesta (202):
+    {
+        "id": "...",
+        "estado": "pendiente",
+        "dias_solicitados": 365,
+        "dias_procesados": 0,
+        ...
+    }
+    """
+    datos = request.get_json(silent=True) or request.args
     
-    controller = CotizacionController()
-    result = controller.get_historico(tipo_unidad.lower(), fecha_inicio, fecha_fin)
+    jobs = current_app.extensions['historico_jobs']
+    result = jobs.crear((datos.get('tipo') or '').lower(), datos.get('inicio'), datos.get('fin'))
     
     if 'error' in result:
-        return jsonify(result), 400
+        return jsonify(result), _codigo_http_job(result)
+    
+    return jsonify(result), 202, {'Location': f"/api/historico/jobs/{result['id']}"}
+
+@api_bp.route('/historico/jobs/<job_id>', methods=['GET'])
+def get_historico_job(job_id):
+    """Endpoint para consultar el estado y el progreso de un trabajo histórico"""
+    jobs = current_app.extensions['historico_jobs']
+    result = jobs.estado(job_id)
     
-    return jsonify(result)
\ No newline at end of file
+    if 'error' in result:
+        return jsonify(result), _codigo_http_job(result)
+    
+    return jsonify(result)
+
+@api_bp.route('/historico/jobs/<job_id>/resultado', methods=['GET'])
+def get_historico_job_resultado(job_id):
+    """
+    Endpoint para obtener el resultado de un trabajo histórico
+    
+    Si el trabajo terminó devuelve la misma respuesta que /api/historico/<tipo_unidad>;
+    si todavía está en curso devuelve 202 con su estado.
+    """
+    jobs = current_app.extensions['historico_jobs']
+    result, terminado = jobs.resultado(job_id)
+    
+    if 'error' in result:
+        return jsonify(result), _codigo_http_job(result)
+    
+    if not terminado:
+        return jsonify(result), 202
+    
+    return jsonify(result)
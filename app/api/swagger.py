@@ -18,7 +18,7 @@ def swagger_json():
             "/health": {
                 "get": {
                     "summary": "Health check endpoint",
-                    "description": "Verify that the API is operational",
+                    "description": "Verify that the API is operational and report the state of the circuit breaker towards the BCU. While the circuit is open the API answers from the cache and the status is 'degradado'",
                     "produces": ["application/json"],
                     "responses": {
                         "200": {
@@ -26,8 +26,38 @@ def swagger_json():
                             "schema": {
                                 "type": "object",
                                 "properties": {
-                                    "status": {"type": "string", "example": "ok"},
-                                    "version": {"type": "string", "example": "1.0.0"}
+                                    "status": {"type": "string", "enum": ["ok", "degradado"], "example": "ok"},
+                                    "version": {"type": "string", "example": "1.0.0"},
+                                    "bcu": {
+                                        "type": "object",
+                                        "properties": {
+                                            "estado": {"type": "string", "enum": ["cerrado", "abierto", "semiabierto"]},
+                                            "fallas_consecutivas": {"type": "integer", "example": 0},
+                                            "umbral_fallas": {"type": "integer", "example": 5},
+                                            "reintento_en": {"type": "number", "description": "Seconds until the next probe while open"},
+                                            "aperturas": {"type": "integer", "example": 0},
+                                            "rechazadas": {"type": "integer", "example": 0}
+                                        }
+                                    }
+                                }
+                            }
+                        }
+                    },
+                    "tags": ["System"]
+                }
+            },
+            "/metrics": {
+                "get": {
+                    "summary": "Worker metrics",
+                    "description": "Get internal metrics of the current worker (cache storage usage, evictions and admission counters, in-memory cache counters)",
+                    "produces": ["application/json"],
+                    "responses": {
+                        "200": {
+                            "description": "Metrics returned successfully",
+                            "schema": {
+                                "type": "object",
+                                "properties": {
+                                    "cache": {"type": "object"}
                                 }
                             }
                         }
@@ -88,6 +118,136 @@ def swagger_json():
                                 "$ref": "#/definitions/CotizacionResponse"
                             }
                         },
+                        "304": {
+                            "description": "Not modified (If-None-Match or If-Modified-Since matched the cached entry)"
+                        },
+                        "400": {
+                            "description": "Bad request",
+                            "schema": {
+                                "$ref": "#/definitions/ErrorResponse"
+                            }
+                        },
+                        "503": {
+                            "description": "The BCU is unavailable (circuit open) and there is no previous value in cache (BCU_UNAVAILABLE)",
+                            "schema": {
+                                "$ref": "#/definitions/ErrorResponse"
+                            }
+                        }
+                    },
+                    "tags": ["Quotations"]
+                }
+            },
+            "/cotizacion/batch": {
+                "post": {
+                    "summary": "Get quotations in batch",
+                    "description": "Get the quotations of many (unit, date) pairs in one call. Cache hits are resolved in one pass and the misses are fetched once per BCU page, concurrently and rate limited",
+                    "consumes": ["application/json"],
+                    "produces": ["application/json"],
+                    "parameters": [
+                        {
+                            "name": "body",
+                            "in": "body",
+                            "required": True,
+                            "schema": {
+                                "type": "object",
+                                "required": ["consultas"],
+                                "properties": {
+                                    "consultas": {
+                                        "type": "array",
+                                        "description": "Pairs as [unit, date] or {\"unidad\", \"fecha\"}",
+                                        "items": {"type": "array", "items": {"type": "string"}},
+                                        "example": [["ui", "2023-12-29"], ["ur", "2023-12-29"]]
+                                    }
+                                }
+                            }
+                        }
+                    ],
+                    "responses": {
+                        "200": {
+                            "description": "One result per query, in the same order",
+                            "schema": {
+                                "$ref": "#/definitions/BatchResponse"
+                            }
+                        },
+                        "400": {
+                            "description": "Bad request",
+                            "schema": {
+                                "$ref": "#/definitions/ErrorResponse"
+                            }
+                        }
+                    },
+                    "tags": ["Quotations"]
+                }
+            },
+            "/convertir": {
+                "get": {
+                    "summary": "Convert an amount",
+                    "description": "Convert an amount between UI, UR and Uruguayan pesos (UYU) using the quotation of a date",
+                    "produces": ["application/json"],
+                    "parameters": [
+                        {"name": "de", "in": "query", "required": True, "type": "string", "enum": ["ui", "ur", "uyu"], "description": "Unit of the amount"},
+                        {"name": "a", "in": "query", "required": True, "type": "string", "enum": ["ui", "ur", "uyu"], "description": "Target unit"},
+                        {"name": "monto", "in": "query", "required": True, "type": "number", "description": "Amount to convert"},
+                        {"name": "fecha", "in": "query", "required": False, "type": "string", "format": "date", "description": "Date in YYYY-MM-DD format. Defaults to current date if not provided"}
+                    ],
+                    "responses": {
+                        "200": {
+                            "description": "Converted amount",
+                            "schema": {
+                                "$ref": "#/definitions/Conversion"
+                            }
+                        },
+                        "400": {
+                            "description": "Bad request",
+                            "schema": {
+                                "$ref": "#/definitions/ErrorResponse"
+                            }
+                        }
+                    },
+                    "tags": ["Quotations"]
+                },
+                "post": {
+                    "summary": "Convert amounts in batch",
+                    "description": "Convert a list of (amount, date) pairs in one call. Quotations for all dates are resolved together and one factor per date is applied to every amount",
+                    "consumes": ["application/json"],
+                    "produces": ["application/json"],
+                    "parameters": [
+                        {
+                            "name": "body",
+                            "in": "body",
+                            "required": True,
+                            "schema": {
+                                "type": "object",
+                                "required": ["de", "a", "conversiones"],
+                                "properties": {
+                                    "de": {"type": "string", "enum": ["ui", "ur", "uyu"]},
+                                    "a": {"type": "string", "enum": ["ui", "ur", "uyu"]},
+                                    "conversiones": {
+                                        "type": "array",
+                                        "description": "Pairs as [amount, date] or {\"monto\", \"fecha\"}",
+                                        "items": {"type": "array", "items": {"type": "string"}},
+                                        "example": [[1000, "2023-12-29"], [250.5, "2023-11-30"]]
+                                    }
+                                }
+                            }
+                        }
+                    ],
+                    "responses": {
+                        "200": {
+                            "description": "One result per conversion, in the same order",
+                            "schema": {
+                                "type": "object",
+                                "properties": {
+                                    "de": {"type": "string", "example": "ui"},
+                                    "a": {"type": "string", "example": "uyu"},
+                                    "resultados": {
+                                        "type": "array",
+                                        "items": {"$ref": "#/definitions/Conversion"}
+                                    },
+                                    "metadata": {"type": "object"}
+                                }
+                            }
+                        },
                         "400": {
                             "description": "Bad request",
                             "schema": {
@@ -101,8 +261,8 @@ def swagger_json():
             "/historico/{tipo_unidad}": {
                 "get": {
                     "summary": "Get historical data",
-                    "description": "Get historical values for UI or UR in a date range",
-                    "produces": ["application/json"],
+                    "description": "Get historical values for UI or UR in a date range. With stream=1 or Accept: application/x-ndjson the response is NDJSON: one line per quotation as soon as it is available, followed by a summary line with the metadata",
+                    "produces": ["application/json", "application/x-ndjson"],
                     "parameters": [
                         {
                             "name": "tipo_unidad",
@@ -127,15 +287,43 @@ def swagger_json():
                             "type": "string",
                             "format": "date",
                             "description": "End date in YYYY-MM-DD format"
+                        },
+                        {
+                            "name": "stream",
+                            "in": "query",
+                            "required": False,
+                            "type": "string",
+                            "enum": ["1"],
+                            "description": "Stream the response as NDJSON"
+                        },
+                        {
+                            "name": "completar",
+                            "in": "query",
+                            "required": False,
+                            "type": "string",
+                            "enum": ["1"],
+                            "description": "Fill weekends and holidays with the last known value (marked with completado_desde)"
+                        },
+                        {
+                            "name": "formato",
+                            "in": "query",
+                            "required": False,
+                            "type": "string",
+                            "enum": ["filas", "columnar"],
+                            "default": "filas",
+                            "description": "Response shape: one object per quote (filas) or parallel fechas/valores arrays (columnar, see HistoricoColumnarResponse). Columnar disables streaming"
                         }
                     ],
                     "responses": {
                         "200": {
-                            "description": "Historical data returned successfully",
+                            "description": "Historical data returned successfully (HistoricoColumnarResponse with formato=columnar). Large responses are gzip or brotli encoded according to Accept-Encoding",
                             "schema": {
                                 "$ref": "#/definitions/HistoricoResponse"
                             }
                         },
+                        "304": {
+                            "description": "Not modified (If-None-Match or If-Modified-Since matched the cached entry)"
+                        },
                         "400": {
                             "description": "Bad request",
                             "schema": {
@@ -145,6 +333,117 @@ def swagger_json():
                     },
                     "tags": ["Quotations"]
                 }
+            },
+            "/historico/jobs": {
+                "post": {
+                    "summary": "Create historical job",
+                    "description": "Start a background job that fetches a long historical range. Progress is saved as it goes and interrupted jobs are resumed on restart",
+                    "consumes": ["application/json"],
+                    "produces": ["application/json"],
+                    "parameters": [
+                        {
+                            "name": "body",
+                            "in": "body",
+                            "required": True,
+                            "schema": {
+                                "type": "object",
+                                "required": ["tipo"],
+                                "properties": {
+                                    "tipo": {"type": "string", "enum": ["ui", "ur"]},
+                                    "inicio": {"type": "string", "format": "date", "example": "2023-01-01"},
+                                    "fin": {"type": "string", "format": "date", "example": "2023-12-31"}
+                                }
+                            }
+                        }
+                    ],
+                    "responses": {
+                        "202": {
+                            "description": "Job created (or an identical unfinished job already exists)",
+                            "schema": {
+                                "$ref": "#/definitions/HistoricoJob"
+                            }
+                        },
+                        "400": {
+                            "description": "Bad request",
+                            "schema": {
+                                "$ref": "#/definitions/ErrorResponse"
+                            }
+                        },
+                        "429": {
+                            "description": "Too many unfinished jobs",
+                            "schema": {
+                                "$ref": "#/definitions/ErrorResponse"
+                            }
+                        }
+                    },
+                    "tags": ["Jobs"]
+                }
+            },
+            "/historico/jobs/{job_id}": {
+                "get": {
+                    "summary": "Get job status",
+                    "description": "Get the state and progress of a historical job",
+                    "produces": ["application/json"],
+                    "parameters": [
+                        {
+                            "name": "job_id",
+                            "in": "path",
+                            "required": True,
+                            "type": "string"
+                        }
+                    ],
+                    "responses": {
+                        "200": {
+                            "description": "Job status",
+                            "schema": {
+                                "$ref": "#/definitions/HistoricoJob"
+                            }
+                        },
+                        "404": {
+                            "description": "Job not found",
+                            "schema": {
+                                "$ref": "#/definitions/ErrorResponse"
+                            }
+                        }
+                    },
+                    "tags": ["Jobs"]
+                }
+            },
+            "/historico/jobs/{job_id}/resultado": {
+                "get": {
+                    "summary": "Get job result",
+                    "description": "Get the historical data of a finished job. Returns 202 with the job status while it is still running",
+                    "produces": ["application/json"],
+                    "parameters": [
+                        {
+                            "name": "job_id",
+                            "in": "path",
+                            "required": True,
+                            "type": "string"
+                        }
+                    ],
+                    "responses": {
+                        "200": {
+                            "description": "Historical data",
+                            "schema": {
+                                "$ref": "#/definitions/HistoricoResponse"
+                            }
+                        },
+                        "202": {
+                            "description": "Job not finished yet",
+                            "schema": {
+                                "$ref": "#/definitions/HistoricoJob"
+                            }
+                        },
+                        "404": {
+                            "description": "Job not found",
+                            "schema": {
+                                "$ref": "#/definitions/ErrorResponse"
+                            }
+                        }
+                    },
+                    "tags": ["Jobs"]
+                }
             }
         },
         "definitions": {
@@ -154,7 +453,8 @@ def swagger_json():
                     "tipo": {"type": "string", "example": "UI"},
                     "moneda": {"type": "string", "example": "UNIDAD INDEXADA"},
                     "fecha": {"type": "string", "example": "2023-12-31"},
-                    "valor": {"type": "number", "example": 5.8642}
+                    "valor": {"type": "number", "example": 5.8642},
+                    "completado_desde": {"type": "string", "example": "2023-12-29", "description": "Only in filled days (completar=1): date the value was taken from"}
                 }
             },
             "CotizacionResponse": {
@@ -196,6 +496,77 @@ def swagger_json():
                     }
                 }
             },
+            "HistoricoColumnarResponse": {
+                "type": "object",
+                "properties": {
+                    "tipo": {"type": "string", "example": "UI"},
+                    "moneda": {"type": "string", "example": "UNIDAD INDEXADA"},
+                    "fecha_inicio": {"type": "string", "example": "2023-01-01"},
+                    "fecha_fin": {"type": "string", "example": "2023-01-31"},
+                    "fechas": {"type": "array", "items": {"type": "string"}, "example": ["2023-01-02", "2023-01-03"]},
+                    "valores": {"type": "array", "items": {"type": "number"}, "example": [5.5837, 5.5853]},
+                    "completado_desde": {"type": "array", "items": {"type": "string"}, "description": "Only with completar=1: source date of each filled day, null for published days"},
+                    "interpolado": {"type": "array", "items": {"type": "boolean"}, "description": "Only when some values were derived by UI interpolation"},
+                    "metadata": {
+                        "type": "object",
+                        "properties": {
+                            "total_registros": {"type": "integer", "example": 21},
+                            "dias_solicitados": {"type": "integer", "example": 31},
+                            "formato": {"type": "string", "example": "columnar"},
+                            "fuente": {"type": "string", "example": "Banco Central del Uruguay"}
+                        }
+                    }
+                }
+            },
+            "BatchResponse": {
+                "type": "object",
+                "properties": {
+                    "resultados": {
+                        "type": "array",
+                        "description": "A quotation or an error object per query",
+                        "items": {
+                            "$ref": "#/definitions/CotizacionResponse"
+                        }
+                    },
+                    "metadata": {
+                        "type": "object",
+                        "properties": {
+                            "total_consultas": {"type": "integer", "example": 2},
+                            "consultas_unicas": {"type": "integer", "example": 2},
+                            "encontradas": {"type": "integer", "example": 2},
+                            "errores": {"type": "integer", "example": 0},
+                            "descargas": {"type": "integer", "example": 1},
+                            "fuente": {"type": "string", "example": "Banco Central del Uruguay"}
+                        }
+                    }
+                }
+            },
+            "Conversion": {
+                "type": "object",
+                "properties": {
+                    "fecha": {"type": "string", "example": "2023-12-29"},
+                    "monto": {"type": "number", "example": 1000},
+                    "resultado": {"type": "number", "example": 5864.2},
+                    "factor": {"type": "number", "example": 5.8642}
+                }
+            },
+            "HistoricoJob": {
+                "type": "object",
+                "properties": {
+                    "id": {"type": "string", "example": "3f2c9a1e8b7d4c6fa0e15b2d9c8e7f10"},
+                    "tipo_unidad": {"type": "string", "example": "ui"},
+                    "fecha_inicio": {"type": "string", "example": "2023-01-01"},
+                    "fecha_fin": {"type": "string", "example": "2023-12-31"},
+                    "estado": {"type": "string", "enum": ["pendiente", "en_curso", "completado", "error"]},
+                    "dias_solicitados": {"type": "integer", "example": 365},
+                    "dias_a_descargar": {"type": "integer", "example": 250},
+                    "dias_procesados": {"type": "integer", "example": 100},
+                    "dias_pendientes": {"type": "integer", "example": 150},
+                    "creado": {"type": "string", "example": "2024-01-01 10:00:00"},
+                    "actualizado": {"type": "string", "example": "2024-01-01 10:00:30"},
+                    "mensaje": {"type": "string", "example": None}
+                }
+            },
             "ErrorResponse": {
                 "type": "object",
                 "properties": {
@@ -212,6 +583,10 @@ def swagger_json():
             {
                 "name": "Quotations",
                 "description": "Access to UI and UR quotation data"
+            },
+            {
+                "name": "Jobs",
+                "description": "Background jobs for long historical ranges"
             }
         ]
     }
@@ -6,6 +6,82 @@ class Config:
     CACHE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'cache'))
     LOG_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'logs'))
     CACHE_TIMEOUT = 24 * 60 * 60  # 24 horas en segundos
+    # Fechas pasadas publicadas nunca expiran; la fecha actual y las futuras sí
+    CACHE_TTL_RECIENTE = 60 * 60  # 1 hora para la fecha actual o aún no publicada
+    CACHE_TTL_NEGATIVO = 6 * 60 * 60  # 6 horas para resultados "sin datos"
+    # Entradas expiradas se sirven como obsoletas (y se refrescan en segundo plano)
+    # hasta este máximo de segundos tras su expiración
+    CACHE_MAX_STALENESS = 24 * 60 * 60
+    CACHE_REFRESH_WORKERS = 2  # Hilos de refresco en segundo plano
+    # Caché en memoria (LRU) compartida por las peticiones de cada worker
+    CACHE_MEMORY_MAX_ENTRIES = 2048
+    CACHE_MEMORY_MAX_BYTES = 32 * 1024 * 1024  # 32 MB
+    # Almacenamiento de la caché compartido por los workers: 'archivos' (un archivo por
+    # entrada en CACHE_DIR), 'sqlite' (una base en modo WAL) o 'redis' (servidor compatible)
+    CACHE_BACKEND = 'archivos'
+    CACHE_SQLITE_PATH = None  # Base de la caché 'sqlite' (por defecto CACHE_DIR/cache.db)
+    CACHE_REDIS_URL = 'redis://localhost:6379/0'  # Servidor de la caché 'redis'
+    # Presupuesto de la caché (archivos o sqlite; en redis se configura maxmemory en el servidor):
+    # al superarlo se desalojan las entradas según CACHE_POLITICA_DESALOJO ('lru' o 'lfu')
+    CACHE_MAX_BYTES = 512 * 1024 * 1024  # 512 MB
+    CACHE_MAX_ENTRADAS = 100000
+    CACHE_POLITICA_DESALOJO = 'lfu'
+    # Control de admisión: las claves con estos prefijos (rangos históricos) se guardan
+    # recién en su pedido número CACHE_ADMISION_MIN_PEDIDOS dentro de CACHE_ADMISION_VENTANA
+    CACHE_ADMISION_PREFIJOS = ['historico_']
+    CACHE_ADMISION_MIN_PEDIDOS = 2
+    CACHE_ADMISION_VENTANA = 24 * 60 * 60
+    # Codificador JSON de las respuestas y de la caché: 'orjson', 'json' o 'auto' (orjson si está instalado)
+    JSON_CODEC = 'auto'
+    # Compresión negociada (gzip, y brotli si está instalado) de las respuestas JSON
+    # a partir de este tamaño; las entradas de caché guardan sus variantes comprimidas
+    COMPRESION_MIN_BYTES = 1024
+    # Coordinar entre workers (lock de archivo) las descargas de una misma fecha
+    SINGLE_FLIGHT_FILE_LOCK = True
+    # Almacén de cotizaciones diarias (por defecto CACHE_DIR/observaciones.db)
+    OBSERVATION_DB = None
+    # Planificador de caché (precalentado diario, backfill histórico y limpieza)
+    SCHEDULER_ENABLED = False  # Ejecutarlo dentro de la aplicación (un solo worker lo toma)
+    SCHEDULER_HORA_PUBLICACION = '16:00'  # Hora a partir de la cual el BCU publica el día
+    SCHEDULER_BACKFILL_DIAS = 365  # Ventana histórica que se mantiene completa
+    SCHEDULER_BACKFILL_RATE = 2  # Descargas por segundo del backfill
+    SCHEDULER_GC_INTERVALO = 60 * 60  # Segundos entre limpiezas de caché
+    # Calendario de publicación del BCU: los fines de semana y feriados no se consultan
+    CALENDARIO_FERIADOS_FIJOS = ['01-01', '05-01', '07-18', '08-25', '12-25']  # MM-DD
+    CALENDARIO_FERIADOS_PASCUA = [-48, -47, -3, -2]  # Carnaval y Turismo, en días desde Pascua
+    CALENDARIO_FERIADOS_EXTRA = []  # Días puntuales sin publicación (YYYY-MM-DD)
+    # Derivar la UI entre observaciones de un mismo período en lugar de descargarla
+    UI_INTERPOLACION = False
+    UI_DIA_ANCLA = 6  # Día del mes en que cambia la tasa diaria de la UI
+    UI_TOLERANCIA = 0.00015  # Diferencia máxima admitida contra los valores publicados
+    # Consultas por lote (POST /api/cotizacion/batch)
+    BATCH_MAX_CONSULTAS = 5000
+    # Trabajos en segundo plano para históricos largos (POST /api/historico/jobs)
+    JOBS_DIR = None  # Estado y resultados de los trabajos (por defecto CACHE_DIR/jobs)
+    JOBS_MAX_WORKERS = 2  # Trabajos ejecutados en simultáneo por worker
+    JOBS_MAX_PENDIENTES = 20  # Trabajos sin terminar admitidos por worker
+    JOBS_RETENCION = 7 * 24 * 60 * 60  # Segundos que se conservan los trabajos terminados
+    # Scraper del BCU
+    BCU_URL = 'https://www.bcu.gub.uy/Estadisticas-e-Indicadores/Paginas/Cotizaciones.aspx'
+    SCRAPER_MAX_WORKERS = 8  # Descargas simultáneas máximas por worker
+    SCRAPER_RATE_LIMIT = 10  # Peticiones por segundo hacia el BCU (límite global del proceso)
+    SCRAPER_RATE_BURST = 10  # Ráfaga máxima de peticiones
+    SCRAPER_POOL_SIZE = None  # Conexiones persistentes al BCU (por defecto SCRAPER_MAX_WORKERS)
+    SCRAPER_PARSER = 'auto'  # Backend de análisis HTML: 'lxml', 'bs4' o 'auto' (lxml si está instalado)
+    # Transporte de las descargas de varias fechas: 'hilos' (requests en el motor de descargas),
+    # 'httpx' (asyncio, todas las descargas en un bucle de eventos) o 'auto' (httpx si está instalado)
+    SCRAPER_TRANSPORTE_ASYNC = 'hilos'
+    # Reintentos de cada petición al BCU: backoff exponencial con jitter y Retry-After
+    SCRAPER_REINTENTOS = 3  # Intentos máximos por petición (incluye el primero)
+    SCRAPER_BACKOFF_BASE = 0.5  # Segundos de espera base del primer reintento
+    SCRAPER_BACKOFF_MAX = 8  # Tope de la espera entre intentos
+    SCRAPER_CONNECT_TIMEOUT = 3.05  # Segundos para conectar con el BCU
+    SCRAPER_READ_TIMEOUT = 10  # Segundos de espera de la respuesta una vez conectado
+    SCRAPER_TIEMPO_MAX = 20  # Segundos totales de una petición con sus reintentos
+    # Circuito ante caídas del BCU: tras CIRCUITO_UMBRAL_FALLAS fallas consecutivas no se
+    # consulta al BCU durante CIRCUITO_ESPERA segundos y se responde con la caché
+    CIRCUITO_UMBRAL_FALLAS = 5
+    CIRCUITO_ESPERA = 30
 
 class DevelopmentConfig(Config):
     """Configuración para desarrollo"""
@@ -1,52 +1,221 @@
 # app/scrapers/base_scraper.py
 import requests
-import random
 import time
+import asyncio
 import datetime
 import logging
+import re
+from collections import deque
 from bs4 import BeautifulSoup
+from app.scrapers import fetch_engine, resiliencia
+from app.scrapers.transporte import RequestsTransport, get_transporte_async, default_event_loop
+from app.scrapers.parsers import get_parser
+from app.utils.calendario import CalendarioBCU
 
 logger = logging.getLogger('scraper.base')
 
+# URL de la página de cotizaciones del BCU
+BCU_URL = "https://www.bcu.gub.uy/Estadisticas-e-Indicadores/Paginas/Cotizaciones.aspx"
+
+# Unidades que la API sabe identificar en la tabla de cotizaciones
+UNIDADES = {
+    'ui': {
+        'tipo': 'UI',
+        'nombre': 'Unidad Indexada',
+        'moneda': 'UNIDAD INDEXADA',
+        'patron': 'UNIDAD INDEXADA',
+        'regex': re.compile(r'(UNIDAD INDEXADA)[^0-9,]*([0-9][0-9.]*,[0-9]+)', re.IGNORECASE)
+    },
+    'ur': {
+        'tipo': 'UR',
+        'nombre': 'Unidad Reajustable',
+        'moneda': 'UNIDAD REAJUSTABLE',
+        'patron': 'UNIDAD REAJUSTAB',
+        'regex': re.compile(r'(UNIDAD REAJUSTAB[^:0-9]*)[^0-9,]*([0-9][0-9.]*,[0-9]+)', re.IGNORECASE)
+    }
+}
+
 class BaseScraper:
-    def __init__(self):
+    def __init__(self, base_url=None, engine=None, rate_limiter=None, pool_size=None, parser=None,
+                 calendario=None, retry_policy=None, circuit_breaker=None, transporte_async=None):
+        """
+        Inicializa el scraper
+        
+        La sesión HTTP mantiene un pool de conexiones persistentes (keep-alive),
+        por lo que conviene crear una única instancia por worker y compartirla
+        entre peticiones e hilos.
+        
+        Los métodos terminados en _async son corrutinas que descargan con el
+        transporte asíncrono. Si ese transporte multiplexa las conexiones
+        (httpx), las descargas de varias fechas desde código síncrono también
+        pasan por el bucle de eventos compartido en lugar de ocupar un hilo cada una.
+        
+        Args:
+            base_url (str, optional): URL de la página de cotizaciones (por defecto la del BCU)
+            engine (FetchEngine, optional): Motor de descargas concurrentes (por defecto el compartido)
+            rate_limiter (TokenBucket, optional): Limitador de tasa (por defecto el global del proceso)
+            pool_size (int, optional): Conexiones persistentes por host (por defecto los hilos del motor)
+            parser (str, optional): Backend de análisis HTML: 'lxml', 'bs4' o 'auto' (por defecto)
+            calendario (CalendarioBCU, optional): Días en que el BCU publica (por defecto feriados de Uruguay)
+            retry_policy (RetryPolicy, optional): Reintentos y timeouts de cada petición
+            circuit_breaker (CircuitBreaker, optional): Circuito ante caídas del BCU (por defecto el global del proceso)
+            transporte_async (str, optional): Transporte de los métodos asíncronos: 'httpx',
+                'hilos' (la sesión de requests en hilos, por defecto) o 'auto' (httpx si está
+                instalado); también se acepta una instancia de transporte
+        """
+        self.base_url = base_url or BCU_URL
+        self.parser = get_parser(parser)
+        self.calendario = calendario or CalendarioBCU()
+        self.engine = engine or fetch_engine.default_engine
+        self.rate_limiter = rate_limiter or fetch_engine.default_rate_limiter
+        self.retry_policy = retry_policy or resiliencia.RetryPolicy()
+        self.circuit_breaker = circuit_breaker or resiliencia.default_circuit_breaker
         self.session = requests.Session()
         self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+            'Connection': 'keep-alive'
         })
         
-    def get(self, url, params=None, retry_count=3):
+        # Pool de conexiones dimensionado para las descargas concurrentes del motor
+        pool_size = pool_size or self.engine.max_workers
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=2,
+            pool_maxsize=pool_size,
+            pool_block=True
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
+        self.transporte = RequestsTransport(self.session)
+        if transporte_async is None or isinstance(transporte_async, str):
+            transporte_async = get_transporte_async(
+                transporte_async or 'hilos',
+                transporte=self.transporte,
+                headers=self.session.headers
+            )
+        self.transporte_async = transporte_async
+        self.bucle = default_event_loop
+        # Descargas asíncronas en curso por delante del consumidor: como en el
+        # motor, acota las corrutinas y respuestas pendientes de un rango largo
+        self.ventana_async = 2 * getattr(self.transporte_async, 'max_conexiones', self.engine.max_workers)
+        
+    def get(self, url, params=None, retry_count=None):
         """
         Realiza una petición GET con reintentos
         
+        Los reintentos siguen la política del scraper (backoff exponencial con
+        jitter, Retry-After y tiempo total acotado). Si el circuito está abierto
+        porque el BCU no responde, se devuelve None de inmediato sin consultarlo.
+        
         Args:
             url (str): URL a la que hacer la petición
             params (dict, optional): Parámetros de la URL
-            retry_count (int): Número de reintentos en caso de error
+            retry_count (int, optional): Intentos máximos (por defecto los de la política)
             
         Returns:
             Response: Respuesta de la petición o None si falló
         """
-        for i in range(retry_count):
+        intentos = retry_count or self.retry_policy.intentos
+        limite = time.monotonic() + self.retry_policy.tiempo_max
+        
+        for i in range(intentos):
+            if not self.circuit_breaker.permitir():
+                logger.warning("Circuito abierto: no se consulta al BCU")
+                return None
+            
+            response = None
             try:
-                # Añadimos verify=False para ignorar la verificación del certificado SSL
-                # Esto es necesario porque el certificado del BCU puede no estar en el bundle por defecto
-                response = self.session.get(url, params=params, timeout=10, verify=False)
-                
-                # Silenciamos las advertencias de las solicitudes no verificadas
-                requests.packages.urllib3.disable_warnings(requests.packages.urllib3.exceptions.InsecureRequestWarning)
-                
-                if response.status_code == 200:
-                    return response
-                
-                logger.warning(f"Intento {i+1}/{retry_count} fallido: Status code {response.status_code}")
-                time.sleep(random.uniform(1, 3))  # Espera aleatoria entre intentos
+                # Respetar el límite de tasa global hacia el BCU (incluye reintentos)
+                self.rate_limiter.acquire()
+                response = self.transporte.get(url, params=params, timeout=self.retry_policy.timeout)
             except Exception as e:
                 logger.error(f"Error en petición GET: {str(e)}")
-                time.sleep(random.uniform(1, 3))  # Espera aleatoria entre intentos
+            except BaseException:
+                # Interrumpido sin resultado: no retener el intento de prueba del circuito
+                self.circuit_breaker.liberar()
+                raise
+            
+            terminado, espera = self._evaluar_intento(i, intentos, limite, response)
+            if terminado:
+                return response if response is not None and response.status_code == 200 else None
+            time.sleep(espera)
                 
         return None
 
+    async def get_async(self, url, params=None, retry_count=None):
+        """
+        Igual que get pero con el transporte asíncrono y sin bloquear el bucle de eventos
+        
+        Returns:
+            Response: Respuesta de la petición o None si falló
+        """
+        intentos = retry_count or self.retry_policy.intentos
+        limite = time.monotonic() + self.retry_policy.tiempo_max
+        
+        for i in range(intentos):
+            if not self.circuit_breaker.permitir():
+                logger.warning("Circuito abierto: no se consulta al BCU")
+                return None
+            
+            response = None
+            try:
+                await asyncio.sleep(self.rate_limiter.reservar())
+                response = await self.transporte_async.get(url, params=params, timeout=self.retry_policy.timeout)
+            except Exception as e:
+                logger.error(f"Error en petición GET: {str(e) or type(e).__name__}")
+            except BaseException:
+                # Cancelada (CancelledError no es Exception): sin resultado que registrar,
+                # pero el intento de prueba del circuito debe quedar libre
+                self.circuit_breaker.liberar()
+                raise
+            
+            terminado, espera = self._evaluar_intento(i, intentos, limite, response)
+            if terminado:
+                return response if response is not None and response.status_code == 200 else None
+            await asyncio.sleep(espera)
+        
+        return None
+
+    def _evaluar_intento(self, intento, intentos, limite, response):
+        """
+        Registra el resultado de un intento en el circuito y decide si reintentar
+        
+        Solo se reintentan los errores de conexión (response None) y los códigos
+        de estado transitorios, mientras queden intentos y tiempo.
+        
+        Args:
+            intento (int): Número del intento, desde 0
+            intentos (int): Intentos máximos
+            limite (float): Momento (time.monotonic) en que se agota el tiempo de la petición
+            response: Respuesta obtenida o None si la petición falló
+            
+        Returns:
+            tuple: (terminado, segundos a esperar antes del siguiente intento o None)
+        """
+        politica = self.retry_policy
+        if response is not None:
+            if response.status_code == 200:
+                self.circuit_breaker.registrar_exito()
+                return True, None
+            
+            if not politica.reintentable(response.status_code):
+                # El servidor responde: el error no indica una caída y no se reintenta
+                self.circuit_breaker.registrar_exito()
+                logger.warning(f"Petición rechazada por el servidor: Status code {response.status_code}")
+                return True, None
+            
+            logger.warning(f"Intento {intento+1}/{intentos} fallido: Status code {response.status_code}")
+        
+        self.circuit_breaker.registrar_falla()
+        if intento + 1 == intentos:
+            return True, None
+        
+        espera = politica.espera(intento, response.headers.get('Retry-After') if response is not None else None)
+        if time.monotonic() + espera >= limite:
+            logger.warning("Se agotó el tiempo máximo de la petición: no se reintenta")
+            return True, None
+        return False, espera
+
     def parse_html(self, html_content):
         """
         Analiza contenido HTML con BeautifulSoup
@@ -59,81 +228,239 @@ class BaseScraper:
         """
         return BeautifulSoup(html_content, 'html.parser')
         
-    def get_ui_cotizacion(self, fecha):
+    def _parse_numero(self, texto):
+        """Convierte un número en formato del BCU (1.532,33) a float, o None si está vacío"""
+        texto = texto.strip().replace(".", "").replace(",", ".")
+        try:
+            return float(texto)
+        except ValueError:
+            return None
+
+    def get_cotizaciones_fecha(self, fecha):
         """
-        Obtiene la cotización de la Unidad Indexada para una fecha específica
+        Obtiene en una sola descarga todas las cotizaciones publicadas para una fecha
+        
+        La página de cotizaciones del BCU incluye todas las monedas y unidades,
+        por lo que una única petición alcanza para extraer la UI, la UR y el resto
+        de las filas de la tabla.
         
         Args:
             fecha (str): Fecha en formato YYYY-MM-DD
             
         Returns:
-            dict: Diccionario con la cotización o mensaje de error
+            dict: Registro de la fecha con las claves:
+                - fecha: la fecha consultada
+                - monedas: lista con todas las filas de la tabla (moneda, valor_compra, valor_venta, valor_arbitraje)
+                - unidades: cotizaciones de las unidades conocidas encontradas ('ui', 'ur')
+              o un diccionario con 'error' si no se pudo obtener la página
         """
         try:
-            # URL correcta para la cotización de UI
-            url = "https://www.bcu.gub.uy/Estadisticas-e-Indicadores/Paginas/Cotizaciones.aspx"
-            
-            # Convertir la fecha al formato adecuado para la solicitud
-            fecha_obj = datetime.datetime.strptime(fecha, "%Y-%m-%d")
-            fecha_formateada = fecha_obj.strftime("%d/%m/%Y")
+            # La página maneja todas las monedas juntas, basta con la fecha
+            response = self.get(self.base_url, params=self._params_fecha(fecha))
+            return self._registro(response, fecha)
             
-            # Realizar la solicitud para obtener la información
-            params = {
-                "fecha": fecha_formateada,
-                "tipo": "ui"
-            }
+        except Exception as e:
+            import traceback
+            return {"error": f"Error al obtener cotizaciones: {str(e)}", "traceback": traceback.format_exc()}
+
+    async def get_cotizaciones_fecha_async(self, fecha):
+        """Igual que get_cotizaciones_fecha, como corrutina"""
+        try:
+            response = await self.get_async(self.base_url, params=self._params_fecha(fecha))
+            return self._registro(response, fecha)
             
-            response = self.get(url, params=params)
-            if not response:
-                return {"error": "No se pudo conectar con el servidor del BCU"}
-                
-            # Analizar el HTML para encontrar el valor de la UI
-            soup = self.parse_html(response.text)
+        except Exception as e:
+            import traceback
+            return {"error": f"Error al obtener cotizaciones: {str(e)}", "traceback": traceback.format_exc()}
+
+    def _params_fecha(self, fecha):
+        """Parámetros de la página del BCU para una fecha YYYY-MM-DD"""
+        fecha_obj = datetime.datetime.strptime(fecha, "%Y-%m-%d")
+        return {"fecha": fecha_obj.strftime("%d/%m/%Y")}
+
+    def _registro(self, response, fecha):
+        """Registro de la fecha a partir de la respuesta descargada (ver get_cotizaciones_fecha)"""
+        if not response:
+            if self.circuit_breaker.abierto():
+                return {"error": "El servidor del BCU no está disponible, se reintentará en breve",
+                        "codigo": "BCU_UNAVAILABLE"}
+            return {"error": "No se pudo conectar con el servidor del BCU"}
+            
+        return self.parse_cotizaciones(response.text, fecha)
+
+    def get_cotizaciones_fechas(self, fechas):
+        """
+        Obtiene los registros de varias fechas descargándolas en paralelo
+        
+        Args:
+            fechas (list): Fechas en formato YYYY-MM-DD
             
-            # Buscar la tabla con los datos de cotización
-            tabla_cotizacion = soup.select_one("table.resultado")
+        Returns:
+            list: Registros de get_cotizaciones_fecha en el mismo orden que fechas
+        """
+        if self.transporte_async.multiplexa:
+            return list(self._imap_async(fechas, ventana=self.ventana_async))
+        return self.engine.map(self.get_cotizaciones_fecha, fechas)
+
+    async def get_cotizaciones_fechas_async(self, fechas):
+        """
+        Igual que get_cotizaciones_fechas, como corrutina: todas las descargas
+        comparten el bucle de eventos, acotadas por el límite de tasa, por las
+        conexiones del transporte y por ventana_async
+        """
+        return await self._amap(self.get_cotizaciones_fecha_async, fechas)
+
+    def iter_cotizaciones_fechas(self, fechas):
+        """
+        Igual que get_cotizaciones_fechas pero entrega cada registro apenas está listo
+        
+        Solo se mantienen en curso unas pocas descargas por delante del consumidor,
+        por lo que la memoria no crece con la longitud del rango.
+        
+        Args:
+            fechas (iterable): Fechas en formato YYYY-MM-DD
             
-            if not tabla_cotizacion:
-                return {"error": "No se encontró la tabla de cotizaciones en la página"}
-                
-            # Buscar la fila que contiene "UNIDAD INDEXADA"
-            valor_ui = None
-            moneda_nombre = None
-            for fila in tabla_cotizacion.select("tr"):
-                celdas = fila.select("td")
-                if len(celdas) >= 3:  # Asegurarse de que hay suficientes columnas
-                    moneda = celdas[0].text.strip()
-                    if "UNIDAD INDEXADA" in moneda:
-                        moneda_nombre = moneda
-                        # El valor está en la columna de venta (o compra, son iguales para UI)
-                        valor_texto = celdas[2].text.strip()  # Columna "Venta"
-                        valor_texto = valor_texto.replace(".", "").replace(",", ".")
-                        valor_ui = float(valor_texto)
-                        break
+        Yields:
+            dict: Registros de get_cotizaciones_fecha en el mismo orden que fechas
+        """
+        if self.transporte_async.multiplexa:
+            return self._imap_async(fechas, ventana=2 * self.engine.max_workers)
+        return self.engine.imap(self.get_cotizaciones_fecha, fechas, ventana=2 * self.engine.max_workers)
+
+    def _imap_async(self, fechas, ventana=None):
+        """
+        Fachada síncrona de las descargas asíncronas: envía las fechas al bucle
+        de eventos compartido y entrega los registros en orden (ver FetchEngine.imap)
+        """
+        futuros = deque()
+        try:
+            for fecha in fechas:
+                futuros.append(self.bucle.enviar(self.get_cotizaciones_fecha_async(fecha)))
+                if ventana and len(futuros) >= ventana:
+                    yield futuros.popleft().result()
+            while futuros:
+                yield futuros.popleft().result()
+        finally:
+            # Si el consumidor abandona la iteración, no seguir descargando
+            for futuro in futuros:
+                futuro.cancel()
+
+    async def _amap(self, func, items):
+        """
+        Equivalente asíncrono de FetchEngine.imap con ventana: aplica la corrutina
+        func a cada elemento con a lo sumo ventana_async tareas en curso
+
+        Returns:
+            list: Resultados en el mismo orden que items
+        """
+        resultados = []
+        tareas = deque()
+        try:
+            for item in items:
+                tareas.append(asyncio.ensure_future(func(item)))
+                if len(tareas) >= self.ventana_async:
+                    resultados.append(await tareas.popleft())
+            while tareas:
+                resultados.append(await tareas.popleft())
+        finally:
+            for tarea in tareas:
+                tarea.cancel()
+        return resultados
+
+    def parse_cotizaciones(self, html_content, fecha):
+        """
+        Extrae todas las cotizaciones de una página del BCU ya descargada
+        
+        Args:
+            html_content (str): Contenido HTML de la página de cotizaciones
+            fecha (str): Fecha consultada en formato YYYY-MM-DD
             
-            if valor_ui is None:
+        Returns:
+            dict: Registro de la fecha (ver get_cotizaciones_fecha) o diccionario con 'error'
+        """
+        documento = self.parser.parse(html_content)
+        
+        # Buscar las filas de la tabla con los datos de cotización
+        filas = self.parser.filas(documento)
+        
+        if filas is None:
+            return {"error": "No se encontró la tabla de cotizaciones en la página"}
+        
+        # Recorrer todas las filas de la tabla
+        monedas = []
+        for celdas in filas:
+            if len(celdas) >= 3:  # Asegurarse de que hay suficientes columnas
+                moneda = {
+                    "moneda": celdas[0].strip(),
+                    "valor_compra": self._parse_numero(celdas[1]),
+                    "valor_venta": self._parse_numero(celdas[2])  # Columna "Venta"
+                }
+                if len(celdas) >= 4:
+                    moneda["valor_arbitraje"] = self._parse_numero(celdas[3])
+                monedas.append(moneda)
+        
+        # Identificar las unidades conocidas entre las filas
+        unidades = {}
+        texto_pagina = None
+        for clave, unidad in UNIDADES.items():
+            for moneda in monedas:
+                # El valor está en la columna de venta (o compra, son iguales)
+                if unidad["patron"] in moneda["moneda"] and moneda["valor_venta"] is not None:
+                    unidades[clave] = {
+                        "tipo": unidad["tipo"],
+                        "moneda": moneda["moneda"],
+                        "fecha": fecha,
+                        "valor": moneda["valor_venta"]
+                    }
+                    break
+            else:
                 # Si no se encuentra en la tabla principal, buscar de forma más genérica
-                texto_pagina = soup.get_text()
-                import re
-                match = re.search(r'(UNIDAD INDEXADA)[^0-9,]*([0-9]+,[0-9]+)', texto_pagina, re.IGNORECASE)
+                if texto_pagina is None:
+                    texto_pagina = self.parser.texto(documento)
+                match = unidad["regex"].search(texto_pagina)
                 if match:
-                    moneda_nombre = match.group(1)
-                    valor_texto = match.group(2).replace(".", "").replace(",", ".")
-                    valor_ui = float(valor_texto)
-            
-            if valor_ui is None:
-                return {"error": "No se pudo encontrar el valor de la Unidad Indexada"}
-                
-            return {
-                "tipo": "UI",
-                "moneda": moneda_nombre or "UNIDAD INDEXADA",
-                "fecha": fecha,
-                "valor": valor_ui
-            }
+                    unidades[clave] = {
+                        "tipo": unidad["tipo"],
+                        "moneda": match.group(1).strip(),
+                        "fecha": fecha,
+                        "valor": self._parse_numero(match.group(2))
+                    }
+        
+        return {
+            "fecha": fecha,
+            "monedas": monedas,
+            "unidades": unidades
+        }
+
+    def _get_unidad_cotizacion(self, clave, fecha):
+        """Extrae la cotización de una unidad conocida a partir del registro de la fecha"""
+        return self._unidad_de_registro(clave, self.get_cotizaciones_fecha(fecha))
+
+    async def _get_unidad_cotizacion_async(self, clave, fecha):
+        return self._unidad_de_registro(clave, await self.get_cotizaciones_fecha_async(fecha))
+
+    def _unidad_de_registro(self, clave, registro):
+        unidad = UNIDADES[clave]
+        
+        if 'error' in registro:
+            return registro
+        
+        if clave not in registro["unidades"]:
+            return {"error": f"No se pudo encontrar el valor de la {unidad['nombre']}"}
+        
+        return registro["unidades"][clave]
+        
+    def get_ui_cotizacion(self, fecha):
+        """
+        Obtiene la cotización de la Unidad Indexada para una fecha específica
+        
+        Args:
+            fecha (str): Fecha en formato YYYY-MM-DD
             
-        except Exception as e:
-            import traceback
-            return {"error": f"Error al obtener cotización UI: {str(e)}", "traceback": traceback.format_exc()}
+        Returns:
+            dict: Diccionario con la cotización o mensaje de error
+        """
+        return self._get_unidad_cotizacion('ui', fecha)
                     
     def get_ur_cotizacion(self, fecha):
         """
@@ -145,70 +472,15 @@ class BaseScraper:
         Returns:
             dict: Diccionario con la cotización o mensaje de error
         """
-        try:
-            # URL correcta para la cotización de UR
-            url = "https://www.bcu.gub.uy/Estadisticas-e-Indicadores/Paginas/Cotizaciones.aspx"
-            
-            # Convertir la fecha al formato adecuado para la solicitud
-            fecha_obj = datetime.datetime.strptime(fecha, "%Y-%m-%d")
-            fecha_formateada = fecha_obj.strftime("%d/%m/%Y")
-            
-            # Realizar la solicitud para obtener la información
-            params = {
-                "fecha": fecha_formateada,
-                "tipo": "ur"  # Mantener este parámetro aunque la página maneja todas las monedas juntas
-            }
-            
-            response = self.get(url, params=params)
-            if not response:
-                return {"error": "No se pudo conectar con el servidor del BCU"}
-                    
-            soup = self.parse_html(response.text)
-            
-            # Buscar la tabla con los datos de cotización
-            tabla_cotizacion = soup.select_one("table.resultado")
-            
-            if not tabla_cotizacion:
-                return {"error": "No se encontró la tabla de cotizaciones en la página"}
-                
-            # Buscar la fila que contiene "UNIDAD REAJUSTAB"
-            valor_ur = None
-            moneda_nombre = None
-            for fila in tabla_cotizacion.select("tr"):
-                celdas = fila.select("td")
-                if len(celdas) >= 3:  # Asegurarse de que hay suficientes columnas
-                    moneda = celdas[0].text.strip()
-                    if "UNIDAD REAJUSTAB" in moneda:
-                        moneda_nombre = moneda
-                        # El valor está en la columna de venta (o compra, son iguales)
-                        valor_texto = celdas[2].text.strip()  # Columna "Venta"
-                        valor_texto = valor_texto.replace(".", "").replace(",", ".")
-                        valor_ur = float(valor_texto)
-                        break
-            
-            if valor_ur is None:
-                # Si no se encuentra en la tabla principal, buscar de forma más genérica
-                texto_pagina = soup.get_text()
-                import re
-                match = re.search(r'(UNIDAD REAJUSTAB[^:]*)[^0-9,]*([0-9]+,[0-9]+)', texto_pagina, re.IGNORECASE)
-                if match:
-                    moneda_nombre = match.group(1)
-                    valor_texto = match.group(2).replace(".", "").replace(",", ".")
-                    valor_ur = float(valor_texto)
-            
-            if valor_ur is None:
-                return {"error": "No se pudo encontrar el valor de la Unidad Reajustable"}
-                
-            return {
-                "tipo": "UR",
-                "moneda": moneda_nombre or "UNIDAD REAJUSTABLE",
-                "fecha": fecha,
-                "valor": valor_ur
-            }
-                
-        except Exception as e:
-            import traceback
-            return {"error": f"Error al obtener cotización UR: {str(e)}", "traceback": traceback.format_exc()}
+        return self._get_unidad_cotizacion('ur', fecha)
+
+    async def get_ui_cotizacion_async(self, fecha):
+        """Igual que get_ui_cotizacion, como corrutina"""
+        return await self._get_unidad_cotizacion_async('ui', fecha)
+
+    async def get_ur_cotizacion_async(self, fecha):
+        """Igual que get_ur_cotizacion, como corrutina"""
+        return await self._get_unidad_cotizacion_async('ur', fecha)
 
     def get_ui_historico(self, fecha_inicio=None, fecha_fin=None):
         """
@@ -221,57 +493,7 @@ class BaseScraper:
         Returns:
             dict: Diccionario con los datos históricos o mensaje de error
         """
-        try:
-            # Si no se proporcionan fechas, usar últimos 30 días
-            if not fecha_inicio:
-                fecha_fin_obj = datetime.datetime.now()
-                fecha_inicio_obj = fecha_fin_obj - datetime.timedelta(days=30)
-                fecha_inicio = fecha_inicio_obj.strftime('%Y-%m-%d')
-            
-            if not fecha_fin:
-                fecha_fin = datetime.datetime.now().strftime('%Y-%m-%d')
-            
-            # Convertir fechas a objetos datetime para validación
-            fecha_inicio_obj = datetime.datetime.strptime(fecha_inicio, '%Y-%m-%d')
-            fecha_fin_obj = datetime.datetime.strptime(fecha_fin, '%Y-%m-%d')
-            
-            # Validar que fecha_inicio no sea posterior a fecha_fin
-            if fecha_inicio_obj > fecha_fin_obj:
-                return {'error': 'La fecha de inicio no puede ser posterior a la fecha final'}
-            
-            # Validar que el rango no sea mayor a 365 días
-            dias_diferencia = (fecha_fin_obj - fecha_inicio_obj).days
-            if dias_diferencia > 365:
-                return {'error': 'El rango de fechas no puede ser mayor a 365 días'}
-            
-            # Obtener cotizaciones para cada fecha
-            cotizaciones = []
-            fecha_actual = fecha_inicio_obj
-            while fecha_actual <= fecha_fin_obj:
-                fecha_str = fecha_actual.strftime('%Y-%m-%d')
-                resultado = self.get_ui_cotizacion(fecha_str)
-                
-                if 'error' not in resultado:
-                    cotizaciones.append(resultado)
-                
-                fecha_actual += datetime.timedelta(days=1)
-                # Pequeña pausa para no sobrecargar el servidor
-                time.sleep(random.uniform(0.5, 1))
-            
-            if not cotizaciones:
-                return {'error': 'No se encontraron cotizaciones para el rango de fechas especificado'}
-            
-            return {
-                'tipo': 'UI',
-                'moneda': 'UNIDAD INDEXADA',
-                'fecha_inicio': fecha_inicio,
-                'fecha_fin': fecha_fin,
-                'cotizaciones': cotizaciones
-            }
-            
-        except Exception as e:
-            import traceback
-            return {'error': f'Error al obtener datos históricos UI: {str(e)}', 'traceback': traceback.format_exc()}
+        return self._get_historico('ui', fecha_inicio, fecha_fin)
     
     def get_ur_historico(self, fecha_inicio=None, fecha_fin=None):
         """
@@ -284,54 +506,125 @@ class BaseScraper:
         Returns:
             dict: Diccionario con los datos históricos o mensaje de error
         """
+        return self._get_historico('ur', fecha_inicio, fecha_fin)
+
+    async def get_ui_historico_async(self, fecha_inicio=None, fecha_fin=None):
+        """Igual que get_ui_historico, como corrutina"""
+        return await self._get_historico_async('ui', fecha_inicio, fecha_fin)
+
+    async def get_ur_historico_async(self, fecha_inicio=None, fecha_fin=None):
+        """Igual que get_ur_historico, como corrutina"""
+        return await self._get_historico_async('ur', fecha_inicio, fecha_fin)
+
+    def _get_historico(self, clave, fecha_inicio, fecha_fin):
         try:
-            # Si no se proporcionan fechas, usar últimos 30 días
-            if not fecha_inicio:
-                fecha_fin_obj = datetime.datetime.now()
-                fecha_inicio_obj = fecha_fin_obj - datetime.timedelta(days=30)
-                fecha_inicio = fecha_inicio_obj.strftime('%Y-%m-%d')
-            
-            if not fecha_fin:
-                fecha_fin = datetime.datetime.now().strftime('%Y-%m-%d')
-            
-            # Convertir fechas a objetos datetime para validación
-            fecha_inicio_obj = datetime.datetime.strptime(fecha_inicio, '%Y-%m-%d')
-            fecha_fin_obj = datetime.datetime.strptime(fecha_fin, '%Y-%m-%d')
-            
-            # Validar que fecha_inicio no sea posterior a fecha_fin
-            if fecha_inicio_obj > fecha_fin_obj:
-                return {'error': 'La fecha de inicio no puede ser posterior a la fecha final'}
+            plan = self._planificar_historico(clave, fecha_inicio, fecha_fin)
+            if 'error' in plan:
+                return plan
+            
+            # Obtener cotizaciones para cada fecha en paralelo; el limitador de
+            # tasa global de self.get evita sobrecargar el servidor del BCU
+            if self.transporte_async.multiplexa:
+                resultados = self.bucle.run(self._descargar_unidad_async(clave, plan['descargas']))
+            else:
+                resultados = self.engine.map(lambda fecha: self._get_unidad_cotizacion(clave, fecha), plan['descargas'])
+            return self._armar_historico(clave, plan, resultados)
             
-            # Validar que el rango no sea mayor a 365 días
-            dias_diferencia = (fecha_fin_obj - fecha_inicio_obj).days
-            if dias_diferencia > 365:
-                return {'error': 'El rango de fechas no puede ser mayor a 365 días'}
-            
-            # Obtener cotizaciones para cada fecha
-            cotizaciones = []
-            fecha_actual = fecha_inicio_obj
-            while fecha_actual <= fecha_fin_obj:
-                fecha_str = fecha_actual.strftime('%Y-%m-%d')
-                resultado = self.get_ur_cotizacion(fecha_str)
-                
-                if 'error' not in resultado:
-                    cotizaciones.append(resultado)
-                
-                fecha_actual += datetime.timedelta(days=1)
-                # Pequeña pausa para no sobrecargar el servidor
-                time.sleep(random.uniform(0.5, 1))
-            
-            if not cotizaciones:
-                return {'error': 'No se encontraron cotizaciones para el rango de fechas especificado'}
+        except Exception as e:
+            import traceback
+            return {'error': f"Error al obtener datos históricos {UNIDADES[clave]['tipo']}: {str(e)}",
+                    'traceback': traceback.format_exc()}
+
+    async def _get_historico_async(self, clave, fecha_inicio, fecha_fin):
+        try:
+            plan = self._planificar_historico(clave, fecha_inicio, fecha_fin)
+            if 'error' in plan:
+                return plan
             
-            return {
-                'tipo': 'UR',
-                'moneda': 'UNIDAD REAJUSTABLE',
-                'fecha_inicio': fecha_inicio,
-                'fecha_fin': fecha_fin,
-                'cotizaciones': cotizaciones
-            }
+            resultados = await self._descargar_unidad_async(clave, plan['descargas'])
+            return self._armar_historico(clave, plan, resultados)
             
         except Exception as e:
             import traceback
-            return {'error': f'Error al obtener datos históricos UR: {str(e)}', 'traceback': traceback.format_exc()}
+            return {'error': f"Error al obtener datos históricos {UNIDADES[clave]['tipo']}: {str(e)}",
+                    'traceback': traceback.format_exc()}
+
+    async def _descargar_unidad_async(self, clave, fechas):
+        return await self._amap(lambda fecha: self._get_unidad_cotizacion_async(clave, fecha), fechas)
+
+    def _planificar_historico(self, clave, fecha_inicio, fecha_fin):
+        """
+        Valida el rango de una consulta histórica y elige las fechas a descargar
+        
+        Los días en que el BCU no publica no se consultan. Las unidades de valor
+        mensual (UR) se descargan solo el primer día con publicación de cada mes.
+        
+        Returns:
+            dict: fecha_inicio, fecha_fin, fechas con publicación y descargas, o mensaje de error
+        """
+        # Si no se proporcionan fechas, usar últimos 30 días
+        if not fecha_inicio:
+            fecha_fin_obj = datetime.datetime.now()
+            fecha_inicio_obj = fecha_fin_obj - datetime.timedelta(days=30)
+            fecha_inicio = fecha_inicio_obj.strftime('%Y-%m-%d')
+        
+        if not fecha_fin:
+            fecha_fin = datetime.datetime.now().strftime('%Y-%m-%d')
+        
+        # Convertir fechas a objetos datetime para validación
+        fecha_inicio_obj = datetime.datetime.strptime(fecha_inicio, '%Y-%m-%d')
+        fecha_fin_obj = datetime.datetime.strptime(fecha_fin, '%Y-%m-%d')
+        
+        # Validar que fecha_inicio no sea posterior a fecha_fin
+        if fecha_inicio_obj > fecha_fin_obj:
+            return {'error': 'La fecha de inicio no puede ser posterior a la fecha final'}
+        
+        # Validar que el rango no sea mayor a 365 días
+        dias_diferencia = (fecha_fin_obj - fecha_inicio_obj).days
+        if dias_diferencia > 365:
+            return {'error': 'El rango de fechas no puede ser mayor a 365 días'}
+        
+        fechas = [
+            (fecha_inicio_obj + datetime.timedelta(days=i)).strftime('%Y-%m-%d')
+            for i in range(dias_diferencia + 1)
+        ]
+        fechas = [fecha for fecha in fechas if self.calendario.publica(clave, fecha)]
+        
+        descargas = fechas
+        if self.calendario.es_mensual(clave):
+            primeras = {}
+            for fecha in fechas:
+                primeras.setdefault(fecha[:7], fecha)
+            descargas = list(primeras.values())
+        
+        return {
+            'fecha_inicio': fecha_inicio,
+            'fecha_fin': fecha_fin,
+            'fechas': fechas,
+            'descargas': descargas
+        }
+
+    def _armar_historico(self, clave, plan, resultados):
+        """Arma la respuesta histórica con los resultados de las descargas del plan"""
+        if self.calendario.es_mensual(clave):
+            # El resto de los días del mes se derivan del valor descargado
+            mensuales = {
+                resultado['fecha'][:7]: resultado for resultado in resultados if 'error' not in resultado
+            }
+            cotizaciones = [
+                dict(mensuales[fecha[:7]], fecha=fecha) for fecha in plan['fechas'] if fecha[:7] in mensuales
+            ]
+        else:
+            cotizaciones = [resultado for resultado in resultados if 'error' not in resultado]
+        
+        if not cotizaciones:
+            return {'error': 'No se encontraron cotizaciones para el rango de fechas especificado'}
+        
+        unidad = UNIDADES[clave]
+        return {
+            'tipo': unidad['tipo'],
+            'moneda': unidad['moneda'],
+            'fecha_inicio': plan['fecha_inicio'],
+            'fecha_fin': plan['fecha_fin'],
+            'cotizaciones': cotizaciones
+        }
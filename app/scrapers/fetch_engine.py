@@ -0,0 +1,170 @@
+# app/scrapers/fetch_engine.py
+import threading
+import time
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger('scraper.engine')
+
+
+class TokenBucket:
+    def __init__(self, rate=10.0, capacity=10):
+        """
+        Limitador de tasa tipo token bucket, seguro entre hilos
+
+        Args:
+            rate (float): Tokens repuestos por segundo (peticiones por segundo sostenidas)
+            capacity (int): Máximo de tokens acumulables (ráfaga permitida)
+        """
+        self._lock = threading.Lock()
+        self.configure(rate, capacity)
+
+    def configure(self, rate, capacity=None):
+        """Actualiza la tasa y la capacidad del bucket"""
+        with self._lock:
+            self.rate = float(rate)
+            self.capacity = float(capacity if capacity is not None else max(1, rate))
+            self._tokens = self.capacity
+            self._last = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self, tokens=1):
+        """
+        Bloquea hasta disponer de la cantidad de tokens solicitada
+
+        Args:
+            tokens (int): Tokens a consumir
+
+        Returns:
+            float: Segundos esperados hasta obtener los tokens
+        """
+        if self.rate <= 0:
+            return 0.0
+
+        esperado = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return esperado
+                espera = (tokens - self._tokens) / self.rate
+            time.sleep(espera)
+            esperado += espera
+
+    def reservar(self, tokens=1):
+        """
+        Reserva tokens sin bloquear, para quien espera por su cuenta (asyncio)
+
+        Los tokens se descuentan de inmediato aunque el saldo quede negativo, de
+        modo que las reservas y los acquire siguientes respetan la misma tasa.
+
+        Args:
+            tokens (int): Tokens a consumir
+
+        Returns:
+            float: Segundos que hay que esperar antes de usar los tokens
+        """
+        if self.rate <= 0:
+            return 0.0
+
+        with self._lock:
+            self._refill()
+            self._tokens -= tokens
+            return max(0.0, -self._tokens / self.rate)
+
+
+class FetchEngine:
+    def __init__(self, max_workers=8):
+        """
+        Motor de descargas con concurrencia acotada
+
+        Args:
+            max_workers (int): Número máximo de descargas simultáneas
+        """
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix='bcu-fetch'
+                )
+            return self._executor
+
+    def imap(self, func, items, ventana=None):
+        """
+        Ejecuta func sobre cada elemento de forma concurrente
+
+        Args:
+            func (callable): Función a aplicar a cada elemento
+            items (iterable): Elementos a procesar
+            ventana (int, optional): Máximo de tareas enviadas por delante del
+                consumidor; acota la memoria cuando los resultados se consumen
+                de a uno (por defecto se envían todas de inmediato)
+
+        Yields:
+            Resultados de func en el mismo orden que items
+        """
+        executor = self._get_executor()
+        futures = deque()
+        try:
+            for item in items:
+                futures.append(executor.submit(func, item))
+                if ventana and len(futures) >= ventana:
+                    yield futures.popleft().result()
+            while futures:
+                yield futures.popleft().result()
+        finally:
+            # Si el consumidor abandona la iteración, no seguir descargando
+            for future in futures:
+                future.cancel()
+
+    def map(self, func, items):
+        """Igual que imap pero devuelve una lista con todos los resultados"""
+        return list(self.imap(func, items))
+
+    def shutdown(self, wait=True):
+        """Detiene los hilos del motor"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+
+
+# Instancias compartidas por todo el proceso: el límite de tasa es global
+# para todas las instancias de BaseScraper de un mismo worker.
+default_rate_limiter = TokenBucket()
+default_engine = FetchEngine()
+
+
+def configure(max_workers=None, rate=None, burst=None):
+    """
+    Configura el motor y el limitador compartidos del proceso
+
+    Args:
+        max_workers (int, optional): Descargas simultáneas máximas
+        rate (float, optional): Peticiones por segundo permitidas hacia el BCU
+        burst (int, optional): Ráfaga máxima de peticiones
+    """
+    global default_engine
+
+    if rate is not None:
+        default_rate_limiter.configure(rate, burst)
+
+    if max_workers is not None and max_workers != default_engine.max_workers:
+        default_engine.shutdown(wait=False)
+        default_engine = FetchEngine(max_workers)
+
+    logger.info(
+        f"Motor de descargas configurado: {default_engine.max_workers} hilos, "
+        f"{default_rate_limiter.rate} peticiones/s (ráfaga {default_rate_limiter.capacity:g})"
+    )
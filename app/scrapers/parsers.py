@@ -0,0 +1,109 @@
+# app/scrapers/parsers.py
+import logging
+from bs4 import BeautifulSoup
+
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+except ImportError:  # lxml es opcional: se usa BeautifulSoup
+    etree = None
+    lxml_html = None
+
+logger = logging.getLogger('scraper.parsers')
+
+
+class BeautifulSoupParser:
+    """Backend basado en BeautifulSoup con html.parser (sin dependencias nativas)"""
+    nombre = 'bs4'
+
+    def parse(self, html_content):
+        """
+        Analiza el contenido HTML de la página
+
+        Args:
+            html_content (str): Contenido HTML a analizar
+
+        Returns:
+            Documento propio del backend, para filas() y texto()
+        """
+        return BeautifulSoup(html_content, 'html.parser')
+
+    def filas(self, documento):
+        """
+        Extrae el texto de las celdas de cada fila de la tabla "resultado"
+
+        Args:
+            documento: Documento devuelto por parse()
+
+        Returns:
+            list: Lista de filas, cada una con el texto de sus celdas <td>,
+                o None si la página no tiene la tabla
+        """
+        tabla = documento.select_one("table.resultado")
+        if tabla is None:
+            return None
+        return [[celda.text for celda in fila.select("td")] for fila in tabla.select("tr")]
+
+    def texto(self, documento):
+        """Devuelve todo el texto visible de la página"""
+        return documento.get_text()
+
+
+class LxmlParser:
+    """Backend basado en lxml (libxml2): más rápido, con XPath precompilados"""
+    nombre = 'lxml'
+
+    if etree is not None:
+        _XPATH_FILAS = etree.XPath(
+            "(//table[contains(concat(' ', normalize-space(@class), ' '), ' resultado ')])[1]//tr"
+        )
+        _XPATH_CELDAS = etree.XPath(".//td")
+        _XPATH_TEXTO = etree.XPath("//text()[not(ancestor::script or ancestor::style)]")
+
+    def parse(self, html_content):
+        try:
+            return lxml_html.document_fromstring(html_content)
+        except ValueError:
+            # lxml no acepta texto con declaración de codificación XML
+            return lxml_html.document_fromstring(html_content.encode('utf-8'))
+
+    def filas(self, documento):
+        filas = self._XPATH_FILAS(documento)
+        if not filas:
+            # Distinguir una tabla sin filas de una página sin tabla
+            if not documento.xpath("//table[contains(concat(' ', normalize-space(@class), ' '), ' resultado ')]"):
+                return None
+            return []
+        return [[celda.text_content() for celda in self._XPATH_CELDAS(fila)] for fila in filas]
+
+    def texto(self, documento):
+        return ''.join(self._XPATH_TEXTO(documento))
+
+
+PARSERS = {
+    BeautifulSoupParser.nombre: BeautifulSoupParser,
+    LxmlParser.nombre: LxmlParser,
+}
+
+
+def get_parser(nombre='auto'):
+    """
+    Devuelve el backend de análisis HTML solicitado
+
+    Args:
+        nombre (str): 'lxml', 'bs4' o 'auto' (lxml si está instalado, si no BeautifulSoup)
+
+    Returns:
+        Instancia del backend
+    """
+    if nombre in (None, 'auto'):
+        nombre = LxmlParser.nombre if etree is not None else BeautifulSoupParser.nombre
+
+    if nombre == LxmlParser.nombre and etree is None:
+        logger.warning("lxml no está instalado, se usa BeautifulSoup")
+        nombre = BeautifulSoupParser.nombre
+
+    if nombre not in PARSERS:
+        raise ValueError(f"Parser desconocido: {nombre}. Use 'lxml', 'bs4' o 'auto'")
+
+    return PARSERS[nombre]()
@@ -0,0 +1,236 @@
+# app/scrapers/resiliencia.py
+import time
+import random
+import datetime
+import threading
+import logging
+from email.utils import parsedate_to_datetime
+
+logger = logging.getLogger('scraper.resiliencia')
+
+# Estados del circuito
+CERRADO = 'cerrado'
+ABIERTO = 'abierto'
+SEMIABIERTO = 'semiabierto'
+
+
+class RetryPolicy:
+    def __init__(self, intentos=3, backoff_base=0.5, backoff_max=8.0, connect_timeout=3.05, read_timeout=10.0,
+                 tiempo_max=20.0, retry_after_max=30.0, estados_reintentables=(408, 429, 500, 502, 503, 504)):
+        """
+        Política de reintentos de las peticiones al BCU
+
+        Los reintentos esperan con backoff exponencial y jitter completo (un valor
+        al azar entre 0 y base * 2^intento, acotado por backoff_max) para que los
+        hilos y workers que fallaron juntos no vuelvan a consultar juntos. Si el
+        servidor indica Retry-After se respeta esa espera. Solo se reintentan los
+        errores de conexión y los códigos de estado transitorios; el resto de las
+        respuestas se dan por definitivas.
+
+        Args:
+            intentos (int): Intentos máximos por petición (incluye el primero)
+            backoff_base (float): Segundos de espera base del primer reintento
+            backoff_max (float): Tope de la espera entre intentos
+            connect_timeout (float): Segundos para establecer la conexión
+            read_timeout (float): Segundos de espera de la respuesta una vez conectado
+            tiempo_max (float): Segundos totales que puede durar una petición con sus reintentos
+            retry_after_max (float): Tope de la espera pedida por Retry-After
+            estados_reintentables (tuple): Códigos de estado HTTP que se reintentan
+        """
+        self.intentos = intentos
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.tiempo_max = tiempo_max
+        self.retry_after_max = retry_after_max
+        self.estados_reintentables = frozenset(estados_reintentables)
+
+    @property
+    def timeout(self):
+        """Timeout para requests: (conexión, lectura)"""
+        return (self.connect_timeout, self.read_timeout)
+
+    def reintentable(self, status_code):
+        """Indica si una respuesta con ese código de estado vale la pena reintentarla"""
+        return status_code in self.estados_reintentables
+
+    def espera(self, intento, retry_after=None):
+        """
+        Calcula la espera antes del siguiente intento
+
+        Args:
+            intento (int): Número del intento que falló, desde 0
+            retry_after (str, optional): Valor de la cabecera Retry-After (segundos o fecha HTTP)
+
+        Returns:
+            float: Segundos a esperar
+        """
+        pedida = self._retry_after(retry_after)
+        if pedida is not None:
+            return min(pedida, self.retry_after_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** intento))
+
+    def _retry_after(self, valor):
+        """Segundos indicados por Retry-After, o None si no hay un valor válido"""
+        if not valor:
+            return None
+        try:
+            return max(0.0, float(valor))
+        except ValueError:
+            pass
+        try:
+            fecha = parsedate_to_datetime(valor)
+        except (TypeError, ValueError):
+            return None
+        if fecha.tzinfo is None:
+            fecha = fecha.replace(tzinfo=datetime.timezone.utc)
+        return max(0.0, (fecha - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+
+
+class CircuitBreaker:
+    def __init__(self, umbral_fallas=5, espera_apertura=30.0):
+        """
+        Circuito que deja de consultar al BCU mientras está caído, seguro entre hilos
+
+        Tras umbral_fallas intentos fallidos consecutivos el circuito se abre y
+        las peticiones fallan de inmediato, sin esperar timeouts. Pasados
+        espera_apertura segundos pasa a semiabierto y deja pasar un único
+        intento de prueba: si funciona el circuito se cierra, y si falla vuelve
+        a abrirse.
+
+        Args:
+            umbral_fallas (int): Fallas consecutivas que abren el circuito
+            espera_apertura (float): Segundos que el circuito queda abierto antes de probar
+        """
+        self._lock = threading.Lock()
+        self.configure(umbral_fallas, espera_apertura)
+        self.reset()
+
+    def configure(self, umbral_fallas=None, espera_apertura=None):
+        """Actualiza el umbral y la espera del circuito"""
+        with self._lock:
+            if umbral_fallas is not None:
+                self.umbral_fallas = umbral_fallas
+            if espera_apertura is not None:
+                self.espera_apertura = float(espera_apertura)
+
+    def reset(self):
+        """Cierra el circuito y reinicia los contadores"""
+        with self._lock:
+            self._estado = CERRADO
+            self._fallas = 0
+            self._abierto_desde = None
+            self._sondeo = False
+            self._aperturas = 0
+            self._rechazadas = 0
+
+    def _actualizar(self):
+        if self._estado == ABIERTO and time.monotonic() - self._abierto_desde >= self.espera_apertura:
+            self._estado = SEMIABIERTO
+            self._sondeo = False
+
+    @property
+    def estado(self):
+        """Estado actual: 'cerrado', 'abierto' o 'semiabierto'"""
+        with self._lock:
+            self._actualizar()
+            return self._estado
+
+    def abierto(self):
+        """Indica si el circuito rechaza las peticiones sin consultar al BCU"""
+        with self._lock:
+            self._actualizar()
+            return self._estado == ABIERTO or (self._estado == SEMIABIERTO and self._sondeo)
+
+    def permitir(self):
+        """
+        Indica si se puede intentar una petición
+
+        En estado semiabierto solo el primer hilo obtiene permiso (el intento
+        de prueba); los demás se rechazan hasta conocer su resultado.
+
+        Returns:
+            bool: True si se puede consultar al BCU
+        """
+        with self._lock:
+            self._actualizar()
+            if self._estado == CERRADO:
+                return True
+            if self._estado == SEMIABIERTO and not self._sondeo:
+                self._sondeo = True
+                return True
+            self._rechazadas += 1
+            return False
+
+    def registrar_exito(self):
+        """Registra un intento exitoso: cierra el circuito si estaba a prueba"""
+        with self._lock:
+            if self._estado != CERRADO:
+                logger.info("Circuito del BCU cerrado: el servidor volvió a responder")
+            self._estado = CERRADO
+            self._fallas = 0
+            self._abierto_desde = None
+            self._sondeo = False
+
+    def liberar(self):
+        """
+        Libera el permiso de un intento que terminó sin resultado (por ejemplo,
+        una corrutina cancelada): si era el intento de prueba, otra petición
+        puede volver a intentarlo
+        """
+        with self._lock:
+            if self._estado == SEMIABIERTO:
+                self._sondeo = False
+
+    def registrar_falla(self):
+        """Registra un intento fallido: abre el circuito al llegar al umbral o si falló la prueba"""
+        with self._lock:
+            self._fallas += 1
+            if self._estado == SEMIABIERTO or (self._estado == CERRADO and self._fallas >= self.umbral_fallas):
+                logger.warning(
+                    f"Circuito del BCU abierto tras {self._fallas} fallas consecutivas: "
+                    f"nuevo intento en {self.espera_apertura:g} s"
+                )
+                self._estado = ABIERTO
+                self._abierto_desde = time.monotonic()
+                self._sondeo = False
+                self._aperturas += 1
+
+    def stats(self):
+        """
+        Devuelve el estado del circuito para /api/health
+
+        Returns:
+            dict: estado, fallas consecutivas, segundos hasta el próximo intento
+                de prueba (si está abierto), aperturas y peticiones rechazadas
+        """
+        with self._lock:
+            self._actualizar()
+            reintento = None
+            if self._estado == ABIERTO:
+                reintento = round(max(0.0, self.espera_apertura - (time.monotonic() - self._abierto_desde)), 1)
+            return {
+                'estado': self._estado,
+                'fallas_consecutivas': self._fallas,
+                'umbral_fallas': self.umbral_fallas,
+                'reintento_en': reintento,
+                'aperturas': self._aperturas,
+                'rechazadas': self._rechazadas
+            }
+
+
+# Circuito compartido por todas las instancias de BaseScraper del proceso:
+# si el BCU no responde, ningún hilo del worker lo sigue esperando
+default_circuit_breaker = CircuitBreaker()
+
+
+def configure(umbral_fallas=None, espera_apertura=None):
+    """
+    Configura el circuito compartido del proceso
+
+    Args:
+        umbral_fallas (int, optional): Fallas consecutivas que abren el circuito
+        espera_apertura (float, optional): Segundos que el circuito queda abierto antes de probar
+    """
+    default_circuit_breaker.configure(umbral_fallas, espera_apertura)
@@ -0,0 +1,224 @@
+# app/scrapers/transporte.py
+import asyncio
+import threading
+import weakref
+import logging
+import functools
+
+import requests
+
+try:
+    import httpx
+except ImportError:  # httpx es opcional: las descargas asíncronas usan hilos
+    httpx = None
+
+logger = logging.getLogger('scraper.transporte')
+
+
+class RequestsTransport:
+    """Transporte síncrono sobre una sesión de requests con conexiones persistentes"""
+    nombre = 'requests'
+
+    def __init__(self, session):
+        self.session = session
+        # El certificado del BCU puede no estar en el bundle por defecto y las
+        # peticiones se hacen sin verificarlo: se silencian las advertencias
+        requests.packages.urllib3.disable_warnings(requests.packages.urllib3.exceptions.InsecureRequestWarning)
+
+    def get(self, url, params=None, timeout=None):
+        """
+        Realiza una petición GET
+
+        Args:
+            url (str): URL a la que hacer la petición
+            params (dict, optional): Parámetros de la URL
+            timeout (tuple, optional): Segundos de (conexión, lectura)
+
+        Returns:
+            Response: Respuesta con status_code, headers y text
+        """
+        return self.session.get(url, params=params, timeout=timeout, verify=False)
+
+
+class HttpxTransport:
+    """
+    Transporte asíncrono sobre httpx
+
+    Muchas descargas comparten un solo bucle de eventos y un pool de
+    conexiones, sin un hilo por petición. Se crea un cliente por bucle, ya que
+    un cliente de httpx no se puede usar desde otro bucle.
+
+    Las peticiones que esperan conexión hacen cola en un semáforo propio y no
+    en el pool de httpx. Por encima de unas 32 conexiones simultáneas, el costo
+    de CPU del pool supera lo que se gana en concurrencia.
+    """
+    nombre = 'httpx'
+    multiplexa = True
+
+    def __init__(self, headers=None, max_conexiones=32):
+        """
+        Args:
+            headers (dict, optional): Cabeceras de todas las peticiones
+            max_conexiones (int): Conexiones simultáneas máximas por bucle
+        """
+        self.headers = dict(headers or {})
+        self.max_conexiones = max_conexiones
+        self._clientes = weakref.WeakKeyDictionary()
+
+    def _cliente(self):
+        """Devuelve el cliente y el semáforo de conexiones del bucle actual"""
+        bucle = asyncio.get_running_loop()
+        cliente = self._clientes.get(bucle)
+        if cliente is None:
+            cliente = (
+                httpx.AsyncClient(
+                    headers=self.headers,
+                    verify=False,
+                    limits=httpx.Limits(max_connections=self.max_conexiones,
+                                        max_keepalive_connections=self.max_conexiones)
+                ),
+                asyncio.Semaphore(self.max_conexiones)
+            )
+            self._clientes[bucle] = cliente
+        return cliente
+
+    async def get(self, url, params=None, timeout=None):
+        """
+        Realiza una petición GET sin bloquear el bucle de eventos
+
+        Args:
+            url (str): URL a la que hacer la petición
+            params (dict, optional): Parámetros de la URL
+            timeout (tuple, optional): Segundos de (conexión, lectura)
+
+        Returns:
+            httpx.Response: Respuesta con status_code, headers y text
+        """
+        if timeout is not None:
+            conexion, lectura = timeout
+            timeout = httpx.Timeout(lectura, connect=conexion)
+        cliente, conexiones = self._cliente()
+        async with conexiones:
+            return await cliente.get(url, params=params, timeout=timeout)
+
+    async def cerrar(self):
+        """Cierra el cliente del bucle actual"""
+        cliente = self._clientes.pop(asyncio.get_running_loop(), None)
+        if cliente is not None:
+            await cliente[0].aclose()
+
+
+class ThreadedAsyncTransport:
+    """
+    Transporte asíncrono que delega en un transporte síncrono ejecutado en hilos
+
+    Mantiene la misma interfaz que HttpxTransport cuando httpx no está
+    instalado; cada petición en curso ocupa un hilo.
+    """
+    nombre = 'hilos'
+    multiplexa = False
+
+    def __init__(self, transporte):
+        """
+        Args:
+            transporte (RequestsTransport): Transporte síncrono a usar
+        """
+        self.transporte = transporte
+
+    async def get(self, url, params=None, timeout=None):
+        bucle = asyncio.get_running_loop()
+        return await bucle.run_in_executor(
+            None, functools.partial(self.transporte.get, url, params=params, timeout=timeout)
+        )
+
+    async def cerrar(self):
+        pass
+
+
+def get_transporte_async(nombre='auto', transporte=None, headers=None, max_conexiones=32):
+    """
+    Devuelve el transporte asíncrono solicitado
+
+    Args:
+        nombre (str): 'httpx', 'hilos' o 'auto' (httpx si está instalado, si no hilos)
+        transporte (RequestsTransport, optional): Transporte síncrono para 'hilos'
+        headers (dict, optional): Cabeceras de todas las peticiones (httpx)
+        max_conexiones (int): Conexiones simultáneas máximas (httpx)
+
+    Returns:
+        Instancia del transporte
+    """
+    if nombre in (None, 'auto'):
+        nombre = HttpxTransport.nombre if httpx is not None else ThreadedAsyncTransport.nombre
+
+    if nombre == HttpxTransport.nombre and httpx is None:
+        logger.warning("httpx no está instalado, las descargas asíncronas usan hilos")
+        nombre = ThreadedAsyncTransport.nombre
+
+    if nombre == HttpxTransport.nombre:
+        return HttpxTransport(headers=headers, max_conexiones=max_conexiones)
+    if nombre == ThreadedAsyncTransport.nombre:
+        return ThreadedAsyncTransport(transporte or RequestsTransport(requests.Session()))
+
+    raise ValueError(f"Transporte asíncrono desconocido: {nombre}. Use 'httpx', 'hilos' o 'auto'")
+
+
+class EventLoopThread:
+    def __init__(self, nombre='bcu-async'):
+        """
+        Bucle de eventos en un hilo propio, para usar corrutinas desde código síncrono
+
+        Es la fachada síncrona de las descargas asíncronas: las rutas de Flask
+        y los hilos del planificador envían corrutinas a este bucle y esperan su
+        resultado, mientras el bucle multiplexa todas las descargas en curso.
+
+        Args:
+            nombre (str): Nombre del hilo
+        """
+        self.nombre = nombre
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+
+    def _get_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name=self.nombre, daemon=True)
+                self._thread.start()
+            return self._loop
+
+    def enviar(self, corrutina):
+        """
+        Programa una corrutina en el bucle
+
+        Args:
+            corrutina: Corrutina a ejecutar
+
+        Returns:
+            concurrent.futures.Future: Resultado de la corrutina
+        """
+        loop = self._get_loop()
+        if threading.current_thread() is self._thread:
+            corrutina.close()
+            raise RuntimeError("No se puede esperar una corrutina desde el propio bucle de eventos")
+        return asyncio.run_coroutine_threadsafe(corrutina, loop)
+
+    def run(self, corrutina, timeout=None):
+        """Ejecuta una corrutina en el bucle y espera su resultado"""
+        return self.enviar(corrutina).result(timeout)
+
+    def stop(self):
+        """Detiene el bucle y su hilo"""
+        with self._lock:
+            if self._loop is None:
+                return
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+            self._loop = None
+            self._thread = None
+
+
+# Bucle compartido por todas las instancias de BaseScraper del proceso
+default_event_loop = EventLoopThread()
@@ -0,0 +1,811 @@
+import os
+import math
+import hashlib
+import time
+import socket
+import tempfile
+import threading
+import logging
+from contextlib import contextmanager
+from urllib.parse import urlparse, unquote
+
+from app.utils.base_sqlite import BaseSQLite
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin coordinación entre procesos
+    fcntl = None
+
+logger = logging.getLogger('app.cache.backend')
+
+# Parámetros por consulta en las lecturas múltiples (SQLite admite 999 en versiones antiguas)
+LOTE_MGET = 500
+
+
+# Políticas de desalojo: orden en que se eligen las entradas a eliminar
+POLITICAS = {
+    'lru': 'ultimo_acceso, clave',           # Las usadas hace más tiempo
+    'lfu': 'accesos, ultimo_acceso, clave',  # Las menos usadas, y entre ellas las más antiguas
+}
+
+# Al superar el presupuesto se desaloja hasta esta fracción, para no volver a
+# desalojar con cada escritura
+OBJETIVO_DESALOJO = 0.9
+
+# Segundos entre envejecimientos de los contadores de accesos: los contadores
+# se reducen a la mitad para que una entrada que fue popular no quede para siempre
+INTERVALO_ENVEJECIMIENTO = 60 * 60
+
+# Entradas desalojadas por consulta
+LOTE_DESALOJO = 256
+
+
+class IndiceSQLite(BaseSQLite):
+    def __init__(self, db_path, columnas=''):
+        """
+        Metadatos de las entradas de la caché en una base SQLite
+
+        Base de ManifiestoCache y de SQLiteBackend. La tabla 'entradas' guarda
+        para cada clave el momento a partir del cual puede eliminarse, su tamaño
+        y sus accesos: la limpieza consulta solo las vencidas y el desalojo elige
+        las menos usadas, en ambos casos sin recorrer la caché. La tabla
+        'pedidos' cuenta las veces que se pidió guardar cada clave sujeta a
+        admisión.
+
+        Args:
+            db_path (str): Ruta del archivo SQLite
+            columnas (str): Columnas adicionales de la tabla de entradas
+        """
+        self._columnas = columnas
+        super().__init__(db_path)
+
+    def _crear_esquema(self, conn):
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS entradas (
+                clave TEXT PRIMARY KEY,{self._columnas}
+                hasta REAL,
+                tamano INTEGER NOT NULL DEFAULT 0,
+                accesos INTEGER NOT NULL DEFAULT 0,
+                ultimo_acceso REAL NOT NULL DEFAULT 0
+            )
+        """)
+        self._migrar_esquema(conn)
+        conn.execute("CREATE INDEX IF NOT EXISTS entradas_hasta ON entradas (hasta) WHERE hasta IS NOT NULL")
+        conn.execute("CREATE INDEX IF NOT EXISTS entradas_lru ON entradas (ultimo_acceso)")
+        conn.execute("CREATE INDEX IF NOT EXISTS entradas_lfu ON entradas (accesos, ultimo_acceso)")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS pedidos (
+                clave TEXT PRIMARY KEY,
+                veces INTEGER NOT NULL,
+                desde REAL NOT NULL
+            ) WITHOUT ROWID
+        """)
+        conn.execute("CREATE TABLE IF NOT EXISTS estado (clave TEXT PRIMARY KEY, valor TEXT)")
+
+    def _migrar_esquema(self, conn):
+        """Agrega a una tabla de entradas anterior las columnas de tamaño y accesos"""
+        existentes = {fila[1] for fila in conn.execute("PRAGMA table_info(entradas)")}
+        for columna in ('tamano', 'accesos', 'ultimo_acceso'):
+            if columna not in existentes:
+                conn.execute(f"ALTER TABLE entradas ADD COLUMN {columna} "
+                             f"{'INTEGER' if columna != 'ultimo_acceso' else 'REAL'} NOT NULL DEFAULT 0")
+        if 'tamano' not in existentes and 'contenido' in existentes:
+            conn.execute("UPDATE entradas SET tamano = length(contenido)")
+
+    def registrar_accesos(self, accesos):
+        """
+        Suma accesos a las entradas en una sola transacción
+
+        Args:
+            accesos (dict): Por clave, (cantidad de accesos, timestamp del último)
+        """
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "UPDATE entradas SET accesos = accesos + ?, ultimo_acceso = MAX(ultimo_acceso, ?) WHERE clave = ?",
+                [(veces, ultimo, key) for key, (veces, ultimo) in accesos.items()]
+            )
+
+    def contar_pedido(self, key, ventana):
+        """
+        Registra un pedido de guardar una clave y devuelve cuántos hubo en la ventana
+
+        Args:
+            key (str): Clave pedida
+            ventana (float): Segundos durante los que se acumulan los pedidos
+
+        Returns:
+            int: Pedidos de la clave desde el primero de la ventana, incluido este
+        """
+        ahora = time.time()
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT INTO pedidos (clave, veces, desde) VALUES (?, 1, ?) "
+                "ON CONFLICT (clave) DO UPDATE SET "
+                "veces = CASE WHEN excluded.desde - desde <= ? THEN veces + 1 ELSE 1 END, "
+                "desde = CASE WHEN excluded.desde - desde <= ? THEN desde ELSE excluded.desde END",
+                (key, ahora, ventana, ventana)
+            )
+            return conn.execute("SELECT veces FROM pedidos WHERE clave = ?", (key,)).fetchone()[0]
+
+    def purgar_pedidos(self, ventana):
+        """Elimina los pedidos cuya ventana ya terminó"""
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM pedidos WHERE desde < ?", (time.time() - ventana,))
+
+    def uso(self):
+        """
+        Devuelve el tamaño de la caché
+
+        Returns:
+            dict: 'entradas' y 'bytes'
+        """
+        entradas, total = self._connect().execute(
+            "SELECT COUNT(*), COALESCE(SUM(tamano), 0) FROM entradas"
+        ).fetchone()
+        return {'entradas': entradas, 'bytes': total}
+
+    def desalojar(self, max_bytes=None, max_entradas=None, politica='lfu'):
+        """
+        Elimina entradas según la política hasta volver dentro del presupuesto
+
+        Solo actúa si se supera alguno de los límites, y en ese caso desaloja
+        hasta OBJETIVO_DESALOJO de cada uno.
+
+        Args:
+            max_bytes (int, optional): Tamaño máximo de la caché en bytes
+            max_entradas (int, optional): Cantidad máxima de entradas
+            politica (str): 'lru' o 'lfu'
+
+        Returns:
+            list: Pares (clave, tamaño) de las entradas desalojadas
+        """
+        orden = POLITICAS[politica]
+        uso = self.uso()
+        entradas, total = uso['entradas'], uso['bytes']
+        if (not max_entradas or entradas <= max_entradas) and (not max_bytes or total <= max_bytes):
+            return []
+
+        objetivo_entradas = max_entradas * OBJETIVO_DESALOJO if max_entradas else math.inf
+        objetivo_bytes = max_bytes * OBJETIVO_DESALOJO if max_bytes else math.inf
+        conn = self._connect()
+        desalojadas = []
+        while entradas > objetivo_entradas or total > objetivo_bytes:
+            lote = []
+            for key, tamano in conn.execute(
+                    f"SELECT clave, tamano FROM entradas ORDER BY {orden} LIMIT {LOTE_DESALOJO}"):
+                if entradas <= objetivo_entradas and total <= objetivo_bytes:
+                    break
+                lote.append((key, tamano))
+                entradas -= 1
+                total -= tamano
+            if not lote:
+                break
+            with conn:
+                conn.executemany("DELETE FROM entradas WHERE clave = ?", [(key,) for key, _ in lote])
+            desalojadas.extend(lote)
+
+        if politica == 'lfu':
+            self._envejecer()
+        return desalojadas
+
+    def _envejecer(self):
+        """Reduce a la mitad los contadores de accesos, como mucho una vez por INTERVALO_ENVEJECIMIENTO"""
+        ahora = time.time()
+        conn = self._connect()
+        with conn:
+            fila = conn.execute("SELECT valor FROM estado WHERE clave = 'envejecido'").fetchone()
+            if fila is not None and ahora - float(fila[0]) < INTERVALO_ENVEJECIMIENTO:
+                return
+            conn.execute("UPDATE entradas SET accesos = accesos / 2 WHERE accesos > 0")
+            conn.execute("INSERT OR REPLACE INTO estado (clave, valor) VALUES ('envejecido', ?)", (str(ahora),))
+
+
+class ManifiestoCache(IndiceSQLite):
+    """
+    Índice SQLite de las entradas de la caché en archivos
+
+    Guarda la expiración, el tamaño y los accesos de cada archivo, de modo que
+    ni la limpieza ni el desalojo necesitan recorrer el directorio.
+    """
+
+    def _crear_esquema(self, conn):
+        super()._crear_esquema(conn)
+        existe = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'expiraciones'"
+        ).fetchone()
+        if existe:
+            # Manifiesto anterior, solo con las entradas que expiran: se vuelve a indexar
+            conn.execute("DROP TABLE expiraciones")
+            conn.execute("DELETE FROM estado WHERE clave = 'completo'")
+
+    def registrar(self, key, hasta, tamano):
+        """Registra (o actualiza) la expiración y el tamaño de una entrada, conservando sus accesos"""
+        self.registrar_varias([(key, hasta, tamano)])
+
+    def registrar_varias(self, entradas):
+        """Registra en una sola transacción tuplas (clave, hasta, tamaño)"""
+        ahora = time.time()
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "INSERT INTO entradas (clave, hasta, tamano, ultimo_acceso) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (clave) DO UPDATE SET hasta = excluded.hasta, tamano = excluded.tamano",
+                [(key, hasta, tamano, ahora) for key, hasta, tamano in entradas]
+            )
+
+    def existe(self, key):
+        """Indica si una clave está registrada en el índice"""
+        return self._connect().execute("SELECT 1 FROM entradas WHERE clave = ?", (key,)).fetchone() is not None
+
+    def quitar(self, key):
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM entradas WHERE clave = ?", (key,))
+
+    def vencidas(self, limite):
+        """Claves que pueden eliminarse antes de `limite`, según el índice"""
+        filas = self._connect().execute(
+            "SELECT clave FROM entradas WHERE hasta IS NOT NULL AND hasta < ?", (limite,)
+        )
+        return [clave for clave, in filas]
+
+    def reclamar(self, key, limite):
+        """
+        Quita una clave vencida del índice si sigue vencida
+
+        Si otro worker volvió a escribir la entrada después de consultar las
+        vencidas, su nueva expiración ya está registrada y la clave no se reclama.
+
+        Returns:
+            bool: True si la entrada puede eliminarse
+        """
+        conn = self._connect()
+        with conn:
+            return conn.execute(
+                "DELETE FROM entradas WHERE clave = ? AND hasta < ?", (key, limite)
+            ).rowcount > 0
+
+    @property
+    def completo(self):
+        """Indica si todos los archivos existentes fueron indexados alguna vez"""
+        fila = self._connect().execute("SELECT valor FROM estado WHERE clave = 'completo'").fetchone()
+        return fila is not None
+
+    def marcar_completo(self):
+        conn = self._connect()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO estado (clave, valor) VALUES ('completo', '1')")
+
+
+class FileBackend:
+    """
+    Almacenamiento de la caché en archivos, uno por clave
+
+    Los archivos se reparten en 256 subdirectorios según los dos primeros
+    caracteres hexadecimales del hash de la clave, para que ningún directorio
+    crezca sin límite. Cada entrada se escribe en un archivo temporal y se
+    renombra sobre el definitivo con os.replace, que es atómico: un lector de
+    otro worker ve el contenido anterior o el nuevo completo, nunca un archivo
+    a medio escribir. La expiración, el tamaño y los accesos de cada entrada
+    se registran en un manifiesto (ManifiestoCache), de modo que ni purgar ni
+    desalojar recorren el directorio.
+
+    Registrar una entrada y publicar su archivo, o comprobar el manifiesto y
+    eliminar el archivo, se hacen con el lock de archivo del subdirectorio
+    tomado: la limpieza y el desalojo de un worker nunca eliminan el archivo
+    que otro acaba de escribir.
+    """
+    nombre = 'archivos'
+
+    def __init__(self, directorio, manifiesto=None):
+        """
+        Args:
+            directorio (str): Directorio de los archivos de caché
+            manifiesto (str, optional): Base SQLite del índice de entradas
+                (por defecto directorio/expiraciones.db)
+        """
+        self.directorio = directorio
+        self.temporales = os.path.join(directorio, '.tmp')
+        os.makedirs(self.temporales, exist_ok=True)
+        self.manifiesto = ManifiestoCache(manifiesto or os.path.join(directorio, 'expiraciones.db'))
+        self._migrar()
+
+    def ruta(self, key):
+        """Ruta del archivo de una clave, en el subdirectorio de su hash"""
+        prefijo = hashlib.sha1(key.encode('utf-8')).hexdigest()[:2]
+        return os.path.join(self.directorio, prefijo, f"{key}.json")
+
+    @contextmanager
+    def _bloqueo(self, key):
+        """Lock de archivo, entre procesos, del subdirectorio de una clave"""
+        if fcntl is None:
+            yield
+            return
+        subdirectorio = os.path.dirname(self.ruta(key))
+        os.makedirs(subdirectorio, exist_ok=True)
+        with open(os.path.join(subdirectorio, '.lock'), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _migrar(self):
+        """
+        Mueve a su subdirectorio los archivos de la estructura anterior, todos
+        en la raíz del directorio
+
+        Si la entrada ya se volvió a escribir en su subdirectorio, se conserva
+        esa y se descarta la anterior. Los archivos movidos se indexan en la
+        primera limpieza.
+        """
+        movidos = 0
+        for filename in os.listdir(self.directorio):
+            origen = os.path.join(self.directorio, filename)
+            if not filename.endswith('.json') or not os.path.isfile(origen):
+                continue
+            destino = self.ruta(filename[:-len('.json')])
+            try:
+                if os.path.exists(destino):
+                    os.remove(origen)
+                else:
+                    os.makedirs(os.path.dirname(destino), exist_ok=True)
+                    os.replace(origen, destino)
+                    movidos += 1
+            except FileNotFoundError:
+                # Otro worker lo movió primero
+                continue
+        if movidos:
+            logger.info(f"Se movieron {movidos} archivos de caché a subdirectorios")
+
+    def get(self, key):
+        """
+        Lee el contenido de una entrada
+
+        Args:
+            key (str): Clave de la entrada
+
+        Returns:
+            bytes: Contenido guardado o None si no existe
+        """
+        try:
+            with open(self.ruta(key), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def mget(self, keys):
+        """
+        Lee varias entradas
+
+        Args:
+            keys (iterable): Claves de las entradas
+
+        Returns:
+            dict: Contenido por clave, solo de las que existen
+        """
+        contenidos = {}
+        for key in keys:
+            contenido = self.get(key)
+            if contenido is not None:
+                contenidos[key] = contenido
+        return contenidos
+
+    def set(self, key, contenido, hasta=None):
+        """
+        Guarda una entrada de forma atómica y registra su expiración y su tamaño
+
+        Args:
+            key (str): Clave de la entrada
+            contenido (bytes): Contenido a guardar
+            hasta (float, optional): Timestamp a partir del cual la entrada puede
+                eliminarse (None si nunca)
+        """
+        ruta = self.ruta(key)
+        fd, temporal = tempfile.mkstemp(dir=self.temporales, prefix=f"{key}.", suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(contenido)
+            # La expiración se registra antes de publicar el archivo y con el lock
+            # tomado: una limpieza o un desalojo simultáneos ven la entrada nueva
+            with self._bloqueo(key):
+                self.manifiesto.registrar(key, hasta, len(contenido))
+                os.replace(temporal, ruta)
+        except BaseException:
+            try:
+                os.remove(temporal)
+            except OSError:
+                pass
+            raise
+
+    def delete(self, key):
+        """
+        Elimina una entrada
+
+        Returns:
+            bool: True si existía
+        """
+        with self._bloqueo(key):
+            self.manifiesto.quitar(key)
+            try:
+                os.remove(self.ruta(key))
+                return True
+            except FileNotFoundError:
+                return False
+
+    def modificado(self, key):
+        """Fecha de modificación del archivo, para las entradas del formato sin metadatos"""
+        return os.path.getmtime(self.ruta(key))
+
+    def purgar(self, limite, expira_de):
+        """
+        Elimina las entradas que pueden eliminarse antes de `limite`
+
+        Las candidatas salen del manifiesto, sin recorrer el directorio. Solo la
+        primera vez (caché creada antes del manifiesto) se leen todos los
+        archivos para indexarlos. También se eliminan los temporales que haya
+        dejado una escritura interrumpida.
+
+        Args:
+            limite (float): Timestamp límite
+            expira_de (callable): Función (clave, contenido) -> timestamp a partir del
+                cual la entrada puede eliminarse, o None si nunca; se usa al indexar
+
+        Returns:
+            int: Cantidad de entradas eliminadas
+        """
+        if not self.manifiesto.completo:
+            self._indexar(expira_de)
+        self._limpiar_temporales()
+
+        count = 0
+        for key in self.manifiesto.vencidas(limite):
+            try:
+                with self._bloqueo(key):
+                    if not self.manifiesto.reclamar(key, limite):
+                        continue
+                    os.remove(self.ruta(key))
+                count += 1
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.error(f"Error al eliminar caché expirada {key}: {str(e)}")
+        return count
+
+    def registrar_accesos(self, accesos):
+        self.manifiesto.registrar_accesos(accesos)
+
+    def contar_pedido(self, key, ventana):
+        return self.manifiesto.contar_pedido(key, ventana)
+
+    def purgar_pedidos(self, ventana):
+        self.manifiesto.purgar_pedidos(ventana)
+
+    def uso(self):
+        return self.manifiesto.uso()
+
+    def desalojar(self, max_bytes=None, max_entradas=None, politica='lfu'):
+        """
+        Desaloja según el manifiesto (ver IndiceSQLite.desalojar) y elimina los archivos
+
+        Si otro worker volvió a escribir una entrada después de que se quitó del
+        manifiesto, su registro nuevo ya está en el manifiesto: el archivo no se
+        elimina y la entrada no cuenta como desalojada.
+        """
+        desalojadas = []
+        for key, tamano in self.manifiesto.desalojar(max_bytes, max_entradas, politica):
+            try:
+                with self._bloqueo(key):
+                    if self.manifiesto.existe(key):
+                        continue
+                    os.remove(self.ruta(key))
+                desalojadas.append((key, tamano))
+            except FileNotFoundError:
+                desalojadas.append((key, tamano))
+            except Exception as e:
+                logger.error(f"Error al eliminar caché desalojada {key}: {str(e)}")
+        return desalojadas
+
+    def _indexar(self, expira_de):
+        """Registra en el manifiesto la expiración y el tamaño de todos los archivos existentes"""
+        expiraciones = []
+        for prefijo in os.listdir(self.directorio):
+            subdirectorio = os.path.join(self.directorio, prefijo)
+            if len(prefijo) != 2 or not os.path.isdir(subdirectorio):
+                continue
+            for filename in os.listdir(subdirectorio):
+                if not filename.endswith('.json'):
+                    continue
+                key = filename[:-len('.json')]
+                try:
+                    with open(os.path.join(subdirectorio, filename), 'rb') as f:
+                        contenido = f.read()
+                    expiraciones.append((key, expira_de(key, contenido), len(contenido)))
+                except OSError:
+                    continue
+        self.manifiesto.registrar_varias(expiraciones)
+        self.manifiesto.marcar_completo()
+        logger.info(f"Manifiesto de la caché creado: {len(expiraciones)} entradas")
+
+    def _limpiar_temporales(self):
+        """Elimina los temporales de más de una hora (escrituras interrumpidas)"""
+        for filename in os.listdir(self.temporales):
+            file_path = os.path.join(self.temporales, filename)
+            try:
+                if os.path.getmtime(file_path) < time.time() - 60 * 60:
+                    os.remove(file_path)
+            except OSError:
+                pass
+
+
+class SQLiteBackend(IndiceSQLite):
+    """
+    Almacenamiento de la caché en una base SQLite en modo WAL
+
+    Todos los workers de la máquina comparten la misma base: las escrituras
+    son transacciones (atómicas por definición) y en modo WAL los lectores no
+    esperan a los escritores. La expiración, el tamaño y los accesos se
+    guardan junto al contenido (ver IndiceSQLite), por lo que purgar y
+    desalojar no necesitan leer las entradas.
+    """
+    nombre = 'sqlite'
+
+    def __init__(self, db_path):
+        """
+        Args:
+            db_path (str): Ruta del archivo SQLite
+        """
+        super().__init__(db_path, columnas='\n                contenido BLOB NOT NULL,')
+
+    def get(self, key):
+        fila = self._connect().execute("SELECT contenido FROM entradas WHERE clave = ?", (key,)).fetchone()
+        return fila[0] if fila is not None else None
+
+    def mget(self, keys):
+        """Lee varias entradas con una consulta por cada LOTE_MGET claves"""
+        keys = list(keys)
+        conn = self._connect()
+        contenidos = {}
+        for i in range(0, len(keys), LOTE_MGET):
+            lote = keys[i:i + LOTE_MGET]
+            filas = conn.execute(
+                f"SELECT clave, contenido FROM entradas WHERE clave IN ({','.join('?' * len(lote))})",
+                lote
+            )
+            contenidos.update(filas)
+        return contenidos
+
+    def set(self, key, contenido, hasta=None):
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT INTO entradas (clave, contenido, hasta, tamano, ultimo_acceso) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (clave) DO UPDATE SET "
+                "contenido = excluded.contenido, hasta = excluded.hasta, tamano = excluded.tamano",
+                (key, contenido, hasta, len(contenido), time.time())
+            )
+
+    def delete(self, key):
+        conn = self._connect()
+        with conn:
+            return conn.execute("DELETE FROM entradas WHERE clave = ?", (key,)).rowcount > 0
+
+    def modificado(self, key):
+        return None
+
+    def purgar(self, limite, expira_de=None):
+        """Elimina con una sola consulta las entradas que pueden eliminarse antes de `limite`"""
+        conn = self._connect()
+        with conn:
+            return conn.execute("DELETE FROM entradas WHERE hasta IS NOT NULL AND hasta < ?", (limite,)).rowcount
+
+
+class ConexionRedis:
+    def __init__(self, host='localhost', port=6379, db=0, password=None, timeout=2.0):
+        """
+        Conexión mínima con un servidor Redis (protocolo RESP2)
+
+        Implementa solo lo que usa la caché: enviar un comando y leer su
+        respuesta. No es segura entre hilos; RedisBackend usa una por hilo.
+
+        Args:
+            host (str): Servidor
+            port (int): Puerto
+            db (int): Base de datos a seleccionar
+            password (str, optional): Contraseña (AUTH)
+            timeout (float): Segundos de espera de conexión y de respuesta
+        """
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._archivo = self.sock.makefile('rb')
+        if password:
+            self.comando('AUTH', password)
+        if db:
+            self.comando('SELECT', db)
+
+    def comando(self, *args):
+        """
+        Envía un comando y devuelve su respuesta
+
+        Args:
+            *args: Nombre del comando y argumentos (str, bytes o números)
+
+        Returns:
+            Respuesta del servidor: bytes, int, str, lista o None
+
+        Raises:
+            RuntimeError: Si el servidor responde con un error
+            ConnectionError: Si la conexión se cierra o la respuesta no es válida
+        """
+        partes = [b'*%d\r\n' % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode('utf-8')
+            partes.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+        self.sock.sendall(b''.join(partes))
+        return self._leer()
+
+    def _leer(self):
+        linea = self._archivo.readline()
+        if not linea.endswith(b'\r\n'):
+            raise ConnectionError("Conexión con Redis cerrada")
+        tipo, valor = linea[:1], linea[1:-2]
+        if tipo == b'$':
+            longitud = int(valor)
+            if longitud < 0:
+                return None
+            datos = self._archivo.read(longitud + 2)
+            if len(datos) != longitud + 2:
+                raise ConnectionError("Conexión con Redis cerrada")
+            return datos[:-2]
+        if tipo == b'*':
+            longitud = int(valor)
+            return None if longitud < 0 else [self._leer() for _ in range(longitud)]
+        if tipo == b':':
+            return int(valor)
+        if tipo == b'+':
+            return valor.decode('utf-8')
+        if tipo == b'-':
+            raise RuntimeError(f"Redis: {valor.decode('utf-8', 'replace')}")
+        raise ConnectionError(f"Respuesta de Redis no válida: {linea!r}")
+
+    def cerrar(self):
+        try:
+            self._archivo.close()
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class RedisBackend:
+    """
+    Almacenamiento de la caché en un servidor Redis (o compatible)
+
+    Permite compartir la caché entre workers de distintas máquinas. SET es
+    atómico en el servidor y las lecturas múltiples se hacen con MGET. Las
+    entradas se guardan con un tiempo de vida, por lo que el servidor las
+    elimina solo y purgar no tiene nada que hacer.
+    """
+    nombre = 'redis'
+
+    def __init__(self, url='redis://localhost:6379/0', prefijo='bcu:cache:', timeout=2.0):
+        """
+        Args:
+            url (str): redis://[:contraseña@]servidor[:puerto][/base]
+            prefijo (str): Prefijo de las claves, para compartir el servidor con otros usos
+            timeout (float): Segundos de espera de conexión y de respuesta
+        """
+        partes = urlparse(url)
+        if partes.scheme != 'redis':
+            raise ValueError(f"URL de Redis no válida: {url}. Use redis://servidor:puerto/base")
+        self.host = partes.hostname or 'localhost'
+        self.port = partes.port or 6379
+        self.db = int(partes.path.lstrip('/') or 0)
+        self.password = unquote(partes.password) if partes.password else None
+        self.prefijo = prefijo
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _conexion(self):
+        """Conexión del hilo actual; un proceso bifurcado abre las suyas"""
+        conexion = getattr(self._local, 'conexion', None)
+        if conexion is None or self._local.pid != os.getpid():
+            conexion = ConexionRedis(self.host, self.port, self.db, self.password, self.timeout)
+            self._local.conexion = conexion
+            self._local.pid = os.getpid()
+        return conexion
+
+    def _comando(self, *args):
+        """Envía un comando; si la conexión falló se descarta para abrir otra en la próxima llamada"""
+        try:
+            return self._conexion().comando(*args)
+        except (OSError, ValueError):
+            conexion = getattr(self._local, 'conexion', None)
+            if conexion is not None:
+                conexion.cerrar()
+                self._local.conexion = None
+            raise
+
+    def get(self, key):
+        return self._comando('GET', self.prefijo + key)
+
+    def mget(self, keys):
+        """Lee varias entradas con un MGET por cada LOTE_MGET claves"""
+        keys = list(keys)
+        contenidos = {}
+        for i in range(0, len(keys), LOTE_MGET):
+            lote = keys[i:i + LOTE_MGET]
+            valores = self._comando('MGET', *[self.prefijo + key for key in lote])
+            contenidos.update((key, valor) for key, valor in zip(lote, valores) if valor is not None)
+        return contenidos
+
+    def set(self, key, contenido, hasta=None):
+        if hasta is None:
+            self._comando('SET', self.prefijo + key, contenido)
+        else:
+            segundos = max(1, math.ceil(hasta - time.time()))
+            self._comando('SET', self.prefijo + key, contenido, 'EX', segundos)
+
+    def delete(self, key):
+        return self._comando('DEL', self.prefijo + key) > 0
+
+    def modificado(self, key):
+        return None
+
+    def purgar(self, limite, expira_de=None):
+        """Redis elimina las entradas al vencer su tiempo de vida"""
+        return 0
+
+    def registrar_accesos(self, accesos):
+        """Redis lleva sus propios accesos para su política de desalojo"""
+
+    def contar_pedido(self, key, ventana):
+        """Cuenta los pedidos con INCR sobre una clave que vence al terminar la ventana"""
+        pedido = self.prefijo + 'pedidos:' + key
+        veces = self._comando('INCR', pedido)
+        if veces == 1:
+            self._comando('EXPIRE', pedido, max(1, math.ceil(ventana)))
+        return veces
+
+    def purgar_pedidos(self, ventana):
+        pass
+
+    def uso(self):
+        """El tamaño lo controla el servidor (maxmemory): no se informa"""
+        return None
+
+    def desalojar(self, max_bytes=None, max_entradas=None, politica='lfu'):
+        """
+        El presupuesto de Redis se configura en el servidor (maxmemory y
+        maxmemory-policy allkeys-lru o allkeys-lfu), que desaloja por su cuenta
+        """
+        return []
+
+
+BACKENDS = (FileBackend.nombre, SQLiteBackend.nombre, RedisBackend.nombre)
+
+
+def get_backend(nombre='archivos', cache_dir=None, sqlite_path=None, redis_url=None):
+    """
+    Devuelve el almacenamiento de caché solicitado
+
+    Args:
+        nombre (str): 'archivos', 'sqlite' o 'redis'
+        cache_dir (str): Directorio de la caché (archivos, y por defecto de la base SQLite)
+        sqlite_path (str, optional): Base SQLite (por defecto cache_dir/cache.db)
+        redis_url (str, optional): URL del servidor Redis
+
+    Returns:
+        Instancia del almacenamiento
+    """
+    if nombre in (None, FileBackend.nombre):
+        return FileBackend(cache_dir)
+    if nombre == SQLiteBackend.nombre:
+        return SQLiteBackend(sqlite_path or os.path.join(cache_dir, 'cache.db'))
+    if nombre == RedisBackend.nombre:
+        return RedisBackend(redis_url) if redis_url else RedisBackend()
+
+    raise ValueError(f"Almacenamiento de caché desconocido: {nombre}. Use {', '.join(repr(b) for b in BACKENDS)}")
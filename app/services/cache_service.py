@@ -1,22 +1,181 @@
-import os
 import json
+import time
+import hashlib
+import threading
 from datetime import datetime
 import logging
+from app.utils.json_codec import get_codec
+from app.utils.compresion import CODIFICACIONES, comprimir
+from app.services.cache_backends import FileBackend, POLITICAS
 
 logger = logging.getLogger('app.cache')
 
+# Clases de expiración soportadas por la caché
+TTL_DEFAULT = 'default'        # Expira tras `timeout` segundos
+TTL_INMUTABLE = 'inmutable'    # Nunca expira (fechas pasadas ya publicadas)
+TTL_RECIENTE = 'reciente'      # Fecha actual o aún no publicada: expira pronto
+TTL_NEGATIVO = 'negativo'      # Resultados "sin datos" (fines de semana, feriados)
+
+# Formato de archivo: una línea con los metadatos y a continuación los bytes
+# JSON de la respuesta, que se envían tal cual sin volver a serializarlos,
+# seguidos de sus variantes precomprimidas si las hay
+FORMATO_BYTES = 2
+
+# Accesos acumulados en memoria a partir de los cuales se registran en el almacenamiento
+LOTE_ACCESOS = 512
+
+def _etag(cuerpo):
+    """Etag fuerte (sin comillas) de los bytes de una respuesta"""
+    return hashlib.sha256(cuerpo).hexdigest()[:32]
+
+class EntradaCache:
+    """
+    Entrada vigente de la caché
+    
+    Guarda los bytes JSON compactos de la respuesta, listos para enviarse, y
+    solo los deserializa si alguien pide los datos. Los datos devueltos se
+    comparten entre peticiones, por lo que no deben modificarse. Las entradas
+    grandes incluyen además sus variantes comprimidas ('gzip', 'br').
+    """
+    __slots__ = ('cuerpo', 'meta', 'variantes', '_data', '_codec')
+    
+    def __init__(self, cuerpo, meta, codec, data=None, variantes=None):
+        self.cuerpo = cuerpo
+        self.meta = meta
+        self.variantes = variantes or {}
+        self._codec = codec
+        self._data = data
+    
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = self._codec.loads(self.cuerpo)
+        return self._data
+
 class CacheService:
-    def __init__(self, cache_dir, timeout=24*60*60):
+    def __init__(self, cache_dir, timeout=24*60*60, ttl_reciente=60*60, ttl_negativo=6*60*60, memory=None,
+                 max_staleness=0, codec=None, compresion_min_bytes=None, backend=None, max_bytes=None,
+                 max_entradas=None, politica='lfu', admision_prefijos=(), admision_min_pedidos=2,
+                 admision_ventana=24*60*60, intervalo_presupuesto=5):
         """
         Inicializa el servicio de caché
         
         Args:
             cache_dir (str): Directorio para almacenar datos en caché
             timeout (int): Tiempo de expiración en segundos (default: 24 horas)
+            ttl_reciente (int): Expiración de las entradas de clase 'reciente' (default: 1 hora)
+            ttl_negativo (int): Expiración de las entradas de clase 'negativo' (default: 6 horas)
+            memory (MemoryLRU, optional): Caché en memoria compartida delante del disco
+            max_staleness (int): Segundos tras la expiración durante los que una entrada
+                todavía puede servirse como obsoleta (default: 0, nunca)
+            codec (optional): Codificador JSON de las entradas (por defecto get_codec())
+            compresion_min_bytes (int, optional): Tamaño a partir del cual se guardan
+                variantes precomprimidas de la respuesta (default: None, nunca)
+            backend (optional): Almacenamiento de las entradas (FileBackend, SQLiteBackend o
+                RedisBackend; por defecto archivos en cache_dir)
+            max_bytes (int, optional): Tamaño máximo del almacenamiento (default: None, sin límite)
+            max_entradas (int, optional): Entradas máximas del almacenamiento (default: None, sin límite)
+            politica (str): Política de desalojo al superar el presupuesto: 'lru' o 'lfu'
+            admision_prefijos (tuple): Prefijos de las claves que solo se guardan a partir
+                del pedido número admision_min_pedidos (por ejemplo, 'historico_'), salvo
+                las que no superan el tamaño por entrada del presupuesto
+            admision_min_pedidos (int): Pedidos de guardar una de esas claves, dentro de
+                admision_ventana, necesarios para guardarla (default: 2)
+            admision_ventana (int): Segundos durante los que se cuentan los pedidos (default: 24 horas)
+            intervalo_presupuesto (float): Segundos mínimos entre controles del presupuesto
+                al escribir (default: 5)
         """
         self.cache_dir = cache_dir
+        self.backend = backend or FileBackend(cache_dir)
+        self.memory = memory
+        self.max_staleness = max_staleness
         self.timeout = timeout
-        os.makedirs(cache_dir, exist_ok=True)
+        self.codec = codec or get_codec()
+        self.compresion_min_bytes = compresion_min_bytes
+        self.ttls = {
+            TTL_DEFAULT: timeout,
+            TTL_INMUTABLE: None,
+            TTL_RECIENTE: ttl_reciente,
+            TTL_NEGATIVO: ttl_negativo
+        }
+        if politica not in POLITICAS:
+            raise ValueError(f"Política de desalojo desconocida: {politica}. Use 'lru' o 'lfu'")
+        self.max_bytes = max_bytes
+        self.max_entradas = max_entradas
+        self.politica = politica
+        self.admision_prefijos = tuple(admision_prefijos or ())
+        self.admision_min_pedidos = admision_min_pedidos
+        self.admision_ventana = admision_ventana
+        # Parte del presupuesto que corresponde a cada entrada: las respuestas que
+        # no la superan no desplazan a otras y se guardan sin control de admisión
+        self.admision_max_bytes = max_bytes // max_entradas if max_bytes and max_entradas else 0
+        self.intervalo_presupuesto = intervalo_presupuesto
+        
+        # Accesos pendientes de registrar en el almacenamiento: se acumulan en
+        # memoria y se registran por lotes para no escribir en cada acierto
+        self._accesos = {}
+        self._accesos_lock = threading.Lock()
+        self._presupuesto_lock = threading.Lock()
+        self._ultimo_presupuesto = time.monotonic()
+        self.desalojadas = 0
+        self.bytes_desalojados = 0
+        self.no_admitidas = 0
+    
+    def _decodificar(self, key, contenido):
+        """
+        Decodifica el contenido guardado de una entrada
+        
+        Las entradas guardan una línea de metadatos seguida de los bytes de la
+        respuesta, que no se deserializan al leerlas. Los archivos con formatos
+        anteriores (JSON con '_meta' y 'data', o solo datos que expiran según su
+        fecha de modificación y el timeout por defecto) se siguen leyendo.
+        
+        Returns:
+            tuple: (EntradaCache, tamaño en bytes). Los metadatos incluyen 'expira'
+                (timestamp o None si nunca expira), 'creado', 'clase', 'etag' y 'error'
+        """
+        cabecera, _, cuerpo = contenido.partition(b'\n')
+        try:
+            meta = self.codec.loads(cabecera)
+        except ValueError:
+            meta = None
+        if isinstance(meta, dict) and meta.get('formato') == FORMATO_BYTES:
+            variantes = {}
+            if meta.get('variantes'):
+                # El cuerpo va primero y detrás cada variante, con las longitudes en los metadatos
+                resto, cuerpo = cuerpo, cuerpo[:meta['longitud']]
+                inicio = meta['longitud']
+                for codificacion, longitud in meta['variantes']:
+                    variantes[codificacion] = resto[inicio:inicio + longitud]
+                    inicio += longitud
+            return EntradaCache(cuerpo, meta, self.codec, variantes=variantes), len(contenido)
+        
+        entry = json.loads(contenido)
+        if isinstance(entry, dict) and '_meta' in entry and 'data' in entry:
+            data, meta = entry['data'], entry['_meta']
+        else:
+            creado = self.backend.modificado(key) or 0
+            data, meta = entry, {'clase': TTL_DEFAULT, 'creado': creado, 'expira': creado + self.timeout}
+        
+        cuerpo = self.codec.dumps(data)
+        meta.update(etag=_etag(cuerpo), error=isinstance(data, dict) and 'error' in data)
+        return EntradaCache(cuerpo, meta, self.codec, data), len(contenido)
+    
+    def _leer(self, key):
+        """
+        Lee y decodifica una entrada del almacenamiento, vigente o no
+        
+        Returns:
+            tuple: (EntradaCache, tamaño en bytes) o None si no existe o no se pudo leer
+        """
+        try:
+            contenido = self.backend.get(key)
+            if contenido is None:
+                return None
+            return self._decodificar(key, contenido)
+        except Exception as e:
+            logger.error(f"Error al leer caché {key}: {str(e)}")
+            return None
     
     def get(self, key):
         """
@@ -28,79 +187,334 @@ class CacheService:
         Returns:
             dict: Datos almacenados en caché o None si no existe o expiró
         """
-        cache_file = os.path.join(self.cache_dir, f"{key}.json")
+        entrada = self.get_entry(key)
+        return entrada.data if entrada is not None else None
+    
+    def get_entry(self, key):
+        """
+        Obtiene una entrada vigente de la caché con sus bytes y sus metadatos
         
-        if not os.path.exists(cache_file):
-            return None
+        Los bytes se pueden enviar tal cual como respuesta y los metadatos
+        permiten responder peticiones condicionales (ETag, Last-Modified), en
+        ambos casos sin deserializar ni volver a serializar los datos.
         
-        # Verificar si el archivo ha expirado
-        file_time = os.path.getmtime(cache_file)
-        age_seconds = datetime.now().timestamp() - file_time
+        Args:
+            key (str): Clave para identificar el valor en caché
+            
+        Returns:
+            EntradaCache: Entrada con 'cuerpo', 'meta' y 'data', o None si no existe o expiró
+        """
+        # Primero la memoria: los aciertos no tocan el almacenamiento
+        if self.memory is not None:
+            entry = self.memory.get_entry(key)
+            if entry is not None:
+                self._registrar_acceso(key)
+                return entry[0]
         
-        if age_seconds > self.timeout:
-            logger.info(f"Caché expirada para {key}")
+        leida = self._leer(key)
+        if leida is None:
             return None
+        return self._vigente(key, *leida)
+    
+    def get_many(self, keys):
+        """
+        Obtiene varios valores vigentes de la caché
+        
+        Las claves que no están en memoria se leen del almacenamiento en una
+        sola operación (una consulta en SQLite, un MGET en Redis) en lugar de
+        una por clave.
+        
+        Args:
+            keys (iterable): Claves de los valores
+            
+        Returns:
+            dict: Datos por clave, solo de las que existen y no expiraron
+        """
+        resultados = {}
+        faltantes = []
+        for key in dict.fromkeys(keys):
+            entry = self.memory.get_entry(key) if self.memory is not None else None
+            if entry is not None:
+                self._registrar_acceso(key)
+                resultados[key] = entry[0].data
+            else:
+                faltantes.append(key)
+        
+        if not faltantes:
+            return resultados
         
         try:
-            with open(cache_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                logger.info(f"Datos obtenidos de caché: {key}")
-                return data
+            contenidos = self.backend.mget(faltantes)
         except Exception as e:
-            logger.error(f"Error al leer caché {key}: {str(e)}")
+            logger.error(f"Error al leer caché ({len(faltantes)} claves): {str(e)}")
+            return resultados
+        
+        for key, contenido in contenidos.items():
+            try:
+                entrada = self._vigente(key, *self._decodificar(key, contenido))
+            except Exception as e:
+                logger.error(f"Error al leer caché {key}: {str(e)}")
+                continue
+            if entrada is not None:
+                resultados[key] = entrada.data
+        return resultados
+    
+    def _vigente(self, key, entrada, size):
+        """Devuelve la entrada si no expiró, promoviéndola a memoria, o None si expiró"""
+        expira = entrada.meta.get('expira')
+        if expira is not None and datetime.now().timestamp() > expira:
+            logger.info(f"Caché expirada para {key}")
             return None
+        
+        logger.info(f"Datos obtenidos de caché: {key}")
+        self._registrar_acceso(key)
+        
+        # Promover a memoria para los próximos accesos
+        if self.memory is not None:
+            self.memory.set(key, entrada, expira, size, entrada.meta)
+        
+        return entrada
     
-    def set(self, key, data):
+    def get_stale(self, key, max_staleness=None):
+        """
+        Obtiene un valor expirado que todavía puede servirse mientras se refresca
+        
+        Args:
+            key (str): Clave para identificar el valor en caché
+            max_staleness (float, optional): Antigüedad máxima admitida en lugar de
+                la configurada (por ejemplo, sin límite mientras el BCU está caído)
+            
+        Returns:
+            tuple: (datos, segundos desde que expiró) o None si no existe, no ha
+                expirado, expiró hace más de max_staleness segundos o es un resultado
+                negativo (un error no se sirve como obsoleto: se vuelve a consultar)
+        """
+        max_staleness = self.max_staleness if max_staleness is None else max_staleness
+        if not max_staleness:
+            return None
+        
+        leida = self._leer(key)
+        if leida is None:
+            return None
+        entrada = leida[0]
+        if entrada.meta.get('clase') == TTL_NEGATIVO or entrada.meta.get('error'):
+            return None
+        
+        expira = entrada.meta.get('expira')
+        if expira is None:
+            return None
+        
+        vencido = datetime.now().timestamp() - expira
+        if vencido <= 0 or vencido > max_staleness:
+            return None
+        
+        logger.info(f"Datos obsoletos obtenidos de caché: {key} (expiró hace {vencido:.0f} s)")
+        return entrada.data, vencido
+    
+    def set(self, key, data, ttl_clase=TTL_DEFAULT):
         """
         Almacena un valor en la caché
         
         Args:
             key (str): Clave para identificar el valor
             data (dict): Datos a almacenar
+            ttl_clase (str): Clase de expiración (TTL_DEFAULT, TTL_INMUTABLE, TTL_RECIENTE o TTL_NEGATIVO)
             
         Returns:
-            bool: True si se guardó correctamente, False en caso contrario
+            bool: True si se guardó correctamente, False en caso contrario (también
+                si no fue admitida y solo se guardó en memoria)
         """
-        cache_file = os.path.join(self.cache_dir, f"{key}.json")
+        ahora = datetime.now().timestamp()
+        ttl = self.ttls[ttl_clase]
         
         try:
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=4)
-            logger.info(f"Datos guardados en caché: {key}")
-            return True
+            # Los datos se serializan una sola vez: esos bytes se guardan y se envían
+            cuerpo = self.codec.dumps(data)
+            meta = {
+                'formato': FORMATO_BYTES,
+                'clase': ttl_clase,
+                'creado': ahora,
+                'expira': ahora + ttl if ttl is not None else None,
+                'etag': _etag(cuerpo),
+                'error': isinstance(data, dict) and 'error' in data
+            }
+            
+            # Las respuestas grandes se comprimen una sola vez, al guardarlas
+            variantes = {}
+            if self.compresion_min_bytes is not None and len(cuerpo) >= self.compresion_min_bytes:
+                variantes = {codificacion: comprimir(cuerpo, codificacion) for codificacion in CODIFICACIONES}
+                meta['longitud'] = len(cuerpo)
+                meta['variantes'] = [[codificacion, len(v)] for codificacion, v in variantes.items()]
+            
+            contenido = b''.join([self.codec.dumps(meta), b'\n', cuerpo, *variantes.values()])
+            admitida = (not key.startswith(self.admision_prefijos) or len(contenido) <= self.admision_max_bytes
+                        or self._admitir(key))
+            if admitida:
+                self.backend.set(key, contenido, self._hasta(meta['expira']))
+                logger.info(f"Datos guardados en caché: {key} ({ttl_clase})")
+                
+                if time.monotonic() - self._ultimo_presupuesto >= self.intervalo_presupuesto:
+                    self.aplicar_presupuesto()
+            
+            # Escritura simultánea en memoria. Una entrada no admitida se guarda
+            # solo en memoria: la respuesta que la generó conserva su ETag
+            if self.memory is not None:
+                self.memory.set(key, EntradaCache(cuerpo, meta, self.codec, data, variantes), meta['expira'],
+                                len(contenido), meta)
+            return admitida
         except Exception as e:
             logger.error(f"Error al guardar en caché {key}: {str(e)}")
             return False
     
+    def _admitir(self, key):
+        """
+        Control de admisión: una clave sujeta a admisión se guarda solo a partir
+        de su pedido número admision_min_pedidos dentro de la ventana
+        
+        Los rangos históricos que se piden una sola vez no ocupan el
+        almacenamiento ni desalojan a las cotizaciones diarias más usadas. Los
+        pedidos se cuentan en el almacenamiento, por lo que se suman los de
+        todos los workers.
+        """
+        try:
+            pedidos = self.backend.contar_pedido(key, self.admision_ventana)
+        except Exception as e:
+            logger.error(f"Error al contar pedidos de caché {key}: {str(e)}")
+            return True
+        
+        if pedidos < self.admision_min_pedidos:
+            with self._accesos_lock:
+                self.no_admitidas += 1
+            logger.info(f"Caché no admitida para {key}: pedido {pedidos} de {self.admision_min_pedidos}")
+            return False
+        return True
+    
+    def _registrar_acceso(self, key):
+        """Acumula un acceso a una clave para la política de desalojo"""
+        if not self.max_bytes and not self.max_entradas:
+            return
+        with self._accesos_lock:
+            veces = self._accesos.get(key, (0, 0))[0]
+            self._accesos[key] = (veces + 1, time.time())
+            lleno = len(self._accesos) >= LOTE_ACCESOS
+        if lleno:
+            self._volcar_accesos()
+    
+    def _volcar_accesos(self):
+        """Registra en el almacenamiento los accesos acumulados"""
+        with self._accesos_lock:
+            accesos, self._accesos = self._accesos, {}
+        if not accesos:
+            return
+        try:
+            self.backend.registrar_accesos(accesos)
+        except Exception as e:
+            logger.error(f"Error al registrar accesos de caché: {str(e)}")
+    
+    def aplicar_presupuesto(self):
+        """
+        Desaloja entradas si el almacenamiento supera max_bytes o max_entradas
+        
+        Se llama al escribir, como mucho cada intervalo_presupuesto segundos, y
+        en cada limpieza. Si otro hilo del worker ya está desalojando no hace nada.
+        
+        Returns:
+            int: Cantidad de entradas desalojadas
+        """
+        if not self._presupuesto_lock.acquire(blocking=False):
+            return 0
+        try:
+            self._ultimo_presupuesto = time.monotonic()
+            self._volcar_accesos()
+            if not self.max_bytes and not self.max_entradas:
+                return 0
+            
+            try:
+                desalojadas = self.backend.desalojar(self.max_bytes, self.max_entradas, self.politica)
+            except Exception as e:
+                logger.error(f"Error al desalojar caché: {str(e)}")
+                return 0
+            
+            if desalojadas:
+                liberados = sum(tamano for _, tamano in desalojadas)
+                with self._accesos_lock:
+                    self.desalojadas += len(desalojadas)
+                    self.bytes_desalojados += liberados
+                logger.info(
+                    f"Se desalojaron {len(desalojadas)} entradas de caché ({liberados} bytes, {self.politica})"
+                )
+            return len(desalojadas)
+        finally:
+            self._presupuesto_lock.release()
+    
+    def stats(self):
+        """
+        Devuelve el uso del almacenamiento y los contadores de desalojo y admisión
+        
+        Returns:
+            dict: almacenamiento, uso (entradas y bytes, si el almacenamiento lo
+                informa), presupuesto, política y contadores de este worker
+        """
+        try:
+            uso = self.backend.uso()
+        except Exception as e:
+            logger.error(f"Error al consultar el uso de la caché: {str(e)}")
+            uso = None
+        with self._accesos_lock:
+            return {
+                'backend': self.backend.nombre,
+                'entradas': uso['entradas'] if uso else None,
+                'bytes': uso['bytes'] if uso else None,
+                'max_entradas': self.max_entradas,
+                'max_bytes': self.max_bytes,
+                'politica': self.politica,
+                'desalojadas': self.desalojadas,
+                'bytes_desalojados': self.bytes_desalojados,
+                'no_admitidas': self.no_admitidas
+            }
+    
+    def _hasta(self, expira):
+        """Momento a partir del cual una entrada ya no puede servirse ni como obsoleta"""
+        return expira + self.max_staleness if expira is not None else None
+    
     def delete(self, key):
         """Elimina un valor de la caché"""
-        cache_file = os.path.join(self.cache_dir, f"{key}.json")
+        if self.memory is not None:
+            self.memory.delete(key)
         
-        if os.path.exists(cache_file):
-            try:
-                os.remove(cache_file)
+        try:
+            if self.backend.delete(key):
                 logger.info(f"Caché eliminada: {key}")
                 return True
-            except Exception as e:
-                logger.error(f"Error al eliminar caché {key}: {str(e)}")
+        except Exception as e:
+            logger.error(f"Error al eliminar caché {key}: {str(e)}")
         
         return False
     
     def clear_expired(self):
-        """Elimina todos los archivos de caché expirados"""
-        count = 0
-        for filename in os.listdir(self.cache_dir):
-            if filename.endswith('.json'):
-                file_path = os.path.join(self.cache_dir, filename)
-                file_time = os.path.getmtime(file_path)
-                age_seconds = datetime.now().timestamp() - file_time
-                
-                if age_seconds > self.timeout:
-                    try:
-                        os.remove(file_path)
-                        count += 1
-                    except Exception as e:
-                        logger.error(f"Error al eliminar caché expirada {filename}: {str(e)}")
-        
-        logger.info(f"Se eliminaron {count} archivos de caché expirados")
-        return count
\ No newline at end of file
+        """Elimina las entradas de caché expiradas que ya no pueden servirse como obsoletas"""
+        def hasta_de(key, contenido):
+            try:
+                return self._hasta(self._decodificar(key, contenido)[0].meta.get('expira'))
+            except Exception as e:
+                # Entradas ilegibles se consideran expiradas
+                logger.error(f"Error al leer caché {key}: {str(e)}")
+                return 0
+        
+        try:
+            count = self.backend.purgar(datetime.now().timestamp(), hasta_de)
+        except Exception as e:
+            logger.error(f"Error al limpiar la caché: {str(e)}")
+            count = 0
+        
+        try:
+            self.backend.purgar_pedidos(self.admision_ventana)
+        except Exception as e:
+            logger.error(f"Error al limpiar los pedidos de caché: {str(e)}")
+        
+        if self.memory is not None:
+            self.memory.clear_expired()
+        
+        logger.info(f"Se eliminaron {count} entradas de caché expiradas")
+        self.aplicar_presupuesto()
+        return count
@@ -0,0 +1,273 @@
+import os
+import json
+import time
+import uuid
+import queue
+import datetime
+import threading
+import logging
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin coordinación entre procesos
+    fcntl = None
+
+logger = logging.getLogger('app.jobs')
+
+# Estados de un trabajo
+JOB_PENDIENTE = 'pendiente'
+JOB_EN_CURSO = 'en_curso'
+JOB_COMPLETADO = 'completado'
+JOB_ERROR = 'error'
+
+class HistoricoJobService:
+    def __init__(self, controller, jobs_dir, max_workers=2, max_pendientes=20, lote=25,
+                 retencion=7*24*60*60):
+        """
+        Trabajos en segundo plano para consultas históricas largas
+
+        Un rango frío de un año puede tardar más que el timeout de un worker de
+        gunicorn. En lugar de resolverlo dentro de la petición, se crea un trabajo
+        que descarga los días faltantes en un pool de hilos acotado. Cada lote
+        descargado queda en el almacén de observaciones y el estado del trabajo se
+        guarda como JSON en jobs_dir, por lo que cualquier worker puede consultarlo
+        y un trabajo interrumpido se retoma (sin repetir descargas) con reanudar().
+
+        Args:
+            controller (CotizacionController): Controlador con el almacén y el scraper
+            jobs_dir (str): Directorio donde se guardan el estado y el resultado de los trabajos
+            max_workers (int): Trabajos ejecutados en simultáneo por worker
+            max_pendientes (int): Trabajos sin terminar admitidos antes de rechazar nuevos
+            lote (int): Días descargados entre cada guardado del progreso
+            retencion (int): Segundos que se conservan los trabajos terminados
+        """
+        self.controller = controller
+        self.jobs_dir = jobs_dir
+        self.max_workers = max_workers
+        self.max_pendientes = max_pendientes
+        self.lote = lote
+        self.retencion = retencion
+        # Hilos daemon: si el proceso termina, el trabajo queda en curso y se reanuda después
+        self._cola = queue.Queue()
+        self._hilos = []
+        self._activos = {}
+        self._lock = threading.Lock()
+        os.makedirs(jobs_dir, exist_ok=True)
+
+    def _encolar(self, job):
+        self._cola.put(job)
+        with self._lock:
+            if not self._hilos:
+                for i in range(self.max_workers):
+                    hilo = threading.Thread(target=self._trabajar, name=f'historico-job-{i}', daemon=True)
+                    hilo.start()
+                    self._hilos.append(hilo)
+
+    def _trabajar(self):
+        while True:
+            self._ejecutar(self._cola.get())
+
+    def _ruta(self, job_id, sufijo='json'):
+        return os.path.join(self.jobs_dir, f"{job_id}.{sufijo}")
+
+    def _leer(self, ruta):
+        try:
+            with open(ruta, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _escribir(self, ruta, data):
+        # Escritura atómica: quien lee el estado nunca ve un archivo a medio escribir
+        temporal = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(temporal, ruta)
+
+    def _guardar(self, job, **cambios):
+        job.update(cambios)
+        job['actualizado'] = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self._escribir(self._ruta(job['id']), job)
+
+    def crear(self, tipo_unidad, fecha_inicio=None, fecha_fin=None):
+        """
+        Crea un trabajo para obtener un rango histórico
+
+        Si ya hay un trabajo sin terminar para la misma unidad y rango, se
+        devuelve ese mismo trabajo en lugar de crear otro.
+
+        Args:
+            tipo_unidad (str): 'ui' para Unidad Indexada, 'ur' para Unidad Reajustable
+            fecha_inicio (str, optional): Fecha inicial en formato YYYY-MM-DD
+            fecha_fin (str, optional): Fecha final en formato YYYY-MM-DD
+
+        Returns:
+            dict: Estado del trabajo o mensaje de error
+        """
+        rango = self.controller.validar_rango(tipo_unidad, fecha_inicio, fecha_fin)
+        if 'error' in rango:
+            return rango
+
+        with self._lock:
+            for job in self._activos.values():
+                if (job['tipo_unidad'], job['fecha_inicio'], job['fecha_fin']) == \
+                        (tipo_unidad, rango['fecha_inicio'], rango['fecha_fin']):
+                    return dict(job)
+
+            if len(self._activos) >= self.max_pendientes:
+                return {
+                    'error': 'Hay demasiados trabajos en curso, intente más tarde',
+                    'codigo': 'TOO_MANY_JOBS'
+                }
+
+            ahora = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            job = {
+                'id': uuid.uuid4().hex,
+                'tipo_unidad': tipo_unidad,
+                'fecha_inicio': rango['fecha_inicio'],
+                'fecha_fin': rango['fecha_fin'],
+                'estado': JOB_PENDIENTE,
+                'dias_solicitados': len(rango['fechas']),
+                'dias_a_descargar': None,
+                'dias_procesados': 0,
+                'dias_pendientes': None,
+                'creado': ahora,
+                'actualizado': ahora,
+                # No se llama 'error' para no confundir el estado con una respuesta de error
+                'mensaje': None
+            }
+            self._escribir(self._ruta(job['id']), job)
+            self._activos[job['id']] = job
+
+        self._encolar(job)
+        logger.info(f"Trabajo {job['id']} creado: {tipo_unidad} {rango['fecha_inicio']}..{rango['fecha_fin']}")
+        return dict(job)
+
+    def estado(self, job_id):
+        """
+        Devuelve el estado y el progreso de un trabajo
+
+        Args:
+            job_id (str): Identificador del trabajo
+
+        Returns:
+            dict: Estado del trabajo o mensaje de error si no existe
+        """
+        # El id se usa como nombre de archivo: solo se aceptan ids generados por crear()
+        job = self._leer(self._ruta(job_id)) if job_id.isalnum() else None
+        if job is None:
+            return {
+                'error': f'No existe el trabajo {job_id}',
+                'codigo': 'JOB_NOT_FOUND'
+            }
+        return job
+
+    def resultado(self, job_id):
+        """
+        Devuelve el resultado de un trabajo terminado
+
+        Args:
+            job_id (str): Identificador del trabajo
+
+        Returns:
+            tuple: (resultado, terminado). Si el trabajo no terminó, resultado es su estado
+        """
+        job = self.estado(job_id)
+        if 'error' in job or job['estado'] not in (JOB_COMPLETADO, JOB_ERROR):
+            return job, False
+
+        resultado = self._leer(self._ruta(job_id, 'resultado.json'))
+        if resultado is None:
+            resultado = {
+                'error': job['mensaje'] or f'No se encontró el resultado del trabajo {job_id}',
+                'codigo': 'JOB_FAILED'
+            }
+        return resultado, True
+
+    def _ejecutar(self, job):
+        lock_file = None
+        try:
+            if fcntl is not None:
+                # Un trabajo reanudado por varios workers a la vez se ejecuta en uno solo
+                lock_file = open(self._ruta(job['id'], 'lock'), 'a')
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    logger.info(f"El trabajo {job['id']} ya se ejecuta en otro proceso")
+                    return
+
+            # Otro worker pudo terminarlo entre que este lo encoló y tomó el lock:
+            # el estado del disco manda sobre la copia encolada
+            actual = self._leer(self._ruta(job['id']))
+            if actual is None or actual['estado'] in (JOB_COMPLETADO, JOB_ERROR):
+                logger.info(f"El trabajo {job['id']} ya terminó en otro proceso")
+                return
+            job.update(actual)
+
+            rango = self.controller.validar_rango(job['tipo_unidad'], job['fecha_inicio'], job['fecha_fin'])
+            self._guardar(job, estado=JOB_EN_CURSO)
+
+            def progreso(procesados, total):
+                self._guardar(job, dias_a_descargar=total, dias_procesados=procesados,
+                              dias_pendientes=total - procesados)
+
+            t0 = time.monotonic()
+            almacenadas = self.controller.completar_rango(job['tipo_unidad'], rango, progreso, self.lote)
+            resultado = self.controller.respuesta_historico(job['tipo_unidad'], rango, almacenadas)
+
+            self._escribir(self._ruta(job['id'], 'resultado.json'), resultado)
+            self._guardar(job, estado=JOB_COMPLETADO, mensaje=resultado.get('error'), dias_pendientes=0,
+                          dias_a_descargar=job['dias_a_descargar'] or 0, segundos=round(time.monotonic() - t0, 2))
+            logger.info(f"Trabajo {job['id']} completado en {job['segundos']}s")
+        except Exception as e:
+            logger.error(f"Error en el trabajo {job['id']}: {str(e)}")
+            self._guardar(job, estado=JOB_ERROR, mensaje=f'Error al obtener datos históricos: {str(e)}')
+        finally:
+            with self._lock:
+                self._activos.pop(job['id'], None)
+            if lock_file is not None:
+                lock_file.close()
+
+    def reanudar(self):
+        """
+        Vuelve a encolar los trabajos que quedaron sin terminar y elimina los
+        trabajos terminados más antiguos que la retención
+
+        Los días que un trabajo interrumpido ya había descargado están en el
+        almacén, por lo que al reanudarlo solo se descargan los que faltan.
+
+        Returns:
+            int: Cantidad de trabajos reanudados
+        """
+        reanudados = 0
+        limite = time.time() - self.retencion
+        for archivo in os.listdir(self.jobs_dir):
+            if not archivo.endswith('.json') or archivo.endswith('.resultado.json'):
+                continue
+            ruta = os.path.join(self.jobs_dir, archivo)
+            job = self._leer(ruta)
+            if job is None:
+                continue
+
+            if job['estado'] in (JOB_PENDIENTE, JOB_EN_CURSO):
+                with self._lock:
+                    if job['id'] in self._activos:
+                        continue
+                    self._activos[job['id']] = job
+                self._encolar(job)
+                reanudados += 1
+            elif os.path.getmtime(ruta) < limite:
+                for sufijo in ('json', 'resultado.json', 'lock'):
+                    try:
+                        os.remove(self._ruta(job['id'], sufijo))
+                    except OSError:
+                        pass
+
+        if reanudados:
+            logger.info(f"{reanudados} trabajos históricos reanudados")
+        return reanudados
+
+    def stats(self):
+        """Devuelve la cantidad de trabajos sin terminar en este worker"""
+        with self._lock:
+            return {'activos': len(self._activos)}
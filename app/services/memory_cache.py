@@ -0,0 +1,128 @@
+import threading
+import logging
+from collections import OrderedDict
+from datetime import datetime
+
+logger = logging.getLogger('app.cache.memoria')
+
+class MemoryLRU:
+    def __init__(self, max_entries=2048, max_bytes=32*1024*1024):
+        """
+        Caché en memoria con política LRU, compartida entre peticiones de un worker
+
+        Se ubica delante de la caché en disco: los aciertos sobre claves
+        frecuentes se resuelven sin tocar el sistema de archivos. Los datos
+        devueltos son los mismos objetos almacenados, por lo que no deben
+        modificarse.
+
+        Args:
+            max_entries (int): Cantidad máxima de entradas
+            max_bytes (int): Tamaño máximo aproximado en bytes (según el JSON serializado)
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # clave -> (datos, expira, tamaño, metadatos)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """
+        Obtiene un valor si está en memoria y no ha expirado
+
+        Args:
+            key (str): Clave del valor
+
+        Returns:
+            dict: Datos almacenados o None si no están o expiraron
+        """
+        entry = self.get_entry(key)
+        return entry[0] if entry is not None else None
+
+    def get_entry(self, key):
+        """
+        Igual que get() pero devuelve también los metadatos de la entrada
+
+        Returns:
+            tuple: (datos, metadatos) o None si no están o expiraron
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            data, expira, _, meta = entry
+            if expira is not None and datetime.now().timestamp() > expira:
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data, meta
+
+    def set(self, key, data, expira, size, meta=None):
+        """
+        Almacena un valor en memoria, desalojando los menos usados si hace falta
+
+        Args:
+            key (str): Clave del valor
+            data: Datos a almacenar (la caché en disco guarda su EntradaCache)
+            expira (float): Timestamp de expiración o None si nunca expira
+            size (int): Tamaño aproximado de la entrada en bytes
+            meta (dict, optional): Metadatos de la entrada en disco (etag, creado, clase)
+        """
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (data, expira, size, meta)
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def delete(self, key):
+        """Elimina un valor de la memoria"""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear_expired(self):
+        """Elimina las entradas expiradas y devuelve cuántas se quitaron"""
+        ahora = datetime.now().timestamp()
+        with self._lock:
+            expiradas = [
+                key for key, (_, expira, _, _) in self._entries.items()
+                if expira is not None and ahora > expira
+            ]
+            for key in expiradas:
+                self._remove(key)
+        return len(expiradas)
+
+    def _remove(self, key):
+        _, _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def stats(self):
+        """Devuelve los contadores de uso de la caché en memoria"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entradas': len(self._entries),
+                'bytes': self._bytes,
+                'max_entradas': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'aciertos': self.hits,
+                'fallos': self.misses,
+                'desalojos': self.evictions,
+                'tasa_aciertos': round(self.hits / total, 4) if total else 0.0
+            }
@@ -0,0 +1,316 @@
+import sqlite3
+import datetime
+import logging
+from app.scrapers.base_scraper import UNIDADES
+from app.utils.base_sqlite import BaseSQLite
+from app.utils.calendario import PUBLICACION
+
+logger = logging.getLogger('app.store')
+
+class ObservationStore(BaseSQLite):
+    def __init__(self, db_path):
+        """
+        Inicializa el almacén persistente de cotizaciones diarias
+
+        Cada observación se guarda una única vez indexada por (unidad, fecha),
+        de modo que cualquier rango histórico se arma a partir de los días ya
+        almacenados y solo los días faltantes requieren consultar al BCU.
+
+        Args:
+            db_path (str): Ruta del archivo SQLite
+        """
+        super().__init__(db_path)
+
+    def _crear_esquema(self, conn):
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS observaciones (
+                unidad TEXT NOT NULL,
+                fecha TEXT NOT NULL,
+                tipo TEXT NOT NULL,
+                moneda TEXT NOT NULL,
+                valor REAL NOT NULL,
+                PRIMARY KEY (unidad, fecha)
+            ) WITHOUT ROWID
+        """)
+        # Días pasados consultados al BCU en los que la página no tenía la unidad
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS sin_datos (
+                unidad TEXT NOT NULL,
+                fecha TEXT NOT NULL,
+                PRIMARY KEY (unidad, fecha)
+            ) WITHOUT ROWID
+        """)
+        # Un valor por mes para las unidades de periodicidad mensual (UR):
+        # cualquier día del mes se responde desde aquí sin consultar al BCU
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS valores_mensuales (
+                unidad TEXT NOT NULL,
+                mes TEXT NOT NULL,
+                tipo TEXT NOT NULL,
+                moneda TEXT NOT NULL,
+                valor REAL NOT NULL,
+                fecha TEXT NOT NULL,
+                PRIMARY KEY (unidad, mes)
+            ) WITHOUT ROWID
+        """)
+        # Completar los meses a partir de observaciones guardadas antes de existir la tabla
+        for unidad in self._unidades_mensuales():
+            conn.execute(
+                "INSERT OR IGNORE INTO valores_mensuales (unidad, mes, tipo, moneda, valor, fecha) "
+                "SELECT unidad, substr(fecha, 1, 7), tipo, moneda, valor, fecha "
+                "FROM observaciones WHERE unidad = ? ORDER BY fecha",
+                (unidad,)
+            )
+
+    @staticmethod
+    def _unidades_mensuales():
+        return [clave for clave, patron in PUBLICACION.items() if patron['periodicidad'] == 'mensual']
+
+    def get(self, unidad, fecha):
+        """
+        Obtiene la observación de una unidad para una fecha
+
+        Args:
+            unidad (str): Clave de la unidad ('ui' o 'ur')
+            fecha (str): Fecha en formato YYYY-MM-DD
+
+        Returns:
+            dict: Cotización almacenada o None si no existe
+        """
+        return self.get_rango(unidad, fecha, fecha).get(fecha)
+
+    def get_rango(self, unidad, fecha_inicio, fecha_fin):
+        """
+        Obtiene las observaciones almacenadas de una unidad en un rango de fechas
+
+        Args:
+            unidad (str): Clave de la unidad ('ui' o 'ur')
+            fecha_inicio (str): Fecha inicial en formato YYYY-MM-DD (inclusive)
+            fecha_fin (str): Fecha final en formato YYYY-MM-DD (inclusive)
+
+        Returns:
+            dict: Cotizaciones indexadas por fecha
+        """
+        try:
+            filas = self._connect().execute(
+                "SELECT tipo, moneda, fecha, valor FROM observaciones "
+                "WHERE unidad = ? AND fecha BETWEEN ? AND ? ORDER BY fecha",
+                (unidad, fecha_inicio, fecha_fin)
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Error al leer observaciones {unidad} {fecha_inicio}..{fecha_fin}: {str(e)}")
+            return {}
+
+        return {
+            fecha: {'tipo': tipo, 'moneda': moneda, 'fecha': fecha, 'valor': valor}
+            for tipo, moneda, fecha, valor in filas
+        }
+
+    def get_fechas(self, unidad, fechas):
+        """
+        Obtiene las observaciones almacenadas de una unidad para fechas sueltas
+
+        Args:
+            unidad (str): Clave de la unidad ('ui' o 'ur')
+            fechas (iterable): Fechas en formato YYYY-MM-DD
+
+        Returns:
+            dict: Cotizaciones indexadas por fecha (solo las fechas almacenadas)
+        """
+        fechas = list(fechas)
+        encontradas = {}
+        try:
+            conn = self._connect()
+            # SQLite limita la cantidad de parámetros por consulta
+            for i in range(0, len(fechas), 500):
+                lote = fechas[i:i + 500]
+                filas = conn.execute(
+                    "SELECT tipo, moneda, fecha, valor FROM observaciones "
+                    f"WHERE unidad = ? AND fecha IN ({','.join('?' * len(lote))})",
+                    (unidad, *lote)
+                ).fetchall()
+                encontradas.update(
+                    (fecha, {'tipo': tipo, 'moneda': moneda, 'fecha': fecha, 'valor': valor})
+                    for tipo, moneda, fecha, valor in filas
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Error al leer observaciones {unidad} de {len(fechas)} fechas: {str(e)}")
+            return {}
+
+        return encontradas
+
+    def get_anterior(self, unidad, fecha):
+        """
+        Obtiene la última observación de una unidad anterior a una fecha
+
+        Args:
+            unidad (str): Clave de la unidad ('ui' o 'ur')
+            fecha (str): Fecha en formato YYYY-MM-DD (exclusive)
+
+        Returns:
+            dict: Cotización almacenada o None si no hay ninguna anterior
+        """
+        try:
+            fila = self._connect().execute(
+                "SELECT tipo, moneda, fecha, valor FROM observaciones "
+                "WHERE unidad = ? AND fecha < ? ORDER BY fecha DESC LIMIT 1",
+                (unidad, fecha)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Error al leer la observación anterior a {fecha} de {unidad}: {str(e)}")
+            return None
+
+        if fila is None:
+            return None
+        tipo, moneda, fecha, valor = fila
+        return {'tipo': tipo, 'moneda': moneda, 'fecha': fecha, 'valor': valor}
+
+    def get_sin_datos(self, unidad, fecha_inicio, fecha_fin):
+        """
+        Obtiene los días de un rango registrados como "sin datos" para una unidad
+
+        Args:
+            unidad (str): Clave de la unidad ('ui' o 'ur')
+            fecha_inicio (str): Fecha inicial en formato YYYY-MM-DD (inclusive)
+            fecha_fin (str): Fecha final en formato YYYY-MM-DD (inclusive)
+
+        Returns:
+            set: Fechas sin datos
+        """
+        try:
+            filas = self._connect().execute(
+                "SELECT fecha FROM sin_datos WHERE unidad = ? AND fecha BETWEEN ? AND ?",
+                (unidad, fecha_inicio, fecha_fin)
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Error al leer días sin datos {unidad} {fecha_inicio}..{fecha_fin}: {str(e)}")
+            return set()
+
+        return {fecha for (fecha,) in filas}
+
+    def marcar_sin_datos(self, unidad, fechas):
+        """
+        Registra días en los que el BCU no publicó la unidad
+
+        Args:
+            unidad (str): Clave de la unidad ('ui' o 'ur')
+            fechas (list): Fechas en formato YYYY-MM-DD
+        """
+        if not fechas:
+            return
+
+        try:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO sin_datos (unidad, fecha) VALUES (?, ?)",
+                    [(unidad, fecha) for fecha in fechas]
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Error al registrar días sin datos de {unidad}: {str(e)}")
+
+    def get_mensuales(self, unidad, mes_inicio, mes_fin):
+        """
+        Obtiene los valores mensuales de una unidad en un rango de meses
+
+        Args:
+            unidad (str): Clave de la unidad ('ur')
+            mes_inicio (str): Mes inicial en formato YYYY-MM (inclusive)
+            mes_fin (str): Mes final en formato YYYY-MM (inclusive)
+
+        Returns:
+            dict: Por mes, la cotización del día del que se tomó el valor
+        """
+        try:
+            filas = self._connect().execute(
+                "SELECT mes, tipo, moneda, fecha, valor FROM valores_mensuales "
+                "WHERE unidad = ? AND mes BETWEEN ? AND ?",
+                (unidad, mes_inicio, mes_fin)
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Error al leer valores mensuales {unidad} {mes_inicio}..{mes_fin}: {str(e)}")
+            return {}
+
+        return {
+            mes: {'tipo': tipo, 'moneda': moneda, 'fecha': fecha, 'valor': valor}
+            for mes, tipo, moneda, fecha, valor in filas
+        }
+
+    def get_mensual(self, unidad, fecha):
+        """
+        Obtiene el valor mensual de una unidad para el mes de una fecha
+
+        Args:
+            unidad (str): Clave de la unidad ('ur')
+            fecha (str): Fecha en formato YYYY-MM-DD
+
+        Returns:
+            dict: Cotización con la fecha pedida, o None si el mes no está almacenado
+        """
+        mensual = self.get_mensuales(unidad, fecha[:7], fecha[:7]).get(fecha[:7])
+        if mensual is None:
+            return None
+        return dict(mensual, fecha=fecha)
+
+    def guardar(self, unidad, cotizaciones):
+        """
+        Almacena cotizaciones diarias de una unidad
+
+        Args:
+            unidad (str): Clave de la unidad ('ui' o 'ur')
+            cotizaciones (list): Cotizaciones con las claves tipo, moneda, fecha y valor
+
+        Returns:
+            bool: True si se guardaron correctamente, False en caso contrario
+        """
+        if not cotizaciones:
+            return True
+
+        try:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO observaciones (unidad, fecha, tipo, moneda, valor) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [(unidad, c['fecha'], c['tipo'], c['moneda'], c['valor']) for c in cotizaciones]
+                )
+                if unidad in self._unidades_mensuales():
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO valores_mensuales (unidad, mes, tipo, moneda, valor, fecha) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        [(unidad, c['fecha'][:7], c['tipo'], c['moneda'], c['valor'], c['fecha']) for c in cotizaciones]
+                    )
+            logger.info(f"Observaciones guardadas: {unidad} ({len(cotizaciones)} días)")
+            return True
+        except sqlite3.Error as e:
+            logger.error(f"Error al guardar observaciones {unidad}: {str(e)}")
+            return False
+
+    def guardar_registros(self, registros):
+        """
+        Almacena todas las unidades presentes en registros diarios del scraper
+
+        Las unidades ausentes en la página de un día ya pasado se registran como
+        "sin datos" para no volver a consultarlas. El día actual no se registra:
+        el BCU todavía puede publicarlo.
+
+        Args:
+            registros (list): Registros devueltos por BaseScraper.get_cotizaciones_fecha
+        """
+        hoy = datetime.date.today().strftime('%Y-%m-%d')
+        por_unidad = {}
+        sin_datos = {}
+        for registro in registros:
+            if 'error' in registro:
+                continue
+            for clave, cotizacion in registro['unidades'].items():
+                por_unidad.setdefault(clave, []).append(cotizacion)
+            if registro['fecha'] < hoy:
+                for clave in UNIDADES:
+                    if clave not in registro['unidades']:
+                        sin_datos.setdefault(clave, []).append(registro['fecha'])
+
+        for clave, cotizaciones in por_unidad.items():
+            self.guardar(clave, cotizaciones)
+        for clave, fechas in sin_datos.items():
+            self.marcar_sin_datos(clave, fechas)
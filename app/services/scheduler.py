@@ -0,0 +1,257 @@
+import time
+import datetime
+import threading
+import logging
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin coordinación entre procesos
+    fcntl = None
+
+from app.scrapers.base_scraper import UNIDADES
+from app.scrapers.fetch_engine import FetchEngine, TokenBucket
+
+logger = logging.getLogger('app.scheduler')
+
+class CacheScheduler:
+    def __init__(self, controller, hora_publicacion='16:00', backfill_dias=365, backfill_rate=2.0,
+                 intervalo=60, intervalo_backfill=24*60*60, intervalo_gc=60*60, lote=50, backfill_hilos=2):
+        """
+        Planificador de tareas de mantenimiento de la caché
+
+        Tareas:
+            - Precalentar la cotización del día una vez que el BCU la publica
+            - Completar en segundo plano una ventana histórica de días
+            - Eliminar periódicamente las entradas de caché expiradas
+
+        Args:
+            controller (CotizacionController): Controlador con la caché, el almacén y el scraper
+            hora_publicacion (str): Hora (HH:MM) a partir de la cual el BCU publica el día
+            backfill_dias (int): Días hacia atrás que se mantienen completos en el almacén
+            backfill_rate (float): Descargas por segundo permitidas al completar históricos
+            intervalo (int): Segundos entre revisiones de tareas pendientes
+            intervalo_backfill (int): Segundos entre ejecuciones del completado histórico
+            intervalo_gc (int): Segundos entre limpiezas de caché
+            lote (int): Fechas descargadas por lote al completar históricos
+            backfill_hilos (int): Descargas simultáneas del completado histórico. Usa
+                su propio motor para no ocupar los hilos de las peticiones
+        """
+        self.controller = controller
+        self.hora_publicacion = datetime.datetime.strptime(hora_publicacion, '%H:%M').time()
+        self.backfill_dias = backfill_dias
+        self.backfill_rate = backfill_rate
+        self.intervalo = intervalo
+        self.intervalo_backfill = intervalo_backfill
+        self.intervalo_gc = intervalo_gc
+        self.lote = lote
+        self.engine = FetchEngine(backfill_hilos)
+
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock_file = None
+        self._precalentado = None
+        self._ultimo_backfill = 0
+        self._ultimo_gc = 0
+        self.estado = {
+            'activo': False,
+            'precalentado': None,
+            'backfill': None,
+            'gc': None
+        }
+
+    def precalentar_hoy(self):
+        """
+        Obtiene la cotización del día para dejarla en caché
+
+        Returns:
+            bool: True si el BCU ya publicó el valor del día
+        """
+        hoy = datetime.date.today().strftime('%Y-%m-%d')
+        calendario = self.controller.calendario
+        if not any(calendario.publica(clave, hoy) and not calendario.es_mensual(clave) for clave in UNIDADES):
+            # Fin de semana o feriado: no hay nada que esperar hasta mañana
+            self._precalentado = hoy
+            logger.info(f"El BCU no publica cotizaciones diarias el {hoy}: no se precalienta")
+            return False
+
+        # Una sola consulta alcanza: la página del BCU completa todas las unidades
+        resultado = self.controller.get_cotizacion('ui', hoy)
+        publicado = 'error' not in resultado
+
+        if publicado:
+            self._precalentado = hoy
+            self.estado['precalentado'] = hoy
+            logger.info(f"Cotizaciones de {hoy} precalentadas")
+        else:
+            logger.info(f"Cotizaciones de {hoy} aún no disponibles: {resultado['error']}")
+        return publicado
+
+    def backfill(self, dias=None, progreso=None):
+        """
+        Descarga los días de la ventana histórica que faltan en el almacén y deja
+        en caché las cotizaciones de toda la ventana
+
+        Args:
+            dias (int, optional): Días hacia atrás desde ayer (por defecto backfill_dias)
+            progreso (callable, optional): Función llamada con el estado tras cada lote
+
+        Returns:
+            dict: Resumen con días pendientes, descargados, entradas guardadas en
+                caché, segundos y tasa
+        """
+        dias = dias or self.backfill_dias
+        fin = datetime.date.today() - datetime.timedelta(days=1)
+        inicio = fin - datetime.timedelta(days=dias - 1)
+        fecha_inicio, fecha_fin = inicio.strftime('%Y-%m-%d'), fin.strftime('%Y-%m-%d')
+        ventana = [(inicio + datetime.timedelta(days=i)).strftime('%Y-%m-%d') for i in range(dias)]
+
+        # Un día está completo cuando todas las unidades que el BCU publica ese
+        # día están en el almacén o ya se consultaron y no tenían datos
+        store = self.controller.store
+        calendario = self.controller.calendario
+        resueltas = {
+            clave: set(store.get_rango(clave, fecha_inicio, fecha_fin))
+            | store.get_sin_datos(clave, fecha_inicio, fecha_fin)
+            for clave in UNIDADES
+        }
+        # Las unidades de valor mensual (UR) están resueltas en todo mes ya almacenado
+        meses_resueltos = {
+            clave: set(store.get_mensuales(clave, fecha_inicio[:7], fecha_fin[:7]))
+            for clave in UNIDADES if calendario.es_mensual(clave)
+        }
+        pendientes = [
+            fecha for fecha in ventana
+            if any(
+                calendario.publica(clave, fecha) and fecha not in resueltas[clave]
+                and fecha[:7] not in meses_resueltos.get(clave, ())
+                for clave in UNIDADES
+            )
+        ]
+
+        # El límite de tasa se aplica al enviar cada fecha, no dentro de los
+        # hilos del motor, para no dejarlos dormidos esperando turno
+        limitador = TokenBucket(self.backfill_rate, 1)
+        scraper = self.controller.scraper
+
+        def limitadas(fechas):
+            for fecha in fechas:
+                limitador.acquire()
+                yield fecha
+
+        t0 = time.monotonic()
+        resumen = {
+            'desde': fecha_inicio,
+            'hasta': fecha_fin,
+            'pendientes': len(pendientes),
+            'procesados': 0,
+            'con_datos': 0,
+            'errores': 0,
+            'en_cache': 0
+        }
+        logger.info(f"Backfill {fecha_inicio}..{fecha_fin}: {len(pendientes)} días pendientes")
+
+        for i in range(0, len(pendientes), self.lote):
+            if self._stop.is_set():
+                break
+
+            lote = pendientes[i:i + self.lote]
+            registros = self.engine.map(scraper.get_cotizaciones_fecha, limitadas(lote))
+            self.controller.store.guardar_registros(registros)
+            resumen['en_cache'] += self.controller.precalentar(lote)
+
+            resumen['procesados'] += len(registros)
+            resumen['con_datos'] += sum(1 for r in registros if 'error' not in r and r['unidades'])
+            resumen['errores'] += sum(1 for r in registros if 'error' in r)
+            resumen['segundos'] = round(time.monotonic() - t0, 2)
+            resumen['dias_por_segundo'] = round(resumen['procesados'] / max(resumen['segundos'], 1e-6), 2)
+
+            logger.info(
+                f"Backfill: {resumen['procesados']}/{resumen['pendientes']} días "
+                f"({resumen['dias_por_segundo']} días/s, {resumen['errores']} errores)"
+            )
+            if progreso:
+                progreso(dict(resumen))
+
+        # El resto de la ventana (días ya almacenados antes y días de valor mensual)
+        # pasa a la caché sin descargar nada
+        if not self._stop.is_set():
+            resumen['en_cache'] += self.controller.precalentar(ventana)
+
+        resumen['segundos'] = round(time.monotonic() - t0, 2)
+        resumen.setdefault('dias_por_segundo', 0.0)
+        self._ultimo_backfill = time.time()
+        self.estado['backfill'] = resumen
+        return resumen
+
+    def gc(self):
+        """Elimina las entradas de caché expiradas"""
+        eliminadas = self.controller.cache_service.clear_expired()
+        self._ultimo_gc = time.time()
+        self.estado['gc'] = {
+            'eliminadas': eliminadas,
+            'fecha': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+        return eliminadas
+
+    def run_pending(self):
+        """Ejecuta las tareas cuyo momento ya llegó"""
+        ahora = datetime.datetime.now()
+
+        if self._precalentado != ahora.strftime('%Y-%m-%d') and ahora.time() >= self.hora_publicacion:
+            self.precalentar_hoy()
+
+        if self.backfill_dias and time.time() - self._ultimo_backfill >= self.intervalo_backfill:
+            self.backfill()
+
+        if time.time() - self._ultimo_gc >= self.intervalo_gc:
+            self.gc()
+
+    def run_forever(self):
+        """Ejecuta las tareas en el hilo actual hasta que se llame a stop()"""
+        self.estado['activo'] = True
+        logger.info("Planificador de caché iniciado")
+        try:
+            while not self._stop.is_set():
+                try:
+                    self.run_pending()
+                except Exception as e:
+                    logger.error(f"Error en el planificador de caché: {str(e)}")
+                self._stop.wait(self.intervalo)
+        finally:
+            self.estado['activo'] = False
+            logger.info("Planificador de caché detenido")
+
+    def start(self, lock_path=None):
+        """
+        Inicia el planificador en un hilo en segundo plano
+
+        Args:
+            lock_path (str, optional): Archivo de lock para que un solo worker
+                de gunicorn ejecute el planificador
+
+        Returns:
+            bool: True si se inició, False si otro proceso ya lo está ejecutando
+        """
+        if lock_path and fcntl is not None:
+            self._lock_file = open(lock_path, 'a')
+            try:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                self._lock_file.close()
+                self._lock_file = None
+                logger.info("El planificador de caché ya se ejecuta en otro proceso")
+                return False
+
+        self._thread = threading.Thread(target=self.run_forever, name='cache-scheduler', daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        """Detiene el planificador"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.engine.shutdown(wait=False)
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
@@ -0,0 +1,98 @@
+import os
+import re
+import threading
+import logging
+
+try:
+    import fcntl
+except ImportError:  # Windows: solo coordinación entre hilos
+    fcntl = None
+
+logger = logging.getLogger('app.single_flight')
+
+class _Llamada:
+    """Llamada en curso para una clave"""
+    def __init__(self):
+        self.evento = threading.Event()
+        self.resultado = None
+        self.error = None
+
+class SingleFlight:
+    def __init__(self, lock_dir=None):
+        """
+        Agrupa llamadas concurrentes con la misma clave en una sola ejecución
+
+        Dentro del proceso, el primer hilo que pide una clave ejecuta la función
+        y los demás esperan su resultado. Si se indica lock_dir, además se toma
+        un lock de archivo propio de la clave para coordinar los workers de
+        gunicorn: el worker que espera el lock vuelve a consultar la caché antes
+        de repetir el trabajo. Las claves distintas nunca se esperan entre sí.
+
+        Args:
+            lock_dir (str, optional): Directorio para los archivos de lock entre procesos
+        """
+        self.lock_dir = lock_dir if fcntl is not None else None
+        self._lock = threading.Lock()
+        self._llamadas = {}
+        if self.lock_dir:
+            os.makedirs(self.lock_dir, exist_ok=True)
+
+    def do(self, key, fn, recheck=None):
+        """
+        Ejecuta fn una sola vez para todas las llamadas concurrentes con la misma clave
+
+        Args:
+            key (str): Clave que identifica el trabajo
+            fn (callable): Función que realiza el trabajo
+            recheck (callable, optional): Consulta ejecutada con el lock entre procesos
+                tomado; si devuelve algo distinto de None se usa en lugar de llamar a fn
+
+        Returns:
+            El resultado de fn (o de recheck), compartido entre todos los que esperaban
+        """
+        with self._lock:
+            llamada = self._llamadas.get(key)
+            lider = llamada is None
+            if lider:
+                llamada = _Llamada()
+                self._llamadas[key] = llamada
+
+        if not lider:
+            logger.info(f"Esperando resultado en curso para {key}")
+            llamada.evento.wait()
+            if llamada.error is not None:
+                raise llamada.error
+            return llamada.resultado
+
+        try:
+            llamada.resultado = self._ejecutar(key, fn, recheck)
+            return llamada.resultado
+        except Exception as e:
+            llamada.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._llamadas[key]
+            llamada.evento.set()
+
+    def _ejecutar(self, key, fn, recheck):
+        if self.lock_dir is None:
+            return fn()
+
+        # Un archivo por clave: el lock se mantiene durante toda la descarga y
+        # no debe demorar a las de otras fechas (las claves son por fecha, así
+        # que los archivos son tantos como días consultados)
+        nombre = re.sub(r'[^\w.-]', '_', key)
+        lock_path = os.path.join(self.lock_dir, f"{nombre}.lock")
+
+        with open(lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                if recheck is not None:
+                    resultado = recheck()
+                    if resultado is not None:
+                        logger.info(f"Resultado de {key} obtenido por otro worker")
+                        return resultado
+                return fn()
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -0,0 +1,187 @@
+import math
+import datetime
+import logging
+
+try:
+    import numpy as np
+except ImportError:  # numpy es opcional: se usa el cálculo en Python puro
+    np = None
+
+logger = logging.getLogger('app.interpolacion')
+
+class InterpoladorUI:
+    def __init__(self, store, dia_ancla=6, tolerancia=0.00015, decimales=4):
+        """
+        Deriva valores diarios de la UI a partir de las observaciones almacenadas
+
+        La UI sigue un camino geométrico dentro de cada período mensual (desde el
+        día dia_ancla de un mes hasta la víspera del mismo día del mes siguiente),
+        con la tasa diaria que fija el IPC. Con unas pocas observaciones de un
+        período se obtiene cualquier día intermedio sin consultar al BCU. Si numpy
+        está instalado el cálculo se vectoriza; si no, se hace en Python.
+
+        Un período solo se usa si las demás observaciones que contiene coinciden
+        con el camino derivado dentro de la tolerancia; si no se puede validar, los
+        días de ese período se siguen descargando del BCU.
+
+        Dentro de un período validado también se extrapola con su tasa hacia los
+        días no observados (por ejemplo, fechas ya publicadas posteriores a la
+        última descarga), hasta tantos días como abarcan las observaciones, para
+        que el error de la tasa ajustada no supere el redondeo publicado. Nunca se
+        cruza al período siguiente, cuya tasa depende de un IPC nuevo. Cada día que
+        luego se descarga entra en la validación del período: si no coincide con
+        el camino, el período deja de derivarse.
+
+        Args:
+            store (ObservationStore): Almacén con las observaciones de la UI
+            dia_ancla (int): Día del mes en que cambia la tasa diaria de la UI
+            tolerancia (float): Diferencia máxima admitida contra los valores publicados
+            decimales (int): Decimales con que el BCU publica la UI
+        """
+        self.store = store
+        self.dia_ancla = dia_ancla
+        self.tolerancia = tolerancia
+        self.decimales = decimales
+
+    def periodo(self, fecha):
+        """
+        Devuelve el período de la UI al que pertenece una fecha
+
+        Args:
+            fecha (datetime.date): Fecha
+
+        Returns:
+            tuple: (primer día, último día) del período
+        """
+        anio, mes = fecha.year, fecha.month
+        if fecha.day < self.dia_ancla:
+            anio, mes = (anio - 1, 12) if mes == 1 else (anio, mes - 1)
+        inicio = datetime.date(anio, mes, self.dia_ancla)
+        anio, mes = (anio + 1, 1) if mes == 12 else (anio, mes + 1)
+        return inicio, datetime.date(anio, mes, self.dia_ancla) - datetime.timedelta(days=1)
+
+    def _agrupar(self, fechas):
+        """Agrupa fechas (YYYY-MM-DD) por período, en orden"""
+        periodos = {}
+        for fecha in fechas:
+            periodo = self.periodo(datetime.date.fromisoformat(fecha))
+            periodos.setdefault(periodo, []).append(fecha)
+        return periodos
+
+    def muestras(self, fechas):
+        """
+        Elige qué días descargar para poder derivar el resto
+
+        Por cada período se toman los días extremos y dos intermedios que
+        sirven para validar el camino geométrico.
+
+        Args:
+            fechas (list): Fechas faltantes en formato YYYY-MM-DD, en orden
+
+        Returns:
+            list: Fechas a descargar, en orden
+        """
+        elegidas = []
+        for dias in self._agrupar(fechas).values():
+            if len(dias) <= 4:
+                elegidas.extend(dias)
+                continue
+            ultimo = len(dias) - 1
+            indices = sorted({0, ultimo // 3, 2 * ultimo // 3, ultimo})
+            elegidas.extend(dias[i] for i in indices)
+        return sorted(elegidas)
+
+    def _tramo_validado(self, periodo, observaciones):
+        """
+        Ajusta el camino geométrico de un período y lo valida contra sus observaciones
+
+        El ajuste es una regresión lineal del logaritmo del valor sobre el día, que
+        usa todas las observaciones y reduce el error de redondeo de los valores
+        publicados frente a tomar solo dos puntos.
+
+        Returns:
+            tuple: (primer ordinal observado, último ordinal observado, ajuste) o None
+                si el período no tiene puntos suficientes o no coincide
+        """
+        puntos = sorted(
+            (datetime.date.fromisoformat(fecha).toordinal(), cotizacion['valor'])
+            for fecha, cotizacion in observaciones.items()
+        )
+        # Con dos puntos cualquier camino coincide: hace falta uno más para validar
+        if len(puntos) < 3:
+            return None
+
+        ordinales = [t for t, _ in puntos]
+        ajuste = self._ajustar(ordinales, [v for _, v in puntos])
+        derivados = self._calcular(ajuste, ordinales)
+        for (t, observado), derivado in zip(puntos, derivados):
+            if abs(derivado - observado) > self.tolerancia:
+                logger.warning(
+                    f"UI del período {periodo[0]} a {periodo[1]} no sigue el camino geométrico: "
+                    f"{datetime.date.fromordinal(t)} publicado {observado}, derivado {derivado}"
+                )
+                return None
+        return ordinales[0], ordinales[-1], ajuste
+
+    def _ajustar(self, ordinales, valores):
+        """Regresión de log(valor) sobre el día: devuelve (t0, log del valor en t0, tasa diaria)"""
+        t0 = ordinales[0]
+        if np is not None:
+            x = np.asarray(ordinales, dtype=np.float64) - t0
+            y = np.log(np.asarray(valores, dtype=np.float64))
+            tasa = ((x - x.mean()) * (y - y.mean())).sum() / ((x - x.mean()) ** 2).sum()
+            return t0, float(y.mean() - tasa * x.mean()), float(tasa)
+
+        x = [t - t0 for t in ordinales]
+        y = [math.log(v) for v in valores]
+        media_x, media_y = sum(x) / len(x), sum(y) / len(y)
+        tasa = (
+            sum((xi - media_x) * (yi - media_y) for xi, yi in zip(x, y))
+            / sum((xi - media_x) ** 2 for xi in x)
+        )
+        return t0, media_y - tasa * media_x, tasa
+
+    def _calcular(self, ajuste, ordinales):
+        """Valores del camino ajustado en los ordinales pedidos, redondeados como los publica el BCU"""
+        t0, base, tasa = ajuste
+        if np is not None:
+            t = np.asarray(ordinales, dtype=np.float64)
+            return np.round(np.exp(base + tasa * (t - t0)), self.decimales).tolist()
+        return [round(math.exp(base + tasa * (t - t0)), self.decimales) for t in ordinales]
+
+    def derivar(self, fechas):
+        """
+        Deriva la UI de las fechas cuyo período tiene observaciones validadas
+
+        Args:
+            fechas (list): Fechas en formato YYYY-MM-DD
+
+        Returns:
+            dict: Valor derivado por fecha; las fechas que no se pueden derivar
+                (período sin validar o demasiado lejos de sus observaciones) no se incluyen
+        """
+        periodos = self._agrupar(fechas)
+        if not periodos:
+            return {}
+
+        # Una sola lectura del almacén para todos los períodos involucrados
+        inicio = min(p[0] for p in periodos).strftime('%Y-%m-%d')
+        fin = max(p[1] for p in periodos).strftime('%Y-%m-%d')
+        almacenadas = self.store.get_rango('ui', inicio, fin)
+
+        derivados = {}
+        for periodo, dias in periodos.items():
+            desde, hasta = periodo[0].strftime('%Y-%m-%d'), periodo[1].strftime('%Y-%m-%d')
+            observaciones = {f: c for f, c in almacenadas.items() if desde <= f <= hasta}
+            tramo = self._tramo_validado(periodo, observaciones)
+            if tramo is None:
+                continue
+
+            primero, ultimo, ajuste = tramo
+            # Se extrapola dentro del período hasta una distancia igual al tramo observado
+            margen = ultimo - primero
+            ordinales = {f: datetime.date.fromisoformat(f).toordinal() for f in dias}
+            dentro = [f for f in dias if primero - margen <= ordinales[f] <= ultimo + margen]
+            valores = self._calcular(ajuste, [ordinales[f] for f in dentro])
+            derivados.update(zip(dentro, valores))
+        return derivados
@@ -0,0 +1,48 @@
+import os
+import sqlite3
+import threading
+
+
+class BaseSQLite:
+    def __init__(self, db_path):
+        """
+        Base de las clases que guardan sus datos en un archivo SQLite compartido
+        por todos los workers (el almacén de cotizaciones y los índices de la caché)
+
+        El esquema se crea con una conexión que se cierra al terminar, para que
+        no quede compartida si el proceso se bifurca (gunicorn --preload). Cada
+        hilo abre después la suya con _connect.
+
+        Args:
+            db_path (str): Ruta del archivo SQLite
+        """
+        self.db_path = db_path
+        self._local = threading.local()
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+
+        conn = self._abrir()
+        try:
+            self._crear_esquema(conn)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _abrir(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        # WAL permite lecturas concurrentes desde varios workers mientras otro escribe
+        conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    def _crear_esquema(self, conn):
+        """Crea las tablas e índices que falten (lo implementa cada subclase)"""
+        raise NotImplementedError
+
+    def _connect(self):
+        """Devuelve la conexión SQLite del hilo actual, creándola si no existe"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._abrir()
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
@@ -0,0 +1,124 @@
+import datetime
+
+# Feriados de fecha fija en los que el BCU no publica cotizaciones (MM-DD)
+FERIADOS_FIJOS = ('01-01', '05-01', '07-18', '08-25', '12-25')
+
+# Feriados móviles, en días relativos al domingo de Pascua:
+# Carnaval (lunes y martes) y Semana de Turismo (jueves y viernes)
+FERIADOS_PASCUA = (-48, -47, -3, -2)
+
+# Días en que el BCU publica cada unidad y cada cuánto cambia su valor
+PUBLICACION = {
+    'ui': {'dias': 'habiles', 'periodicidad': 'diaria'},
+    'ur': {'dias': 'habiles', 'periodicidad': 'mensual'},
+}
+
+def domingo_de_pascua(anio):
+    """
+    Calcula el domingo de Pascua (calendario gregoriano, algoritmo de Meeus/Jones/Butcher)
+
+    Args:
+        anio (int): Año
+
+    Returns:
+        datetime.date: Fecha del domingo de Pascua
+    """
+    a = anio % 19
+    b, c = divmod(anio, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    mes, dia = divmod(h + l - 7 * m + 114, 31)
+    return datetime.date(anio, mes, dia + 1)
+
+def _a_fecha(fecha):
+    if isinstance(fecha, datetime.date):
+        return fecha
+    return datetime.datetime.strptime(fecha, '%Y-%m-%d').date()
+
+class CalendarioBCU:
+    def __init__(self, feriados_fijos=FERIADOS_FIJOS, feriados_pascua=FERIADOS_PASCUA,
+                 feriados_extra=None, publicacion=None):
+        """
+        Calendario de días en que el BCU publica cotizaciones
+
+        El BCU no publica los fines de semana ni los feriados. Consultar esos días
+        solo consume una petición que no puede devolver datos, por lo que las
+        consultas históricas los saltean.
+
+        Args:
+            feriados_fijos (iterable): Feriados de fecha fija en formato MM-DD
+            feriados_pascua (iterable): Feriados móviles en días relativos al domingo de Pascua
+            feriados_extra (iterable, optional): Días puntuales sin publicación (YYYY-MM-DD),
+                por ejemplo feriados decretados o trasladados
+            publicacion (dict, optional): Patrón de publicación por unidad (por defecto PUBLICACION)
+        """
+        self.feriados_fijos = [tuple(int(x) for x in f.split('-')) for f in feriados_fijos]
+        self.feriados_pascua = list(feriados_pascua)
+        self.feriados_extra = {_a_fecha(f) for f in (feriados_extra or [])}
+        self.publicacion = publicacion or PUBLICACION
+        self._por_anio = {}
+
+    def feriados(self, anio):
+        """
+        Devuelve los feriados de un año
+
+        Args:
+            anio (int): Año
+
+        Returns:
+            set: Fechas (datetime.date) de los feriados
+        """
+        feriados = self._por_anio.get(anio)
+        if feriados is None:
+            pascua = domingo_de_pascua(anio)
+            feriados = {datetime.date(anio, mes, dia) for mes, dia in self.feriados_fijos}
+            feriados |= {pascua + datetime.timedelta(days=d) for d in self.feriados_pascua}
+            feriados |= {f for f in self.feriados_extra if f.year == anio}
+            self._por_anio[anio] = feriados
+        return feriados
+
+    def es_habil(self, fecha):
+        """
+        Indica si una fecha es día hábil (ni fin de semana ni feriado)
+
+        Args:
+            fecha (str | datetime.date): Fecha en formato YYYY-MM-DD o date
+
+        Returns:
+            bool: True si es día hábil
+        """
+        fecha = _a_fecha(fecha)
+        return fecha.weekday() < 5 and fecha not in self.feriados(fecha.year)
+
+    def es_mensual(self, unidad):
+        """
+        Indica si el valor de una unidad se fija una vez por mes (como la UR)
+
+        Args:
+            unidad (str): Clave de la unidad ('ui' o 'ur')
+
+        Returns:
+            bool: True si el valor es el mismo todos los días del mes
+        """
+        return self.publicacion.get(unidad, {}).get('periodicidad') == 'mensual'
+
+    def publica(self, unidad, fecha):
+        """
+        Indica si el BCU publica la cotización de una unidad en una fecha
+
+        Args:
+            unidad (str): Clave de la unidad ('ui' o 'ur')
+            fecha (str | datetime.date): Fecha en formato YYYY-MM-DD o date
+
+        Returns:
+            bool: True si la fecha puede tener cotización
+        """
+        patron = self.publicacion.get(unidad, {'dias': 'habiles'})
+        if patron['dias'] == 'todos':
+            return True
+        return self.es_habil(fecha)
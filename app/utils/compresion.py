@@ -0,0 +1,98 @@
+import gzip
+import logging
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional: se comprime solo con gzip
+    brotli = None
+
+logger = logging.getLogger('app.compresion')
+
+# Codificaciones disponibles, en orden de preferencia ante la misma calidad
+CODIFICACIONES = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+# Tipos de contenido que vale la pena comprimir
+TIPOS_COMPRIMIBLES = ('application/json',)
+
+
+def comprimir(cuerpo, codificacion):
+    """
+    Comprime un cuerpo de respuesta
+
+    La salida es determinista (gzip sin fecha de modificación), por lo que
+    los mismos bytes producen siempre la misma variante.
+
+    Args:
+        cuerpo (bytes): Contenido a comprimir
+        codificacion (str): 'br' o 'gzip'
+
+    Returns:
+        bytes: Contenido comprimido
+    """
+    if codificacion == 'br':
+        return brotli.compress(cuerpo, quality=5)
+    return gzip.compress(cuerpo, compresslevel=6, mtime=0)
+
+
+def elegir_codificacion(request, disponibles=CODIFICACIONES):
+    """
+    Elige la codificación según la cabecera Accept-Encoding de la petición
+
+    Args:
+        request: Petición de Flask
+        disponibles (iterable): Codificaciones que se pueden ofrecer
+
+    Returns:
+        str: Codificación elegida o None para enviar sin comprimir
+    """
+    disponibles = list(disponibles)
+    if not disponibles or not request.accept_encodings:
+        return None
+    return request.accept_encodings.best_match(disponibles)
+
+
+def etag_variante(etag, codificacion):
+    """Etag de la variante comprimida: cada representación tiene su propio etag fuerte"""
+    return f"{etag}-{codificacion}" if codificacion else etag
+
+
+def crear_comprimir_respuesta(min_bytes):
+    """
+    Crea la función after_request que comprime las respuestas JSON grandes
+
+    Las respuestas que ya traen Content-Encoding (por ejemplo, las variantes
+    precomprimidas de la caché) y las respuestas en streaming no se tocan.
+
+    Args:
+        min_bytes (int): Tamaño mínimo para comprimir; las respuestas más chicas
+            no ganan lo suficiente para justificar la CPU
+
+    Returns:
+        callable: Función para registrar con app.after_request
+    """
+    def comprimir_respuesta(response):
+        from flask import request
+
+        if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in TIPOS_COMPRIMIBLES):
+            return response
+
+        cuerpo = response.get_data()
+        if len(cuerpo) < min_bytes:
+            return response
+
+        # La representación depende de Accept-Encoding aunque esta vez no se comprima
+        response.vary.add('Accept-Encoding')
+        codificacion = elegir_codificacion(request)
+        if codificacion is None:
+            return response
+
+        response.set_data(comprimir(cuerpo, codificacion))
+        response.headers['Content-Encoding'] = codificacion
+        etag, debil = response.get_etag()
+        if etag:
+            response.set_etag(etag_variante(etag, codificacion), debil)
+        return response
+
+    return comprimir_respuesta
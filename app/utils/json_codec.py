@@ -0,0 +1,95 @@
+import json
+import logging
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional: se usa el módulo json de la biblioteca estándar
+    orjson = None
+
+logger = logging.getLogger('app.json')
+
+
+class StdlibCodec:
+    """Codificador JSON de la biblioteca estándar, en formato compacto"""
+    nombre = 'json'
+
+    def dumps(self, data):
+        """
+        Serializa un valor a JSON compacto en UTF-8, con las claves ordenadas
+
+        Args:
+            data: Valor a serializar
+
+        Returns:
+            bytes: JSON codificado
+        """
+        return json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+    def loads(self, contenido):
+        """
+        Deserializa JSON
+
+        Args:
+            contenido (bytes | str): JSON a deserializar
+
+        Returns:
+            Valor deserializado
+        """
+        return json.loads(contenido)
+
+
+class OrjsonCodec:
+    """Codificador basado en orjson: varias veces más rápido, misma salida compacta"""
+    nombre = 'orjson'
+
+    def dumps(self, data):
+        return orjson.dumps(data, option=orjson.OPT_SORT_KEYS)
+
+    def loads(self, contenido):
+        return orjson.loads(contenido)
+
+
+CODECS = {
+    StdlibCodec.nombre: StdlibCodec,
+    OrjsonCodec.nombre: OrjsonCodec,
+}
+
+
+def get_codec(nombre='auto'):
+    """
+    Devuelve el codificador JSON solicitado
+
+    Args:
+        nombre (str): 'orjson', 'json' o 'auto' (orjson si está instalado, si no json)
+
+    Returns:
+        Instancia del codificador
+    """
+    if nombre in (None, 'auto'):
+        nombre = OrjsonCodec.nombre if orjson is not None else StdlibCodec.nombre
+
+    if nombre == OrjsonCodec.nombre and orjson is None:
+        logger.warning("orjson no está instalado, se usa json")
+        nombre = StdlibCodec.nombre
+
+    if nombre not in CODECS:
+        raise ValueError(f"Codificador JSON desconocido: {nombre}. Use 'orjson', 'json' o 'auto'")
+
+    return CODECS[nombre]()
+
+
+class CodecJSONProvider(DefaultJSONProvider):
+    """
+    Proveedor JSON de Flask que serializa las respuestas de jsonify con el
+    codificador configurado, directamente a bytes
+    """
+
+    def __init__(self, app, codec=None):
+        super().__init__(app)
+        self.codec = codec or get_codec()
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.codec.dumps(obj) + b'\n', mimetype=self.mimetype)
@@ -0,0 +1,169 @@
+"""
+Benchmark de los almacenamientos de caché con varios workers
+
+Lanza varios procesos (como los workers de gunicorn) que leen y escriben a
+la vez la misma caché, sin caché en memoria delante, y compara:
+
+    archivos          un archivo por entrada, escrito en un temporal y renombrado
+    archivos-directo  un archivo por entrada escrito en el lugar (el formato
+                      anterior): un lector puede ver un archivo a medio escribir
+    sqlite            una base en modo WAL compartida
+    redis             un servidor Redis; por defecto benchmarks.fake_redis en otro
+                      proceso (un diccionario en Python detrás de un lock, por lo que
+                      mide el cliente y el protocolo, no a Redis), o el servidor
+                      indicado con --redis-url
+
+Las claves se cargan antes de empezar y nunca se borran, así que cualquier
+lectura que no devuelve la entrada completa es una lectura rota. Al final mide la
+lectura de las 730 entradas diarias de un año (UI y UR) con una lectura por
+clave contra una sola lectura múltiple (get_many).
+
+Uso:
+    python -m benchmarks.bench_cache_backends --workers 4 --segundos 3
+"""
+import argparse
+import datetime
+import logging
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from app.services.cache_service import CacheService, TTL_INMUTABLE
+from app.services.cache_backends import FileBackend, get_backend
+from benchmarks.bench_cache_hits import cotizacion, historico
+
+
+class EscrituraDirecta(FileBackend):
+    """Escritura en el lugar, sin temporal ni rename, como antes de FileBackend"""
+    nombre = 'archivos-directo'
+
+    def set(self, key, contenido, hasta=None):
+        with open(self.ruta(key), 'wb') as f:
+            f.write(contenido)
+
+
+def crear_backend(nombre, directorio, redis_url):
+    if nombre == EscrituraDirecta.nombre:
+        return EscrituraDirecta(os.path.join(directorio, nombre))
+    return get_backend(nombre, os.path.join(directorio, nombre), redis_url=redis_url)
+
+
+def entradas(historicos):
+    """Claves y datos de la carga: un año de cotizaciones diarias y algunos históricos"""
+    inicio = datetime.date(2023, 1, 1)
+    datos = {}
+    for i in range(365):
+        fecha = (inicio + datetime.timedelta(days=i)).strftime('%Y-%m-%d')
+        datos[f"ui_{fecha}"] = cotizacion(fecha, round(5.5 + i * 0.0011, 4))
+        datos[f"ur_{fecha}"] = dict(cotizacion(fecha, 1500.0), tipo='UR', moneda='UNIDAD REAJUSTABLE')
+    for i in range(historicos):
+        datos[f"historico_ui_{i}"] = historico(365)
+    return datos
+
+
+def worker(nombre, directorio, redis_url, segundos, escrituras, historicos, resultados):
+    """Lee y escribe claves al azar durante `segundos` y devuelve (operaciones, lecturas rotas)"""
+    logging.disable(logging.CRITICAL)
+    cache = CacheService(directorio, backend=crear_backend(nombre, directorio, redis_url),
+                         compresion_min_bytes=1024)
+    datos = entradas(historicos)
+    claves = list(datos)
+    # Los históricos son los que se reescriben: son los archivos grandes
+    grandes = [clave for clave in claves if clave.startswith('historico_')]
+    azar = random.Random(os.getpid())
+    operaciones = rotas = 0
+    fin = time.perf_counter() + segundos
+    while time.perf_counter() < fin:
+        if azar.random() < escrituras:
+            clave = azar.choice(grandes)
+            cache.set(clave, datos[clave], TTL_INMUTABLE)
+        else:
+            clave = azar.choice(claves) if azar.random() < 0.5 else azar.choice(grandes)
+            # Un archivo a medio escribir puede tener la línea de metadatos
+            # completa y el cuerpo cortado: se detecta al decodificarlo
+            try:
+                if cache.get(clave) is None:
+                    rotas += 1
+            except ValueError:
+                rotas += 1
+        operaciones += 1
+    resultados.put((operaciones, rotas))
+
+
+def medir_backend(nombre, args, directorio, redis_url):
+    logging.disable(logging.CRITICAL)
+    cache = CacheService(directorio, backend=crear_backend(nombre, directorio, redis_url),
+                         compresion_min_bytes=1024)
+    datos = entradas(args.historicos)
+    for clave, data in datos.items():
+        cache.set(clave, data, TTL_INMUTABLE)
+
+    contexto = multiprocessing.get_context('fork')
+    resultados = contexto.Queue()
+    procesos = [
+        contexto.Process(target=worker, args=(nombre, directorio, redis_url, args.segundos, args.escrituras,
+                                              args.historicos, resultados))
+        for _ in range(args.workers)
+    ]
+    for proceso in procesos:
+        proceso.start()
+    totales = [resultados.get() for _ in procesos]
+    for proceso in procesos:
+        proceso.join()
+    operaciones = sum(t[0] for t in totales)
+    rotas = sum(t[1] for t in totales)
+
+    # Un año de cotizaciones diarias: una lectura por clave contra una lectura múltiple
+    anuales = [clave for clave in datos if not clave.startswith('historico_')]
+    t0 = time.perf_counter()
+    for _ in range(args.repeticiones):
+        sueltas = {clave: cache.get(clave) for clave in anuales}
+    una_a_una = (time.perf_counter() - t0) * 1000 / args.repeticiones
+    t0 = time.perf_counter()
+    for _ in range(args.repeticiones):
+        juntas = cache.get_many(anuales)
+    multiple = (time.perf_counter() - t0) * 1000 / args.repeticiones
+    assert sueltas == juntas
+
+    print(f"{nombre:<18}{operaciones / args.segundos:>12.0f}{rotas:>16}{una_a_una:>14.1f}{multiple:>14.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4, help='Procesos simultáneos')
+    parser.add_argument('--segundos', type=float, default=3, help='Duración de la carga por almacenamiento')
+    parser.add_argument('--escrituras', type=float, default=0.1, help='Fracción de operaciones que escriben')
+    parser.add_argument('--historicos', type=int, default=20, help='Históricos de 365 días en la carga')
+    parser.add_argument('--repeticiones', type=int, default=20, help='Repeticiones de la lectura de un año')
+    parser.add_argument('--backends', nargs='+', default=['archivos-directo', 'archivos', 'sqlite', 'redis'],
+                        help='Almacenamientos a medir')
+    parser.add_argument('--redis-url', default=None, help='Servidor Redis real (por defecto uno simulado)')
+    parser.add_argument('--port', type=int, default=6392, help='Puerto del Redis simulado')
+    args = parser.parse_args()
+
+    directorio = tempfile.mkdtemp(prefix='bench_cache_backends_')
+    redis_url = args.redis_url
+    servidor = None
+    if redis_url is None:
+        servidor = subprocess.Popen([sys.executable, '-m', 'benchmarks.fake_redis', '--port', str(args.port)],
+                                    stdout=subprocess.DEVNULL)
+        redis_url = f"redis://127.0.0.1:{args.port}/0"
+        time.sleep(1)
+
+    try:
+        print(f"{args.workers} workers, {args.segundos:g} s, {args.escrituras:.0%} escrituras")
+        print(f"{'almacenamiento':<18}{'ops/s':>12}{'lecturas rotas':>16}{'año 1x1 (ms)':>14}{'año mget (ms)':>14}")
+        for nombre in args.backends:
+            medir_backend(nombre, args, directorio, redis_url)
+    finally:
+        if servidor is not None:
+            servidor.terminate()
+            servidor.wait()
+
+
+if __name__ == '__main__':
+    main()
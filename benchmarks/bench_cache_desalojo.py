@@ -0,0 +1,98 @@
+"""
+Benchmark del presupuesto de la caché y sus políticas de desalojo
+
+Simula una carga en la que pocas cotizaciones diarias reciben la mayor parte
+de los pedidos (distribución de Zipf) mezclada con históricos grandes que se
+piden una sola vez, como un recorrido de rangos al azar. Cada fallo guarda la
+respuesta, y el almacenamiento tiene un presupuesto de bytes menor que todo lo
+que se pide. Compara:
+
+    sin límite       el almacenamiento crece sin tope (el comportamiento anterior)
+    lru              desaloja las entradas usadas hace más tiempo
+    lfu              desaloja las entradas usadas menos veces
+    lfu + admisión   además, un histórico se guarda recién en su segundo pedido
+
+Informa la tasa de aciertos de las cotizaciones diarias, el tamaño final del
+almacenamiento y el tiempo por operación.
+
+Uso:
+    python -m benchmarks.bench_cache_desalojo --pedidos 20000 --presupuesto 400000
+"""
+import argparse
+import datetime
+import logging
+import os
+import random
+import tempfile
+import time
+
+from app.services.cache_service import CacheService, TTL_INMUTABLE
+from benchmarks.bench_cache_hits import cotizacion, historico
+
+ESCENARIOS = (
+    ('sin límite', None, 'lfu', ()),
+    ('lru', True, 'lru', ()),
+    ('lfu', True, 'lfu', ()),
+    ('lfu + admisión', True, 'lfu', ('historico_',)),
+)
+
+
+def carga(pedidos, diarias, fraccion_historicos, semilla=1):
+    """Secuencia de claves: cotizaciones con popularidad de Zipf e históricos únicos"""
+    azar = random.Random(semilla)
+    inicio = datetime.date(2015, 1, 1)
+    fechas = [(inicio + datetime.timedelta(days=i)).strftime('%Y-%m-%d') for i in range(diarias)]
+    pesos = [1 / (rango + 1) for rango in range(diarias)]
+    claves = []
+    for i in range(pedidos):
+        if azar.random() < fraccion_historicos:
+            claves.append(f"historico_ui_{i}")
+        else:
+            claves.append(f"ui_{azar.choices(fechas, pesos)[0]}")
+    return claves
+
+
+def medir(directorio, claves, presupuesto, politica, admision):
+    cache = CacheService(directorio, max_bytes=presupuesto, politica=politica,
+                         admision_prefijos=admision, intervalo_presupuesto=0.05)
+    respuesta_historico = historico(365)
+    aciertos = diarias = 0
+    t0 = time.perf_counter()
+    for key in claves:
+        es_diaria = not key.startswith('historico_')
+        if cache.get(key) is not None:
+            aciertos += es_diaria
+        else:
+            data = cotizacion(key[3:], 5.7) if es_diaria else respuesta_historico
+            cache.set(key, data, TTL_INMUTABLE)
+        diarias += es_diaria
+    operacion = (time.perf_counter() - t0) * 1e6 / len(claves)
+    cache.aplicar_presupuesto()
+    return aciertos / diarias, cache.stats(), operacion
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pedidos', type=int, default=20000, help='Pedidos de la carga')
+    parser.add_argument('--diarias', type=int, default=3000, help='Fechas distintas que se piden')
+    parser.add_argument('--historicos', type=float, default=0.1, help='Fracción de pedidos de históricos únicos')
+    parser.add_argument('--presupuesto', type=int, default=400000, help='CACHE_MAX_BYTES en bytes')
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    base = tempfile.mkdtemp(prefix='bench_cache_desalojo_')
+    claves = carga(args.pedidos, args.diarias, args.historicos)
+
+    print(f"{args.pedidos} pedidos, {args.diarias} fechas, {args.historicos:.0%} históricos únicos, "
+          f"presupuesto {args.presupuesto / 1e6:g} MB")
+    print(f"{'escenario':<16}{'aciertos diarias':>18}{'MB':>8}{'desalojadas':>13}{'no admitidas':>14}{'µs/op':>8}")
+    for nombre, limitado, politica, admision in ESCENARIOS:
+        presupuesto = args.presupuesto if limitado else None
+        tasa, stats, operacion = medir(os.path.join(base, nombre.replace(' ', '_')), claves,
+                                       presupuesto, politica, admision)
+        print(f"{nombre:<16}{tasa:>18.1%}{stats['bytes'] / 1e6:>8.2f}{stats['desalojadas']:>13}"
+              f"{stats['no_admitidas']:>14}{operacion:>8.0f}")
+
+
+if __name__ == '__main__':
+    main()
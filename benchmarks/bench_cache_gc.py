@@ -0,0 +1,101 @@
+"""
+Benchmark de la limpieza de caché expirada en archivos
+
+Llena una caché con muchas entradas diarias, de las que solo una pequeña
+parte está vencida, y compara:
+
+    antes    todos los archivos en un solo directorio; la limpieza recorre el
+             directorio y lee los metadatos de cada archivo (O(todas))
+    después  archivos repartidos en subdirectorios por hash y un manifiesto
+             SQLite de expiraciones; la limpieza consulta solo las vencidas
+             (O(vencidas))
+
+Mide también el costo de escribir una entrada, que ahora incluye el renombrado
+atómico y el registro en el manifiesto.
+
+Uso:
+    python -m benchmarks.bench_cache_gc --entradas 20000 --vencidas 200
+"""
+import argparse
+import json
+import logging
+import os
+import tempfile
+import time
+
+from app.services.cache_service import CacheService, TTL_INMUTABLE, TTL_RECIENTE
+from benchmarks.bench_cache_hits import cotizacion
+
+
+def claves(cantidad):
+    """Claves diarias distintas, como las de varios años de UI y UR"""
+    return [f"{unidad}_{i:06d}" for i in range(cantidad // 2) for unidad in ('ui', 'ur')]
+
+
+def antes(directorio, cache, todas, vencidas):
+    """Escribe con el esquema anterior (un directorio, escritura en el lugar) y limpia recorriéndolo"""
+    os.makedirs(directorio)
+    t0 = time.perf_counter()
+    for i, key in enumerate(todas):
+        cuerpo = cache.codec.dumps(cotizacion('2023-06-15', 5.7))
+        expira = 0 if i < vencidas else None
+        meta = {'formato': 2, 'clase': TTL_INMUTABLE, 'creado': 0, 'expira': expira, 'etag': '', 'error': False}
+        with open(os.path.join(directorio, f"{key}.json"), 'wb') as f:
+            f.write(cache.codec.dumps(meta) + b'\n' + cuerpo)
+    escritura = (time.perf_counter() - t0) * 1e6 / len(todas)
+
+    def limpiar():
+        count = 0
+        for filename in os.listdir(directorio):
+            if filename.endswith('.json'):
+                file_path = os.path.join(directorio, filename)
+                with open(file_path, 'rb') as f:
+                    meta = json.loads(f.read().partition(b'\n')[0])
+                if meta['expira'] is not None and time.time() > meta['expira']:
+                    os.remove(file_path)
+                    count += 1
+        return count
+
+    return escritura, limpiar
+
+
+def despues(directorio, todas, vencidas):
+    """Escribe con CacheService (subdirectorios y manifiesto) y limpia con clear_expired"""
+    cache = CacheService(directorio, ttl_reciente=0)
+    cache.clear_expired()  # Caché vacía: el manifiesto queda marcado como completo
+    t0 = time.perf_counter()
+    for i, key in enumerate(todas):
+        cache.set(key, cotizacion('2023-06-15', 5.7), TTL_RECIENTE if i < vencidas else TTL_INMUTABLE)
+    escritura = (time.perf_counter() - t0) * 1e6 / len(todas)
+    time.sleep(0.01)
+    return escritura, cache.clear_expired
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entradas', type=int, default=20000, help='Entradas en la caché')
+    parser.add_argument('--vencidas', type=int, default=200, help='Entradas vencidas entre ellas')
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    base = tempfile.mkdtemp(prefix='bench_cache_gc_')
+    todas = claves(args.entradas)
+    cache = CacheService(os.path.join(base, 'codec'))
+
+    print(f"{len(todas)} entradas, {args.vencidas} vencidas")
+    print(f"{'esquema':<10}{'escritura (µs)':>16}{'limpieza (ms)':>15}{'eliminadas':>12}{'sin vencidas (ms)':>19}")
+    for nombre, (escritura, limpiar) in (
+            ('antes', antes(os.path.join(base, 'antes'), cache, todas, args.vencidas)),
+            ('después', despues(os.path.join(base, 'despues'), todas, args.vencidas))):
+        t0 = time.perf_counter()
+        eliminadas = limpiar()
+        limpieza = (time.perf_counter() - t0) * 1000
+        # Segunda pasada: no queda nada vencido, pero "antes" vuelve a leer todo
+        t0 = time.perf_counter()
+        limpiar()
+        vacia = (time.perf_counter() - t0) * 1000
+        print(f"{nombre:<10}{escritura:>16.1f}{limpieza:>15.1f}{eliminadas:>12}{vacia:>19.2f}")
+
+
+if __name__ == '__main__':
+    main()
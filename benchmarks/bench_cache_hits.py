@@ -0,0 +1,168 @@
+"""
+Benchmark del camino de acierto de caché: bytes preserializados contra JSON
+
+Compara, para una cotización puntual y para un histórico de 365 días, el
+trabajo que hace un acierto de caché antes y después de guardar los bytes
+de la respuesta:
+
+    antes    el archivo es JSON indentado con '_meta' y 'data': se lee con
+             json.loads y la respuesta se vuelve a serializar con json.dumps
+             (lo que hace jsonify); en memoria se guardaba el dict y había
+             que serializarlo en cada acierto
+    después  el archivo es una línea de metadatos y los bytes de la
+             respuesta, que se envían tal cual (en disco solo se decodifica
+             la línea de metadatos; en memoria no se hace nada)
+
+Mide latencia (reloj) y CPU (tiempo de proceso) por acierto, en disco y en
+memoria, con cada codificador disponible. Al final mide peticiones completas
+a través del cliente de pruebas de Flask con la caché caliente.
+
+Uso:
+    python -m benchmarks.bench_cache_hits --repeticiones 2000
+"""
+import argparse
+import datetime
+import json
+import logging
+import os
+import tempfile
+import time
+
+from app.services.cache_service import CacheService
+from app.utils import json_codec
+
+
+def cotizacion(fecha, valor):
+    """Respuesta de una cotización con el formato de la API"""
+    return {
+        'tipo': 'UI',
+        'moneda': 'UNIDAD INDEXADA',
+        'fecha': fecha,
+        'valor': valor,
+        'metadata': {
+            'fuente': 'Banco Central del Uruguay',
+            'fecha_consulta': '2024-01-02 16:05:00'
+        }
+    }
+
+
+def historico(dias):
+    """Respuesta histórica de `dias` días con el formato de la API"""
+    inicio = datetime.date(2023, 1, 1)
+    cotizaciones = [
+        {'tipo': 'UI', 'moneda': 'UNIDAD INDEXADA',
+         'fecha': (inicio + datetime.timedelta(days=i)).strftime('%Y-%m-%d'), 'valor': round(5.5 + i * 0.0011, 4)}
+        for i in range(dias)
+    ]
+    return {
+        'tipo': 'UI',
+        'moneda': 'UNIDAD INDEXADA',
+        'fecha_inicio': cotizaciones[0]['fecha'],
+        'fecha_fin': cotizaciones[-1]['fecha'],
+        'cotizaciones': cotizaciones,
+        'metadata': {'total_registros': dias, 'dias_solicitados': dias, 'fuente': 'Banco Central del Uruguay'}
+    }
+
+
+def medir(funcion, repeticiones):
+    """Devuelve (µs de reloj, µs de CPU) por llamada"""
+    funcion()
+    t0, c0 = time.perf_counter(), time.process_time()
+    for _ in range(repeticiones):
+        funcion()
+    return ((time.perf_counter() - t0) * 1e6 / repeticiones,
+            (time.process_time() - c0) * 1e6 / repeticiones)
+
+
+def casos_antes(directorio, clave, data):
+    """Acierto con el formato anterior: JSON indentado, deserializar y volver a serializar"""
+    ruta = os.path.join(directorio, f"antes_{clave}.json")
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump({'_meta': {'clase': 'inmutable', 'creado': 0, 'expira': None}, 'data': data},
+                  f, ensure_ascii=False, indent=4)
+
+    def disco():
+        with open(ruta, 'r', encoding='utf-8') as f:
+            entry = json.loads(f.read())
+        return json.dumps(entry['data'], separators=(',', ':')).encode('utf-8')
+
+    def memoria():
+        return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+    return disco, memoria, os.path.getsize(ruta)
+
+
+def casos_despues(directorio, clave, data, codec):
+    """Acierto con bytes preserializados: en disco se decodifican solo los metadatos"""
+    cache = CacheService(os.path.join(directorio, codec.nombre), codec=codec)
+    cache.set(clave, data)
+    entrada = cache.get_entry(clave)
+    assert codec.loads(entrada.cuerpo) == data
+
+    def disco():
+        return cache.get_entry(clave).cuerpo
+
+    def memoria():
+        return entrada.cuerpo
+
+    return disco, memoria, os.path.getsize(cache.backend.ruta(clave))
+
+
+def peticiones(repeticiones, dias):
+    """Mide peticiones completas con la caché caliente a través del cliente de pruebas de Flask"""
+    from benchmarks.stub_bcu import StubBCU
+
+    with StubBCU() as stub:
+        os.environ['BCU_URL'] = stub.url
+        os.environ['CACHE_DIR'] = tempfile.mkdtemp(prefix='bench_cache_hits_app_')
+        os.environ['SCRAPER_RATE_LIMIT'] = '0'  # Sin límite de tasa contra el servidor local
+
+        from app import create_app
+        app = create_app('production')
+        logging.disable(logging.WARNING)
+        cliente = app.test_client()
+
+        fin = datetime.date(2023, 12, 31)
+        inicio = fin - datetime.timedelta(days=dias - 1)
+        urls = {
+            'cotización': '/api/cotizacion/ui?fecha=2023-06-15',
+            f'histórico {dias} días': f'/api/historico/ui?inicio={inicio}&fin={fin}',
+        }
+        print(f"\nPeticiones completas (caché caliente, codificador {app.extensions['json_codec'].nombre})")
+        print(f"{'caso':<22}{'reloj (µs)':>12}{'CPU (µs)':>12}")
+        for nombre, url in urls.items():
+            assert cliente.get(url).status_code == 200
+            reloj, cpu = medir(lambda: cliente.get(url), repeticiones)
+            print(f"{nombre:<22}{reloj:>12.1f}{cpu:>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeticiones', type=int, default=2000, help='Aciertos medidos por caso')
+    parser.add_argument('--dias', type=int, default=365, help='Días del histórico')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    directorio = tempfile.mkdtemp(prefix='bench_cache_hits_')
+    codecs = [json_codec.StdlibCodec()]
+    if json_codec.orjson is not None:
+        codecs.append(json_codec.OrjsonCodec())
+
+    print(f"{'caso':<22}{'modo':<18}{'archivo (B)':>12}{'disco reloj':>13}{'disco CPU':>11}"
+          f"{'memoria reloj':>15}{'memoria CPU':>13}")
+    for clave, data in (('cotizacion', cotizacion('2023-06-15', 5.7112)),
+                        (f'historico_{args.dias}', historico(args.dias))):
+        modos = [('antes', casos_antes(directorio, clave, data))]
+        modos += [(f'después ({c.nombre})', casos_despues(directorio, clave, data, c)) for c in codecs]
+        for modo, (disco, memoria, tamano) in modos:
+            disco_reloj, disco_cpu = medir(disco, args.repeticiones)
+            memoria_reloj, memoria_cpu = medir(memoria, args.repeticiones)
+            print(f"{clave:<22}{modo:<18}{tamano:>12}{disco_reloj:>13.1f}{disco_cpu:>11.1f}"
+                  f"{memoria_reloj:>15.2f}{memoria_cpu:>13.2f}")
+    print("(tiempos en µs por acierto)")
+
+    peticiones(max(1, args.repeticiones // 4), args.dias)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark del costo por petición del controlador de cotizaciones
+
+Compara crear un CotizacionController nuevo en cada petición (con su propia
+caché, almacén y sesión HTTP) contra el controlador compartido que se crea
+una vez por worker en create_app. Mide aciertos de caché y fallos de caché
+que consultan a un BCU local simulado.
+
+Uso:
+    python -m benchmarks.bench_controller --aciertos 2000 --fallos 200
+"""
+import argparse
+import datetime
+import logging
+import os
+import tempfile
+import time
+
+from benchmarks.stub_bcu import StubBCU
+
+
+def dias_habiles(desde, cantidad):
+    """Devuelve `cantidad` fechas hábiles consecutivas a partir de `desde`"""
+    fechas = []
+    fecha = desde
+    while len(fechas) < cantidad:
+        if fecha.weekday() < 5:
+            fechas.append(fecha.strftime('%Y-%m-%d'))
+        fecha += datetime.timedelta(days=1)
+    return fechas
+
+
+def medir(app, obtener_controller, fechas, repeticiones=1):
+    """Ejecuta get_cotizacion dentro de un contexto de petición y devuelve µs por petición"""
+    t0 = time.perf_counter()
+    for _ in range(repeticiones):
+        for fecha in fechas:
+            with app.test_request_context('/api/cotizacion/ui'):
+                resultado = obtener_controller().get_cotizacion('ui', fecha)
+                assert 'error' not in resultado, resultado
+    return (time.perf_counter() - t0) * 1e6 / (len(fechas) * repeticiones)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--aciertos', type=int, default=2000, help='Peticiones con acierto de caché')
+    parser.add_argument('--fallos', type=int, default=200, help='Peticiones con fallo de caché')
+    parser.add_argument('--latencia', type=float, default=0.0, help='Latencia simulada del BCU en segundos')
+    args = parser.parse_args()
+
+    with StubBCU(latencia=args.latencia) as stub:
+        os.environ['BCU_URL'] = stub.url
+        os.environ['CACHE_DIR'] = tempfile.mkdtemp(prefix='bench_controller_')
+        os.environ['SCRAPER_RATE_LIMIT'] = '0'  # Sin límite de tasa contra el servidor local
+
+        from app import create_app
+        from app.api.controllers import CotizacionController
+
+        app = create_app('production')
+        logging.disable(logging.WARNING)
+
+        modos = {
+            'por petición': CotizacionController,
+            'compartido': lambda: app.extensions['cotizacion_controller'],
+        }
+
+        fechas = dias_habiles(datetime.date(2015, 1, 1), args.fallos * len(modos))
+        print(f"{'modo':<14}{'acierto (µs)':>14}{'fallo (µs)':>14}{'conexiones':>12}")
+        for i, (nombre, obtener_controller) in enumerate(modos.items()):
+            lote = fechas[i * args.fallos:(i + 1) * args.fallos]
+
+            conexiones = stub.conexiones
+            t_fallo = medir(app, obtener_controller, lote)
+            conexiones = stub.conexiones - conexiones
+
+            repeticiones = max(1, args.aciertos // len(lote))
+            t_acierto = medir(app, obtener_controller, lote, repeticiones)
+
+            print(f"{nombre:<14}{t_acierto:>14.1f}{t_fallo:>14.1f}{conexiones:>12}")
+
+
+if __name__ == '__main__':
+    main()
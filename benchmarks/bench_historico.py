@@ -0,0 +1,71 @@
+"""
+Benchmark de get_ui_historico contra un BCU local simulado
+
+Compara el recorrido secuencial anterior (una fecha por vez con pausa
+aleatoria de 0,5-1 s) con el motor de descargas concurrente.
+
+Uso:
+    python -m benchmarks.bench_historico --dias 365 --latencia 0.2
+"""
+import argparse
+import datetime
+import logging
+import random
+import time
+
+from benchmarks.stub_bcu import StubBCU
+from app.scrapers.base_scraper import BaseScraper
+from app.scrapers.fetch_engine import FetchEngine, TokenBucket
+
+
+def historico_secuencial(scraper, fechas):
+    """Reproduce el algoritmo anterior: una petición por día más una pausa"""
+    cotizaciones = []
+    for fecha in fechas:
+        resultado = scraper.get_ui_cotizacion(fecha)
+        if 'error' not in resultado:
+            cotizaciones.append(resultado)
+        time.sleep(random.uniform(0.5, 1))
+    return cotizaciones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dias', type=int, default=365, help='Días del rango histórico')
+    parser.add_argument('--latencia', type=float, default=0.2, help='Latencia simulada del BCU en segundos')
+    parser.add_argument('--hilos', type=int, default=8, help='Descargas simultáneas del motor')
+    parser.add_argument('--tasa', type=float, default=10, help='Peticiones por segundo permitidas')
+    parser.add_argument('--muestra-secuencial', type=int, default=20,
+                        help='Días medidos con el algoritmo secuencial (se extrapola al rango completo)')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+
+    fin = datetime.date(2023, 12, 31)
+    inicio = fin - datetime.timedelta(days=args.dias - 1)
+    fechas = [(inicio + datetime.timedelta(days=i)).strftime('%Y-%m-%d') for i in range(args.dias)]
+
+    with StubBCU(latencia=args.latencia) as stub:
+        muestra = fechas[:args.muestra_secuencial]
+        scraper = BaseScraper(stub.url, engine=FetchEngine(1), rate_limiter=TokenBucket(rate=0))
+        t0 = time.perf_counter()
+        historico_secuencial(scraper, muestra)
+        t_secuencial = (time.perf_counter() - t0) * len(fechas) / len(muestra)
+
+        engine = FetchEngine(args.hilos)
+        scraper = BaseScraper(stub.url, engine=engine, rate_limiter=TokenBucket(args.tasa, args.tasa))
+        stub.peticiones = 0
+        t0 = time.perf_counter()
+        resultado = scraper.get_ui_historico(fechas[0], fechas[-1])
+        t_concurrente = time.perf_counter() - t0
+        engine.shutdown()
+
+    print(f"Rango: {args.dias} días, latencia simulada {args.latencia * 1000:.0f} ms")
+    print(f"Secuencial (estimado sobre {len(muestra)} días): {t_secuencial:8.1f} s")
+    print(f"Concurrente ({args.hilos} hilos, {args.tasa:g} req/s): {t_concurrente:8.1f} s "
+          f"({stub.peticiones} peticiones, {len(resultado.get('cotizaciones', []))} cotizaciones)")
+    print(f"Mejora: {t_secuencial / t_concurrente:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
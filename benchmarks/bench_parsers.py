@@ -0,0 +1,97 @@
+"""
+Paridad y velocidad de los backends de análisis HTML del scraper
+
+Primero verifica que todos los backends disponibles ('bs4', 'lxml') extraen
+exactamente el mismo resultado de cada página de benchmarks/fixtures, y
+termina con código 1 si alguno difiere. Después mide el tiempo medio de
+parse_cotizaciones por página con cada backend.
+
+Uso:
+    python -m benchmarks.bench_parsers --repeticiones 500
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+from app.scrapers import parsers
+from app.scrapers.base_scraper import BaseScraper
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+FECHA = '2024-03-14'
+
+
+def backends_disponibles():
+    """Backends que se pueden instanciar en este entorno"""
+    nombres = [parsers.BeautifulSoupParser.nombre]
+    if parsers.etree is not None:
+        nombres.append(parsers.LxmlParser.nombre)
+    return nombres
+
+
+def cargar_paginas():
+    """Devuelve {nombre de archivo: HTML} de las páginas de prueba"""
+    paginas = {}
+    for ruta in sorted(glob.glob(os.path.join(FIXTURES, '*.html'))):
+        with open(ruta, encoding='utf-8') as f:
+            paginas[os.path.basename(ruta)] = f.read()
+    return paginas
+
+
+def verificar_paridad(scrapers, paginas):
+    """
+    Compara el resultado de parse_cotizaciones de cada backend contra bs4
+
+    Returns:
+        bool: True si todos los backends coinciden en todas las páginas
+    """
+    referencia = scrapers[parsers.BeautifulSoupParser.nombre]
+    ok = True
+    for archivo, html in paginas.items():
+        esperado = referencia.parse_cotizaciones(html, FECHA)
+        for nombre, scraper in scrapers.items():
+            obtenido = scraper.parse_cotizaciones(html, FECHA)
+            if obtenido != esperado:
+                ok = False
+                print(f"DIFERENCIA en {archivo} ({nombre}):\n  bs4:  {esperado}\n  {nombre}: {obtenido}")
+        unidades = ', '.join(sorted(esperado.get('unidades', {}))) or esperado.get('error', '-')
+        print(f"  {archivo:<24} {unidades}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeticiones', type=int, default=500, help='Análisis por página y backend')
+    args = parser.parse_args()
+
+    paginas = cargar_paginas()
+    scrapers = {nombre: BaseScraper(parser=nombre) for nombre in backends_disponibles()}
+    if parsers.etree is None:
+        print("lxml no está instalado: solo se evalúa bs4")
+
+    print(f"Paridad entre {', '.join(scrapers)} en {len(paginas)} páginas:")
+    if not verificar_paridad(scrapers, paginas):
+        print("Los backends no producen el mismo resultado")
+        sys.exit(1)
+
+    print(f"\n{'página':<24}" + ''.join(f"{nombre + ' (µs)':>14}" for nombre in scrapers))
+    totales = dict.fromkeys(scrapers, 0.0)
+    for archivo, html in paginas.items():
+        fila = f"{archivo:<24}"
+        for nombre, scraper in scrapers.items():
+            t0 = time.perf_counter()
+            for _ in range(args.repeticiones):
+                scraper.parse_cotizaciones(html, FECHA)
+            microsegundos = (time.perf_counter() - t0) * 1e6 / args.repeticiones
+            totales[nombre] += microsegundos
+            fila += f"{microsegundos:>14.1f}"
+        print(fila)
+
+    base = totales[parsers.BeautifulSoupParser.nombre]
+    print(f"{'total':<24}" + ''.join(f"{t:>14.1f}" for t in totales.values()))
+    print(f"{'aceleración':<24}" + ''.join(f"{base / t:>13.1f}x" for t in totales.values()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark de los transportes del scraper contra un BCU local simulado
+
+Descarga las mismas fechas con cada transporte y compara tiempo, CPU e
+hilos ocupados:
+
+    hilos   requests en el motor de descargas: una descarga en curso por hilo
+    httpx   asyncio: todas las descargas en curso comparten un bucle de eventos
+            (solo si httpx está instalado)
+
+El servidor simulado corre en otro proceso para que no compita por el GIL
+con el cliente. Verifica además que ambos transportes devuelven lo mismo.
+
+Uso:
+    python -m benchmarks.bench_transporte --fechas 336 --latencia 0.2
+"""
+import argparse
+import datetime
+import logging
+import subprocess
+import sys
+import threading
+import time
+
+from benchmarks.stub_bcu import RUTA
+from app.scrapers import transporte
+from app.scrapers.base_scraper import BaseScraper
+from app.scrapers.fetch_engine import FetchEngine, TokenBucket
+from app.scrapers.resiliencia import CircuitBreaker
+
+
+def medir(scraper, fechas):
+    """Descarga las fechas y devuelve (registros, segundos, segundos de CPU, hilos máximos)"""
+    hilos = [threading.active_count()]
+    listo = threading.Event()
+
+    def contar():
+        while not listo.wait(0.01):
+            hilos.append(threading.active_count())
+
+    contador = threading.Thread(target=contar, daemon=True)
+    contador.start()
+    t0, c0 = time.perf_counter(), time.process_time()
+    registros = scraper.get_cotizaciones_fechas(fechas)
+    segundos, cpu = time.perf_counter() - t0, time.process_time() - c0
+    listo.set()
+    contador.join()
+    # El hilo contador no cuenta
+    return registros, segundos, cpu, max(hilos) - 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fechas', type=int, default=336, help='Fechas a descargar')
+    parser.add_argument('--latencia', type=float, default=0.2, help='Latencia simulada del BCU en segundos')
+    parser.add_argument('--concurrencia', type=int, default=32,
+                        help='Hilos del motor y conexiones del transporte httpx')
+    parser.add_argument('--port', type=int, default=8098, help='Puerto del servidor simulado')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    inicio = datetime.date(2023, 1, 2)
+    fechas = [(inicio + datetime.timedelta(days=i)).strftime('%Y-%m-%d') for i in range(args.fechas)]
+
+    servidor = subprocess.Popen(
+        [sys.executable, '-m', 'benchmarks.stub_bcu', '--port', str(args.port), '--latencia', str(args.latencia)],
+        stdout=subprocess.DEVNULL
+    )
+    try:
+        time.sleep(1)
+        url = f"http://127.0.0.1:{args.port}{RUTA}"
+        nombres = ['hilos'] + (['httpx'] if transporte.httpx is not None else [])
+        resultados = {}
+        print(f"{args.fechas} fechas, latencia {args.latencia} s, concurrencia {args.concurrencia}")
+        print(f"{'transporte':<12}{'segundos':>10}{'CPU (s)':>10}{'hilos':>8}{'errores':>9}")
+        for nombre in nombres:
+            scraper = BaseScraper(
+                url,
+                engine=FetchEngine(args.concurrencia),
+                rate_limiter=TokenBucket(rate=0),
+                circuit_breaker=CircuitBreaker(),
+                transporte_async=transporte.get_transporte_async(nombre, max_conexiones=args.concurrencia)
+            )
+            scraper.get_cotizaciones_fechas(fechas[:2])
+            registros, segundos, cpu, hilos = medir(scraper, fechas)
+            resultados[nombre] = registros
+            errores = sum(1 for r in registros if 'error' in r)
+            print(f"{nombre:<12}{segundos:>10.2f}{cpu:>10.2f}{hilos:>8}{errores:>9}")
+            scraper.engine.shutdown()
+
+        if len(resultados) > 1 and resultados['hilos'] != resultados['httpx']:
+            print("Los transportes devolvieron resultados distintos")
+            sys.exit(1)
+    finally:
+        servidor.terminate()
+        servidor.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,219 @@
+"""
+Servidor local que habla el protocolo de Redis (RESP2) con un diccionario en memoria
+
+Se usa para probar y medir RedisBackend sin un servidor Redis real. Implementa
+solo los comandos que usa la caché (PING, AUTH, SELECT, GET, MGET, SET con
+EX/PX, INCR, EXPIRE, DEL, EXISTS, TTL, DBSIZE y FLUSHDB). Las claves vencidas
+se eliminan al consultarlas, como hace Redis.
+"""
+import socket
+import socketserver
+import threading
+import time
+
+
+class ErrorComando(Exception):
+    """Error que se devuelve al cliente como respuesta '-ERR'"""
+
+
+def _codificar(valor):
+    """Codifica una respuesta en RESP2"""
+    if valor is None:
+        return b'$-1\r\n'
+    if isinstance(valor, bool):
+        return b':%d\r\n' % int(valor)
+    if isinstance(valor, int):
+        return b':%d\r\n' % valor
+    if isinstance(valor, str):
+        return b'+%s\r\n' % valor.encode('utf-8')
+    if isinstance(valor, bytes):
+        return b'$%d\r\n%s\r\n' % (len(valor), valor)
+    if isinstance(valor, list):
+        return b'*%d\r\n' % len(valor) + b''.join(_codificar(v) for v in valor)
+    raise TypeError(f"Tipo de respuesta no soportado: {type(valor)}")
+
+
+class FakeRedis:
+    def __init__(self, host='127.0.0.1', port=0, password=None):
+        """
+        Servidor TCP local compatible con los comandos de caché de Redis
+
+        Args:
+            host (str): Dirección de escucha
+            port (int): Puerto (0 para elegir uno libre)
+            password (str, optional): Contraseña exigida con AUTH
+        """
+        self.password = password
+        self.datos = {}  # (base, clave) -> (valor, vence o None)
+        self.comandos = 0
+        self._lock = threading.Lock()
+        servidor_redis = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def setup(self):
+                super().setup()
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                self.db = 0
+                self.autenticado = servidor_redis.password is None
+
+            def handle(self):
+                while True:
+                    try:
+                        args = self._leer_comando()
+                    except (ConnectionError, ValueError):
+                        return
+                    if args is None:
+                        return
+                    try:
+                        respuesta = _codificar(servidor_redis.ejecutar(self, args))
+                    except ErrorComando as e:
+                        respuesta = b'-ERR %s\r\n' % str(e).encode('utf-8')
+                    self.wfile.write(respuesta)
+                    self.wfile.flush()
+
+            def _leer_comando(self):
+                linea = self.rfile.readline()
+                if not linea:
+                    return None
+                if not linea.startswith(b'*'):
+                    # Comando en línea (telnet, redis-cli --no-raw)
+                    return linea.split()
+                args = []
+                for _ in range(int(linea[1:-2])):
+                    cabecera = self.rfile.readline()
+                    if not cabecera.startswith(b'$'):
+                        raise ValueError("Se esperaba un bulk string")
+                    longitud = int(cabecera[1:-2])
+                    args.append(self.rfile.read(longitud + 2)[:-2])
+                return args
+
+        # Cola de conexiones amplia: cada hilo de cada worker abre la suya
+        servidor = type('Servidor', (socketserver.ThreadingTCPServer,),
+                        {'request_queue_size': 1024, 'allow_reuse_address': True})
+        self.server = servidor((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread = None
+
+    def _vigente(self, db, clave):
+        entrada = self.datos.get((db, clave))
+        if entrada is None:
+            return None
+        valor, vence = entrada
+        if vence is not None and time.time() >= vence:
+            del self.datos[(db, clave)]
+            return None
+        return valor
+
+    def ejecutar(self, conexion, args):
+        """
+        Ejecuta un comando de una conexión
+
+        Args:
+            conexion: Handler de la conexión (base seleccionada y autenticación)
+            args (list): Nombre del comando y argumentos, en bytes
+
+        Returns:
+            Respuesta a codificar en RESP2
+        """
+        if not args:
+            raise ErrorComando("comando vacío")
+        nombre, args = args[0].decode('utf-8').upper(), args[1:]
+        db = conexion.db
+
+        if nombre == 'AUTH':
+            if self.password is None or args[-1].decode('utf-8') != self.password:
+                raise ErrorComando("invalid password")
+            conexion.autenticado = True
+            return 'OK'
+        if not conexion.autenticado:
+            raise ErrorComando("NOAUTH Authentication required")
+
+        with self._lock:
+            self.comandos += 1
+            if nombre == 'PING':
+                return 'PONG'
+            if nombre == 'SELECT':
+                conexion.db = int(args[0])
+                return 'OK'
+            if nombre == 'GET':
+                return self._vigente(db, args[0])
+            if nombre == 'MGET':
+                return [self._vigente(db, clave) for clave in args]
+            if nombre == 'SET':
+                vence = None
+                opciones = [a.decode('utf-8').upper() for a in args[2::2]]
+                for opcion, valor in zip(opciones, args[3::2]):
+                    if opcion == 'EX':
+                        vence = time.time() + int(valor)
+                    elif opcion == 'PX':
+                        vence = time.time() + int(valor) / 1000
+                    else:
+                        raise ErrorComando(f"opción de SET no soportada: {opcion}")
+                self.datos[(db, args[0])] = (args[1], vence)
+                return 'OK'
+            if nombre == 'INCR':
+                valor = self._vigente(db, args[0])
+                vence = self.datos[(db, args[0])][1] if valor is not None else None
+                try:
+                    valor = int(valor or 0) + 1
+                except ValueError:
+                    raise ErrorComando("value is not an integer or out of range")
+                self.datos[(db, args[0])] = (str(valor).encode('utf-8'), vence)
+                return valor
+            if nombre == 'EXPIRE':
+                valor = self._vigente(db, args[0])
+                if valor is None:
+                    return 0
+                self.datos[(db, args[0])] = (valor, time.time() + int(args[1]))
+                return 1
+            if nombre == 'DEL':
+                return sum(1 for clave in args if self._vigente(db, clave) is not None
+                           and self.datos.pop((db, clave), None) is not None)
+            if nombre == 'EXISTS':
+                return sum(1 for clave in args if self._vigente(db, clave) is not None)
+            if nombre == 'TTL':
+                if self._vigente(db, args[0]) is None:
+                    return -2
+                vence = self.datos[(db, args[0])][1]
+                return -1 if vence is None else max(0, int(vence - time.time()))
+            if nombre == 'DBSIZE':
+                return sum(1 for base, clave in list(self.datos) if base == db and self._vigente(db, clave) is not None)
+            if nombre == 'FLUSHDB':
+                for clave in [k for k in self.datos if k[0] == db]:
+                    del self.datos[clave]
+                return 'OK'
+        raise ErrorComando(f"comando no soportado: {nombre}")
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        credenciales = f":{self.password}@" if self.password else ''
+        return f"redis://{credenciales}{host}:{port}/0"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Servidor local compatible con los comandos de caché de Redis')
+    parser.add_argument('--port', type=int, default=6390)
+    parser.add_argument('--password', default=None)
+    args = parser.parse_args()
+
+    servidor = FakeRedis(port=args.port, password=args.password)
+    print(f"Sirviendo {servidor.url}")
+    servidor.server.serve_forever()
@@ -0,0 +1,163 @@
+"""
+Servidor local que imita la página de cotizaciones del BCU
+
+Se usa en los benchmarks para medir el scraper sin depender del sitio real.
+Los valores son deterministas a partir de la fecha: la UI crece a diario,
+la UR cambia una vez por mes y los fines de semana la tabla viene vacía.
+"""
+import datetime
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+RUTA = '/Estadisticas-e-Indicadores/Paginas/Cotizaciones.aspx'
+FECHA_BASE = datetime.date(2010, 1, 1)
+
+
+def _formatear(valor, decimales):
+    """Formatea un número al estilo del BCU (1.532,33)"""
+    texto = f"{valor:,.{decimales}f}"
+    return texto.replace(',', '_').replace('.', ',').replace('_', '.')
+
+
+def valor_ui(fecha):
+    """Valor simulado de la UI para una fecha"""
+    return round(2.1 * (1.0002 ** (fecha - FECHA_BASE).days), 4)
+
+
+def valor_ur(fecha):
+    """Valor simulado de la UR para una fecha (constante dentro del mes)"""
+    meses = (fecha.year - FECHA_BASE.year) * 12 + fecha.month - 1
+    return round(480 * (1.006 ** meses), 2)
+
+
+def render_pagina(fecha):
+    """
+    Genera el HTML de la página de cotizaciones para una fecha
+
+    Args:
+        fecha (datetime.date): Fecha consultada
+
+    Returns:
+        str: HTML con la tabla "resultado"
+    """
+    filas = []
+    if fecha.weekday() < 5:
+        dolar = 38 + (fecha - FECHA_BASE).days % 300 / 100
+        for moneda, compra, venta, arbitraje in [
+            ('DOLAR USA BILLETE', _formatear(dolar, 3), _formatear(dolar + 0.6, 3), '1,000'),
+            ('EURO', _formatear(dolar * 1.08, 3), _formatear(dolar * 1.08 + 0.7, 3), '1,080'),
+            ('UNIDAD INDEXADA', _formatear(valor_ui(fecha), 4), _formatear(valor_ui(fecha), 4), ''),
+            ('UNIDAD REAJUSTAB', _formatear(valor_ur(fecha), 2), _formatear(valor_ur(fecha), 2), ''),
+        ]:
+            filas.append(
+                f'<tr><td class="moneda">{moneda}</td><td>{compra}</td>'
+                f'<td>{venta}</td><td>{arbitraje}</td></tr>'
+            )
+
+    return (
+        '<!DOCTYPE html><html><head><meta charset="utf-8"><title>Cotizaciones</title></head>'
+        '<body><div id="contenido"><h1>Cotizaciones</h1>'
+        f'<p>Fecha de consulta: {fecha.strftime("%d/%m/%Y")}</p>'
+        '<table class="resultado"><thead><tr><th>Moneda</th><th>Compra</th>'
+        '<th>Venta</th><th>Arbitraje</th></tr></thead><tbody>'
+        + ''.join(filas) +
+        '</tbody></table></div></body></html>'
+    )
+
+
+class StubBCU:
+    def __init__(self, latencia=0.0, host='127.0.0.1', port=0):
+        """
+        Servidor HTTP local con la página de cotizaciones simulada
+
+        Args:
+            latencia (float): Segundos de espera simulada por petición
+            host (str): Dirección de escucha
+            port (int): Puerto (0 para elegir uno libre)
+        """
+        self.latencia = latencia
+        self.peticiones = 0
+        self.conexiones = 0
+        self.fechas = []  # Fechas consultadas, en orden de llegada
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # HTTP/1.1 para que los clientes puedan reutilizar conexiones
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                # Sin Nagle: las cabeceras y el cuerpo se envían en escrituras separadas
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                with stub._lock:
+                    stub.conexiones += 1
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path != RUTA:
+                    self.send_error(404)
+                    return
+                with stub._lock:
+                    stub.peticiones += 1
+                if stub.latencia:
+                    time.sleep(stub.latencia)
+                try:
+                    fecha_param = parse_qs(url.query)['fecha'][0]
+                    fecha = datetime.datetime.strptime(fecha_param, '%d/%m/%Y').date()
+                except (KeyError, ValueError):
+                    self.send_error(400)
+                    return
+                with stub._lock:
+                    stub.fechas.append(fecha.isoformat())
+                cuerpo = render_pagina(fecha).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(cuerpo)))
+                self.end_headers()
+                self.wfile.write(cuerpo)
+
+            def log_message(self, format, *args):
+                pass
+
+        # Cola de conexiones amplia: los clientes asíncronos abren muchas a la vez
+        servidor = type('Servidor', (ThreadingHTTPServer,), {'request_queue_size': 1024})
+        self.server = servidor((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}{RUTA}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Servidor local que simula la página del BCU')
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--latencia', type=float, default=0.0)
+    args = parser.parse_args()
+
+    stub = StubBCU(latencia=args.latencia, port=args.port)
+    print(f"Sirviendo {stub.url}")
+    stub.server.serve_forever()
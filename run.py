@@ -1,6 +1,40 @@
+import argparse
 from app import create_app
 
 app = create_app()
 
+def main():
+    parser = argparse.ArgumentParser(description='API de Cotizaciones BCU')
+    subparsers = parser.add_subparsers(dest='comando')
+    
+    subparsers.add_parser('serve', help='Inicia el servidor de desarrollo (por defecto)')
+    subparsers.add_parser('scheduler', help='Ejecuta el planificador de caché en primer plano')
+    
+    backfill_parser = subparsers.add_parser('backfill', help='Completa una ventana histórica en el almacén')
+    backfill_parser.add_argument('--dias', type=int, default=None, help='Días hacia atrás desde ayer')
+    
+    subparsers.add_parser('gc', help='Elimina las entradas de caché expiradas')
+    
+    args = parser.parse_args()
+    scheduler = app.extensions['cache_scheduler']
+    
+    if args.comando == 'scheduler':
+        try:
+            scheduler.run_forever()
+        except KeyboardInterrupt:
+            pass
+    elif args.comando == 'backfill':
+        resumen = scheduler.backfill(
+            args.dias,
+            progreso=lambda r: print(f"{r['procesados']}/{r['pendientes']} días ({r['dias_por_segundo']} días/s)")
+        )
+        print(f"Backfill terminado: {resumen['procesados']} días en {resumen['segundos']} s, "
+              f"{resumen['con_datos']} con datos, {resumen['errores']} errores, "
+              f"{resumen['en_cache']} entradas guardadas en caché")
+    elif args.comando == 'gc':
+        print(f"Se eliminaron {scheduler.gc()} entradas de caché expiradas")
+    else:
+        app.run(host='0.0.0.0', port=5000)
+
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000)
\ No newline at end of file
+    main()
@@ -0,0 +1,70 @@
+import pytest
+
+from app import create_app
+from benchmarks.stub_bcu import StubBCU
+from app.scrapers.base_scraper import BaseScraper
+from app.scrapers.fetch_engine import FetchEngine, TokenBucket
+from app.scrapers.resiliencia import CircuitBreaker
+from app.scrapers.transporte import EventLoopThread
+
+
+@pytest.fixture(scope='session')
+def stub():
+    """Servidor local que imita la página de cotizaciones del BCU"""
+    with StubBCU(latencia=0.02) as servidor:
+        yield servidor
+
+
+@pytest.fixture
+def bucle():
+    """Bucle de eventos propio de cada prueba, detenido al terminar"""
+    bucle = EventLoopThread(nombre='bcu-async-test')
+    yield bucle
+    bucle.stop()
+
+
+@pytest.fixture
+def crear_scraper(stub, bucle):
+    """Crea scrapers contra el servidor simulado, sin límite de tasa y con su propio circuito"""
+    engines = []
+
+    def crear(transporte_async):
+        engine = FetchEngine(4)
+        engines.append(engine)
+        scraper = BaseScraper(stub.url, engine=engine, rate_limiter=TokenBucket(rate=0),
+                              circuit_breaker=CircuitBreaker(), transporte_async=transporte_async)
+        scraper.bucle = bucle
+        return scraper
+
+    yield crear
+    for engine in engines:
+        engine.shutdown()
+
+
+@pytest.fixture
+def app(stub, tmp_path, monkeypatch):
+    """Aplicación contra el servidor simulado, con la caché, el almacén y los trabajos en un directorio temporal"""
+    monkeypatch.setenv('BCU_URL', stub.url)
+    monkeypatch.setenv('CACHE_DIR', str(tmp_path / 'cache'))
+    monkeypatch.setenv('SCRAPER_RATE_LIMIT', '1000')
+    monkeypatch.setenv('SCRAPER_RATE_BURST', '1000')
+    monkeypatch.delenv('SCHEDULER_ENABLED', raising=False)
+    aplicacion = create_app()
+    controlador = aplicacion.extensions['cotizacion_controller']
+    # El circuito es compartido por el proceso: cada prueba empieza con el circuito cerrado
+    controlador.scraper.circuit_breaker.reset()
+    yield aplicacion
+    controlador._refresh_executor.shutdown(wait=True)
+    controlador.scraper.circuit_breaker.reset()
+
+
+@pytest.fixture
+def cliente(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def controlador(app):
+    """Controlador de la aplicación, para usarlo dentro de su contexto"""
+    with app.app_context():
+        yield app.extensions['cotizacion_controller']
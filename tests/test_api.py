@@ -0,0 +1,286 @@
+import datetime
+import gzip
+import json
+
+import pytest
+
+from benchmarks.stub_bcu import valor_ui, valor_ur
+from app.services.cache_service import TTL_RECIENTE
+
+
+def test_info_lista_los_endpoints(cliente):
+    info = cliente.get('/api/info').get_json()
+    rutas = {endpoint['ruta'] for endpoint in info['endpoints']}
+    assert {'/api/cotizacion/batch', '/api/convertir', '/api/historico/jobs'} <= rutas
+    assert not any('debe implementarse' in endpoint.get('nota', '') for endpoint in info['endpoints'])
+
+
+def test_ejemplo_de_jobs_en_info_es_un_rango_valido(cliente, controlador):
+    info = cliente.get('/api/info').get_json()
+    jobs = next(endpoint for endpoint in info['endpoints'] if endpoint['ruta'] == '/api/historico/jobs')
+    ejemplo = json.loads(jobs['ejemplo'])
+
+    rango = controlador.validar_rango(ejemplo['tipo'], ejemplo['inicio'], ejemplo['fin'], con_fechas=False)
+    assert 'error' not in rango
+
+
+def test_peticiones_comparten_el_controlador_y_las_conexiones(app, cliente, stub):
+    controlador = app.extensions['cotizacion_controller']
+    conexiones = stub.conexiones
+
+    for dia in range(12, 17):
+        respuesta = cliente.get(f'/api/cotizacion/ui?fecha=2023-06-{dia}')
+        assert respuesta.status_code == 200
+        assert respuesta.get_json()['valor'] == valor_ui(datetime.date(2023, 6, dia))
+
+    assert app.extensions['cotizacion_controller'] is controlador
+    # La sesión del scraper vive lo que la aplicación: una conexión keep-alive para todas
+    assert stub.conexiones - conexiones == 1
+
+
+# Días hábiles del 1 al 15 de junio de 2023
+JUNIO = [f'2023-06-{d:02d}' for d in (1, 2, 5, 6, 7, 8, 9, 12, 13, 14, 15)]
+
+
+def lineas(respuesta):
+    return [json.loads(linea) for linea in respuesta.get_data(as_text=True).splitlines()]
+
+
+@pytest.mark.parametrize('consulta, cabeceras', [
+    ('&stream=1', {}),
+    ('', {'Accept': 'application/x-ndjson'}),
+])
+def test_historico_en_ndjson(cliente, consulta, cabeceras):
+    respuesta = cliente.get(f'/api/historico/ui?inicio=2023-06-01&fin=2023-06-15{consulta}', headers=cabeceras)
+
+    assert respuesta.status_code == 200
+    assert respuesta.mimetype == 'application/x-ndjson'
+    assert respuesta.headers['X-Accel-Buffering'] == 'no'
+    *cotizaciones, resumen = lineas(respuesta)
+    assert [c['fecha'] for c in cotizaciones] == JUNIO
+    assert resumen['metadata']['total_registros'] == len(cotizaciones)
+    assert resumen['fecha_inicio'] == '2023-06-01' and 'cotizaciones' not in resumen
+
+    # La misma URL en JSON devuelve las mismas cotizaciones, ya almacenadas
+    completa = cliente.get('/api/historico/ui?inicio=2023-06-01&fin=2023-06-15')
+    assert completa.get_json()['cotizaciones'] == cotizaciones
+    assert 'Accept' in completa.headers['Vary']
+
+
+def test_ndjson_completa_los_dias_sin_publicacion(cliente, stub):
+    consultas = len(stub.fechas)
+    respuesta = cliente.get('/api/historico/ur?inicio=2023-07-14&fin=2023-07-19&stream=1&completar=1')
+
+    *cotizaciones, resumen = lineas(respuesta)
+    assert [c['fecha'] for c in cotizaciones] == [f'2023-07-{d}' for d in range(14, 20)]
+    assert {c['valor'] for c in cotizaciones} == {valor_ur(datetime.date(2023, 7, 14))}
+    assert [c.get('completado_desde') for c in cotizaciones] == [
+        None, '2023-07-14', '2023-07-14', None, '2023-07-17', None
+    ]
+    assert resumen['metadata']['total_registros'] == 6
+    # La UR es mensual: una sola página de julio alcanza
+    assert stub.fechas[consultas:] == ['2023-07-14']
+
+
+def test_ndjson_error_a_mitad_del_rango(cliente, controlador, monkeypatch):
+    def descargas(fechas):
+        yield controlador.scraper.get_cotizaciones_fecha(fechas[0])
+        raise ConnectionError('sin conexión')
+
+    monkeypatch.setattr(controlador.scraper, 'iter_cotizaciones_fechas', descargas)
+    *cotizaciones, ultima = lineas(cliente.get('/api/historico/ui?inicio=2023-06-01&fin=2023-06-09&stream=1'))
+
+    assert [c['fecha'] for c in cotizaciones] == ['2023-06-01']
+    assert ultima['codigo'] == 'SCRAPER_ERROR' and 'sin conexión' in ultima['error']
+
+
+def test_ndjson_rango_invalido(cliente):
+    respuesta = cliente.get('/api/historico/ui?inicio=2023-06-15&fin=2023-06-01&stream=1')
+    assert respuesta.status_code == 400
+    assert respuesta.get_json()['codigo'] == 'INVALID_DATE_RANGE'
+
+
+def test_lote_de_consultas(cliente, stub):
+    consultas = [
+        ['ui', '2023-06-15'],
+        {'unidad': 'UR', 'fecha': '2023-06-15'},
+        ['ui', '2023-06-15'],
+        ['ui', '2023-06-17'],
+        ['ur', '2023-06-17'],
+        ['uf', '2023-06-15'],
+        'ui 2023-06-15',
+    ]
+    anteriores = len(stub.fechas)
+
+    respuesta = cliente.post('/api/cotizacion/batch', json={'consultas': consultas})
+
+    assert respuesta.status_code == 200
+    resultados, metadata = respuesta.get_json()['resultados'], respuesta.get_json()['metadata']
+    assert resultados[0]['valor'] == resultados[2]['valor'] == valor_ui(datetime.date(2023, 6, 15))
+    assert resultados[1]['valor'] == resultados[4]['valor'] == valor_ur(datetime.date(2023, 6, 15))
+    assert resultados[4]['fecha'] == '2023-06-17'
+    assert [r.get('codigo') for r in resultados[3:4] + resultados[5:]] == [
+        'DATA_FETCH_ERROR', 'INVALID_UNIT_TYPE', 'INVALID_UNIT_TYPE'
+    ]
+    assert (metadata['total_consultas'], metadata['consultas_unicas'], metadata['descargas']) == (7, 4, 1)
+    assert (metadata['encontradas'], metadata['errores']) == (4, 3)
+    # La página del 15 responde la UI y la UR de todo junio
+    assert stub.fechas[anteriores:] == ['2023-06-15']
+
+    repetida = cliente.post('/api/cotizacion/batch', json=consultas).get_json()
+    assert repetida['metadata']['descargas'] == 0
+    assert repetida['resultados'] == resultados
+
+
+@pytest.mark.parametrize('cuerpo, codigo', [
+    ({'consultas': []}, 'INVALID_BATCH'),
+    ({'consultas': 'ui'}, 'INVALID_BATCH'),
+    ([['ui', '2023-06-15']] * 3, 'BATCH_TOO_LARGE'),
+])
+def test_lote_invalido(cliente, controlador, monkeypatch, cuerpo, codigo):
+    monkeypatch.setattr(controlador, 'batch_max', 2)
+    respuesta = cliente.post('/api/cotizacion/batch', json=cuerpo)
+    assert respuesta.status_code == 400
+    assert respuesta.get_json()['codigo'] == codigo
+
+
+@pytest.mark.parametrize('de, a, factor, decimales', [
+    ('ui', 'uyu', lambda ui, ur: ui, 2),
+    ('uyu', 'ur', lambda ui, ur: 1 / ur, 4),
+    ('ur', 'ui', lambda ui, ur: ur / ui, 4),
+    ('ui', 'ui', lambda ui, ur: 1.0, 4),
+])
+def test_convertir(cliente, de, a, factor, decimales):
+    fecha = datetime.date(2023, 6, 15)
+    respuesta = cliente.get(f'/api/convertir?de={de.upper()}&a={a}&monto=1500&fecha=2023-06-15')
+
+    assert respuesta.status_code == 200
+    conversion = respuesta.get_json()
+    esperado = factor(valor_ui(fecha), valor_ur(fecha))
+    assert conversion['factor'] == pytest.approx(esperado)
+    assert conversion['resultado'] == round(1500 * conversion['factor'], decimales)
+    assert (conversion['de'], conversion['a'], conversion['fecha']) == (de, a, '2023-06-15')
+
+
+@pytest.mark.parametrize('consulta, codigo', [
+    ('de=ui&a=usd&monto=1', 'INVALID_UNIT_TYPE'),
+    ('de=ui&a=uyu&monto=mil', 'INVALID_AMOUNT'),
+    ('de=ui&a=uyu&monto=1&fecha=15/06/2023', 'INVALID_DATE_FORMAT'),
+    ('de=ui&a=uyu&monto=1&fecha=2023-06-17', 'DATA_FETCH_ERROR'),
+])
+def test_convertir_invalido(cliente, consulta, codigo):
+    respuesta = cliente.get(f'/api/convertir?{consulta}')
+    assert respuesta.status_code == 400
+    assert respuesta.get_json()['codigo'] == codigo
+
+
+def test_convertir_lote_un_factor_por_fecha(cliente, stub):
+    anteriores = len(stub.fechas)
+    respuesta = cliente.post('/api/convertir', json={
+        'de': 'ur',
+        'a': 'uyu',
+        'conversiones': [[100, '2023-06-15'], {'monto': 250.5, 'fecha': '2023-06-15'},
+                         [10, '2023-06-17'], [True, '2023-06-15'], [1, '2023-13-01']]
+    }).get_json()
+
+    resultados = respuesta['resultados']
+    ur = valor_ur(datetime.date(2023, 6, 15))
+    assert [r.get('resultado') for r in resultados[:3]] == [round(100 * ur, 2), round(250.5 * ur, 2), round(10 * ur, 2)]
+    assert [r['codigo'] for r in resultados[3:]] == ['INVALID_AMOUNT', 'INVALID_DATE_FORMAT']
+    assert respuesta['metadata']['fechas_distintas'] == 2
+    assert respuesta['metadata']['descargas'] == 1
+    assert len(stub.fechas) - anteriores == 1
+
+
+def test_validadores_de_una_fecha_pasada(cliente):
+    respuesta = cliente.get('/api/cotizacion/ui?fecha=2023-06-15')
+
+    assert respuesta.status_code == 200
+    assert respuesta.headers['ETag'] and respuesta.last_modified is not None
+    assert respuesta.cache_control.public and respuesta.cache_control.immutable
+    assert respuesta.cache_control.max_age == 365 * 24 * 60 * 60
+
+    for cabeceras in ({'If-None-Match': respuesta.headers['ETag']},
+                      {'If-None-Match': f"W/{respuesta.headers['ETag']}"},
+                      {'If-Modified-Since': respuesta.headers['Last-Modified']}):
+        condicional = cliente.get('/api/cotizacion/ui?fecha=2023-06-15', headers=cabeceras)
+        assert condicional.status_code == 304
+        assert condicional.data == b''
+        assert condicional.headers['ETag'] == respuesta.headers['ETag']
+
+    otra = cliente.get('/api/cotizacion/ui?fecha=2023-06-15', headers={'If-None-Match': '"otro"'})
+    assert otra.status_code == 200 and otra.get_json() == respuesta.get_json()
+
+
+def test_validadores_de_una_entrada_que_expira(cliente, controlador):
+    data = {'tipo': 'UI', 'moneda': 'UNIDAD INDEXADA', 'fecha': '2023-06-15', 'valor': 5.7}
+    controlador.cache_service.set('ui_2023-06-15', data, TTL_RECIENTE)
+
+    respuesta = cliente.get('/api/cotizacion/ui?fecha=2023-06-15')
+
+    assert respuesta.get_json() == data
+    assert not respuesta.cache_control.immutable
+    assert 0 < respuesta.cache_control.max_age <= controlador.cache_service.ttls[TTL_RECIENTE]
+
+
+def test_historico_condicional(cliente):
+    url = '/api/historico/ui?inicio=2023-06-01&fin=2023-06-15'
+    respuesta = cliente.get(url)
+    condicional = cliente.get(url, headers={'If-None-Match': respuesta.headers['ETag']})
+
+    assert condicional.status_code == 304
+    assert 'Accept' in condicional.headers['Vary']
+
+
+def test_errores_sin_validadores(cliente):
+    respuesta = cliente.get('/api/cotizacion/ui?fecha=2023-06-17')
+    assert respuesta.status_code == 400
+    assert 'ETag' not in respuesta.headers
+
+
+def test_historico_grande_comprimido(cliente):
+    url = '/api/historico/ui?inicio=2023-05-01&fin=2023-06-30'
+    plano = cliente.get(url)
+    comprimido = cliente.get(url, headers={'Accept-Encoding': 'gzip'})
+
+    assert 'Content-Encoding' not in plano.headers
+    assert comprimido.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in comprimido.headers['Vary']
+    assert gzip.decompress(comprimido.get_data()) == plano.get_data()
+    assert len(comprimido.get_data()) < len(plano.get_data()) / 4
+    assert comprimido.headers['ETag'] == plano.headers['ETag'][:-1] + '-gzip"'
+
+    # Cualquiera de las dos representaciones valida la petición condicional
+    for etag in (plano.headers['ETag'], comprimido.headers['ETag']):
+        condicional = cliente.get(url, headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+        assert condicional.status_code == 304
+        assert condicional.headers['ETag'] == comprimido.headers['ETag']
+
+
+def test_respuestas_chicas_y_streams_sin_comprimir(cliente):
+    chica = cliente.get('/api/cotizacion/ui?fecha=2023-06-15', headers={'Accept-Encoding': 'gzip'})
+    stream = cliente.get('/api/historico/ui?inicio=2023-05-01&fin=2023-06-30&stream=1',
+                         headers={'Accept-Encoding': 'gzip'})
+
+    assert 'Content-Encoding' not in chica.headers
+    assert 'Content-Encoding' not in stream.headers
+    # 44 días hábiles y el resumen
+    assert len(lineas(stream)) == 45
+
+
+def test_historico_columnar(cliente):
+    filas = cliente.get('/api/historico/ur?inicio=2023-07-14&fin=2023-07-19&completar=1').get_json()
+    columnar = cliente.get('/api/historico/ur?inicio=2023-07-14&fin=2023-07-19&completar=1'
+                           '&formato=columnar&stream=1').get_json()
+
+    assert columnar['fechas'] == [c['fecha'] for c in filas['cotizaciones']]
+    assert columnar['valores'] == [c['valor'] for c in filas['cotizaciones']]
+    assert columnar['completado_desde'] == [c.get('completado_desde') for c in filas['cotizaciones']]
+    assert 'interpolado' not in columnar and 'cotizaciones' not in columnar
+    assert columnar['metadata'] == dict(filas['metadata'], formato='columnar')
+
+
+def test_formato_desconocido(cliente):
+    respuesta = cliente.get('/api/historico/ui?inicio=2023-06-01&fin=2023-06-15&formato=csv')
+    assert respuesta.status_code == 400
+    assert respuesta.get_json()['codigo'] == 'INVALID_FORMAT'
@@ -0,0 +1,63 @@
+import datetime
+import os
+
+import pytest
+
+from benchmarks.stub_bcu import render_pagina, valor_ui, valor_ur
+from app.scrapers.base_scraper import BaseScraper
+
+FIXTURES = os.path.join(os.path.dirname(__file__), '..', 'benchmarks', 'fixtures')
+
+
+@pytest.fixture
+def scraper(crear_scraper):
+    return crear_scraper('hilos')
+
+
+def test_una_pagina_trae_todas_las_filas():
+    fecha = datetime.date(2023, 6, 15)
+    registro = BaseScraper().parse_cotizaciones(render_pagina(fecha), fecha.isoformat())
+
+    assert [m['moneda'] for m in registro['monedas']] == [
+        'DOLAR USA BILLETE', 'EURO', 'UNIDAD INDEXADA', 'UNIDAD REAJUSTAB'
+    ]
+    assert registro['monedas'][0]['valor_arbitraje'] == 1.0
+    assert registro['monedas'][2]['valor_arbitraje'] is None
+    assert registro['unidades'] == {
+        'ui': {'tipo': 'UI', 'moneda': 'UNIDAD INDEXADA', 'fecha': '2023-06-15', 'valor': valor_ui(fecha)},
+        'ur': {'tipo': 'UR', 'moneda': 'UNIDAD REAJUSTAB', 'fecha': '2023-06-15', 'valor': valor_ur(fecha)},
+    }
+
+
+def test_unidades_fuera_de_la_tabla():
+    with open(os.path.join(FIXTURES, 'texto_libre.html'), encoding='utf-8') as f:
+        registro = BaseScraper().parse_cotizaciones(f.read(), '2024-03-14')
+
+    assert registro['unidades']['ui']['valor'] == 6.0312
+    assert registro['unidades']['ur']['valor'] == 1712.45
+    assert registro['unidades']['ur']['moneda'] == 'UNIDAD REAJUSTABLE (UR)'
+
+
+@pytest.mark.parametrize('texto, valor', [
+    ('UNIDAD REAJUSTABLE 1712,45', 1712.45),
+    ('Unidad Reajustable: 1.712,45', 1712.45),
+    ('UNIDAD INDEXADA ........ 6,0312', 6.0312),
+])
+def test_valor_en_texto_libre(texto, valor):
+    html = f'<table class="resultado"><tbody></tbody></table><p>{texto}</p>'
+    unidades = BaseScraper().parse_cotizaciones(html, '2024-03-14')['unidades']
+    assert [u['valor'] for u in unidades.values()] == [valor]
+
+
+def test_una_descarga_por_fecha(scraper, stub):
+    peticiones = stub.peticiones
+    registro = scraper.get_cotizaciones_fecha('2023-06-15')
+
+    assert stub.peticiones - peticiones == 1
+    assert set(registro['unidades']) == {'ui', 'ur'}
+    assert len(registro['monedas']) == 4
+
+
+def test_unidad_ausente(scraper):
+    assert scraper.get_ui_cotizacion('2023-06-17') == {'error': 'No se pudo encontrar el valor de la Unidad Indexada'}
+    assert scraper.get_ur_cotizacion('2023-06-16')['valor'] == valor_ur(datetime.date(2023, 6, 16))
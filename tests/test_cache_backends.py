@@ -0,0 +1,168 @@
+import os
+import time
+import uuid
+
+import pytest
+
+from benchmarks.fake_redis import FakeRedis
+from app.services.cache_backends import FileBackend, RedisBackend, SQLiteBackend, get_backend
+
+
+@pytest.fixture(scope='session')
+def redis():
+    """Servidor local compatible con los comandos de caché de Redis"""
+    with FakeRedis(password='secreta') as servidor:
+        yield servidor
+
+
+@pytest.fixture(params=['archivos', 'sqlite', 'redis'])
+def backend(request, tmp_path):
+    if request.param == 'redis':
+        servidor = request.getfixturevalue('redis')
+        # Un prefijo por prueba: el servidor es compartido por toda la sesión
+        return RedisBackend(servidor.url, prefijo=f'prueba:{uuid.uuid4().hex}:')
+    return get_backend(request.param, str(tmp_path / 'cache'))
+
+
+@pytest.fixture(params=['archivos', 'sqlite'])
+def backend_indexado(request, tmp_path):
+    """Almacenamientos con índice propio (manifiesto o tabla), que desalojan y purgan"""
+    return get_backend(request.param, str(tmp_path / 'cache'))
+
+
+def llenar(backend, cantidad, tamano=100):
+    for i in range(cantidad):
+        backend.set(f'ui_{i:02d}', b'x' * tamano, None)
+
+
+def test_get_backend():
+    with pytest.raises(ValueError):
+        get_backend('memcached', 'cache')
+    with pytest.raises(ValueError):
+        RedisBackend('http://localhost:6379/0')
+    assert isinstance(get_backend('redis', redis_url='redis://localhost:6390/2'), RedisBackend)
+
+
+def test_ida_y_vuelta(backend):
+    assert backend.get('ui_2023-06-15') is None
+    backend.set('ui_2023-06-15', b'{"valor":5.7}', None)
+    backend.set('ur_2023-06-15', b'{"valor":1500}', time.time() + 60)
+
+    assert backend.get('ui_2023-06-15') == b'{"valor":5.7}'
+    assert backend.mget(['ui_2023-06-15', 'ur_2023-06-15', 'ui_2023-06-16']) == {
+        'ui_2023-06-15': b'{"valor":5.7}',
+        'ur_2023-06-15': b'{"valor":1500}',
+    }
+
+    backend.set('ui_2023-06-15', b'{"valor":5.8}', None)
+    assert backend.get('ui_2023-06-15') == b'{"valor":5.8}'
+
+    assert backend.delete('ui_2023-06-15')
+    assert not backend.delete('ui_2023-06-15')
+    assert backend.get('ui_2023-06-15') is None
+
+
+def test_mget_de_muchas_claves(backend):
+    claves = [f'ui_{i:04d}' for i in range(1200)]
+    for key in claves[::2]:
+        backend.set(key, key.encode(), None)
+    assert backend.mget(claves) == {key: key.encode() for key in claves[::2]}
+
+
+def test_purgar_elimina_solo_las_vencidas(backend_indexado):
+    ahora = time.time()
+    backend_indexado.purgar(ahora, lambda key, contenido: None)  # Indexa la caché vacía
+    backend_indexado.set('vencida', b'a', ahora - 10)
+    backend_indexado.set('vigente', b'b', ahora + 3600)
+    backend_indexado.set('inmutable', b'c', None)
+
+    assert backend_indexado.purgar(ahora, lambda key, contenido: None) == 1
+    assert backend_indexado.get('vencida') is None
+    assert backend_indexado.get('vigente') == b'b'
+    assert backend_indexado.get('inmutable') == b'c'
+    assert backend_indexado.uso() == {'entradas': 2, 'bytes': 2}
+
+
+def test_redis_expira_con_el_servidor(redis):
+    backend = RedisBackend(redis.url, prefijo=f'prueba:{uuid.uuid4().hex}:')
+    backend.set('ui_2023-06-15', b'a', time.time() + 120)
+    clave = (0, (backend.prefijo + 'ui_2023-06-15').encode())
+    valor, vence = redis.datos[clave]
+    assert 110 < vence - time.time() <= 121
+
+    redis.datos[clave] = (valor, time.time() - 1)
+    assert backend.get('ui_2023-06-15') is None
+    assert backend.purgar(time.time()) == 0
+
+
+def test_desalojo_lru(backend_indexado):
+    llenar(backend_indexado, 10)
+    backend_indexado.registrar_accesos({'ui_00': (1, time.time()), 'ui_01': (1, time.time())})
+
+    desalojadas = backend_indexado.desalojar(max_bytes=500, politica='lru')
+
+    # Se desaloja hasta el 90 % del presupuesto: quedan 4 entradas de 100 bytes
+    assert len(desalojadas) == 6
+    assert backend_indexado.uso() == {'entradas': 4, 'bytes': 400}
+    assert backend_indexado.get('ui_00') is not None and backend_indexado.get('ui_01') is not None
+    for key, tamano in desalojadas:
+        assert tamano == 100 and backend_indexado.get(key) is None
+
+
+def test_desalojo_lfu_conserva_las_mas_usadas(backend_indexado):
+    llenar(backend_indexado, 10)
+    ahora = time.time()
+    backend_indexado.registrar_accesos({'ui_09': (5, ahora - 100), 'ui_08': (3, ahora - 100)})
+    backend_indexado.registrar_accesos({'ui_00': (1, ahora)})
+
+    backend_indexado.desalojar(max_entradas=3, politica='lfu')
+
+    assert backend_indexado.uso()['entradas'] == 2
+    assert backend_indexado.get('ui_09') is not None and backend_indexado.get('ui_08') is not None
+
+
+def test_sin_exceder_el_presupuesto_no_desaloja(backend_indexado):
+    llenar(backend_indexado, 5)
+    assert backend_indexado.desalojar(max_bytes=500, max_entradas=5) == []
+    assert backend_indexado.uso()['entradas'] == 5
+
+
+def test_contar_pedidos(backend):
+    assert backend.contar_pedido('historico_ui_a', 60) == 1
+    assert backend.contar_pedido('historico_ui_a', 60) == 2
+    assert backend.contar_pedido('historico_ui_b', 60) == 1
+
+
+def test_desalojo_no_borra_un_archivo_reescrito(tmp_path):
+    backend = FileBackend(str(tmp_path / 'cache'))
+    llenar(backend, 2)
+    desalojar = backend.manifiesto.desalojar
+
+    def desalojar_y_reescribir(*args, **kwargs):
+        # Otro worker reescribe las claves entre el manifiesto y los archivos
+        desalojadas = desalojar(*args, **kwargs)
+        for key, _ in desalojadas:
+            backend.set(key, b'nuevo', None)
+        return desalojadas
+
+    backend.manifiesto.desalojar = desalojar_y_reescribir
+    assert backend.desalojar(max_bytes=1) == []
+    for key in ('ui_00', 'ui_01'):
+        assert backend.get(key) == b'nuevo'
+        assert os.path.exists(backend.ruta(key)) and backend.manifiesto.existe(key)
+
+
+def test_archivos_en_subdirectorios_sin_temporales(tmp_path):
+    backend = FileBackend(str(tmp_path / 'cache'))
+    llenar(backend, 20)
+    for i in range(20):
+        ruta = backend.ruta(f'ui_{i:02d}')
+        assert os.path.basename(os.path.dirname(ruta)) != 'cache'
+        assert os.path.exists(ruta)
+    assert os.listdir(backend.temporales) == []
+
+
+def test_sqlite_comparte_la_base_entre_instancias(tmp_path):
+    ruta = str(tmp_path / 'cache.db')
+    SQLiteBackend(ruta).set('ui_2023-06-15', b'a', None)
+    assert SQLiteBackend(ruta).get('ui_2023-06-15') == b'a'
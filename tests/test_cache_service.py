@@ -0,0 +1,126 @@
+import gzip
+
+import pytest
+
+from app.services.cache_backends import get_backend
+from app.services.cache_service import (CacheService, TTL_DEFAULT, TTL_INMUTABLE, TTL_NEGATIVO,
+                                        TTL_RECIENTE)
+from app.services.memory_cache import MemoryLRU
+
+
+def cotizacion(fecha, valor=5.7):
+    return {'tipo': 'UI', 'moneda': 'UNIDAD INDEXADA', 'fecha': fecha, 'valor': valor}
+
+
+def historico(dias):
+    return {'tipo': 'UI', 'cotizaciones': [cotizacion(f'2023-{1 + i // 28:02d}-{1 + i % 28:02d}') for i in range(dias)]}
+
+
+@pytest.fixture(params=['archivos', 'sqlite'])
+def crear_cache(request, tmp_path):
+    def crear(**kwargs):
+        directorio = str(tmp_path / 'cache')
+        return CacheService(directorio, backend=get_backend(request.param, directorio), **kwargs)
+    return crear
+
+
+@pytest.mark.parametrize('clase, vigente', [
+    (TTL_INMUTABLE, True),
+    (TTL_DEFAULT, True),
+    (TTL_RECIENTE, False),
+    (TTL_NEGATIVO, False),
+])
+def test_clases_de_expiracion(crear_cache, clase, vigente):
+    cache = crear_cache(timeout=3600, ttl_reciente=-1, ttl_negativo=-1)
+    cache.set('ui_2023-06-15', cotizacion('2023-06-15'), clase)
+
+    assert (cache.get('ui_2023-06-15') is not None) == vigente
+    entrada = cache._leer('ui_2023-06-15')[0]
+    assert entrada.meta['clase'] == clase
+    assert (entrada.meta['expira'] is None) == (clase == TTL_INMUTABLE)
+
+
+def test_inmutable_sobrevive_a_la_limpieza(crear_cache):
+    cache = crear_cache(timeout=-1)
+    cache.set('ui_2023-06-15', cotizacion('2023-06-15'), TTL_INMUTABLE)
+    cache.set('ui_2023-06-16', cotizacion('2023-06-16'))
+
+    assert cache.clear_expired() == 1
+    assert cache.get('ui_2023-06-15') == cotizacion('2023-06-15')
+
+
+def test_obsoleta_dentro_del_margen(crear_cache):
+    cache = crear_cache(ttl_reciente=-10, max_staleness=60)
+    cache.set('ui_2023-06-15', cotizacion('2023-06-15'), TTL_RECIENTE)
+    cache.set('ui_2023-06-16', {'error': 'sin datos', 'codigo': 'DATA_FETCH_ERROR'}, TTL_NEGATIVO)
+
+    data, vencido = cache.get_stale('ui_2023-06-15')
+    assert data == cotizacion('2023-06-15') and 9 < vencido < 60
+    assert cache.get_stale('ui_2023-06-16') is None
+    assert cache.get_stale('ui_2023-06-15', max_staleness=5) is None
+
+
+def test_entrada_con_bytes_etag_y_variantes(crear_cache):
+    cache = crear_cache(compresion_min_bytes=1024)
+    data = historico(60)
+    cache.set('historico_ui_a', data, TTL_INMUTABLE)
+
+    entrada = cache.get_entry('historico_ui_a')
+    assert entrada.data == data
+    assert entrada.cuerpo == cache.codec.dumps(data)
+    assert len(entrada.meta['etag']) == 32
+    assert gzip.decompress(entrada.variantes['gzip']) == entrada.cuerpo
+
+
+def test_memoria_delante_del_almacenamiento(crear_cache):
+    memoria = MemoryLRU(max_entries=10)
+    cache = crear_cache(memory=memoria)
+    cache.set('ui_2023-06-15', cotizacion('2023-06-15'))
+    cache.backend.delete('ui_2023-06-15')
+
+    assert cache.get('ui_2023-06-15') == cotizacion('2023-06-15')
+    assert memoria.hits == 1
+
+
+def test_presupuesto_desaloja_las_menos_usadas(crear_cache):
+    cache = crear_cache(max_entradas=10, politica='lfu', intervalo_presupuesto=3600)
+    for i in range(10):
+        cache.set(f'ui_2023-06-{i + 1:02d}', cotizacion(f'2023-06-{i + 1:02d}'))
+    for _ in range(3):
+        assert cache.get('ui_2023-06-10') is not None
+    for i in range(10, 15):
+        cache.set(f'ui_2023-06-{i + 1:02d}', cotizacion(f'2023-06-{i + 1:02d}'))
+
+    assert cache.aplicar_presupuesto() == 6
+    stats = cache.stats()
+    assert stats['entradas'] == 9 and stats['desalojadas'] == 6
+    assert cache.get('ui_2023-06-10') is not None
+
+
+def test_admision_de_historicos_grandes(crear_cache):
+    memoria = MemoryLRU(max_entries=10)
+    cache = crear_cache(memory=memoria, max_bytes=10 ** 6, max_entradas=1000,
+                        admision_prefijos=('historico_',))
+    assert cache.admision_max_bytes == 1000
+    grande = historico(60)
+
+    # Primer pedido: no se guarda en el almacenamiento, pero sí en la memoria del worker
+    assert not cache.set('historico_ui_a', grande, TTL_INMUTABLE)
+    assert cache.backend.get('historico_ui_a') is None
+    assert cache.get_entry('historico_ui_a').meta['etag']
+    assert cache.stats()['no_admitidas'] == 1
+
+    assert cache.set('historico_ui_a', grande, TTL_INMUTABLE)
+    assert cache.backend.get('historico_ui_a') is not None
+
+
+def test_admision_no_frena_las_respuestas_chicas(crear_cache):
+    cache = crear_cache(max_bytes=10 ** 6, max_entradas=1000, admision_prefijos=('historico_',))
+    assert cache.set('historico_ui_b', historico(2), TTL_INMUTABLE)
+    assert cache.set('ui_2023-06-15', cotizacion('2023-06-15'))
+    assert cache.stats()['no_admitidas'] == 0
+
+
+def test_politica_desconocida(tmp_path):
+    with pytest.raises(ValueError):
+        CacheService(str(tmp_path), politica='fifo')
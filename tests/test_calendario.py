@@ -0,0 +1,75 @@
+import datetime
+
+import pytest
+
+from app.utils.calendario import CalendarioBCU, domingo_de_pascua
+
+
+@pytest.mark.parametrize('anio, pascua', [
+    (1818, '1818-03-22'),  # La más temprana posible
+    (1943, '1943-04-25'),  # La más tardía posible
+    (2000, '2000-04-23'),
+    (2008, '2008-03-23'),
+    (2011, '2011-04-24'),
+    (2019, '2019-04-21'),
+    (2023, '2023-04-09'),
+    (2024, '2024-03-31'),
+    (2025, '2025-04-20'),
+    (2038, '2038-04-25'),
+    (2285, '2285-03-22'),
+])
+def test_domingo_de_pascua(anio, pascua):
+    fecha = domingo_de_pascua(anio)
+    assert fecha.isoformat() == pascua
+    assert fecha.weekday() == 6
+
+
+@pytest.mark.parametrize('fecha, habil', [
+    ('2024-01-01', False),  # Año nuevo
+    ('2024-05-01', False),  # Día de los trabajadores
+    ('2023-07-18', False),  # Jura de la Constitución (martes)
+    ('2023-08-25', False),  # Declaratoria de la Independencia (viernes)
+    ('2023-12-25', False),  # Navidad (lunes)
+    ('2024-02-12', False),  # Lunes de Carnaval
+    ('2024-02-13', False),  # Martes de Carnaval
+    ('2024-02-14', True),   # Miércoles de ceniza
+    ('2024-03-27', True),   # Miércoles de la Semana de Turismo
+    ('2024-03-28', False),  # Jueves de Turismo
+    ('2024-03-29', False),  # Viernes de Turismo
+    ('2023-02-20', False),  # Lunes de Carnaval
+    ('2023-04-06', False),  # Jueves de Turismo
+    ('2023-04-10', True),   # Lunes después de Pascua
+    ('2023-06-17', False),  # Sábado
+    ('2023-06-18', False),  # Domingo
+    ('2023-06-19', True),   # Lunes (el feriado del 19 de junio no es bancario)
+])
+def test_dias_habiles(fecha, habil):
+    calendario = CalendarioBCU()
+    assert calendario.es_habil(fecha) == habil
+    assert calendario.es_habil(datetime.date.fromisoformat(fecha)) == habil
+
+
+def test_feriados_de_un_anio():
+    feriados = CalendarioBCU().feriados(2024)
+    assert len(feriados) == 9
+    assert datetime.date(2024, 3, 28) in feriados
+
+
+def test_feriados_extra_y_configurables():
+    calendario = CalendarioBCU(feriados_fijos=['06-19'], feriados_pascua=[], feriados_extra=['2023-06-16'])
+    assert not calendario.es_habil('2023-06-19')
+    assert not calendario.es_habil('2023-06-16')
+    assert calendario.es_habil('2024-06-14')
+    assert calendario.es_habil('2024-02-12')
+
+
+def test_publicacion_por_unidad():
+    calendario = CalendarioBCU(publicacion={
+        'ui': {'dias': 'habiles', 'periodicidad': 'diaria'},
+        'ur': {'dias': 'habiles', 'periodicidad': 'mensual'},
+        'x': {'dias': 'todos', 'periodicidad': 'diaria'},
+    })
+    assert calendario.es_mensual('ur') and not calendario.es_mensual('ui')
+    assert not calendario.publica('ui', '2023-06-17')
+    assert calendario.publica('ui', '2023-06-16')
+    assert calendario.publica('x', '2023-06-17')
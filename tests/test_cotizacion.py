@@ -0,0 +1,130 @@
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.stub_bcu import valor_ui, valor_ur
+from app.services.cache_service import TTL_RECIENTE, TTL_NEGATIVO
+
+SABADO = '2023-07-15'
+MARTES = '2023-07-18'  # Feriado (Jura de la Constitución)
+
+
+def guardar_vencida(controlador, key, data, clase=TTL_RECIENTE):
+    """Guarda una entrada que ya expiró pero todavía puede servirse como obsoleta"""
+    ttl = controlador.cache_service.ttls[clase]
+    controlador.cache_service.ttls[clase] = -60
+    try:
+        controlador.cache_service.set(key, data, clase)
+    finally:
+        controlador.cache_service.ttls[clase] = ttl
+    if controlador.cache_service.memory is not None:
+        controlador.cache_service.memory.delete(key)
+
+
+def test_cotizacion_diaria_se_descarga_una_vez(controlador, stub):
+    consultas = len(stub.fechas)
+    respuesta = controlador.get_cotizacion('ui', '2023-06-15')
+
+    assert respuesta['valor'] == valor_ui(datetime.date(2023, 6, 15))
+    assert controlador.get_cotizacion('ui', '2023-06-15') == respuesta
+    assert controlador.get_cotizacion('ur', '2023-06-15')['valor'] == valor_ur(datetime.date(2023, 6, 15))
+    assert stub.fechas[consultas:] == ['2023-06-15']
+
+
+def test_ur_de_un_sabado_sale_de_un_dia_habil_del_mes(controlador, stub):
+    consultas = len(stub.fechas)
+    respuesta = controlador.get_cotizacion('ur', SABADO)
+
+    assert respuesta['fecha'] == SABADO
+    assert respuesta['valor'] == valor_ur(datetime.date(2023, 7, 15))
+    descargadas = stub.fechas[consultas:]
+    assert len(descargadas) == 1 and descargadas[0][:7] == '2023-07'
+    assert datetime.date.fromisoformat(descargadas[0]).weekday() < 5
+
+
+def test_ui_de_un_feriado_no_consulta_al_bcu(controlador, stub):
+    consultas = len(stub.fechas)
+    respuesta = controlador.get_cotizacion('ui', MARTES)
+
+    assert respuesta['codigo'] == 'DATA_FETCH_ERROR'
+    assert stub.fechas[consultas:] == []
+
+
+def test_obsoleta_se_refresca_desde_la_pagina_que_publica(controlador, stub):
+    guardar_vencida(controlador, f'ur_{SABADO}', {'tipo': 'UR', 'fecha': SABADO, 'valor': 1.0})
+    consultas = len(stub.fechas)
+
+    respuesta = controlador.get_cotizacion('ur', SABADO)
+    assert respuesta['valor'] == 1.0
+    assert respuesta['metadata']['obsoleto'] is True
+
+    controlador._refresh_executor.shutdown(wait=True)
+    descargadas = stub.fechas[consultas:]
+    assert SABADO not in descargadas
+    assert all(datetime.date.fromisoformat(fecha).weekday() < 5 for fecha in descargadas)
+
+    refrescada = controlador.cache_service.get(f'ur_{SABADO}')
+    assert refrescada['valor'] == valor_ur(datetime.date(2023, 7, 15))
+    assert 'obsoleto' not in refrescada.get('metadata', {})
+
+
+def test_error_vencido_no_se_sirve_como_obsoleto(controlador):
+    guardar_vencida(controlador, 'ui_2023-06-16', {'error': 'sin datos', 'codigo': 'NOT_FOUND'}, TTL_NEGATIVO)
+
+    respuesta = controlador.get_cotizacion('ui', '2023-06-16')
+
+    assert respuesta['valor'] == valor_ui(datetime.date(2023, 6, 16))
+
+
+def test_consultas_concurrentes_descargan_una_vez(app, controlador, stub):
+    consultas = len(stub.fechas)
+
+    def consultar(tipo):
+        with app.app_context():
+            return controlador.get_cotizacion(tipo, '2023-06-20')
+
+    with ThreadPoolExecutor(8) as executor:
+        respuestas = list(executor.map(consultar, ['ui', 'ur'] * 8))
+
+    assert stub.fechas[consultas:] == ['2023-06-20']
+    assert {r['valor'] for r in respuestas[::2]} == {valor_ui(datetime.date(2023, 6, 20))}
+    assert {r['valor'] for r in respuestas[1::2]} == {valor_ur(datetime.date(2023, 6, 20))}
+
+
+def test_obsoleta_se_refresca_una_sola_vez(controlador, stub):
+    guardar_vencida(controlador, 'ui_2023-06-21', {'tipo': 'UI', 'fecha': '2023-06-21', 'valor': 1.0})
+    consultas = len(stub.fechas)
+
+    respuestas = [controlador.get_cotizacion('ui', '2023-06-21') for _ in range(3)]
+    controlador._refresh_executor.shutdown(wait=True)
+
+    assert respuestas[0]['valor'] == 1.0
+    assert respuestas[0]['metadata']['obsoleto'] is True
+    assert respuestas[0]['metadata']['segundos_vencido'] >= 59
+    assert stub.fechas[consultas:] == ['2023-06-21']
+    assert controlador.cache_service.get('ui_2023-06-21')['valor'] == valor_ui(datetime.date(2023, 6, 21))
+
+
+def test_obsoleta_demasiado_vieja_se_descarga(controlador, stub, monkeypatch):
+    monkeypatch.setattr(controlador.cache_service, 'max_staleness', 30)
+    guardar_vencida(controlador, 'ui_2023-06-22', {'tipo': 'UI', 'fecha': '2023-06-22', 'valor': 1.0})
+
+    respuesta = controlador.get_cotizacion('ui', '2023-06-22')
+
+    assert respuesta['valor'] == valor_ui(datetime.date(2023, 6, 22))
+    assert 'obsoleto' not in respuesta.get('metadata', {})
+
+
+def test_circuito_abierto_responde_el_ultimo_valor_conocido(controlador, stub, monkeypatch):
+    monkeypatch.setattr(controlador.cache_service, 'max_staleness', 30)
+    guardar_vencida(controlador, 'ui_2023-06-22', {'tipo': 'UI', 'fecha': '2023-06-22', 'valor': 1.0})
+    circuito = controlador.scraper.circuit_breaker
+    for _ in range(circuito.umbral_fallas):
+        circuito.registrar_falla()
+    consultas = len(stub.fechas)
+
+    respaldo = controlador.get_cotizacion('ui', '2023-06-22')
+    sin_respaldo = controlador.get_cotizacion('ui', '2023-06-23')
+
+    assert respaldo['valor'] == 1.0 and respaldo['metadata']['obsoleto'] is True
+    assert sin_respaldo['codigo'] == 'BCU_UNAVAILABLE'
+    assert stub.fechas[consultas:] == []
@@ -0,0 +1,127 @@
+import datetime
+import threading
+import time
+
+import pytest
+
+from benchmarks.stub_bcu import valor_ui
+from app.scrapers.base_scraper import BaseScraper
+from app.scrapers.fetch_engine import FetchEngine, TokenBucket
+from app.scrapers.resiliencia import CircuitBreaker
+
+
+@pytest.fixture
+def engine():
+    engine = FetchEngine(3)
+    yield engine
+    engine.shutdown()
+
+
+def test_token_bucket_permite_la_rafaga_y_despues_espera():
+    bucket = TokenBucket(rate=50, capacity=5)
+    assert [bucket.acquire() for _ in range(5)] == [0.0] * 5
+
+    t0 = time.monotonic()
+    assert bucket.acquire() > 0
+    assert time.monotonic() - t0 >= 0.015
+
+
+def test_token_bucket_sin_tasa_no_limita():
+    bucket = TokenBucket(rate=0)
+    assert [bucket.acquire() for _ in range(1000)] == [0.0] * 1000
+    assert bucket.reservar() == 0.0
+
+
+def test_reservar_acumula_la_espera():
+    bucket = TokenBucket(rate=10, capacity=2)
+    esperas = [bucket.reservar() for _ in range(4)]
+
+    assert esperas[:2] == [0.0, 0.0]
+    assert esperas[2] == pytest.approx(0.1, abs=0.01)
+    assert esperas[3] == pytest.approx(0.2, abs=0.01)
+
+
+def test_token_bucket_compartido_entre_hilos():
+    bucket = TokenBucket(rate=100, capacity=1)
+    hilos = [threading.Thread(target=bucket.acquire) for _ in range(11)]
+
+    t0 = time.monotonic()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join(5)
+
+    # El primero usa la ráfaga; los otros diez esperan 10 ms cada uno
+    assert time.monotonic() - t0 >= 0.09
+
+
+def test_map_conserva_el_orden_y_acota_la_concurrencia(engine):
+    lock = threading.Lock()
+    en_curso = [0]
+    maximo = [0]
+
+    def tarea(i):
+        with lock:
+            en_curso[0] += 1
+            maximo[0] = max(maximo[0], en_curso[0])
+        time.sleep(0.01 * (i % 3))
+        with lock:
+            en_curso[0] -= 1
+        return i * i
+
+    assert engine.map(tarea, range(20)) == [i * i for i in range(20)]
+    assert 1 < maximo[0] <= 3
+
+
+def test_imap_envia_solo_la_ventana_por_delante(engine):
+    pedidas = []
+
+    def items():
+        for i in range(50):
+            pedidas.append(i)
+            yield i
+
+    resultados = engine.imap(lambda i: i, items(), ventana=4)
+    assert next(resultados) == 0
+    assert len(pedidas) == 4
+    assert list(resultados) == list(range(1, 50))
+
+
+def test_imap_abandonado_cancela_las_pendientes(engine):
+    ejecutadas = []
+
+    def lenta(i):
+        time.sleep(0.02)
+        ejecutadas.append(i)
+        return i
+
+    resultados = engine.imap(lenta, range(100))
+    assert next(resultados) == 0
+    resultados.close()
+    engine.shutdown(wait=True)
+
+    assert len(ejecutadas) < 100
+
+
+def test_motor_se_puede_reusar_despues_de_detenerlo(engine):
+    assert engine.map(str, [1, 2]) == ['1', '2']
+    engine.shutdown()
+    assert engine.map(str, [3]) == ['3']
+
+
+def test_historico_respeta_el_limite_de_tasa(stub, engine):
+    scraper = BaseScraper(stub.url, engine=engine, rate_limiter=TokenBucket(rate=50, capacity=1),
+                          circuit_breaker=CircuitBreaker())
+    consultas = len(stub.fechas)
+
+    t0 = time.monotonic()
+    resultado = scraper.get_ui_historico('2023-06-05', '2023-06-16')
+    transcurrido = time.monotonic() - t0
+
+    descargadas = stub.fechas[consultas:]
+    assert sorted(descargadas) == [c['fecha'] for c in resultado['cotizaciones']]
+    assert len(descargadas) == 10
+    # Diez descargas a 50 por segundo con ráfaga de una: al menos 9 esperas de 20 ms
+    assert transcurrido >= 0.17
+    for cotizacion in resultado['cotizaciones']:
+        assert cotizacion['valor'] == valor_ui(datetime.date.fromisoformat(cotizacion['fecha']))
@@ -0,0 +1,100 @@
+import datetime
+
+import pytest
+
+from benchmarks.stub_bcu import valor_ui, valor_ur
+from app.services.cache_service import TTL_INMUTABLE, TTL_NEGATIVO, TTL_RECIENTE
+
+
+def dias_habiles(inicio, fin):
+    """Días de semana entre dos fechas (sin contar feriados)"""
+    dias = []
+    fecha = datetime.date.fromisoformat(inicio)
+    while fecha <= datetime.date.fromisoformat(fin):
+        if fecha.weekday() < 5:
+            dias.append(fecha.isoformat())
+        fecha += datetime.timedelta(days=1)
+    return dias
+
+
+def test_rangos_superpuestos_descargan_solo_los_dias_nuevos(controlador, stub):
+    consultas = len(stub.fechas)
+    primero = controlador.get_historico('ui', '2023-06-01', '2023-06-15')
+    assert sorted(stub.fechas[consultas:]) == dias_habiles('2023-06-01', '2023-06-15')
+
+    consultas = len(stub.fechas)
+    segundo = controlador.get_historico('ui', '2023-06-10', '2023-06-23')
+
+    assert sorted(stub.fechas[consultas:]) == dias_habiles('2023-06-16', '2023-06-23')
+    assert [c['fecha'] for c in segundo['cotizaciones']] == dias_habiles('2023-06-10', '2023-06-23')
+    assert segundo['cotizaciones'][:4] == primero['cotizaciones'][-4:]
+    for cotizacion in segundo['cotizaciones']:
+        assert cotizacion['valor'] == valor_ui(datetime.date.fromisoformat(cotizacion['fecha']))
+
+
+def test_historico_pasado_completo_no_expira(controlador):
+    controlador.get_historico('ui', '2023-06-01', '2023-06-15')
+    entrada = controlador.cache_service.get_entry('historico_ui_2023-06-01_2023-06-15')
+    assert entrada.meta['clase'] == TTL_INMUTABLE and entrada.meta['expira'] is None
+
+
+def test_historico_incompleto_o_reciente_expira(controlador):
+    rango = controlador.validar_rango('ui', '2023-06-01', '2023-06-15')
+    almacenadas = controlador.completar_rango('ui', rango)
+    assert controlador._ttl_historico('ui', rango, almacenadas) == TTL_INMUTABLE
+
+    almacenadas.pop('2023-06-07')
+    assert controlador._ttl_historico('ui', rango, almacenadas) == TTL_RECIENTE
+
+    hoy = datetime.date.today()
+    rango = controlador.validar_rango('ui', (hoy - datetime.timedelta(days=3)).isoformat(), hoy.isoformat())
+    assert controlador._ttl_historico('ui', rango, {}) == TTL_RECIENTE
+
+
+@pytest.mark.parametrize('dias, encontrada, clase', [
+    (-30, True, TTL_INMUTABLE),
+    (-30, False, TTL_NEGATIVO),
+    (0, True, TTL_RECIENTE),
+    (0, False, TTL_RECIENTE),
+    (2, False, TTL_RECIENTE),
+])
+def test_clase_de_una_cotizacion(controlador, dias, encontrada, clase):
+    fecha = (datetime.date.today() + datetime.timedelta(days=dias)).isoformat()
+    assert controlador._ttl_clase(fecha, encontrada) == clase
+
+
+def test_historico_no_consulta_feriados_ni_fines_de_semana(controlador, stub):
+    consultas = len(stub.fechas)
+    respuesta = controlador.get_historico('ui', '2023-07-14', '2023-07-21')
+
+    esperadas = ['2023-07-14', '2023-07-17', '2023-07-19', '2023-07-20', '2023-07-21']
+    assert sorted(stub.fechas[consultas:]) == esperadas
+    assert [c['fecha'] for c in respuesta['cotizaciones']] == esperadas
+    assert respuesta['metadata']['dias_solicitados'] == 8
+
+
+def test_historico_completado_en_feriados(controlador):
+    respuesta = controlador.get_historico('ui', '2023-07-17', '2023-07-19', completar=True)
+
+    feriado = respuesta['cotizaciones'][1]
+    assert feriado['fecha'] == '2023-07-18' and feriado['completado_desde'] == '2023-07-17'
+    assert feriado['valor'] == valor_ui(datetime.date(2023, 7, 17))
+
+
+def test_ur_una_descarga_por_mes(controlador, stub):
+    consultas = len(stub.fechas)
+    respuesta = controlador.get_historico('ur', '2023-05-15', '2023-07-20')
+
+    descargadas = stub.fechas[consultas:]
+    assert sorted(d[:7] for d in descargadas) == ['2023-05', '2023-06', '2023-07']
+    for cotizacion in respuesta['cotizaciones']:
+        assert cotizacion['valor'] == valor_ur(datetime.date.fromisoformat(cotizacion['fecha']))
+    assert [c['fecha'] for c in respuesta['cotizaciones']] == [
+        f for f in dias_habiles('2023-05-15', '2023-07-20') if f != '2023-07-18'
+    ]
+
+    # Cualquier otro día de esos meses sale del valor mensual almacenado
+    consultas = len(stub.fechas)
+    assert controlador.get_cotizacion('ur', '2023-06-25')['valor'] == valor_ur(datetime.date(2023, 6, 25))
+    assert controlador.get_cotizacion('ur', '2023-07-18')['valor'] == valor_ur(datetime.date(2023, 7, 18))
+    assert stub.fechas[consultas:] == []
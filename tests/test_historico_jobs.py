@@ -0,0 +1,125 @@
+import datetime
+import os
+import time
+
+from app.services.historico_jobs import JOB_COMPLETADO, JOB_EN_CURSO
+
+
+def dias_habiles(inicio, fin):
+    """Días de semana entre dos fechas (marzo de 2023 no tiene feriados)"""
+    dias = []
+    fecha = datetime.date.fromisoformat(inicio)
+    while fecha <= datetime.date.fromisoformat(fin):
+        if fecha.weekday() < 5:
+            dias.append(fecha.isoformat())
+        fecha += datetime.timedelta(days=1)
+    return dias
+
+
+def esperar(jobs, job_id, timeout=10):
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        job = jobs.estado(job_id)
+        if job['estado'] not in ('pendiente', JOB_EN_CURSO):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f'El trabajo {job_id} no terminó')
+
+
+def test_reanudar_descarga_solo_los_dias_faltantes(app, controlador, stub):
+    jobs = app.extensions['historico_jobs']
+    # Un trabajo interrumpido a mitad de marzo: la primera quincena ya está en el almacén
+    controlador.completar_rango('ui', controlador.validar_rango('ui', '2023-03-01', '2023-03-15'))
+    jobs._escribir(jobs._ruta('interrumpido'), {
+        'id': 'interrumpido',
+        'tipo_unidad': 'ui',
+        'fecha_inicio': '2023-03-01',
+        'fecha_fin': '2023-03-31',
+        'estado': JOB_EN_CURSO,
+        'dias_solicitados': 31,
+        'dias_a_descargar': 23,
+        'dias_procesados': 11,
+        'dias_pendientes': 12,
+        'creado': '2023-03-31 10:00:00',
+        'actualizado': '2023-03-31 10:00:05',
+        'mensaje': None
+    })
+    consultas = len(stub.fechas)
+
+    assert jobs.reanudar() == 1
+    job = esperar(jobs, 'interrumpido')
+
+    assert job['estado'] == JOB_COMPLETADO
+    assert job['dias_a_descargar'] == 12 and job['dias_pendientes'] == 0
+    assert sorted(stub.fechas[consultas:]) == dias_habiles('2023-03-16', '2023-03-31')
+
+    resultado, terminado = jobs.resultado('interrumpido')
+    assert terminado
+    assert [c['fecha'] for c in resultado['cotizaciones']] == dias_habiles('2023-03-01', '2023-03-31')
+
+
+def test_reanudar_no_repite_los_terminados_y_elimina_los_vencidos(app):
+    jobs = app.extensions['historico_jobs']
+    for job_id, dias in (('reciente', 0), ('vencido', 8)):
+        ruta = jobs._ruta(job_id)
+        jobs._escribir(ruta, {'id': job_id, 'estado': JOB_COMPLETADO})
+        jobs._escribir(jobs._ruta(job_id, 'resultado.json'), {'cotizaciones': []})
+        antiguedad = time.time() - dias * 24 * 60 * 60
+        os.utime(ruta, (antiguedad, antiguedad))
+
+    assert jobs.reanudar() == 0
+    assert jobs.estado('reciente')['estado'] == JOB_COMPLETADO
+    assert jobs.estado('vencido')['codigo'] == 'JOB_NOT_FOUND'
+    assert not os.path.exists(jobs._ruta('vencido', 'resultado.json'))
+
+
+def test_trabajo_por_la_api(app, cliente):
+    respuesta = cliente.post('/api/historico/jobs', json={'tipo': 'UI', 'inicio': '2023-05-01', 'fin': '2023-05-31'})
+
+    assert respuesta.status_code == 202
+    job = respuesta.get_json()
+    assert respuesta.headers['Location'] == f"/api/historico/jobs/{job['id']}"
+    assert job['dias_solicitados'] == 31
+
+    esperar(app.extensions['historico_jobs'], job['id'])
+    estado = cliente.get(respuesta.headers['Location']).get_json()
+    assert estado['estado'] == JOB_COMPLETADO and estado['dias_pendientes'] == 0
+
+    resultado = cliente.get(f"/api/historico/jobs/{job['id']}/resultado")
+    assert resultado.status_code == 200
+    assert resultado.get_json() == cliente.get('/api/historico/ui?inicio=2023-05-01&fin=2023-05-31').get_json()
+
+
+def test_trabajos_repetidos_y_rechazados(app, cliente, monkeypatch):
+    jobs = app.extensions['historico_jobs']
+    # Sin hilos: los trabajos quedan pendientes
+    monkeypatch.setattr(jobs, '_encolar', lambda job: None)
+    monkeypatch.setattr(jobs, 'max_pendientes', 2)
+
+    primero = jobs.crear('ui', '2023-01-01', '2023-01-31')
+    assert jobs.crear('ui', '2023-01-01', '2023-01-31')['id'] == primero['id']
+    jobs.crear('ur', '2023-01-01', '2023-01-31')
+
+    respuesta = cliente.post('/api/historico/jobs?tipo=ui&inicio=2023-02-01&fin=2023-02-28')
+    assert respuesta.status_code == 429
+    assert respuesta.get_json()['codigo'] == 'TOO_MANY_JOBS'
+
+    pendiente = cliente.get(f"/api/historico/jobs/{primero['id']}/resultado")
+    assert pendiente.status_code == 202 and pendiente.get_json()['estado'] == 'pendiente'
+
+
+def test_trabajo_inexistente(app, cliente):
+    respuesta = cliente.get('/api/historico/jobs/noexiste/resultado')
+    assert respuesta.status_code == 404
+    assert respuesta.get_json()['codigo'] == 'JOB_NOT_FOUND'
+
+    # El id es un nombre de archivo: no se aceptan rutas
+    jobs = app.extensions['historico_jobs']
+    jobs._escribir(os.path.join(os.path.dirname(jobs.jobs_dir), 'fuera.json'), {'estado': JOB_COMPLETADO})
+    assert jobs.estado('../fuera')['codigo'] == 'JOB_NOT_FOUND'
+
+
+def test_trabajo_con_rango_invalido(cliente):
+    respuesta = cliente.post('/api/historico/jobs', json={'tipo': 'uf', 'inicio': '2023-01-01'})
+    assert respuesta.status_code == 400
+    assert respuesta.get_json()['codigo'] == 'INVALID_UNIT_TYPE'
@@ -0,0 +1,53 @@
+import pytest
+
+from app.utils import json_codec
+from app.utils.json_codec import OrjsonCodec, StdlibCodec, get_codec
+
+requiere_orjson = pytest.mark.skipif(json_codec.orjson is None, reason='orjson no está instalado')
+
+DATOS = {
+    'tipo': 'UR',
+    'moneda': 'UNIDAD REAJUSTABLE',
+    'fecha': '2023-06-15',
+    'valor': 1512.33,
+    'metadata': {'fuente': 'Banco Central del Uruguay', 'obsoleto': False, 'nota': 'día hábil'},
+    'cotizaciones': [{'valor': 5.7}, {'valor': None}],
+}
+
+
+def test_json_compacto_ordenado_y_en_utf8():
+    cuerpo = StdlibCodec().dumps({'b': 1, 'a': 'día'})
+    assert cuerpo == '{"a":"día","b":1}'.encode('utf-8')
+    assert StdlibCodec().loads(cuerpo) == {'a': 'día', 'b': 1}
+
+
+@requiere_orjson
+def test_orjson_produce_los_mismos_bytes():
+    # La caché guarda bytes: cambiar de codificador no debe cambiar los etags
+    assert OrjsonCodec().dumps(DATOS) == StdlibCodec().dumps(DATOS)
+    assert OrjsonCodec().loads(StdlibCodec().dumps(DATOS)) == DATOS
+
+
+def test_get_codec(monkeypatch):
+    assert isinstance(get_codec('json'), StdlibCodec)
+    assert get_codec('auto').nombre == ('orjson' if json_codec.orjson is not None else 'json')
+    with pytest.raises(ValueError):
+        get_codec('ujson')
+
+    monkeypatch.setattr(json_codec, 'orjson', None)
+    assert isinstance(get_codec('orjson'), StdlibCodec)
+
+
+def test_jsonify_usa_el_codificador_de_la_aplicacion(app):
+    with app.test_request_context():
+        respuesta = app.json.response(DATOS)
+    assert respuesta.get_data() == app.extensions['json_codec'].dumps(DATOS) + b'\n'
+    assert respuesta.mimetype == 'application/json'
+
+
+def test_aciertos_responden_los_bytes_de_la_cache(cliente, controlador):
+    primera = cliente.get('/api/cotizacion/ui?fecha=2023-06-15')
+    segunda = cliente.get('/api/cotizacion/ui?fecha=2023-06-15')
+
+    entrada = controlador.cache_service.get_entry('ui_2023-06-15')
+    assert primera.get_data() == segunda.get_data() == entrada.cuerpo
@@ -0,0 +1,88 @@
+import threading
+import time
+
+from app.services.memory_cache import MemoryLRU
+
+
+def test_acierto_y_fallo():
+    memoria = MemoryLRU()
+    memoria.set('ui_2023-06-15', {'valor': 5.7}, None, 20, {'etag': 'abc'})
+
+    assert memoria.get('ui_2023-06-15') == {'valor': 5.7}
+    assert memoria.get_entry('ui_2023-06-15') == ({'valor': 5.7}, {'etag': 'abc'})
+    assert memoria.get('ui_2023-06-16') is None
+    stats = memoria.stats()
+    assert (stats['aciertos'], stats['fallos'], stats['tasa_aciertos']) == (2, 1, 0.6667)
+
+
+def test_expira():
+    memoria = MemoryLRU()
+    memoria.set('vencida', 1, time.time() - 1, 10)
+    memoria.set('vigente', 2, time.time() + 60, 10)
+    memoria.set('inmutable', 3, None, 10)
+
+    assert memoria.get('vencida') is None
+    assert memoria.stats()['entradas'] == 2
+
+    memoria.set('vencida', 1, time.time() - 1, 10)
+    assert memoria.clear_expired() == 1
+    assert memoria.get('vigente') == 2 and memoria.get('inmutable') == 3
+
+
+def test_desaloja_la_menos_usada_por_cantidad():
+    memoria = MemoryLRU(max_entries=3)
+    for key in 'abc':
+        memoria.set(key, key, None, 1)
+    memoria.get('a')
+    memoria.set('d', 'd', None, 1)
+
+    assert memoria.get('b') is None
+    assert [memoria.get(key) for key in 'acd'] == ['a', 'c', 'd']
+    assert memoria.stats()['desalojos'] == 1
+
+
+def test_desaloja_por_tamano():
+    memoria = MemoryLRU(max_bytes=100)
+    memoria.set('a', 'a', None, 40)
+    memoria.set('b', 'b', None, 40)
+    memoria.set('c', 'c', None, 40)
+
+    assert memoria.get('a') is None
+    assert memoria.stats()['bytes'] == 80
+
+    # Una entrada más grande que toda la memoria no se guarda ni desaloja a las demás
+    memoria.set('enorme', 'x', None, 101)
+    assert memoria.get('enorme') is None
+    assert memoria.stats()['entradas'] == 2
+
+
+def test_reemplazar_y_borrar_ajustan_el_tamano():
+    memoria = MemoryLRU()
+    memoria.set('a', 1, None, 40)
+    memoria.set('a', 2, None, 10)
+    assert memoria.get('a') == 2 and memoria.stats()['bytes'] == 10
+
+    memoria.delete('a')
+    memoria.delete('a')
+    assert memoria.stats()['bytes'] == 0 and memoria.get('a') is None
+
+
+def test_uso_concurrente():
+    memoria = MemoryLRU(max_entries=50)
+
+    def usar(hilo):
+        for i in range(500):
+            key = f'ui_{(hilo * 7 + i) % 80}'
+            if memoria.get(key) is None:
+                memoria.set(key, i, None, 8)
+
+    hilos = [threading.Thread(target=usar, args=(i,)) for i in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join(10)
+
+    stats = memoria.stats()
+    assert stats['entradas'] <= 50
+    assert stats['bytes'] == 8 * stats['entradas']
+    assert stats['aciertos'] + stats['fallos'] == 8 * 500
@@ -0,0 +1,98 @@
+import datetime
+import sqlite3
+
+import pytest
+
+from app.services.observation_store import ObservationStore
+
+
+def cotizacion(unidad, fecha, valor):
+    tipo, moneda = ('UI', 'UNIDAD INDEXADA') if unidad == 'ui' else ('UR', 'UNIDAD REAJUSTABLE')
+    return {'tipo': tipo, 'moneda': moneda, 'fecha': fecha, 'valor': valor}
+
+
+def registro(fecha, **valores):
+    """Registro como los de BaseScraper.get_cotizaciones_fecha, con las unidades indicadas"""
+    return {
+        'fecha': fecha,
+        'monedas': [],
+        'unidades': {unidad: cotizacion(unidad, fecha, valor) for unidad, valor in valores.items()}
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ObservationStore(str(tmp_path / 'observaciones.db'))
+
+
+def test_ruta_sin_directorio(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    store = ObservationStore('observaciones.db')
+    assert store.get('ui', '2023-06-15') is None
+    assert (tmp_path / 'observaciones.db').exists()
+
+
+def test_guardar_y_leer_rangos(store):
+    assert store.guardar('ui', [cotizacion('ui', f'2023-06-{d:02d}', 5.7 + d / 1000) for d in (14, 15, 16)])
+    assert store.guardar('ui', [])
+
+    assert store.get('ui', '2023-06-15') == cotizacion('ui', '2023-06-15', 5.715)
+    assert store.get('ur', '2023-06-15') is None
+    assert list(store.get_rango('ui', '2023-06-15', '2023-06-30')) == ['2023-06-15', '2023-06-16']
+    assert store.get_anterior('ui', '2023-06-15') == cotizacion('ui', '2023-06-14', 5.714)
+    assert store.get_anterior('ui', '2023-06-14') is None
+
+
+def test_guardar_reemplaza_el_valor(store):
+    store.guardar('ui', [cotizacion('ui', '2023-06-15', 5.7)])
+    store.guardar('ui', [cotizacion('ui', '2023-06-15', 5.8)])
+    assert store.get('ui', '2023-06-15')['valor'] == 5.8
+
+
+def test_get_fechas_en_lotes(store):
+    inicio = datetime.date(2021, 1, 1)
+    fechas = [(inicio + datetime.timedelta(days=i)).isoformat() for i in range(1200)]
+    store.guardar('ui', [cotizacion('ui', f, 5.0) for f in fechas[::2]])
+
+    encontradas = store.get_fechas('ui', fechas)
+
+    assert sorted(encontradas) == fechas[::2]
+
+
+def test_guardar_registros_marca_los_dias_sin_datos(store):
+    hoy = datetime.date.today().isoformat()
+    store.guardar_registros([
+        registro('2023-06-15', ui=5.7, ur=1500.0),
+        registro('2023-06-17'),
+        registro(hoy, ur=1600.0),
+        {'error': 'No se pudo conectar con el servidor del BCU'},
+    ])
+
+    assert store.get('ur', '2023-06-15')['valor'] == 1500.0
+    assert store.get_sin_datos('ui', '2023-06-01', hoy) == {'2023-06-17'}
+    assert store.get_sin_datos('ur', '2023-06-01', hoy) == {'2023-06-17'}
+    store.marcar_sin_datos('ui', ['2023-06-17', '2023-06-18'])
+    assert store.get_sin_datos('ui', '2023-06-01', '2023-06-30') == {'2023-06-17', '2023-06-18'}
+
+
+def test_ur_guarda_un_valor_por_mes(store):
+    store.guardar('ur', [cotizacion('ur', '2023-06-05', 1500.0)])
+    store.guardar('ur', [cotizacion('ur', '2023-06-20', 1500.0), cotizacion('ur', '2023-07-03', 1510.0)])
+    store.guardar('ui', [cotizacion('ui', '2023-06-05', 5.7)])
+
+    assert store.get_mensual('ur', '2023-06-25') == cotizacion('ur', '2023-06-25', 1500.0)
+    assert store.get_mensuales('ur', '2023-06', '2023-07')['2023-06']['fecha'] == '2023-06-05'
+    assert store.get_mensual('ur', '2023-08-01') is None
+    assert store.get_mensuales('ui', '2023-06', '2023-06') == {}
+
+
+def test_valores_mensuales_de_una_base_anterior(tmp_path):
+    ruta = str(tmp_path / 'observaciones.db')
+    ObservationStore(ruta).guardar('ur', [cotizacion('ur', '2023-06-05', 1500.0)])
+    # Base creada antes de que existiera la tabla de valores mensuales
+    conn = sqlite3.connect(ruta)
+    with conn:
+        conn.execute('DROP TABLE valores_mensuales')
+    conn.close()
+
+    assert ObservationStore(ruta).get_mensual('ur', '2023-06-30')['valor'] == 1500.0
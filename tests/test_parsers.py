@@ -0,0 +1,66 @@
+import datetime
+import glob
+import os
+
+import pytest
+
+from benchmarks.stub_bcu import render_pagina, valor_ui, valor_ur
+from app.scrapers import parsers
+from app.scrapers.base_scraper import BaseScraper
+from app.scrapers.parsers import BeautifulSoupParser, LxmlParser, get_parser
+
+requiere_lxml = pytest.mark.skipif(parsers.etree is None, reason='lxml no está instalado')
+
+FIXTURES = sorted(glob.glob(os.path.join(os.path.dirname(__file__), '..', 'benchmarks', 'fixtures', '*.html')))
+FECHA = '2024-03-14'
+
+
+def leer(ruta):
+    with open(ruta, encoding='utf-8') as f:
+        return f.read()
+
+
+def test_hay_paginas_de_prueba():
+    assert len(FIXTURES) >= 5
+
+
+@requiere_lxml
+@pytest.mark.parametrize('ruta', FIXTURES, ids=os.path.basename)
+def test_lxml_extrae_lo_mismo_que_beautifulsoup(ruta):
+    html = leer(ruta)
+    por_bs4 = BaseScraper(parser=BeautifulSoupParser.nombre).parse_cotizaciones(html, FECHA)
+    por_lxml = BaseScraper(parser=LxmlParser.nombre).parse_cotizaciones(html, FECHA)
+    assert por_lxml == por_bs4
+
+
+@requiere_lxml
+@pytest.mark.parametrize('ruta', FIXTURES, ids=os.path.basename)
+def test_lxml_devuelve_las_mismas_celdas(ruta):
+    # Los espacios alrededor del texto pueden variar entre backends; el scraper los normaliza
+    def normalizar(filas):
+        return None if filas is None else [[' '.join(celda.split()) for celda in fila] for fila in filas]
+
+    html = leer(ruta)
+    bs4, lxml = BeautifulSoupParser(), LxmlParser()
+    assert normalizar(lxml.filas(lxml.parse(html))) == normalizar(bs4.filas(bs4.parse(html)))
+
+
+@pytest.mark.parametrize('nombre', [
+    BeautifulSoupParser.nombre,
+    pytest.param(LxmlParser.nombre, marks=requiere_lxml),
+])
+@pytest.mark.parametrize('fecha', [datetime.date(2023, 6, 15), datetime.date(2023, 6, 17)])
+def test_pagina_del_servidor_simulado(nombre, fecha):
+    resultado = BaseScraper(parser=nombre).parse_cotizaciones(render_pagina(fecha), fecha.isoformat())
+    if fecha.weekday() < 5:
+        assert resultado['unidades']['ui']['valor'] == valor_ui(fecha)
+        assert resultado['unidades']['ur']['valor'] == valor_ur(fecha)
+    else:
+        assert 'ui' not in resultado.get('unidades', {})
+
+
+def test_get_parser():
+    assert isinstance(get_parser('bs4'), BeautifulSoupParser)
+    assert get_parser('auto').nombre == ('lxml' if parsers.etree is not None else 'bs4')
+    with pytest.raises(ValueError):
+        get_parser('selectolax')
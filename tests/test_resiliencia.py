@@ -0,0 +1,190 @@
+import asyncio
+import types
+
+import pytest
+
+from app.scrapers.base_scraper import BaseScraper
+from app.scrapers.fetch_engine import TokenBucket
+from app.scrapers.resiliencia import ABIERTO, CERRADO, SEMIABIERTO, CircuitBreaker, RetryPolicy
+
+
+class TransporteColgado:
+    """Transporte asíncrono cuyas peticiones no terminan hasta que se cancelan"""
+    multiplexa = True
+    max_conexiones = 1
+
+    def __init__(self):
+        self.iniciadas = None
+
+    async def get(self, url, params=None, timeout=None):
+        self.iniciadas.set()
+        await asyncio.sleep(3600)
+
+    async def cerrar(self):
+        pass
+
+
+class TransporteGuionado:
+    """Transporte síncrono que responde, en orden, los estados o excepciones indicados"""
+
+    def __init__(self, *guion):
+        self.guion = list(guion)
+        self.llamadas = 0
+
+    def get(self, url, params=None, timeout=None):
+        self.llamadas += 1
+        paso = self.guion.pop(0)
+        if isinstance(paso, Exception):
+            raise paso
+        estado, cabeceras = paso if isinstance(paso, tuple) else (paso, {})
+        return types.SimpleNamespace(status_code=estado, headers=cabeceras, text='')
+
+
+def scraper_con(transporte, umbral_fallas=5, **politica):
+    scraper = BaseScraper('http://bcu.invalid/cotizaciones', rate_limiter=TokenBucket(rate=0),
+                          retry_policy=RetryPolicy(backoff_base=0.001, **politica),
+                          circuit_breaker=CircuitBreaker(umbral_fallas=umbral_fallas, espera_apertura=60))
+    scraper.transporte = transporte
+    return scraper
+
+
+def abrir(circuito):
+    for _ in range(circuito.umbral_fallas):
+        circuito.registrar_falla()
+
+
+def test_circuito_se_abre_al_llegar_al_umbral():
+    circuito = CircuitBreaker(umbral_fallas=3, espera_apertura=60)
+    circuito.registrar_falla()
+    circuito.registrar_falla()
+    assert circuito.estado == CERRADO and circuito.permitir()
+
+    circuito.registrar_falla()
+    assert circuito.estado == ABIERTO
+    assert circuito.abierto()
+    assert not circuito.permitir()
+    assert circuito.stats()['rechazadas'] == 1
+
+
+def test_un_exito_reinicia_las_fallas_consecutivas():
+    circuito = CircuitBreaker(umbral_fallas=2, espera_apertura=60)
+    circuito.registrar_falla()
+    circuito.registrar_exito()
+    circuito.registrar_falla()
+    assert circuito.estado == CERRADO
+
+
+def test_semiabierto_permite_un_solo_intento_de_prueba():
+    circuito = CircuitBreaker(umbral_fallas=1, espera_apertura=0)
+    abrir(circuito)
+    assert circuito.estado == SEMIABIERTO
+
+    assert circuito.permitir()
+    assert not circuito.permitir()
+    assert circuito.abierto()
+
+    circuito.registrar_exito()
+    assert circuito.estado == CERRADO and circuito.permitir()
+
+
+def test_prueba_fallida_vuelve_a_abrir_el_circuito():
+    circuito = CircuitBreaker(umbral_fallas=5, espera_apertura=60)
+    abrir(circuito)
+    circuito.espera_apertura = 0
+    assert circuito.permitir()
+
+    circuito.espera_apertura = 60
+    circuito.registrar_falla()
+    assert circuito.estado == ABIERTO
+    assert circuito.stats()['aperturas'] == 2
+
+
+def test_liberar_devuelve_el_intento_de_prueba():
+    circuito = CircuitBreaker(umbral_fallas=1, espera_apertura=0)
+    abrir(circuito)
+    assert circuito.permitir()
+
+    circuito.liberar()
+    assert not circuito.abierto()
+    assert circuito.permitir()
+
+
+def test_prueba_cancelada_no_deja_el_circuito_abierto(crear_scraper, bucle):
+    transporte = TransporteColgado()
+    scraper = crear_scraper(transporte)
+    scraper.circuit_breaker = CircuitBreaker(umbral_fallas=1, espera_apertura=0)
+    abrir(scraper.circuit_breaker)
+
+    async def cancelar_prueba():
+        transporte.iniciadas = asyncio.Event()
+        tarea = asyncio.ensure_future(scraper.get_async(scraper.base_url))
+        await transporte.iniciadas.wait()
+        assert scraper.circuit_breaker.abierto()
+        tarea.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await tarea
+
+    bucle.run(cancelar_prueba(), timeout=10)
+
+    assert scraper.circuit_breaker.estado == SEMIABIERTO
+    assert not scraper.circuit_breaker.abierto()
+    assert scraper.circuit_breaker.permitir()
+
+
+@pytest.mark.parametrize('retry_after, esperado', [
+    ('2', 2.0),
+    ('120', 30.0),
+    ('Thu, 01 Jan 1970 00:00:00 GMT', 0.0),
+])
+def test_retry_after_se_respeta_con_tope(retry_after, esperado):
+    assert RetryPolicy(retry_after_max=30).espera(0, retry_after) == esperado
+
+
+def test_backoff_con_jitter_acotado():
+    politica = RetryPolicy(backoff_base=0.5, backoff_max=4)
+    for intento in range(8):
+        assert 0 <= politica.espera(intento) <= min(4, 0.5 * 2 ** intento)
+
+
+def test_solo_se_reintentan_estados_transitorios():
+    politica = RetryPolicy()
+    assert politica.reintentable(503) and politica.reintentable(429)
+    assert not politica.reintentable(404) and not politica.reintentable(200)
+
+
+def test_get_reintenta_los_errores_transitorios():
+    transporte = TransporteGuionado(503, ConnectionError('sin conexión'), 200)
+    scraper = scraper_con(transporte)
+
+    assert scraper.get(scraper.base_url).status_code == 200
+    assert transporte.llamadas == 3
+    assert scraper.circuit_breaker.stats()['fallas_consecutivas'] == 0
+
+
+def test_get_no_reintenta_los_rechazos():
+    transporte = TransporteGuionado(404)
+    scraper = scraper_con(transporte, umbral_fallas=1)
+
+    assert scraper.get(scraper.base_url) is None
+    assert transporte.llamadas == 1
+    assert scraper.circuit_breaker.estado == CERRADO
+
+
+def test_get_no_espera_mas_que_el_tiempo_maximo():
+    transporte = TransporteGuionado((503, {'Retry-After': '10'}), 200)
+    scraper = scraper_con(transporte, tiempo_max=1)
+
+    assert scraper.get(scraper.base_url) is None
+    assert transporte.llamadas == 1
+
+
+def test_fallas_repetidas_abren_el_circuito():
+    transporte = TransporteGuionado(*[ConnectionError('sin conexión')] * 3)
+    scraper = scraper_con(transporte, umbral_fallas=3)
+
+    assert scraper.get(scraper.base_url) is None
+    assert scraper.circuit_breaker.estado == ABIERTO
+
+    registro = scraper.get_cotizaciones_fecha('2023-06-15')
+    assert registro['codigo'] == 'BCU_UNAVAILABLE'
+    assert transporte.llamadas == 3
@@ -0,0 +1,119 @@
+import datetime
+import types
+
+import pytest
+
+from benchmarks.stub_bcu import valor_ui
+from app.services import scheduler as modulo
+from app.services.cache_service import TTL_RECIENTE
+from app.services.scheduler import CacheScheduler
+
+
+@pytest.fixture
+def planificador(controlador):
+    planificador = CacheScheduler(controlador, backfill_rate=1000, lote=4)
+    yield planificador
+    planificador.stop()
+
+
+def fijar_hoy(monkeypatch, hoy):
+    """Hace que el planificador vea hoy como la fecha indicada"""
+    class Fecha(datetime.date):
+        @classmethod
+        def today(cls):
+            return hoy
+
+    monkeypatch.setattr(modulo, 'datetime', types.SimpleNamespace(
+        date=Fecha, datetime=datetime.datetime, timedelta=datetime.timedelta, time=datetime.time
+    ))
+
+
+def ventana(dias):
+    ayer = datetime.date.today() - datetime.timedelta(days=1)
+    return [(ayer - datetime.timedelta(days=i)).isoformat() for i in range(dias - 1, -1, -1)]
+
+
+def test_precalentar_un_dia_habil(planificador, controlador, stub, monkeypatch):
+    fijar_hoy(monkeypatch, datetime.date(2023, 6, 15))
+    consultas = len(stub.fechas)
+
+    assert planificador.precalentar_hoy()
+
+    assert stub.fechas[consultas:] == ['2023-06-15']
+    assert planificador.estado['precalentado'] == '2023-06-15'
+    en_cache = controlador.cache_service.get_many(['ui_2023-06-15', 'ur_2023-06-15'])
+    assert en_cache['ui_2023-06-15']['valor'] == valor_ui(datetime.date(2023, 6, 15))
+    assert 'ur_2023-06-15' in en_cache
+
+
+def test_no_precalienta_sin_publicacion(planificador, stub, monkeypatch):
+    fijar_hoy(monkeypatch, datetime.date(2023, 7, 18))  # Feriado
+    consultas = len(stub.fechas)
+
+    assert not planificador.precalentar_hoy()
+    assert stub.fechas[consultas:] == []
+    assert planificador.estado['precalentado'] is None
+
+
+def test_backfill_descarga_solo_lo_que_falta(planificador, controlador, stub):
+    dias = ventana(14)
+    habiles = [f for f in dias if controlador.calendario.es_habil(f)]
+    # Un día de la ventana ya estaba en el almacén
+    controlador.get_cotizacion('ui', habiles[0])
+    consultas = len(stub.fechas)
+    avances = []
+
+    resumen = planificador.backfill(14, progreso=avances.append)
+
+    assert sorted(stub.fechas[consultas:]) == habiles[1:]
+    pendientes = len(habiles) - 1
+    assert resumen['pendientes'] == resumen['procesados'] == pendientes
+    assert resumen['errores'] == 0
+    assert [a['procesados'] for a in avances] == list(range(4, pendientes, 4)) + [pendientes]
+    en_cache = controlador.cache_service.get_many([f'ur_{f}' for f in dias] + [f'ui_{f}' for f in habiles])
+    assert len(en_cache) == len(dias) + len(habiles)
+
+    consultas = len(stub.fechas)
+    assert planificador.backfill(14)['pendientes'] == 0
+    assert stub.fechas[consultas:] == []
+
+
+def test_gc_elimina_las_entradas_vencidas(planificador, controlador):
+    ttls = controlador.cache_service.ttls
+    ttl = ttls[TTL_RECIENTE]
+    # Vencida hace más de lo que se puede servir como obsoleta
+    ttls[TTL_RECIENTE] = -controlador.cache_service.max_staleness - 60
+    try:
+        controlador.cache_service.set('ui_2023-06-15', {'valor': 5.7}, TTL_RECIENTE)
+    finally:
+        ttls[TTL_RECIENTE] = ttl
+
+    assert planificador.gc() == 1
+    assert planificador.estado['gc']['eliminadas'] == 1
+
+
+def test_run_pending_respeta_la_hora_de_publicacion(controlador, stub, monkeypatch):
+    fijar_hoy(monkeypatch, datetime.date(2023, 6, 15))
+    planificador = CacheScheduler(controlador, backfill_dias=0)
+    planificador.hora_publicacion = datetime.time.max
+    consultas = len(stub.fechas)
+
+    planificador.run_pending()
+
+    assert stub.fechas[consultas:] == []
+    assert planificador.estado['gc'] is not None
+    planificador.stop()
+
+
+@pytest.mark.skipif(modulo.fcntl is None, reason='sin locks de archivo en esta plataforma')
+def test_un_solo_planificador_por_lock(controlador, tmp_path):
+    lock = str(tmp_path / 'scheduler.lock')
+    primero = CacheScheduler(controlador, backfill_dias=0, intervalo=3600)
+    segundo = CacheScheduler(controlador, backfill_dias=0, intervalo=3600)
+    try:
+        assert primero.start(lock_path=lock)
+        assert not segundo.start(lock_path=lock)
+    finally:
+        primero.stop()
+        segundo.stop()
+    assert not primero.estado['activo']
@@ -0,0 +1,83 @@
+import threading
+import time
+
+import pytest
+
+from app.services import single_flight as modulo
+from app.services.single_flight import SingleFlight
+
+requiere_fcntl = pytest.mark.skipif(modulo.fcntl is None, reason='sin locks de archivo en esta plataforma')
+
+
+def en_hilos(funciones):
+    resultados = [None] * len(funciones)
+
+    def correr(i, funcion):
+        resultados[i] = funcion()
+
+    hilos = [threading.Thread(target=correr, args=(i, f)) for i, f in enumerate(funciones)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join(10)
+    return resultados
+
+
+def test_llamadas_concurrentes_comparten_una_ejecucion():
+    grupo = SingleFlight()
+    llamadas = []
+
+    def descargar():
+        llamadas.append(1)
+        time.sleep(0.1)
+        return {'valor': 5.7}
+
+    resultados = en_hilos([lambda: grupo.do('bcu_2023-06-15', descargar)] * 8)
+
+    assert len(llamadas) == 1
+    assert resultados == [{'valor': 5.7}] * 8
+
+
+def test_el_error_llega_a_todos_los_que_esperan():
+    grupo = SingleFlight()
+    errores = []
+
+    def fallar():
+        time.sleep(0.1)
+        raise ValueError('sin conexión')
+
+    def llamar():
+        try:
+            grupo.do('bcu_2023-06-15', fallar)
+        except ValueError as e:
+            errores.append(str(e))
+
+    en_hilos([llamar] * 4)
+    assert errores == ['sin conexión'] * 4
+
+
+@requiere_fcntl
+def test_recheck_evita_repetir_el_trabajo(tmp_path):
+    grupo = SingleFlight(str(tmp_path))
+    assert grupo.do('bcu_2023-06-15', lambda: 'descargado', recheck=lambda: 'en caché') == 'en caché'
+    assert grupo.do('bcu_2023-06-15', lambda: 'descargado', recheck=lambda: None) == 'descargado'
+
+
+@requiere_fcntl
+def test_claves_distintas_no_se_esperan(tmp_path):
+    # Ambas claves caían en el mismo archivo cuando los locks se repartían en 64 franjas
+    grupo = SingleFlight(str(tmp_path))
+    otra_empezo = threading.Event()
+
+    def primera():
+        return otra_empezo.wait(5)
+
+    def segunda():
+        otra_empezo.set()
+        return True
+
+    resultados = en_hilos([
+        lambda: grupo.do('bcu_2023-01-23', primera),
+        lambda: (time.sleep(0.05), grupo.do('bcu_2023-02-01', segunda))[1],
+    ])
+    assert resultados == [True, True]
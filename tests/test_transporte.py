@@ -0,0 +1,133 @@
+import asyncio
+import datetime
+
+import pytest
+
+from benchmarks.stub_bcu import valor_ui, valor_ur
+from app.scrapers import transporte
+from app.scrapers.transporte import HttpxTransport, ThreadedAsyncTransport, get_transporte_async
+
+requiere_httpx = pytest.mark.skipif(transporte.httpx is None, reason='httpx no está instalado')
+
+# Dos semanas hábiles de 2023, sin feriados
+FECHAS = [
+    (datetime.date(2023, 6, 5) + datetime.timedelta(days=i)).strftime('%Y-%m-%d')
+    for i in range(14) if (datetime.date(2023, 6, 5) + datetime.timedelta(days=i)).weekday() < 5
+]
+
+
+class ContadorTransporte:
+    """Envuelve un transporte asíncrono y registra cuántas peticiones hay pendientes a la vez"""
+
+    def __init__(self, transporte_async):
+        self.transporte = transporte_async
+        self.multiplexa = transporte_async.multiplexa
+        self.max_conexiones = transporte_async.max_conexiones
+        self.pendientes = 0
+        self.max_pendientes = 0
+
+    async def get(self, url, params=None, timeout=None):
+        self.pendientes += 1
+        self.max_pendientes = max(self.max_pendientes, self.pendientes)
+        try:
+            return await self.transporte.get(url, params=params, timeout=timeout)
+        finally:
+            self.pendientes -= 1
+
+    async def cerrar(self):
+        await self.transporte.cerrar()
+
+
+def test_event_loop_thread_ejecuta_corrutinas(bucle):
+    async def sumar(a, b):
+        await asyncio.sleep(0)
+        return a + b
+
+    assert bucle.run(sumar(1, 2), timeout=5) == 3
+    futuros = [bucle.enviar(sumar(i, i)) for i in range(10)]
+    assert [f.result(5) for f in futuros] == [2 * i for i in range(10)]
+
+
+def test_event_loop_thread_rechaza_esperar_desde_el_bucle(bucle):
+    async def anidada():
+        bucle.enviar(asyncio.sleep(0))
+
+    with pytest.raises(RuntimeError):
+        bucle.run(anidada(), timeout=5)
+
+
+def test_event_loop_thread_se_puede_reiniciar(bucle):
+    assert bucle.run(asyncio.sleep(0, result='a'), timeout=5) == 'a'
+    bucle.stop()
+    assert bucle.run(asyncio.sleep(0, result='b'), timeout=5) == 'b'
+
+
+def test_get_transporte_async_desconocido():
+    with pytest.raises(ValueError):
+        get_transporte_async('curl')
+
+
+@requiere_httpx
+def test_httpx_transport_descarga_la_pagina(stub, bucle):
+    cliente = HttpxTransport(max_conexiones=4)
+
+    async def descargar():
+        try:
+            return await cliente.get(stub.url, params={'fecha': '15/06/2023'}, timeout=(5, 5))
+        finally:
+            await cliente.cerrar()
+
+    response = bucle.run(descargar(), timeout=10)
+    assert response.status_code == 200
+    assert 'UNIDAD INDEXADA' in response.text
+
+
+@requiere_httpx
+def test_httpx_transport_reutiliza_conexiones(stub, crear_scraper):
+    scraper = crear_scraper(HttpxTransport(max_conexiones=2))
+    conexiones = stub.conexiones
+    registros = scraper.get_cotizaciones_fechas(FECHAS)
+    assert all('error' not in r for r in registros)
+    assert stub.conexiones - conexiones <= 2
+
+
+@pytest.mark.parametrize('nombre', [
+    pytest.param('httpx', marks=requiere_httpx),
+    'hilos',
+])
+def test_fachada_sincrona_devuelve_los_registros_en_orden(crear_scraper, nombre):
+    scraper = crear_scraper(nombre)
+    registros = scraper.get_cotizaciones_fechas(FECHAS)
+
+    assert [r['fecha'] for r in registros] == FECHAS
+    for registro in registros:
+        fecha = datetime.date.fromisoformat(registro['fecha'])
+        assert registro['unidades']['ui']['valor'] == valor_ui(fecha)
+        assert registro['unidades']['ur']['valor'] == valor_ur(fecha)
+
+
+@requiere_httpx
+def test_transportes_devuelven_lo_mismo(crear_scraper):
+    por_hilos = crear_scraper('hilos').get_ui_historico('2023-06-01', '2023-06-30')
+    por_httpx = crear_scraper('httpx').get_ui_historico('2023-06-01', '2023-06-30')
+    assert 'error' not in por_httpx
+    assert por_httpx['cotizaciones'] == por_hilos['cotizaciones']
+
+
+@requiere_httpx
+def test_historico_async_acota_las_descargas_en_curso(crear_scraper, bucle):
+    contador = ContadorTransporte(HttpxTransport(max_conexiones=2))
+    scraper = crear_scraper(contador)
+
+    resultado = bucle.run(scraper.get_ui_historico_async('2023-01-01', '2023-03-31'), timeout=60)
+
+    assert 'error' not in resultado
+    assert len(resultado['cotizaciones']) > scraper.ventana_async
+    assert contador.max_pendientes <= scraper.ventana_async
+
+
+def test_hilos_usa_la_sesion_de_requests(crear_scraper):
+    scraper = crear_scraper('hilos')
+    assert isinstance(scraper.transporte_async, ThreadedAsyncTransport)
+    assert scraper.transporte_async.transporte is scraper.transporte
+    assert scraper.get_cotizaciones_fechas(FECHAS[:2])[1]['fecha'] == FECHAS[1]
@@ -0,0 +1,137 @@
+import datetime
+import math
+
+import pytest
+
+from app.services import ui_interpolacion as modulo
+from app.services.observation_store import ObservationStore
+from app.services.ui_interpolacion import InterpoladorUI
+
+# Tasa diaria distinta en cada período, como cuando cambia el IPC
+TASAS = {6: 0.0003, 7: 0.0001}
+ANCLA = datetime.date(2023, 6, 6)
+
+
+def camino(fecha, redondear=True):
+    """UI simulada: geométrica desde el 6 de junio y con otra tasa desde el 6 de julio"""
+    dias = (fecha - ANCLA).days
+    if fecha.month == 7 and fecha.day >= 6:
+        base = 5.6 * math.exp(TASAS[6] * 30)
+        valor = base * math.exp(TASAS[7] * (fecha - datetime.date(2023, 7, 6)).days)
+    else:
+        valor = 5.6 * math.exp(TASAS[6] * dias)
+    return round(valor, 4) if redondear else valor
+
+
+def fecha(dia, mes=6):
+    return datetime.date(2023, mes, dia)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ObservationStore(str(tmp_path / 'observaciones.db'))
+
+
+def observar(store, fechas, valor=camino):
+    store.guardar('ui', [
+        {'tipo': 'UI', 'moneda': 'UNIDAD INDEXADA', 'fecha': f.isoformat(), 'valor': valor(f)}
+        for f in fechas
+    ])
+
+
+@pytest.fixture(params=['python', 'numpy'])
+def rama(request, monkeypatch):
+    """Corre cada prueba con el ajuste en Python puro y, si está instalado, con numpy"""
+    if request.param == 'python':
+        monkeypatch.setattr(modulo, 'np', None)
+    else:
+        monkeypatch.setattr(modulo, 'np', pytest.importorskip('numpy'))
+    return request.param
+
+
+@pytest.mark.parametrize('dia, mes, periodo', [
+    (6, 6, (fecha(6), fecha(5, 7))),
+    (5, 7, (fecha(6), fecha(5, 7))),
+    (5, 1, (datetime.date(2022, 12, 6), datetime.date(2023, 1, 5))),
+    (31, 12, (datetime.date(2023, 12, 6), datetime.date(2024, 1, 5))),
+])
+def test_periodo(dia, mes, periodo):
+    assert InterpoladorUI(None).periodo(fecha(dia, mes)) == periodo
+
+
+def test_ajuste_recupera_la_tasa(rama):
+    ordinales = [fecha(d).toordinal() for d in (6, 9, 20, 28)]
+    valores = [camino(datetime.date.fromordinal(t), redondear=False) for t in ordinales]
+
+    t0, base, tasa = InterpoladorUI(None)._ajustar(ordinales, valores)
+
+    assert t0 == ordinales[0]
+    assert base == pytest.approx(math.log(5.6), abs=1e-12)
+    assert tasa == pytest.approx(TASAS[6], abs=1e-12)
+
+
+def test_ramas_numpy_y_python_coinciden(monkeypatch):
+    np = pytest.importorskip('numpy')
+    ordinales = [fecha(d).toordinal() for d in (6, 12, 18, 30)]
+    valores = [camino(datetime.date.fromordinal(t)) for t in ordinales]
+    interpolador = InterpoladorUI(None)
+
+    monkeypatch.setattr(modulo, 'np', None)
+    puro = interpolador._ajustar(ordinales, valores)
+    monkeypatch.setattr(modulo, 'np', np)
+    vectorizado = interpolador._ajustar(ordinales, valores)
+
+    assert vectorizado == pytest.approx(puro, rel=1e-12)
+    assert interpolador._calcular(vectorizado, ordinales) == interpolador._calcular(puro, ordinales)
+
+
+def test_deriva_los_dias_intermedios(store, rama):
+    observar(store, [fecha(d) for d in (6, 13, 21, 28)])
+    pedidas = [fecha(d) for d in range(6, 29)]
+
+    derivados = InterpoladorUI(store).derivar([f.isoformat() for f in pedidas])
+
+    assert set(derivados) == {f.isoformat() for f in pedidas}
+    for f in pedidas:
+        assert derivados[f.isoformat()] == pytest.approx(camino(f), abs=1.5e-4)
+
+
+def test_extrapola_solo_hasta_el_margen(store, rama):
+    # Observaciones del 10 al 18: se extrapola hasta 8 días antes y después
+    observar(store, [fecha(d) for d in (10, 14, 18)])
+    pedidas = [fecha(d) for d in (6, 26, 27)] + [fecha(1, 7)]
+
+    derivados = InterpoladorUI(store).derivar([f.isoformat() for f in pedidas])
+
+    assert set(derivados) == {'2023-06-06', '2023-06-26'}
+    assert derivados['2023-06-26'] == pytest.approx(camino(fecha(26)), abs=1.5e-4)
+
+
+def test_no_cruza_al_periodo_siguiente(store, rama):
+    observar(store, [fecha(d) for d in (6, 15, 25, 30)] + [fecha(5, 7)])
+
+    derivados = InterpoladorUI(store).derivar(['2023-07-04', '2023-07-06', '2023-07-07'])
+
+    assert set(derivados) == {'2023-07-04'}
+
+
+def test_periodo_que_no_sigue_el_camino_no_se_deriva(store, rama):
+    observar(store, [fecha(d) for d in (6, 13, 21)])
+    observar(store, [fecha(28)], valor=lambda f: camino(f) + 0.001)
+
+    assert InterpoladorUI(store).derivar(['2023-06-10', '2023-06-25']) == {}
+
+
+def test_dos_observaciones_no_alcanzan(store, rama):
+    observar(store, [fecha(6), fecha(20)])
+    assert InterpoladorUI(store).derivar(['2023-06-10']) == {}
+
+
+def test_muestras_por_periodo():
+    fechas = [(fecha(6) + datetime.timedelta(days=i)).isoformat() for i in range(40)]
+
+    elegidas = InterpoladorUI(None).muestras(fechas)
+
+    # Extremos y dos intermedios del período de junio; los 10 días de julio son más de 4
+    assert elegidas == ['2023-06-06', '2023-06-15', '2023-06-25', '2023-07-05',
+                        '2023-07-06', '2023-07-09', '2023-07-12', '2023-07-15']